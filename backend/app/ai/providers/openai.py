@@ -18,6 +18,7 @@ from app.ai.base import (
     SectionGeneratorError,
 )
 from app.ai.debug import InteractionDebugger, to_serialisable
+from app.ai.usage import record_model_usage
 
 # DEFAULT_OPENAI_MODEL = "gpt-4.1-nano"  # occassionally makes mistakes
 DEFAULT_OPENAI_MODEL = "gpt-4o-mini"
@@ -274,6 +275,8 @@ class OpenAIPaletteGenerator(PaletteGenerator):
             logger.error("OpenAI palette generation failed: {exc}", exc=str(exc))
             raise PaletteGeneratorError("OpenAI request failed") from exc
 
+        record_model_usage(self._model, getattr(response, "usage", None))
+
         try:
             if self._debugger.enabled:
                 payload = to_serialisable(response)
@@ -403,6 +406,8 @@ class OpenAISectionGenerator(SectionGenerator):
             logger.error("OpenAI section generation failed: {exc}", exc=str(exc))
             raise SectionGeneratorError("OpenAI request failed") from exc
 
+        record_model_usage(self._model, getattr(response, "usage", None))
+
         try:
             if self._debugger.enabled:
                 payload = to_serialisable(response)
@@ -0,0 +1,548 @@
+"""Token usage and cost accounting for AI provider calls."""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Literal
+
+from loguru import logger
+
+from app.errors import TooManyRequestsError
+
+UsageFeature = Literal["palette", "section"]
+
+DEFAULT_USAGE_DB_PATH = "/tmp/prempage_ai_usage.sqlite3"
+DEFAULT_FLUSH_INTERVAL_SECONDS = 30.0
+DEFAULT_BUDGET_WINDOW = timedelta(days=1)
+UNKNOWN_MODEL = "unknown"
+
+
+@dataclass(frozen=True, slots=True)
+class ModelPricing:
+    """USD pricing per million tokens for a model."""
+
+    input_per_million: float
+    output_per_million: float
+
+
+MODEL_PRICING: dict[str, ModelPricing] = {
+    "gpt-4o-mini": ModelPricing(input_per_million=0.15, output_per_million=0.60),
+    "gpt-4o": ModelPricing(input_per_million=2.50, output_per_million=10.00),
+    "gpt-4.1-nano": ModelPricing(input_per_million=0.10, output_per_million=0.40),
+    "gpt-4.1-mini": ModelPricing(input_per_million=0.40, output_per_million=1.60),
+    "gpt-5-mini": ModelPricing(input_per_million=0.25, output_per_million=2.00),
+}
+
+
+def estimate_cost_usd(model: str, input_tokens: int, output_tokens: int) -> float:
+    """Return the estimated USD cost of a call, or 0 for unpriced models."""
+
+    pricing = MODEL_PRICING.get(model)
+    if pricing is None:
+        return 0.0
+    return (
+        input_tokens * pricing.input_per_million
+        + output_tokens * pricing.output_per_million
+    ) / 1_000_000
+
+
+class AIUsageQuotaExceededError(TooManyRequestsError):
+    """Raised when a project has exhausted its AI usage budget."""
+
+    def __init__(
+        self,
+        detail: str,
+        *,
+        error_code: str = "ai_usage_quota_exceeded",
+        context: Mapping[str, Any] | None = None,
+    ) -> None:
+        super().__init__(detail, error_code=error_code, context=context)
+
+
+@dataclass(slots=True)
+class UsageBudget:
+    """Token and cost limits enforced over a rolling window."""
+
+    max_tokens: int | None = None
+    max_cost_usd: float | None = None
+    window: timedelta = DEFAULT_BUDGET_WINDOW
+
+    @classmethod
+    def from_mapping(cls, data: Mapping[str, Any]) -> "UsageBudget":
+        window_hours = data.get("window_hours")
+        return cls(
+            max_tokens=_optional_int(data.get("max_tokens")),
+            max_cost_usd=_optional_float(data.get("max_cost_usd")),
+            window=(
+                timedelta(hours=float(window_hours))
+                if window_hours is not None
+                else DEFAULT_BUDGET_WINDOW
+            ),
+        )
+
+    @property
+    def is_limited(self) -> bool:
+        return self.max_tokens is not None or self.max_cost_usd is not None
+
+
+@dataclass(slots=True)
+class UsageTotals:
+    """Aggregated counters for a group of AI calls."""
+
+    calls: int = 0
+    failures: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+    latency_ms: float = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    def add(self, other: "UsageTotals") -> None:
+        self.calls += other.calls
+        self.failures += other.failures
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.cost_usd += other.cost_usd
+        self.latency_ms += other.latency_ms
+
+
+@dataclass(frozen=True, slots=True)
+class UsageKey:
+    """Aggregation key: hourly bucket plus attribution."""
+
+    bucket_start: str
+    project_slug: str
+    feature: str
+    model: str
+
+
+@dataclass(slots=True)
+class _ActiveCall:
+    model: str | None = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+_active_call: ContextVar[_ActiveCall | None] = ContextVar(
+    "prempage_ai_active_call", default=None
+)
+
+
+def record_model_usage(model: str, usage: Any) -> None:
+    """Attach provider-reported token usage to the call being tracked.
+
+    Providers call this with the ``usage`` object from the raw response. It is a
+    no-op when no :meth:`UsageTracker.track` block is active.
+    """
+
+    call = _active_call.get()
+    if call is None:
+        return
+
+    call.model = model
+    call.input_tokens += _usage_value(usage, "input_tokens", "prompt_tokens")
+    call.output_tokens += _usage_value(usage, "output_tokens", "completion_tokens")
+
+
+def _usage_value(usage: Any, *names: str) -> int:
+    if usage is None:
+        return 0
+    for name in names:
+        value = usage.get(name) if isinstance(usage, Mapping) else getattr(usage, name, None)
+        if isinstance(value, int):
+            return value
+    return 0
+
+
+def _bucket_start(moment: datetime) -> str:
+    # Buckets are stored as UTC ISO strings and compared as text, so every moment is converted to UTC
+    # first; naive values are taken to be UTC already.
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0).isoformat()
+
+
+class UsageStore:
+    """SQLite persistence for hourly usage aggregates."""
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._initialised = False
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialised:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self._path, timeout=5.0)
+        if not self._initialised:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ai_usage (
+                    bucket_start TEXT NOT NULL,
+                    project_slug TEXT NOT NULL,
+                    feature TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    calls INTEGER NOT NULL DEFAULT 0,
+                    failures INTEGER NOT NULL DEFAULT 0,
+                    input_tokens INTEGER NOT NULL DEFAULT 0,
+                    output_tokens INTEGER NOT NULL DEFAULT 0,
+                    cost_usd REAL NOT NULL DEFAULT 0,
+                    latency_ms REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (bucket_start, project_slug, feature, model)
+                )
+                """
+            )
+            self._initialised = True
+        return connection
+
+    def upsert(self, rows: Mapping[UsageKey, UsageTotals]) -> None:
+        if not rows:
+            return
+
+        with self._connect() as connection:
+            connection.executemany(
+                """
+                INSERT INTO ai_usage (
+                    bucket_start, project_slug, feature, model,
+                    calls, failures, input_tokens, output_tokens, cost_usd, latency_ms
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (bucket_start, project_slug, feature, model) DO UPDATE SET
+                    calls = calls + excluded.calls,
+                    failures = failures + excluded.failures,
+                    input_tokens = input_tokens + excluded.input_tokens,
+                    output_tokens = output_tokens + excluded.output_tokens,
+                    cost_usd = cost_usd + excluded.cost_usd,
+                    latency_ms = latency_ms + excluded.latency_ms
+                """,
+                [
+                    (
+                        key.bucket_start,
+                        key.project_slug,
+                        key.feature,
+                        key.model,
+                        totals.calls,
+                        totals.failures,
+                        totals.input_tokens,
+                        totals.output_tokens,
+                        totals.cost_usd,
+                        totals.latency_ms,
+                    )
+                    for key, totals in rows.items()
+                ],
+            )
+        connection.close()
+
+    def load(
+        self,
+        *,
+        project_slug: str | None = None,
+        since: str | None = None,
+    ) -> dict[tuple[str, str, str], UsageTotals]:
+        if not self._path.exists():
+            return {}
+
+        clauses: list[str] = []
+        params: list[str] = []
+        if project_slug is not None:
+            clauses.append("project_slug = ?")
+            params.append(project_slug)
+        if since is not None:
+            clauses.append("bucket_start >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        connection = self._connect()
+        try:
+            cursor = connection.execute(
+                f"""
+                SELECT project_slug, feature, model,
+                       SUM(calls), SUM(failures), SUM(input_tokens),
+                       SUM(output_tokens), SUM(cost_usd), SUM(latency_ms)
+                FROM ai_usage {where}
+                GROUP BY project_slug, feature, model
+                """,
+                params,
+            )
+            return {
+                (row[0], row[1], row[2]): UsageTotals(
+                    calls=row[3],
+                    failures=row[4],
+                    input_tokens=row[5],
+                    output_tokens=row[6],
+                    cost_usd=row[7],
+                    latency_ms=row[8],
+                )
+                for row in cursor.fetchall()
+            }
+        finally:
+            connection.close()
+
+
+@dataclass(slots=True)
+class UsageTracker:
+    """Aggregates AI call usage in memory and flushes it to a :class:`UsageStore`."""
+
+    store: UsageStore
+    default_budget: UsageBudget = field(default_factory=UsageBudget)
+    budgets: dict[str, UsageBudget] = field(default_factory=dict)
+    flush_interval_seconds: float = DEFAULT_FLUSH_INTERVAL_SECONDS
+    _pending: dict[UsageKey, UsageTotals] = field(default_factory=dict, init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+    _flush_lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+
+    @classmethod
+    def from_env(cls) -> "UsageTracker":
+        store = UsageStore(
+            Path(os.getenv("PREMPAGE_AI_USAGE_DB", DEFAULT_USAGE_DB_PATH)).expanduser()
+        )
+        default_budget = UsageBudget(
+            max_tokens=_optional_int(os.getenv("PREMPAGE_AI_DAILY_TOKEN_BUDGET")),
+            max_cost_usd=_optional_float(os.getenv("PREMPAGE_AI_DAILY_COST_BUDGET_USD")),
+        )
+
+        budgets: dict[str, UsageBudget] = {}
+        raw_budgets = os.getenv("PREMPAGE_AI_BUDGETS")
+        if raw_budgets:
+            try:
+                parsed = json.loads(raw_budgets)
+                budgets = {
+                    str(slug): UsageBudget.from_mapping(entry)
+                    for slug, entry in parsed.items()
+                    if isinstance(entry, Mapping)
+                }
+            except (AttributeError, TypeError, ValueError) as exc:
+                logger.warning(
+                    "Ignoring invalid PREMPAGE_AI_BUDGETS value: {error}",
+                    error=str(exc),
+                )
+
+        flush_interval = _optional_float(os.getenv("PREMPAGE_AI_USAGE_FLUSH_SECONDS"))
+        return cls(
+            store=store,
+            default_budget=default_budget,
+            budgets=budgets,
+            flush_interval_seconds=flush_interval or DEFAULT_FLUSH_INTERVAL_SECONDS,
+        )
+
+    def budget_for(self, project_slug: str) -> UsageBudget:
+        return self.budgets.get(project_slug, self.default_budget)
+
+    def set_budget(self, project_slug: str, budget: UsageBudget) -> None:
+        self.budgets[project_slug] = budget
+
+    @contextmanager
+    def track(self, *, project_slug: str, feature: UsageFeature) -> Iterator[None]:
+        """Check the project's budget, then record usage for the wrapped model call."""
+
+        self.check_budget(project_slug)
+
+        call = _ActiveCall()
+        token = _active_call.set(call)
+        started = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            _active_call.reset(token)
+            self.record(
+                project_slug=project_slug,
+                feature=feature,
+                model=call.model or UNKNOWN_MODEL,
+                input_tokens=call.input_tokens,
+                output_tokens=call.output_tokens,
+                latency_ms=(time.perf_counter() - started) * 1000,
+                failed=failed,
+            )
+
+    def record(
+        self,
+        *,
+        project_slug: str,
+        feature: str,
+        model: str,
+        input_tokens: int,
+        output_tokens: int,
+        latency_ms: float,
+        failed: bool = False,
+        at: datetime | None = None,
+    ) -> None:
+        moment = at or datetime.now(timezone.utc)
+        key = UsageKey(
+            bucket_start=_bucket_start(moment),
+            project_slug=project_slug,
+            feature=feature,
+            model=model,
+        )
+        delta = UsageTotals(
+            calls=1,
+            failures=1 if failed else 0,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cost_usd=estimate_cost_usd(model, input_tokens, output_tokens),
+            latency_ms=latency_ms,
+        )
+        with self._lock:
+            self._pending.setdefault(key, UsageTotals()).add(delta)
+
+    def check_budget(self, project_slug: str) -> None:
+        budget = self.budget_for(project_slug)
+        if not budget.is_limited:
+            return
+
+        since = _bucket_start(datetime.now(timezone.utc) - budget.window)
+        spent = UsageTotals()
+        for totals in self._collect(project_slug=project_slug, since=since).values():
+            spent.add(totals)
+
+        if budget.max_tokens is not None and spent.total_tokens >= budget.max_tokens:
+            raise AIUsageQuotaExceededError(
+                f"AI token budget exhausted for project '{project_slug}'",
+                context={
+                    "project_slug": project_slug,
+                    "used_tokens": spent.total_tokens,
+                    "max_tokens": budget.max_tokens,
+                },
+            )
+        if budget.max_cost_usd is not None and spent.cost_usd >= budget.max_cost_usd:
+            raise AIUsageQuotaExceededError(
+                f"AI cost budget exhausted for project '{project_slug}'",
+                context={
+                    "project_slug": project_slug,
+                    "used_cost_usd": round(spent.cost_usd, 6),
+                    "max_cost_usd": budget.max_cost_usd,
+                },
+            )
+
+    def flush(self) -> int:
+        """Persist pending aggregates and return the number of rows written."""
+
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            try:
+                self.store.upsert(pending)
+            except sqlite3.Error as exc:
+                logger.warning("Failed to flush AI usage: {error}", error=str(exc))
+                with self._lock:
+                    for key, totals in pending.items():
+                        self._pending.setdefault(key, UsageTotals()).add(totals)
+                return 0
+            return len(pending)
+
+    def report(
+        self,
+        *,
+        project_slug: str | None = None,
+        since: datetime | None = None,
+    ) -> dict[tuple[str, str, str], UsageTotals]:
+        """Return totals grouped by (project_slug, feature, model)."""
+
+        return self._collect(
+            project_slug=project_slug,
+            since=_bucket_start(since) if since is not None else None,
+        )
+
+    async def run_periodic_flush(self) -> None:
+        """Flush pending usage every ``flush_interval_seconds`` until cancelled."""
+
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            await asyncio.to_thread(self.flush)
+
+    def _collect(
+        self,
+        *,
+        project_slug: str | None,
+        since: str | None,
+    ) -> dict[tuple[str, str, str], UsageTotals]:
+        try:
+            combined = self.store.load(project_slug=project_slug, since=since)
+        except sqlite3.Error as exc:
+            logger.warning("Failed to read AI usage store: {error}", error=str(exc))
+            combined = {}
+
+        with self._lock:
+            pending = list(self._pending.items())
+
+        for key, totals in pending:
+            if project_slug is not None and key.project_slug != project_slug:
+                continue
+            if since is not None and key.bucket_start < since:
+                continue
+            group = (key.project_slug, key.feature, key.model)
+            combined.setdefault(group, UsageTotals()).add(totals)
+        return combined
+
+
+def _optional_int(value: Any) -> int | None:
+    if value is None or value == "":
+        return None
+    return int(value)
+
+
+def _optional_float(value: Any) -> float | None:
+    if value is None or value == "":
+        return None
+    return float(value)
+
+
+_tracker: UsageTracker | None = None
+_tracker_lock = threading.Lock()
+
+
+def get_usage_tracker() -> UsageTracker:
+    """Return the process-wide usage tracker, creating it from the environment."""
+
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = UsageTracker.from_env()
+    return _tracker
+
+
+def set_usage_tracker(tracker: UsageTracker | None) -> None:
+    """Override the process-wide usage tracker (primarily for tests)."""
+
+    global _tracker
+    with _tracker_lock:
+        _tracker = tracker
+
+
+__all__ = [
+    "AIUsageQuotaExceededError",
+    "MODEL_PRICING",
+    "ModelPricing",
+    "UsageBudget",
+    "UsageFeature",
+    "UsageKey",
+    "UsageStore",
+    "UsageTotals",
+    "UsageTracker",
+    "estimate_cost_usd",
+    "get_usage_tracker",
+    "record_model_usage",
+    "set_usage_tracker",
+]
@@ -1,12 +1,15 @@
 """Application lifespan hooks."""
 from __future__ import annotations
 
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime, timezone
 
 from fastapi import FastAPI
 from loguru import logger
 
+from app.ai.usage import get_usage_tracker
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):  # noqa: D401
@@ -14,7 +17,13 @@ async def lifespan(app: FastAPI):  # noqa: D401
 
     app.state.service_start_time = datetime.now(timezone.utc)
     logger.info("Starting Prempage backend service")
+    usage_tracker = get_usage_tracker()
+    usage_flush_task = asyncio.create_task(usage_tracker.run_periodic_flush())
     try:
         yield
     finally:
+        usage_flush_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await usage_flush_task
+        await asyncio.to_thread(usage_tracker.flush)
         logger.info("Stopping Prempage backend service")
@@ -131,6 +131,24 @@ class RequestEntityTooLargeError(AppError):
         )
 
 
+class TooManyRequestsError(AppError):
+    """Raised when a client exceeds an allowed request rate or quota."""
+
+    def __init__(
+        self,
+        detail: str,
+        *,
+        error_code: str = "too_many_requests",
+        context: Mapping[str, Any] | None = None,
+    ) -> None:
+        super().__init__(
+            detail,
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            error_code=error_code,
+            context=context,
+        )
+
+
 class ServiceUnavailableError(AppError):
     """Raised when a dependent service fails or is unavailable."""
 
@@ -176,5 +194,6 @@ __all__ = [
     "NotFoundError",
     "RequestEntityTooLargeError",
     "ServiceUnavailableError",
+    "TooManyRequestsError",
     "UnprocessableEntityError",
 ]
@@ -0,0 +1,46 @@
+"""Response models for AI usage reports."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from pydantic import BaseModel, Field
+
+
+class UsageReportEntry(BaseModel):
+    """Aggregated AI usage for a project, feature, and model."""
+
+    project_slug: str
+    feature: str = Field(..., description="AI feature that issued the calls (palette, section)")
+    model: str
+    calls: int = Field(..., ge=0)
+    failures: int = Field(..., ge=0)
+    input_tokens: int = Field(..., ge=0)
+    output_tokens: int = Field(..., ge=0)
+    total_tokens: int = Field(..., ge=0)
+    cost_usd: float = Field(..., ge=0, description="Estimated cost in USD")
+    average_latency_ms: float = Field(..., ge=0)
+
+
+class UsageBudgetStatus(BaseModel):
+    """Budget limits and consumption for a single project."""
+
+    max_tokens: int | None = None
+    max_cost_usd: float | None = None
+    window_hours: float
+    used_tokens: int = Field(..., ge=0)
+    used_cost_usd: float = Field(..., ge=0)
+
+
+class UsageReportResponse(BaseModel):
+    """Usage report returned by the usage endpoint."""
+
+    generated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    since: datetime | None = None
+    entries: list[UsageReportEntry] = Field(default_factory=list)
+    budget: UsageBudgetStatus | None = Field(
+        default=None,
+        description="Budget status, present when the report is filtered to one project",
+    )
+
+
+__all__ = ["UsageBudgetStatus", "UsageReportEntry", "UsageReportResponse"]
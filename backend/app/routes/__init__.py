@@ -3,7 +3,7 @@ from __future__ import annotations
 
 from fastapi import APIRouter
 
-from app.routes import health, overlay, palette, sections
+from app.routes import health, overlay, palette, sections, usage
 
 
 router = APIRouter()
@@ -11,6 +11,7 @@ router.include_router(health.router)
 router.include_router(palette.router)
 router.include_router(overlay.router)
 router.include_router(sections.router)
+router.include_router(usage.router)
 
 
 __all__ = ["router"]
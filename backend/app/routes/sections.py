@@ -11,6 +11,7 @@ from starlette.concurrency import run_in_threadpool
 
 from sse_starlette.sse import EventSourceResponse
 
+from app.errors import AppError
 from app.templates.horizon.models import (
     HorizonSectionInsertRequest,
     HorizonSectionInsertResponse,
@@ -91,7 +92,7 @@ async def stream_insert_section(
                 custom_prompt=custom_section_prompt,
                 progress_callback=handle_progress,
             )
-        except HorizonSectionInsertionError as exc:
+        except AppError as exc:
             emit_event("stage", {"stage": "error"})
             emit_event("failed", {"message": exc.detail})
         except Exception:  # pragma: no cover - unforeseen errors
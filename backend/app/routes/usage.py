@@ -0,0 +1,63 @@
+"""AI usage reporting endpoint."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Query
+from starlette.concurrency import run_in_threadpool
+
+from app.ai.usage import UsageTotals, get_usage_tracker
+from app.models.usage import UsageBudgetStatus, UsageReportEntry, UsageReportResponse
+
+
+router = APIRouter(prefix="/usage", tags=["usage"])
+
+
+@router.get("", response_model=UsageReportResponse, summary="AI usage report")
+async def usage_report(
+    project_slug: str | None = Query(default=None, description="Limit the report to one project"),
+    since: datetime | None = Query(default=None, description="Only include usage recorded after this time"),
+) -> UsageReportResponse:
+    """Return token usage, cost, and latency aggregated per project and feature."""
+
+    tracker = get_usage_tracker()
+    grouped = await run_in_threadpool(tracker.report, project_slug=project_slug, since=since)
+
+    entries = [
+        UsageReportEntry(
+            project_slug=slug,
+            feature=feature,
+            model=model,
+            calls=totals.calls,
+            failures=totals.failures,
+            input_tokens=totals.input_tokens,
+            output_tokens=totals.output_tokens,
+            total_tokens=totals.total_tokens,
+            cost_usd=round(totals.cost_usd, 6),
+            average_latency_ms=round(totals.latency_ms / totals.calls, 2) if totals.calls else 0.0,
+        )
+        for (slug, feature, model), totals in sorted(grouped.items())
+    ]
+
+    budget_status: UsageBudgetStatus | None = None
+    if project_slug is not None:
+        budget = tracker.budget_for(project_slug)
+        window_start = datetime.now(timezone.utc) - budget.window
+        windowed = await run_in_threadpool(
+            tracker.report, project_slug=project_slug, since=window_start
+        )
+        spent = UsageTotals()
+        for totals in windowed.values():
+            spent.add(totals)
+        budget_status = UsageBudgetStatus(
+            max_tokens=budget.max_tokens,
+            max_cost_usd=budget.max_cost_usd,
+            window_hours=budget.window / timedelta(hours=1),
+            used_tokens=spent.total_tokens,
+            used_cost_usd=round(spent.cost_usd, 6),
+        )
+
+    return UsageReportResponse(since=since, entries=entries, budget=budget_status)
+
+
+__all__ = ["router"]
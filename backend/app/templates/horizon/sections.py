@@ -15,6 +15,7 @@ from html.parser import HTMLParser
 
 from app.ai.base import SectionGenerator, SectionGeneratorError
 from app.ai.providers.openai import OpenAISectionGenerator
+from app.ai.usage import UsageTracker, get_usage_tracker
 from app.errors import BadRequestError
 
 
@@ -387,7 +388,12 @@ SECTION_VARIANT_PLACEHOLDER = "__SECTION_VARIANT__"
 class HorizonSectionLibraryService:
     """Clones Horizon template sections into site workspaces."""
 
-    def __init__(self, repo_root: Path | None = None) -> None:
+    def __init__(
+        self,
+        repo_root: Path | None = None,
+        usage_tracker: UsageTracker | None = None,
+    ) -> None:
+        self._usage_tracker = usage_tracker or get_usage_tracker()
         self._repo_root = self._resolve_repo_root(repo_root)
         self._templates_root = (
             self._repo_root / "public-sites" / "templates" / "horizon"
@@ -436,10 +442,13 @@ class HorizonSectionLibraryService:
             try:
                 if progress_callback is not None:
                     progress_callback("generating")
-                generated_html = generator.generate(
-                    user_prompt=custom_prompt.strip(),
-                    template_html=CUSTOM_SECTION_TEMPLATE_HTML,
-                )
+                with self._usage_tracker.track(
+                    project_slug=site_slug, feature="section"
+                ):
+                    generated_html = generator.generate(
+                        user_prompt=custom_prompt.strip(),
+                        template_html=CUSTOM_SECTION_TEMPLATE_HTML,
+                    )
             except SectionGeneratorError as exc:  # pragma: no cover - provider errors
                 raise HorizonSectionInsertionError(
                     f"Section generator failed: {exc}"
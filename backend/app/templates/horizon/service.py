@@ -15,6 +15,7 @@ from pydantic import ValidationError
 
 from app.ai.base import PaletteGenerator, PaletteGeneratorError
 from app.ai.providers.openai import DEFAULT_OPENAI_MODEL, OpenAIPaletteGenerator
+from app.ai.usage import UsageTracker, get_usage_tracker
 from app.errors import InternalServerError, NotFoundError, ServiceUnavailableError
 from app.templates.horizon.models import (
     HorizonPalette,
@@ -42,7 +43,9 @@ class HorizonPaletteService:
         self,
         repo_root: Path | None = None,
         generator: PaletteGenerator | None = None,
+        usage_tracker: UsageTracker | None = None,
     ) -> None:
+        self._usage_tracker = usage_tracker or get_usage_tracker()
         self._repo_root = self._resolve_repo_root(repo_root)
         self._sites_dir = self._repo_root / "public-sites" / "sites"
         self._apply_theme_script = (
@@ -75,7 +78,9 @@ class HorizonPaletteService:
                 slug=site_slug,
                 notes=payload.notes,
             )
-        candidate_palette = self._generate_palette(current_palette, payload.notes)
+        candidate_palette = self._generate_palette(
+            site_slug, current_palette, payload.notes
+        )
         self._apply_palette(site_slug, candidate_palette)
         updated_palette = self._load_palette(site_dir)
         logger.info(
@@ -118,11 +123,12 @@ class HorizonPaletteService:
             ) from exc
 
     def _generate_palette(
-        self, current: HorizonPalette, notes: str | None
+        self, site_slug: str, current: HorizonPalette, notes: str | None
     ) -> HorizonPalette:
         source: Mapping[str, str] = current.model_dump()
         try:
-            raw_palette = self._generator.generate(source, notes)
+            with self._usage_tracker.track(project_slug=site_slug, feature="palette"):
+                raw_palette = self._generator.generate(source, notes)
         except PaletteGeneratorError as exc:
             raise HorizonPaletteGenerationError(str(exc)) from exc
 
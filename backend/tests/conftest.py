@@ -14,6 +14,7 @@ if str(BACKEND_ROOT) not in __import__("sys").path:
     __import__("sys").path.insert(0, str(BACKEND_ROOT))
 
 from app import create_app
+from app.ai.usage import UsageStore, UsageTracker, set_usage_tracker
 
 
 EXAMPLE_COMPONENT = """"use client";
@@ -57,6 +58,14 @@ class OverlayFixture:
   )
 
 
+@pytest.fixture(autouse=True)
+def usage_tracker(tmp_path: Path) -> Iterator[UsageTracker]:
+  tracker = UsageTracker(store=UsageStore(tmp_path / "usage.sqlite3"))
+  set_usage_tracker(tracker)
+  yield tracker
+  set_usage_tracker(None)
+
+
 @pytest.fixture
 def overlay_repo(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[OverlayFixture]:
   repo_root = tmp_path / "repo"
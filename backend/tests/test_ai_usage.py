@@ -0,0 +1,141 @@
+"""Tests for AI usage accounting."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.ai.usage import (
+    AIUsageQuotaExceededError,
+    UsageBudget,
+    UsageTracker,
+    estimate_cost_usd,
+    record_model_usage,
+)
+
+
+def test_track_records_provider_usage(usage_tracker: UsageTracker) -> None:
+    with usage_tracker.track(project_slug="horizon-example", feature="palette"):
+        record_model_usage(
+            "gpt-4o-mini", SimpleNamespace(input_tokens=1200, output_tokens=300)
+        )
+
+    report = usage_tracker.report(project_slug="horizon-example")
+    totals = report[("horizon-example", "palette", "gpt-4o-mini")]
+    assert totals.calls == 1
+    assert totals.failures == 0
+    assert totals.total_tokens == 1500
+    assert totals.cost_usd == pytest.approx(estimate_cost_usd("gpt-4o-mini", 1200, 300))
+    assert totals.latency_ms >= 0
+
+
+def test_track_counts_failures(usage_tracker: UsageTracker) -> None:
+    with pytest.raises(RuntimeError):
+        with usage_tracker.track(project_slug="horizon-example", feature="section"):
+            raise RuntimeError("provider down")
+
+    totals = usage_tracker.report()[("horizon-example", "section", "unknown")]
+    assert totals.calls == 1
+    assert totals.failures == 1
+
+
+def test_record_model_usage_outside_tracking_is_ignored(usage_tracker: UsageTracker) -> None:
+    record_model_usage("gpt-4o-mini", {"input_tokens": 10, "output_tokens": 5})
+
+    assert usage_tracker.report() == {}
+
+
+def test_flush_persists_and_merges_aggregates(usage_tracker: UsageTracker) -> None:
+    for _ in range(2):
+        usage_tracker.record(
+            project_slug="horizon-example",
+            feature="section",
+            model="gpt-4o-mini",
+            input_tokens=100,
+            output_tokens=50,
+            latency_ms=20.0,
+        )
+        assert usage_tracker.flush() == 1
+
+    assert usage_tracker.flush() == 0
+    assert usage_tracker.store.path.exists()
+
+    totals = usage_tracker.store.load()[("horizon-example", "section", "gpt-4o-mini")]
+    assert totals.calls == 2
+    assert totals.input_tokens == 200
+    assert totals.latency_ms == pytest.approx(40.0)
+
+
+def test_report_filters_by_since(usage_tracker: UsageTracker) -> None:
+    now = datetime.now(timezone.utc)
+    usage_tracker.record(
+        project_slug="horizon-example",
+        feature="palette",
+        model="gpt-4o-mini",
+        input_tokens=10,
+        output_tokens=10,
+        latency_ms=1.0,
+        at=now - timedelta(days=3),
+    )
+    usage_tracker.flush()
+    usage_tracker.record(
+        project_slug="horizon-example",
+        feature="palette",
+        model="gpt-4o-mini",
+        input_tokens=5,
+        output_tokens=5,
+        latency_ms=1.0,
+        at=now,
+    )
+
+    recent = usage_tracker.report(since=now - timedelta(hours=2))
+    assert recent[("horizon-example", "palette", "gpt-4o-mini")].total_tokens == 10
+    assert usage_tracker.report()[("horizon-example", "palette", "gpt-4o-mini")].calls == 2
+
+
+def test_budget_blocks_calls_once_exhausted(usage_tracker: UsageTracker) -> None:
+    usage_tracker.set_budget("horizon-example", UsageBudget(max_tokens=1000))
+    usage_tracker.record(
+        project_slug="horizon-example",
+        feature="section",
+        model="gpt-4o-mini",
+        input_tokens=800,
+        output_tokens=200,
+        latency_ms=5.0,
+    )
+
+    invoked = False
+    with pytest.raises(AIUsageQuotaExceededError) as excinfo:
+        with usage_tracker.track(project_slug="horizon-example", feature="section"):
+            invoked = True
+
+    assert not invoked
+    assert excinfo.value.status_code == 429
+    assert excinfo.value.context == {
+        "project_slug": "horizon-example",
+        "used_tokens": 1000,
+        "max_tokens": 1000,
+    }
+
+    # Other projects fall back to the (unlimited) default budget.
+    with usage_tracker.track(project_slug="other-site", feature="section"):
+        pass
+
+
+def test_from_env_reads_budgets(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    monkeypatch.setenv("PREMPAGE_AI_USAGE_DB", str(tmp_path / "env.sqlite3"))
+    monkeypatch.setenv("PREMPAGE_AI_DAILY_TOKEN_BUDGET", "5000")
+    monkeypatch.setenv(
+        "PREMPAGE_AI_BUDGETS",
+        '{"horizon-example": {"max_cost_usd": 0.5, "window_hours": 12}}',
+    )
+
+    tracker = UsageTracker.from_env()
+
+    assert tracker.store.path == tmp_path / "env.sqlite3"
+    assert tracker.budget_for("another-site").max_tokens == 5000
+    override = tracker.budget_for("horizon-example")
+    assert override.max_tokens is None
+    assert override.max_cost_usd == 0.5
+    assert override.window == timedelta(hours=12)
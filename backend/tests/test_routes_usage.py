@@ -0,0 +1,79 @@
+"""Usage report route tests."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from fastapi import status
+
+from app.ai.usage import UsageBudget, UsageTracker
+
+
+def test_usage_report_groups_by_project_and_feature(
+    api_client, usage_tracker: UsageTracker
+) -> None:
+    for feature, tokens in (("palette", 100), ("section", 400), ("section", 600)):
+        usage_tracker.record(
+            project_slug="horizon-example",
+            feature=feature,
+            model="gpt-4o-mini",
+            input_tokens=tokens,
+            output_tokens=0,
+            latency_ms=10.0,
+        )
+    usage_tracker.record(
+        project_slug="other-site",
+        feature="palette",
+        model="gpt-4o-mini",
+        input_tokens=50,
+        output_tokens=50,
+        latency_ms=30.0,
+    )
+    usage_tracker.set_budget("horizon-example", UsageBudget(max_tokens=10_000))
+
+    response = api_client.get("/usage", params={"project_slug": "horizon-example"})
+
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert [(entry["feature"], entry["calls"], entry["total_tokens"]) for entry in body["entries"]] == [
+        ("palette", 1, 100),
+        ("section", 2, 1000),
+    ]
+    assert body["entries"][1]["average_latency_ms"] == 10.0
+    assert body["budget"]["max_tokens"] == 10_000
+    assert body["budget"]["used_tokens"] == 1100
+    assert body["budget"]["window_hours"] == 24
+
+
+def test_usage_report_without_filter_has_no_budget(
+    api_client, usage_tracker: UsageTracker
+) -> None:
+    response = api_client.get("/usage")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["entries"] == []
+    assert response.json()["budget"] is None
+
+
+def test_usage_report_since_accepts_offsets_and_naive_times(
+    api_client, usage_tracker: UsageTracker
+) -> None:
+    for hour, tokens in ((10, 100), (12, 400)):
+        usage_tracker.record(
+            project_slug="horizon-example",
+            feature="palette",
+            model="gpt-4o-mini",
+            input_tokens=tokens,
+            output_tokens=0,
+            latency_ms=10.0,
+            at=datetime(2026, 1, 1, hour, 30, tzinfo=timezone.utc),
+        )
+
+    def total_tokens(since: str) -> int:
+        response = api_client.get("/usage", params={"since": since})
+        assert response.status_code == status.HTTP_200_OK
+        return sum(entry["total_tokens"] for entry in response.json()["entries"])
+
+    # 13:15 at +02:00 is 11:15 UTC, so only the 12:30 UTC call is in range.
+    assert total_tokens("2026-01-01T13:15:00+02:00") == 400
+    assert total_tokens("2026-01-01T05:15:00-05:00") == 500
+    assert total_tokens("2026-01-01T11:15:00") == 400
@@ -104,6 +104,26 @@ export interface paths {
         patch?: never;
         trace?: never;
     };
+    "/usage": {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        /**
+         * AI usage report
+         * @description Return token usage, cost, and latency aggregated per project and feature.
+         */
+        get: operations["usage_report_usage_get"];
+        put?: never;
+        post?: never;
+        delete?: never;
+        options?: never;
+        head?: never;
+        patch?: never;
+        trace?: never;
+    };
 }
 export type webhooks = Record<string, never>;
 export interface components {
@@ -337,6 +357,71 @@ export interface components {
             /** Version */
             version: string;
         };
+        /**
+         * UsageBudgetStatus
+         * @description Budget limits and consumption for a single project.
+         */
+        UsageBudgetStatus: {
+            /** Max Tokens */
+            max_tokens?: number | null;
+            /** Max Cost Usd */
+            max_cost_usd?: number | null;
+            /** Window Hours */
+            window_hours: number;
+            /** Used Tokens */
+            used_tokens: number;
+            /** Used Cost Usd */
+            used_cost_usd: number;
+        };
+        /**
+         * UsageReportEntry
+         * @description Aggregated AI usage for a project, feature, and model.
+         */
+        UsageReportEntry: {
+            /** Project Slug */
+            project_slug: string;
+            /**
+             * Feature
+             * @description AI feature that issued the calls (palette, section)
+             */
+            feature: string;
+            /** Model */
+            model: string;
+            /** Calls */
+            calls: number;
+            /** Failures */
+            failures: number;
+            /** Input Tokens */
+            input_tokens: number;
+            /** Output Tokens */
+            output_tokens: number;
+            /** Total Tokens */
+            total_tokens: number;
+            /**
+             * Cost Usd
+             * @description Estimated cost in USD
+             */
+            cost_usd: number;
+            /** Average Latency Ms */
+            average_latency_ms: number;
+        };
+        /**
+         * UsageReportResponse
+         * @description Usage report returned by the usage endpoint.
+         */
+        UsageReportResponse: {
+            /**
+             * Generated At
+             * Format: date-time
+             */
+            generated_at?: string;
+            /** Since */
+            since?: string | null;
+            /** Entries */
+            entries?: components["schemas"]["UsageReportEntry"][];
+            /** @description Budget status, present when the report is filtered to one project */
+            budget?: components["schemas"]["UsageBudgetStatus"] | null;
+        };
         /** ValidationError */
         ValidationError: {
             /** Location */
@@ -514,4 +599,38 @@ export interface operations {
             };
         };
     };
+    usage_report_usage_get: {
+        parameters: {
+            query?: {
+                /** @description Limit the report to one project */
+                project_slug?: string | null;
+                /** @description Only include usage recorded after this time */
+                since?: string | null;
+            };
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        requestBody?: never;
+        responses: {
+            /** @description Successful Response */
+            200: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["UsageReportResponse"];
+                };
+            };
+            /** @description Validation Error */
+            422: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["HTTPValidationError"];
+                };
+            };
+        };
+    };
 }
@@ -4,10 +4,12 @@
 Usage
 -----
 python public-sites/scripts/automation/extract_site.py <site_slug> <url> [--service-url http://localhost:8081] [--output <path>]
+python public-sites/scripts/automation/extract_site.py <site_slug> <url> --crawl [--max-pages 50] [--max-depth 3]
 
 The script writes the JSON response into `public-sites/sites/<site_slug>/artifacts/` unless an
 explicit output path is provided. The filename defaults to the target domain with a timestamp
-suffix to avoid accidental overwrites.
+suffix to avoid accidental overwrites. With `--crawl` the service follows internal links and the
+streamed page events are collected into a single `{"pages", "errors", "skipped", "summary"}` file.
 """
 
 from __future__ import annotations
@@ -39,6 +41,9 @@ def parse_args() -> argparse.Namespace:
         "--output",
         help="Optional explicit output path for the JSON file. Defaults to artifacts/ under the site directory.",
     )
+    parser.add_argument("--crawl", action="store_true", help="Crawl internal links instead of extracting one page")
+    parser.add_argument("--max-pages", type=int, help="Page limit for --crawl (service default when omitted)")
+    parser.add_argument("--max-depth", type=int, help="Link depth limit for --crawl (service default when omitted)")
     return parser.parse_args()
 
 
@@ -51,11 +56,11 @@ def ensure_site_directory(site_slug: str) -> Path:
     return artifacts_dir
 
 
-def derive_default_output(artifacts_dir: Path, target_url: str) -> Path:
+def derive_default_output(artifacts_dir: Path, target_url: str, prefix: str = "extract") -> Path:
     parsed = urlparse(target_url)
     domain = parsed.netloc or "unknown-domain"
     timestamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
-    filename = f"extract-{domain}-{timestamp}.json"
+    filename = f"{prefix}-{domain}-{timestamp}.json"
     return artifacts_dir / filename
 
 
@@ -74,12 +79,50 @@ def call_extractor(service_url: str, target_url: str) -> dict:
         raise SystemExit(f"Failed to reach extractor service at {endpoint}: {exc}") from exc
 
 
+def call_crawler(service_url: str, target_url: str, max_pages: int | None, max_depth: int | None) -> dict:
+    endpoint = service_url.rstrip("/") + "/crawl"
+    body: dict[str, object] = {"url": target_url}
+    if max_pages is not None:
+        body["max_pages"] = max_pages
+    if max_depth is not None:
+        body["max_depth"] = max_depth
+    request = Request(endpoint, data=json.dumps(body).encode("utf-8"), headers={"Content-Type": "application/json"})
+
+    result: dict = {"pages": [], "errors": [], "skipped": [], "summary": None}
+    try:
+        with urlopen(request, timeout=600) as response:
+            if response.status != 200:
+                raise SystemExit(f"Crawler returned HTTP {response.status}: {response.read().decode('utf-8')}")
+            for raw_line in response:
+                if not raw_line.strip():
+                    continue
+                event = json.loads(raw_line)
+                kind = event.pop("event", None)
+                if kind == "page":
+                    result["pages"].append(event)
+                    print(f"  [{len(result['pages'])}] {event['page']['url']}")
+                elif kind == "error":
+                    result["errors"].append(event)
+                    print(f"  ! {event['url']}: {event['detail']}", file=sys.stderr)
+                elif kind == "skipped":
+                    result["skipped"].append(event)
+                elif kind == "summary":
+                    result["summary"] = event
+    except OSError as exc:  # includes URLError
+        raise SystemExit(f"Failed to reach extractor service at {endpoint}: {exc}") from exc
+    return result
+
+
 def main() -> None:
     args = parse_args()
     artifacts_dir = ensure_site_directory(args.site_slug)
-    output_path = Path(args.output) if args.output else derive_default_output(artifacts_dir, args.url)
+    prefix = "crawl" if args.crawl else "extract"
+    output_path = Path(args.output) if args.output else derive_default_output(artifacts_dir, args.url, prefix)
 
-    data = call_extractor(args.service_url, args.url)
+    if args.crawl:
+        data = call_crawler(args.service_url, args.url, args.max_pages, args.max_depth)
+    else:
+        data = call_extractor(args.service_url, args.url)
     output_path.parent.mkdir(parents=True, exist_ok=True)
     output_path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n", encoding="utf-8")
 
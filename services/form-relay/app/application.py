@@ -1,28 +1,126 @@
 """FastAPI application factory for the form relay service."""
 from __future__ import annotations
 
+import asyncio
+import random
+import secrets
 from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, List
 from urllib.parse import urlparse
+from uuid import UUID, uuid4
 
 from fastapi import FastAPI, HTTPException, Request, status
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
 from loguru import logger
+from pydantic import ValidationError
 
-from .clients.salon import SalonSubmission, forward_to_salon
+from .clients.salon import SalonClient, SalonSubmission, forward_to_salon
 from .config import Settings, get_settings
+from .dedupe import SubmissionDeduplicator, submission_fingerprint
+from .delivery import DeliveryWorkers, SubmissionQueue
+from .form_schemas import FormSchemaRegistry, validation_errors
 from .logging import configure_logging
+from .metrics import CONTENT_TYPE, MetricsRegistry, RelayMetrics, SnapshotDirectory, render
+from .origins import AllowListCORSMiddleware, AllowListWatcher, OriginMatcher
+from .ratelimit import (
+    PARSED_BODY_STATE_KEY,
+    RateLimitKey,
+    RateLimitMiddleware,
+    TrustedProxies,
+    client_address,
+    create_rate_limiter,
+    trusted_proxy_networks,
+)
 from .schemas import (
     ErrorResponse,
     HealthResponse,
-    SubmissionContext,
     SubmissionRequest,
     SubmissionResponse,
 )
+from .spam import SpamFilter, SubmissionCandidate
 from .telemetry import configure_sentry
+from .uploads import FORM_NAME_PART, METADATA_PART, AttachmentStore, UploadRejected
+
+SUBMISSIONS_PATH = "/v1/forms/submissions"
+UPLOADS_PATH = SUBMISSIONS_PATH + "/multipart"
+DUPLICATE_MESSAGE = "Submission already accepted"
+ATTACHMENT_PURGE_INTERVAL_SECONDS = 3600.0
+# Metric labels standing in for caller-supplied values: a 429's Origin host that is not on the
+# allow-list, and a form name the site's schemas do not declare.
+UNLISTED_HOST_LABEL = "unlisted"
+UNDECLARED_FORM_LABEL = "undeclared"
+
+# The endpoint reads the body itself (see read_submission), so the schema is declared here.
+SUBMISSION_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": SubmissionRequest.model_json_schema()}},
+    }
+}
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        FORM_NAME_PART: {"type": "string"},
+                        METADATA_PART: {"type": "string", "description": "JSON object of submission metadata."},
+                    },
+                    "additionalProperties": {
+                        "oneOf": [{"type": "string"}, {"type": "string", "format": "binary"}],
+                    },
+                    "description": "Text parts become form fields; parts with a filename are stored as attachments.",
+                }
+            }
+        },
+    }
+}
+
+
+async def read_submission(request: Request) -> SubmissionRequest:
+    """Validate the submission body in a single pass.
+
+    When the rate limiter already decoded the JSON it is validated directly;
+    otherwise the raw bytes go straight to pydantic's JSON validator. Errors
+    are reported in FastAPI's usual 422 shape.
+    """
+    parsed = request.scope.get("state", {}).get(PARSED_BODY_STATE_KEY)
+    try:
+        if parsed is not None:
+            return SubmissionRequest.model_validate(parsed)
+        return SubmissionRequest.model_validate_json(await _read_capped_body(request))
+    except ValidationError as exc:
+        raise _validation_error(exc) from exc
+
+
+async def _read_capped_body(request: Request) -> bytes:
+    """Read the body, refusing it with 413 once it passes ``submission_max_body_bytes``."""
+    limit = request.app.state.settings.submission_max_body_bytes
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail="Submission is too large")
+    return bytes(body)
+
+
+def _validation_error(exc: ValidationError) -> RequestValidationError:
+    """Report a model validation failure in FastAPI's 422 shape."""
+    return RequestValidationError(
+        [{**error, "loc": ("body", *error["loc"])} for error in exc.errors(include_url=False)]
+    )
+
 
+def host_allowed(matcher: OriginMatcher, hostname: str) -> bool:
+    """Whether ``hostname`` may submit; an empty allow-list lets every host through."""
+    return not matcher or matcher.allows_host(hostname)
 
-def resolve_origin(request: Request, settings: Settings) -> tuple[str, str]:
+
+def resolve_origin(request: Request, matcher: OriginMatcher) -> tuple[str, str]:
     """Derive the caller origin string and hostname, enforcing allow-list rules."""
     origin = request.headers.get("origin")
     referer = request.headers.get("referer")
@@ -42,21 +140,17 @@ def resolve_origin(request: Request, settings: Settings) -> tuple[str, str]:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unable to parse request origin")
 
     normalized_host = hostname.lower()
-    if settings.allowed_hosts and normalized_host not in settings.allowed_hosts:
+    if not host_allowed(matcher, normalized_host):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Origin is not allowed")
 
     origin_root = f"{parsed.scheme}://{parsed.netloc}" if parsed.scheme and parsed.netloc else candidate
     return origin_root, normalized_host
 
 
-def resolve_client_ip(request: Request) -> str:
-    """Determine the caller IP, honoring X-Forwarded-For when present."""
-    forwarded_for = request.headers.get("x-forwarded-for")
-    if forwarded_for:
-        return forwarded_for.split(",")[0].strip()
-    if request.client and request.client.host:
-        return request.client.host
-    return "unknown"
+def resolve_client_ip(request: Request, trusted_proxies: TrustedProxies = ()) -> str:
+    """Determine the caller IP, honoring X-Forwarded-For only from trusted proxies."""
+    peer = request.client.host if request.client else None
+    return client_address(peer, request.headers.get("x-forwarded-for"), trusted_proxies)
 
 
 @asynccontextmanager
@@ -64,10 +158,65 @@ async def lifespan(app: FastAPI):  # noqa: D401
     """Manage application startup and shutdown events."""
     settings: Settings = app.state.settings
     logger.info("Starting {} service", settings.service_name)
+    queue = SubmissionQueue(
+        settings.delivery_queue_path, retention_seconds=settings.delivery_retention_seconds
+    )
+    salon = SalonClient(settings) if settings.salon_forwarding_enabled else None
+    if salon is None:
+        logger.info("Salon forwarding disabled; submissions are logged instead of sent")
+    workers = DeliveryWorkers(
+        queue, salon.forward if salon else forward_to_salon, settings, metrics=app.state.metrics
+    )
+    app.state.submission_queue = queue
+    app.state.delivery_workers = workers
+    workers.start()
+    watch_task = _watch_allow_list(app, settings)
+    snapshots: SnapshotDirectory | None = app.state.metrics_snapshots
+    snapshot_task = asyncio.create_task(snapshots.run(), name="metrics-snapshot") if snapshots else None
+    store: AttachmentStore | None = app.state.attachment_store
+    purge_task = (
+        asyncio.create_task(_purge_attachments(store), name="attachment-purge")
+        if store is not None and store.retention_seconds
+        else None
+    )
     try:
         yield
     finally:
         logger.info("Stopping {} service", settings.service_name)
+        if watch_task is not None:
+            watch_task.cancel()
+        if purge_task is not None:
+            purge_task.cancel()
+        await workers.stop()
+        if snapshot_task is not None:
+            snapshot_task.cancel()
+            snapshots.write()
+        if salon is not None:
+            await salon.aclose()
+        queue.close()
+        if app.state.rate_limiter is not None:
+            await app.state.rate_limiter.close()
+
+
+async def _purge_attachments(store: AttachmentStore) -> None:
+    """Delete attachments past their retention window, hourly."""
+    while True:
+        await asyncio.to_thread(store.purge_expired)
+        await asyncio.sleep(ATTACHMENT_PURGE_INTERVAL_SECONDS)
+
+
+def _watch_allow_list(app: FastAPI, settings: Settings) -> asyncio.Task[None] | None:
+    """Hot-reload the allow-list file when origins came from it rather than the environment."""
+    path = settings.allowed_origins_path
+    if path is None or not settings.allowed_origins_reload_seconds:
+        return None
+
+    def install(matcher: OriginMatcher) -> None:
+        app.state.origin_matcher = matcher
+
+    watcher = AllowListWatcher(path, install, interval=settings.allowed_origins_reload_seconds)
+    app.state.allow_list_watcher = watcher
+    return asyncio.create_task(watcher.run(), name="allow-list-watcher")
 
 
 def create_app() -> FastAPI:
@@ -83,16 +232,71 @@ def create_app() -> FastAPI:
         lifespan=lifespan,
     )
     app.state.settings = settings
+    metrics = RelayMetrics(MetricsRegistry(max_series=settings.metrics_max_series))
+    app.state.metrics = metrics
+    app.state.metrics_snapshots = (
+        SnapshotDirectory(
+            settings.metrics_multiprocess_dir, metrics.registry, interval=settings.metrics_flush_seconds
+        )
+        if settings.metrics_multiprocess_dir
+        else None
+    )
+    metrics.registry.add_collector(lambda: app.state.submission_queue.metric_families(), aggregate=False)
+    app.state.form_schemas = (
+        FormSchemaRegistry.from_directory(settings.form_schemas_dir) if settings.form_schemas_dir else None
+    )
+    app.state.spam_filter = SpamFilter(settings) if settings.spam_filter_enabled else None
+    if app.state.spam_filter is not None:
+        metrics.registry.add_collector(app.state.spam_filter.metric_families, aggregate=True)
+    app.state.attachment_store = AttachmentStore(settings) if settings.uploads_enabled else None
+    app.state.deduplicator = (
+        SubmissionDeduplicator(
+            window_seconds=settings.dedupe_window_seconds, max_entries=settings.dedupe_max_entries
+        )
+        if settings.dedupe_enabled
+        else None
+    )
+
+    app.state.trusted_proxies = trusted_proxy_networks(settings.trusted_proxies)
 
-    if settings.allowed_origins:
+    def form_label(hostname: str, form_name: str | None) -> str:
+        """The metric label for a form: its name if the site's schemas declare it, a fixed label otherwise."""
+        form_schemas: FormSchemaRegistry | None = app.state.form_schemas
+        if form_name and form_schemas is not None and form_schemas.knows_form(hostname, form_name):
+            return form_name
+        # Anything else is chosen by the caller and could fill the series cap.
+        return UNDECLARED_FORM_LABEL
+
+    def count_rate_limited(key: RateLimitKey, form_name: str) -> None:
+        """Count a 429, labelling it with the caller's host only if that host may submit."""
+        hostname, _ = key
+        if not host_allowed(app.state.origin_matcher, hostname):
+            metrics.submissions.inc(UNLISTED_HOST_LABEL, UNDECLARED_FORM_LABEL, "rate_limited")
+            return
+        metrics.submissions.inc(hostname, form_label(hostname, form_name), "rate_limited")
+
+    # Added before CORS so 429 responses still carry CORS headers.
+    app.state.rate_limiter = create_rate_limiter(settings) if settings.rate_limit_enabled else None
+    if app.state.rate_limiter is not None:
         app.add_middleware(
-            CORSMiddleware,
-            allow_origins=settings.allowed_origins,
-            allow_credentials=False,
-            allow_methods=["POST", "OPTIONS"],
-            allow_headers=["*"]
+            RateLimitMiddleware,
+            limiter=app.state.rate_limiter,
+            paths=(SUBMISSIONS_PATH, UPLOADS_PATH),
+            max_body_bytes=settings.submission_max_body_bytes,
+            on_limited=count_rate_limited,
+            trusted_proxies=app.state.trusted_proxies,
         )
-    else:  # pragma: no cover - misconfiguration safeguard
+
+    # Compiled once; the watcher swaps in a new matcher when allowed-origins.json changes.
+    app.state.origin_matcher = OriginMatcher(settings.allowed_origins)
+    app.add_middleware(
+        AllowListCORSMiddleware,
+        matcher=lambda: app.state.origin_matcher,
+        allow_credentials=False,
+        allow_methods=["POST", "OPTIONS"],
+        allow_headers=["*"]
+    )
+    if not settings.allowed_origins:  # pragma: no cover - misconfiguration safeguard
         logger.warning("No CORS origins configured; cross-site requests will be rejected")
 
     @app.exception_handler(HTTPException)
@@ -114,50 +318,173 @@ def create_app() -> FastAPI:
         return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content=payload.model_dump())
 
     @app.post(
-        "/v1/forms/submissions",
+        SUBMISSIONS_PATH,
         response_model=SubmissionResponse,
         status_code=status.HTTP_202_ACCEPTED,
         tags=["forms"],
         summary="Receive a form submission",
+        openapi_extra=SUBMISSION_REQUEST_BODY,
     )
-    async def submit_form(request_payload: SubmissionRequest, request: Request) -> SubmissionResponse:
-        origin, hostname = resolve_origin(request, settings)
-        client_ip = resolve_client_ip(request)
+    async def submit_form(request: Request) -> SubmissionResponse:
+        try:
+            request_payload = await read_submission(request)
+        except RequestValidationError:
+            metrics.rejections.inc("invalid")
+            raise
+        except HTTPException:
+            metrics.rejections.inc("too_large")
+            raise
+        try:
+            origin, hostname = resolve_origin(request, request.app.state.origin_matcher)
+        except HTTPException:
+            metrics.rejections.inc("origin")
+            raise
+        response, _ = accept_submission(request, request_payload, origin, hostname)
+        return response
 
-        context = SubmissionContext(
-            origin=origin,
-            hostname=hostname,
-            client_ip=client_ip,
-            user_agent=request.headers.get("user-agent"),
-            referer=request.headers.get("referer"),
-        )
+    def accept_submission(
+        request: Request,
+        request_payload: SubmissionRequest,
+        origin: str,
+        hostname: str,
+        *,
+        submission_id: UUID | None = None,
+        attachments: List[Dict[str, Any]] | None = None,
+    ) -> tuple[SubmissionResponse, bool]:
+        """Filter, validate, dedupe and enqueue one submission; the flag is False if it was not queued."""
+        state = request.app.state
+        form = form_label(hostname, request_payload.form_name)
+        client_ip = resolve_client_ip(request, state.trusted_proxies)
+        received_at = datetime.now(timezone.utc)
 
-        logger.info(
-            "Accepted submission {} from host={} ip={} form={}",
-            context.submission_id,
-            hostname,
-            client_ip,
-            request_payload.form_name,
-        )
+        spam_filter: SpamFilter | None = state.spam_filter
+        if spam_filter is not None:
+            verdict = spam_filter.check(
+                SubmissionCandidate(
+                    hostname=hostname,
+                    form_name=request_payload.form_name,
+                    fields=request_payload.fields,
+                    metadata=request_payload.metadata,
+                    received_at=received_at,
+                )
+            )
+            if verdict is not None:
+                # Look accepted so bots learn nothing; the submission is dropped.
+                metrics.submissions.inc(hostname, form, "spam")
+                logger.debug("Dropped spam from host={} ({}: {})", hostname, verdict.stage, verdict.reason)
+                return SubmissionResponse(submission_id=uuid4()), False
 
+        form_schemas: FormSchemaRegistry | None = state.form_schemas
+        if form_schemas is not None:
+            issues = form_schemas.validate(hostname, request_payload.form_name, request_payload.fields)
+            if issues:
+                # After the spam filter, so bots still get a silent 202; before the queue, so malformed or
+                # oversized fields never reach it or Salon.
+                metrics.submissions.inc(hostname, form, "invalid")
+                raise RequestValidationError(validation_errors(issues))
+
+        deduplicator: SubmissionDeduplicator | None = state.deduplicator
+        fingerprint = None
+        if deduplicator is not None:
+            fingerprint = submission_fingerprint(
+                hostname,
+                request_payload.form_name,
+                request_payload.fields,
+                [attachment["sha256"] for attachment in attachments or ()],
+            )
+            original_id = deduplicator.seen(fingerprint)
+            if original_id is not None:
+                # A double-submit: answer as the first one was answered and forward nothing.
+                logger.debug("Duplicate of submission {} from host={}", original_id, hostname)
+                metrics.submissions.inc(hostname, form, "duplicate")
+                return SubmissionResponse(submission_id=original_id, message=DUPLICATE_MESSAGE), False
+
+        submission_id = submission_id or uuid4()
+        headers = request.headers
+        # The validated fields and metadata dicts are handed over as-is, not copied.
+        metadata = request_payload.metadata
+        metadata["received_at"] = received_at.isoformat()
         salon_payload = SalonSubmission(
-            submission_id=str(context.submission_id),
-            origin=context.origin,
-            hostname=context.hostname,
+            submission_id=str(submission_id),
+            origin=origin,
+            hostname=hostname,
             form_name=request_payload.form_name,
-            client_ip=context.client_ip,
-            user_agent=context.user_agent,
-            referer=context.referer,
+            client_ip=client_ip,
+            user_agent=headers.get("user-agent"),
+            referer=headers.get("referer"),
             fields=request_payload.fields,
-            metadata={
-                **request_payload.metadata,
-                "received_at": context.received_at.isoformat(),
-            },
+            metadata=metadata,
+            attachments=attachments or [],
         )
 
-        await forward_to_salon(salon_payload)
+        if settings.log_sample_rate >= 1.0 or random.random() < settings.log_sample_rate:
+            logger.info(
+                "Accepted submission {} from host={} ip={} form={}",
+                salon_payload.submission_id,
+                hostname,
+                client_ip,
+                request_payload.form_name,
+            )
+
+        # Persist and acknowledge; delivery workers forward it to Salon in the background.
+        if state.submission_queue.enqueue(salon_payload):
+            state.delivery_workers.notify()
+        if fingerprint is not None:
+            deduplicator.remember(fingerprint, salon_payload.submission_id)
+        metrics.submissions.inc(hostname, form, "accepted")
 
-        return SubmissionResponse(submission_id=context.submission_id)
+        return SubmissionResponse(submission_id=submission_id), True
+
+    attachment_store: AttachmentStore | None = app.state.attachment_store
+    if attachment_store is not None:
+
+        @app.post(
+            UPLOADS_PATH,
+            response_model=SubmissionResponse,
+            status_code=status.HTTP_202_ACCEPTED,
+            tags=["forms"],
+            summary="Receive a form submission with file attachments",
+            openapi_extra=UPLOAD_REQUEST_BODY,
+        )
+        async def submit_upload(request: Request) -> SubmissionResponse:
+            try:
+                origin, hostname = resolve_origin(request, request.app.state.origin_matcher)
+            except HTTPException:
+                metrics.rejections.inc("origin")
+                raise
+            # Origin is checked first so disallowed callers never get to write to disk.
+            submission_id = uuid4()
+            try:
+                attachment_store.check_declared_length(request.headers.get("content-length"))
+                upload = await attachment_store.receive(
+                    request.stream(), request.headers.get("content-type"), str(submission_id)
+                )
+            except UploadRejected as exc:
+                metrics.rejections.inc(exc.reason)
+                raise HTTPException(status_code=exc.status_code, detail=exc.message) from exc
+
+            accepted = False
+            try:
+                try:
+                    request_payload = SubmissionRequest.model_validate(upload.submission_body())
+                except ValidationError as exc:
+                    metrics.rejections.inc("invalid")
+                    raise _validation_error(exc) from exc
+                response, accepted = accept_submission(
+                    request,
+                    request_payload,
+                    origin,
+                    hostname,
+                    submission_id=submission_id,
+                    attachments=upload.attachments,
+                )
+            finally:
+                if not accepted:
+                    # Spam, duplicates and invalid submissions keep nothing on disk.
+                    attachment_store.discard(str(submission_id))
+            if accepted:
+                metrics.attachment_bytes.inc(amount=sum(attachment["size"] for attachment in upload.attachments))
+            return response
 
     @app.get(
         "/health",
@@ -168,4 +495,20 @@ def create_app() -> FastAPI:
     async def health() -> HealthResponse:
         return HealthResponse(service=settings.service_name)
 
+    if settings.metrics_enabled:
+        if not settings.metrics_auth_token:
+            logger.warning("/metrics is served without FORM_RELAY_METRICS_AUTH_TOKEN; per-site traffic is public")
+
+        @app.get("/metrics", include_in_schema=False)
+        async def metrics_endpoint(request: Request) -> Response:
+            token = settings.metrics_auth_token
+            if token and not secrets.compare_digest(
+                request.headers.get("authorization", ""), f"Bearer {token}"
+            ):
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
+            snapshots: SnapshotDirectory | None = request.app.state.metrics_snapshots
+            families = snapshots.collect() if snapshots else metrics.registry.snapshot()
+            families.update(metrics.registry.live())
+            return Response(render(families), media_type=CONTENT_TYPE)
+
     return app
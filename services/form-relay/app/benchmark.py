@@ -0,0 +1,160 @@
+"""Measure how many submissions one form relay worker accepts per second.
+
+Usage:
+    python -m app.benchmark --requests 5000 --concurrency 32 [--log-level INFO] [--no-rate-limit]
+
+The full application (middleware, validation, spam filter, dedupe, queue
+and the delivery workers) runs in-process on one event loop, the same as a
+single uvicorn worker. Requests are fed to it as raw ASGI messages, so the
+numbers exclude HTTP parsing and any client overhead and reflect only the
+work the relay itself does. Logs go through the configured level into a sink
+that discards them, so formatting cost is counted but terminal I/O is not.
+The queue lives in a temporary directory; Salon forwarding is left disabled.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, Sequence
+
+from loguru import logger
+
+BENCH_ORIGIN = "https://bench.example.com"
+
+
+def _payload(index: int) -> bytes:
+    body = {
+        "form_name": "contact",
+        "fields": {
+            "name": "Ada Lovelace",
+            "email": f"ada+{index}@example.com",
+            "phone": "+1 555 0100",
+            "password": "hunter2",
+            "message": "I'd like to book an appointment next week, mornings work best.",
+        },
+        "metadata": {"site_id": "bench", "page": "/contact"},
+    }
+    return json.dumps(body).encode()
+
+
+def _client_ip(index: int) -> str:
+    # A distinct caller per request keeps the rate limiter from throttling the run.
+    return f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}"
+
+
+async def _post(app: Any, path: str, body: bytes, client_ip: str) -> int:
+    """Send one POST through the ASGI interface and return the response status."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "https",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"relay.example.com"),
+            (b"origin", BENCH_ORIGIN.encode()),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"user-agent", b"form-relay-bench"),
+        ],
+        "client": (client_ip, 50000),
+        "server": ("relay.example.com", 443),
+        "state": {},
+    }
+    messages = iter([{"type": "http.request", "body": body, "more_body": False}])
+    response_status = 0
+
+    async def receive() -> Dict[str, Any]:
+        return next(messages, {"type": "http.disconnect"})
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal response_status
+        if message["type"] == "http.response.start":
+            response_status = message["status"]
+
+    await app(scope, receive, send)
+    return response_status
+
+
+async def run_bench(*, requests: int, concurrency: int, log_level: str, rate_limit: bool) -> Dict[str, float]:
+    """Post ``requests`` distinct submissions with ``concurrency`` concurrent callers."""
+    from .application import SUBMISSIONS_PATH, create_app
+    from .config import get_settings
+
+    workdir = tempfile.mkdtemp(prefix="form-relay-bench-")
+    os.environ.update(
+        {
+            "FORM_RELAY_ALLOWED_ORIGINS": BENCH_ORIGIN,
+            "FORM_RELAY_RATE_LIMIT_ENABLED": "true" if rate_limit else "false",
+            "FORM_RELAY_SALON_FORWARDING_ENABLED": "false",
+            "FORM_RELAY_LOG_LEVEL": log_level,
+            "FORM_RELAY_DELIVERY_QUEUE_PATH": os.path.join(workdir, "submissions.sqlite3"),
+            "FORM_RELAY_SPAM_SAMPLE_PATH": os.path.join(workdir, "spam-samples.jsonl"),
+            "FORM_RELAY_UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        }
+    )
+    get_settings.cache_clear()
+    app = create_app()
+    logger.remove()
+    logger.add(lambda _: None, level=log_level.upper())
+
+    payloads = [(_payload(index), _client_ip(index)) for index in range(requests)]
+    statuses: Dict[int, int] = {}
+    async with app.router.lifespan_context(app):
+
+        async def worker() -> None:
+            while payloads:
+                code = await _post(app, SUBMISSIONS_PATH, *payloads.pop())
+                statuses[code] = statuses.get(code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(requests / elapsed, 1),
+        **{f"status_{code}": count for code, count in sorted(statuses.items())},
+    }
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Single-worker form relay throughput benchmark.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent in-flight requests.")
+    parser.add_argument("--log-level", default="INFO", help="Log level applied during the run.")
+    parser.add_argument("--no-rate-limit", action="store_true", help="Leave the rate limit middleware out.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Command-line entrypoint."""
+    args = parse_args(argv)
+    result = asyncio.run(
+        run_bench(
+            requests=args.requests,
+            concurrency=args.concurrency,
+            log_level=args.log_level,
+            rate_limit=not args.no_rate_limit,
+        )
+    )
+    for key, value in result.items():
+        print(f"{key:>24}: {value}")
+
+
+if __name__ == "__main__":
+    main()
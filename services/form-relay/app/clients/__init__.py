@@ -1,4 +1,18 @@
 """Client library exports."""
-from .salon import SalonSubmission, forward_to_salon
+from .salon import (
+    PermanentDeliveryError,
+    SalonClient,
+    SalonDeliveryError,
+    SalonSubmission,
+    SubmissionBatcher,
+    forward_to_salon,
+)
 
-__all__ = ["SalonSubmission", "forward_to_salon"]
+__all__ = [
+    "PermanentDeliveryError",
+    "SalonClient",
+    "SalonDeliveryError",
+    "SalonSubmission",
+    "SubmissionBatcher",
+    "forward_to_salon",
+]
@@ -1,27 +1,43 @@
-"""Salon service client stub."""
+"""Salon service client."""
 from __future__ import annotations
 
-from dataclasses import asdict, dataclass
-from typing import Any, Dict
+import asyncio
+import json
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List
 
+import httpx
 from loguru import logger
 
+from ..config import Settings
+
+# Statuses worth another attempt; any other 4xx means the payload itself was refused.
+RETRYABLE_STATUSES = frozenset({408, 409, 425, 429})
+SENSITIVE_FIELD_TOKENS = ("password", "passcode", "secret")
+REDACTED = "***redacted***"
+
+
+def _is_sensitive(key: str) -> bool:
+    lowered = key.lower()
+    return any(token in lowered for token in SENSITIVE_FIELD_TOKENS)
+
 
 def scrub_sensitive_fields(fields: Dict[str, Any]) -> Dict[str, Any]:
     """Return a copy of the submission fields with sensitive data masked."""
-    scrubbed = {}
-    for key, value in fields.items():
-        lowered = key.lower()
-        if any(token in lowered for token in {"password", "passcode", "secret"}):
-            scrubbed[key] = "***redacted***"
-        else:
-            scrubbed[key] = value
-    return scrubbed
+    return {key: REDACTED if _is_sensitive(key) else value for key, value in fields.items()}
+
+
+class SalonDeliveryError(Exception):
+    """A delivery attempt failed in a way that may succeed if retried."""
+
+
+class PermanentDeliveryError(Exception):
+    """Salon refused a submission in a way retrying cannot fix; it is dead-lettered."""
 
 
 @dataclass(slots=True)
 class SalonSubmission:
-    """Payload that will eventually be forwarded to the Salon service."""
+    """Payload forwarded to the Salon service."""
 
     submission_id: str
     origin: str
@@ -32,11 +48,203 @@ class SalonSubmission:
     referer: str | None
     fields: Dict[str, Any]
     metadata: Dict[str, Any]
+    # References to files kept in local attachment storage; the files themselves are never forwarded.
+    attachments: List[Dict[str, Any]] = field(default_factory=list)
+
+    def to_dict(self, *, scrub: bool = False) -> Dict[str, Any]:
+        """Shallow JSON-ready mapping; with ``scrub``, sensitive fields are masked as it is built.
+
+        Unlike :func:`dataclasses.asdict` nothing is deep-copied: ``fields`` and
+        ``metadata`` come straight from parsed JSON and are shared, not cloned.
+        """
+        data = {name: getattr(self, name) for name in self.__slots__}
+        if scrub:
+            data["fields"] = scrub_sensitive_fields(self.fields)
+        return data
+
+    def to_json(self, *, scrub: bool = False) -> str:
+        """Serialise for the queue or the logs."""
+        return json.dumps(self.to_dict(scrub=scrub), separators=(",", ":"), default=str)
 
 
 async def forward_to_salon(payload: SalonSubmission) -> None:
-    """Send the submission to the Salon application (stubbed for now)."""
-    scrubbed_payload = asdict(payload)
-    scrubbed_payload["fields"] = scrub_sensitive_fields(scrubbed_payload["fields"])
-    logger.info("Salon forward stub: {}", scrubbed_payload)
-    # TODO: Replace with actual HTTP client call once Salon endpoint exists.
+    """Log the submission instead of sending it; used while Salon forwarding is disabled."""
+    # Lazy: the scrubbed JSON is only built if a sink accepts INFO.
+    logger.opt(lazy=True).info("Salon forward stub: {}", lambda: payload.to_json(scrub=True))
+
+
+def raise_for_salon_status(response: httpx.Response, submission_id: str | None = None) -> None:
+    """Map a Salon response to success, a retryable error or a permanent one."""
+    status_code = response.status_code
+    if status_code < 400:
+        return
+    label = f"submission {submission_id}" if submission_id else "batch"
+    message = f"Salon returned {status_code} for {label}"
+    if status_code >= 500 or status_code in RETRYABLE_STATUSES:
+        raise SalonDeliveryError(message)
+    raise PermanentDeliveryError(message)
+
+
+class SalonClient:
+    """Forwards submissions to Salon over one pooled, lifespan-managed HTTP client.
+
+    ``submission_id`` is sent as the ``Idempotency-Key`` so retried deliveries
+    are safe. With batching enabled, submissions arriving within the batch
+    window are sent together as one bulk POST; see :class:`SubmissionBatcher`.
+    """
+
+    def __init__(self, settings: Settings, *, transport: httpx.AsyncBaseTransport | None = None) -> None:
+        if not settings.salon_endpoint_url:
+            raise ValueError("FORM_RELAY_SALON_ENDPOINT_URL is required when Salon forwarding is enabled")
+        self.endpoint_url = settings.salon_endpoint_url
+        self.batch_endpoint_url = settings.salon_batch_endpoint_url or f"{self.endpoint_url.rstrip('/')}/batch"
+        headers = {"User-Agent": f"{settings.service_name}/0.1"}
+        if settings.salon_auth_token:
+            headers["Authorization"] = f"Bearer {settings.salon_auth_token}"
+        self._client = httpx.AsyncClient(
+            headers=headers,
+            timeout=httpx.Timeout(
+                settings.salon_timeout_seconds, connect=settings.salon_connect_timeout_seconds
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.salon_max_connections,
+                max_keepalive_connections=settings.salon_max_connections,
+            ),
+            transport=transport,
+        )
+        self._batcher = (
+            SubmissionBatcher(
+                self._send_batch,
+                window_seconds=settings.salon_batch_window_ms / 1000,
+                max_size=settings.salon_batch_max_size,
+            )
+            if settings.salon_batch_enabled
+            else None
+        )
+
+    async def forward(self, payload: SalonSubmission) -> None:
+        """Deliver one submission, raising :class:`SalonDeliveryError` or :class:`PermanentDeliveryError`."""
+        if self._batcher is not None:
+            await self._batcher.submit(payload)
+            return
+        try:
+            response = await self._client.post(
+                self.endpoint_url,
+                json=payload.to_dict(),
+                headers={"Idempotency-Key": payload.submission_id},
+            )
+        except httpx.HTTPError as exc:
+            raise SalonDeliveryError(f"Salon request failed: {exc!r}") from exc
+        raise_for_salon_status(response, payload.submission_id)
+
+    async def aclose(self) -> None:
+        """Flush any open batch and close the connection pool."""
+        if self._batcher is not None:
+            await self._batcher.drain()
+        await self._client.aclose()
+
+    async def _send_batch(self, payloads: list[SalonSubmission]) -> dict[str, Exception]:
+        try:
+            response = await self._client.post(
+                self.batch_endpoint_url,
+                json={"submissions": [payload.to_dict() for payload in payloads]},
+            )
+        except httpx.HTTPError as exc:
+            raise SalonDeliveryError(f"Salon batch request failed: {exc!r}") from exc
+        raise_for_salon_status(response)
+        return _item_failures(response)
+
+
+def _item_failures(response: httpx.Response) -> dict[str, Exception]:
+    """Read per-submission statuses from a bulk response, if Salon sent any."""
+    try:
+        results = response.json().get("results") or []
+    except (ValueError, AttributeError):
+        return {}
+    failures: dict[str, Exception] = {}
+    for result in results:
+        if not isinstance(result, dict):
+            continue
+        submission_id = str(result.get("submission_id"))
+        status = result.get("status", 200)
+        try:
+            status_code = int(status)
+        except (TypeError, ValueError):
+            failures[submission_id] = SalonDeliveryError(
+                f"Salon returned an unreadable status {status!r} for submission {submission_id}"
+            )
+            continue
+        if status_code < 400:
+            continue
+        message = f"Salon returned {status_code} for submission {submission_id}"
+        if status_code >= 500 or status_code in RETRYABLE_STATUSES:
+            failures[submission_id] = SalonDeliveryError(message)
+        else:
+            failures[submission_id] = PermanentDeliveryError(message)
+    return failures
+
+
+SendBatch = Callable[[list[SalonSubmission]], Awaitable[dict[str, Exception]]]
+
+
+class SubmissionBatcher:
+    """Groups submissions that arrive within a short window into one bulk send.
+
+    Each caller waits for the outcome of the batch its submission went out in;
+    a batch is sent when it reaches ``max_size`` or ``window_seconds`` after its
+    first submission, whichever comes first.
+    """
+
+    def __init__(self, send: SendBatch, *, window_seconds: float, max_size: int) -> None:
+        self._send = send
+        self.window_seconds = window_seconds
+        self.max_size = max_size
+        self._pending: list[tuple[SalonSubmission, asyncio.Future[None]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._in_flight: set[asyncio.Task[None]] = set()
+
+    async def submit(self, payload: SalonSubmission) -> None:
+        """Queue ``payload`` for the current batch and wait until that batch is delivered."""
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._pending.append((payload, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window_seconds, self._flush)
+        await future
+
+    async def drain(self) -> None:
+        """Send whatever is pending and wait for every batch still in flight."""
+        self._flush()
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # Callers cancelled while waiting (e.g. at shutdown) are left out of the batch.
+        batch = [(payload, future) for payload, future in self._pending if not future.done()]
+        self._pending = []
+        if not batch:
+            return
+        task = asyncio.create_task(self._deliver(batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _deliver(self, batch: list[tuple[SalonSubmission, asyncio.Future[None]]]) -> None:
+        try:
+            failures = await self._send([payload for payload, _ in batch])
+        except Exception as exc:  # noqa: BLE001 - the whole batch shares the outcome
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for payload, future in batch:
+            if future.done():
+                continue
+            failure = failures.get(payload.submission_id)
+            if failure is None:
+                future.set_result(None)
+            else:
+                future.set_exception(failure)
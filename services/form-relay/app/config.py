@@ -1,17 +1,20 @@
 """Configuration management for the form relay service."""
 from __future__ import annotations
 
+import ipaddress
 import json
 from functools import lru_cache
 from pathlib import Path
-from typing import List
-from urllib.parse import urlparse
+from typing import Annotated, List
 
-from pydantic import Field, computed_field, field_validator, model_validator
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic import Field, PrivateAttr, field_validator, model_validator
+from pydantic_settings import BaseSettings, NoDecode, SettingsConfigDict
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 DEFAULT_ALLOWED_ORIGINS_PATH = BASE_DIR / "allowed-origins.json"
+DEFAULT_QUEUE_PATH = BASE_DIR / "data" / "submissions.sqlite3"
+DEFAULT_SPAM_SAMPLE_PATH = BASE_DIR / "data" / "spam-samples.jsonl"
+DEFAULT_UPLOAD_DIR = BASE_DIR / "data" / "uploads"
 
 
 class Settings(BaseSettings):
@@ -19,9 +22,11 @@ class Settings(BaseSettings):
 
     service_name: str = Field(default="form-relay")
     log_level: str = Field(default="INFO")
+    log_sample_rate: float = Field(default=1.0, ge=0.0, le=1.0)
 
-    allowed_origins: List[str] = Field(default_factory=list)
+    allowed_origins: Annotated[List[str], NoDecode] = Field(default_factory=list)
     allowed_origins_file: str | None = Field(default=None)
+    allowed_origins_reload_seconds: float = Field(default=5.0, ge=0)
 
     sentry_dsn: str | None = Field(default=None)
     sentry_environment: str = Field(default="development")
@@ -31,6 +36,71 @@ class Settings(BaseSettings):
     salon_forwarding_enabled: bool = Field(default=False)
     salon_endpoint_url: str | None = Field(default=None)
     salon_auth_token: str | None = Field(default=None)
+    salon_timeout_seconds: float = Field(default=10.0, gt=0)
+    salon_connect_timeout_seconds: float = Field(default=3.0, gt=0)
+    salon_max_connections: int = Field(default=20, ge=1)
+    salon_batch_enabled: bool = Field(default=False)
+    salon_batch_endpoint_url: str | None = Field(default=None)
+    salon_batch_window_ms: float = Field(default=50.0, gt=0)
+    salon_batch_max_size: int = Field(default=50, ge=1)
+
+    submission_max_body_bytes: int = Field(default=256 * 1024, ge=1)
+
+    rate_limit_enabled: bool = Field(default=True)
+    rate_limit_per_minute: float = Field(default=6.0, gt=0)
+    rate_limit_burst: int = Field(default=5, ge=1)
+    rate_limit_redis_url: str | None = Field(default=None)
+    # Behind a load balancer, list it here: otherwise every caller is keyed by the balancer's address
+    # and they all share one rate-limit bucket.
+    trusted_proxies: Annotated[List[str], NoDecode] = Field(default_factory=list)
+
+    form_schemas_dir: str | None = Field(default=None)
+
+    spam_filter_enabled: bool = Field(default=True)
+    spam_filter_stages: Annotated[List[str], NoDecode] = Field(
+        default_factory=lambda: ["honeypot", "fill_time", "lengths", "links", "classifier"]
+    )
+    spam_honeypot_fields: Annotated[List[str], NoDecode] = Field(
+        default_factory=lambda: ["_gotcha", "_honeypot", "bot_field"]
+    )
+    spam_min_fill_seconds: float = Field(default=3.0, ge=0)
+    spam_max_field_length: int = Field(default=5000, ge=1)
+    spam_max_links: int = Field(default=3, ge=0)
+    spam_classifier_threshold: float = Field(default=0.9, gt=0.0, le=1.0)
+    spam_classifier_path: str | None = Field(default=None)
+    spam_sample_rate: float = Field(default=0.1, ge=0.0, le=1.0)
+    spam_sample_path: str | None = Field(default=str(DEFAULT_SPAM_SAMPLE_PATH))
+
+    uploads_enabled: bool = Field(default=True)
+    upload_dir: str = Field(default=str(DEFAULT_UPLOAD_DIR))
+    upload_max_file_bytes: int = Field(default=10 * 1024 * 1024, ge=1)
+    upload_max_total_bytes: int = Field(default=25 * 1024 * 1024, ge=1)
+    upload_max_files: int = Field(default=5, ge=1)
+    upload_max_field_bytes: int = Field(default=64 * 1024, ge=1)
+    upload_allowed_content_types: Annotated[List[str], NoDecode] = Field(default_factory=list)
+    upload_public_base_url: str | None = Field(default=None)
+    upload_retention_seconds: float = Field(default=30 * 24 * 3600, ge=0)
+
+    metrics_enabled: bool = Field(default=False)
+    metrics_auth_token: str | None = Field(default=None)
+    metrics_max_series: int = Field(default=1000, ge=1)
+    metrics_multiprocess_dir: str | None = Field(default=None)
+    metrics_flush_seconds: float = Field(default=5.0, gt=0)
+
+    dedupe_enabled: bool = Field(default=True)
+    dedupe_window_seconds: float = Field(default=120.0, gt=0)
+    dedupe_max_entries: int = Field(default=100_000, ge=1)
+
+    delivery_queue_path: str = Field(default=str(DEFAULT_QUEUE_PATH))
+    delivery_workers: int = Field(default=4, ge=1)
+    delivery_max_attempts: int = Field(default=10, ge=1)
+    delivery_backoff_base_seconds: float = Field(default=2.0, gt=0)
+    delivery_backoff_max_seconds: float = Field(default=900.0, gt=0)
+    delivery_lease_seconds: float = Field(default=120.0, gt=0)
+    delivery_poll_interval_seconds: float = Field(default=1.0, gt=0)
+    delivery_retention_seconds: float = Field(default=7 * 24 * 3600, ge=0)
+
+    _allowed_origins_path: Path | None = PrivateAttr(default=None)
 
     model_config = SettingsConfigDict(
         env_prefix="FORM_RELAY_",
@@ -38,15 +108,30 @@ class Settings(BaseSettings):
         extra="ignore",
     )
 
-    @field_validator("allowed_origins", mode="before")
+    @field_validator(
+        "allowed_origins",
+        "spam_filter_stages",
+        "spam_honeypot_fields",
+        "upload_allowed_content_types",
+        "trusted_proxies",
+        mode="before",
+    )
     @classmethod
     def parse_allowed_origins(cls, value: str | list[str]) -> list[str]:
-        """Allow comma-separated values for origins in environment variables."""
+        """Allow comma-separated values for list settings in environment variables."""
         if isinstance(value, str):
             items = [item.strip() for item in value.split(",") if item.strip()]
             return items
         return value
 
+    @field_validator("trusted_proxies")
+    @classmethod
+    def validate_trusted_proxies(cls, value: list[str]) -> list[str]:
+        """Reject proxy entries that are not IP addresses or CIDR ranges."""
+        for item in value:
+            ipaddress.ip_network(item, strict=False)
+        return value
+
     @model_validator(mode="after")
     def populate_allowed_origins_from_file(self) -> "Settings":
         """Load allowed origins from JSON if not provided via env."""
@@ -69,19 +154,13 @@ class Settings(BaseSettings):
 
         if isinstance(data, list):
             self.allowed_origins = [str(item) for item in data if item]
+            self._allowed_origins_path = path
         return self
 
-    @computed_field(return_type=list[str])
     @property
-    def allowed_hosts(self) -> list[str]:
-        """Return normalized hostnames derived from allowed origins."""
-        hosts: list[str] = []
-        for origin in self.allowed_origins:
-            parsed = urlparse(origin)
-            host = parsed.hostname or origin
-            if host:
-                hosts.append(host.lower())
-        return sorted(set(hosts))
+    def allowed_origins_path(self) -> Path | None:
+        """Return the file the allowed origins were loaded from, if they did not come from env."""
+        return self._allowed_origins_path
 
 
 @lru_cache
@@ -0,0 +1,80 @@
+"""Time-windowed deduplication of repeated form submissions."""
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, dict):
+        return {str(key).strip().casefold(): _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    return value
+
+
+def submission_fingerprint(
+    hostname: str, form_name: str | None, fields: Dict[str, Any], attachment_digests: Iterable[str] = ()
+) -> bytes:
+    """Hash the site, form and fields, ignoring key case, value case and whitespace differences.
+
+    Uploads add the SHA-256 of each attached file, so resending the same form
+    with a different file is not mistaken for a double-submit.
+    """
+    parts: list[Any] = [hostname, form_name or "", _normalize(fields)]
+    digests = sorted(attachment_digests)
+    if digests:
+        parts.append(digests)
+    canonical = json.dumps(
+        parts,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.blake2b(canonical.encode(), digest_size=16).digest()
+
+
+class SubmissionDeduplicator:
+    """Remembers recent fingerprints and the ``submission_id`` each was accepted as.
+
+    Entries sit in insertion order with a fixed window, so the oldest entry is
+    always the first to expire: lookups pop expired entries off the front, and
+    ``max_entries`` caps memory by evicting the oldest when a spike fills it.
+    """
+
+    def __init__(self, *, window_seconds: float, max_entries: int) -> None:
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[bytes, tuple[str, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def seen(self, fingerprint: bytes) -> str | None:
+        """Return the original ``submission_id`` if ``fingerprint`` was accepted within the window."""
+        now = time.monotonic()
+        self._expire(now)
+        entry = self._entries.get(fingerprint)
+        return entry[0] if entry is not None else None
+
+    def remember(self, fingerprint: bytes, submission_id: str) -> None:
+        """Record an accepted submission."""
+        now = time.monotonic()
+        self._entries[fingerprint] = (submission_id, now + self.window_seconds)
+        self._entries.move_to_end(fingerprint)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _expire(self, now: float) -> None:
+        entries = self._entries
+        while entries:
+            _, (_, expires_at) = next(iter(entries.items()))
+            if expires_at > now:
+                return
+            entries.popitem(last=False)
@@ -0,0 +1,283 @@
+"""Durable submission queue and background delivery workers."""
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, NamedTuple
+
+from loguru import logger
+
+from .clients.salon import PermanentDeliveryError, SalonSubmission
+from .config import Settings
+from .metrics import RelayMetrics
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    submission_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS submissions_due ON submissions (status, next_attempt_at);
+"""
+
+Deliver = Callable[[SalonSubmission], Awaitable[None]]
+
+
+class QueuedSubmission(NamedTuple):
+    """A submission claimed for a delivery attempt."""
+
+    submission_id: str
+    payload: SalonSubmission
+    attempts: int
+
+
+class SubmissionQueue:
+    """SQLite (WAL) store of accepted submissions and their delivery state.
+
+    Rows move from ``pending`` to ``delivered`` or ``dead``. A claim pushes
+    ``next_attempt_at`` out by a lease instead of marking the row in flight, so
+    a row whose worker died (or whose process restarted) becomes due again on
+    its own. Delivered rows are kept for the retention window so a repeated
+    ``submission_id`` is recognised and not delivered twice.
+    """
+
+    def __init__(self, path: str | Path, *, retention_seconds: float) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL survives a process crash; only an OS crash can lose the last commits.
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(_SCHEMA)
+
+    def enqueue(self, payload: SalonSubmission) -> bool:
+        """Persist ``payload``; return ``False`` when its ``submission_id`` is already queued."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO submissions "
+                "(submission_id, payload, next_attempt_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (payload.submission_id, payload.to_json(), now, now, now),
+            )
+        return cursor.rowcount == 1
+
+    def claim(self, lease_seconds: float) -> QueuedSubmission | None:
+        """Take the oldest due submission for one attempt, or ``None`` if nothing is due."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                """
+                UPDATE submissions
+                SET attempts = attempts + 1, next_attempt_at = ?, updated_at = ?
+                WHERE submission_id = (
+                    SELECT submission_id FROM submissions
+                    WHERE status = 'pending' AND next_attempt_at <= ?
+                    ORDER BY next_attempt_at LIMIT 1
+                )
+                RETURNING submission_id, payload, attempts
+                """,
+                (now + lease_seconds, now, now),
+            ).fetchone()
+        if row is None:
+            return None
+        submission_id, payload, attempts = row
+        return QueuedSubmission(submission_id, SalonSubmission(**json.loads(payload)), attempts)
+
+    def mark_delivered(self, submission_id: str) -> None:
+        """Record a successful delivery."""
+        self._set(submission_id, "status = 'delivered', last_error = NULL", ())
+
+    def retry_later(self, submission_id: str, delay: float, error: str) -> None:
+        """Schedule another attempt ``delay`` seconds from now."""
+        self._set(submission_id, "next_attempt_at = ?, last_error = ?", (time.time() + delay, error))
+
+    def dead_letter(self, submission_id: str, error: str) -> None:
+        """Stop retrying; the row stays in the store for inspection and replay."""
+        self._set(submission_id, "status = 'dead', last_error = ?", (error,))
+
+    def requeue_dead(self) -> int:
+        """Move every dead-lettered submission back to ``pending``; return how many moved."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE submissions SET status = 'pending', attempts = 0, next_attempt_at = ?, updated_at = ? "
+                "WHERE status = 'dead'",
+                (now, now),
+            )
+        return cursor.rowcount
+
+    def counts(self) -> dict[str, int]:
+        """Return the number of stored submissions per status."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM submissions GROUP BY status").fetchall()
+        return {"pending": 0, "delivered": 0, "dead": 0, **dict(rows)}
+
+    def metric_families(self) -> Dict[str, Dict[str, Any]]:
+        """Queue depth per status as a gauge family for :mod:`app.metrics`."""
+        return {
+            "form_relay_queue_submissions": {
+                "type": "gauge",
+                "help": "Submissions stored in the delivery queue by status.",
+                "labels": ["status"],
+                "samples": [[[status], count] for status, count in self.counts().items()],
+            }
+        }
+
+    def purge_delivered(self) -> int:
+        """Drop delivered submissions older than the retention window."""
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM submissions WHERE status = 'delivered' AND updated_at < ?", (cutoff,)
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        """Close the underlying connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _set(self, submission_id: str, assignments: str, params: tuple) -> None:
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE submissions SET {assignments}, updated_at = ? WHERE submission_id = ?",
+                (*params, time.time(), submission_id),
+            )
+
+
+class DeliveryWorkers:
+    """Background tasks that drain the queue into ``deliver`` with retries and backoff."""
+
+    def __init__(
+        self, queue: SubmissionQueue, deliver: Deliver, settings: Settings, *, metrics: RelayMetrics | None = None
+    ) -> None:
+        self.queue = queue
+        self.deliver = deliver
+        self.metrics = metrics
+        self.concurrency = settings.delivery_workers
+        self.max_attempts = settings.delivery_max_attempts
+        self.backoff_base = settings.delivery_backoff_base_seconds
+        self.backoff_max = settings.delivery_backoff_max_seconds
+        self.lease_seconds = settings.delivery_lease_seconds
+        self.poll_interval = settings.delivery_poll_interval_seconds
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task[None]] = []
+        self._last_purge = 0.0
+        self._stopping = False
+
+    def start(self) -> None:
+        """Spawn the worker tasks on the running loop."""
+        self._stopping = False
+        self._tasks = [
+            asyncio.create_task(self._run(), name=f"salon-delivery-{index}")
+            for index in range(self.concurrency)
+        ]
+
+    def notify(self) -> None:
+        """Wake idle workers after a new submission was queued."""
+        self._wakeup.set()
+
+    async def stop(self) -> None:
+        """Cancel the workers; claimed but unfinished submissions are retried after their lease."""
+        # The flag also ends workers whose cancellation wait_for swallowed (Python < 3.12).
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def backoff(self, attempts: int) -> float:
+        """Exponential backoff with jitter for the attempt that just failed."""
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            # Cleared before claiming, so a notify() arriving after an empty claim is not lost.
+            self._wakeup.clear()
+            item = self.queue.claim(self.lease_seconds)
+            if item is None:
+                self._purge_if_due()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._attempt(item)
+
+    async def _attempt(self, item: QueuedSubmission) -> None:
+        started = time.perf_counter()
+        try:
+            await self.deliver(item.payload)
+        except asyncio.CancelledError:
+            raise
+        except PermanentDeliveryError as exc:
+            logger.error("Salon rejected submission {}; dead-lettered: {}", item.submission_id, exc)
+            self.queue.dead_letter(item.submission_id, str(exc))
+            self._record(item, "dead_lettered", started)
+        except Exception as exc:  # noqa: BLE001 - any other failure is retried
+            if item.attempts >= self.max_attempts:
+                logger.error(
+                    "Giving up on submission {} after {} attempts: {}", item.submission_id, item.attempts, exc
+                )
+                self.queue.dead_letter(item.submission_id, str(exc))
+                self._record(item, "dead_lettered", started)
+                return
+            delay = self.backoff(item.attempts)
+            logger.warning(
+                "Delivery of submission {} failed (attempt {}), retrying in {:.1f}s: {}",
+                item.submission_id,
+                item.attempts,
+                delay,
+                exc,
+            )
+            self.queue.retry_later(item.submission_id, delay, str(exc))
+            self._record(item, "retried", started)
+        else:
+            self.queue.mark_delivered(item.submission_id)
+            self._record(item, "delivered", started)
+
+    def _record(self, item: QueuedSubmission, result: str, started: float) -> None:
+        metrics = self.metrics
+        if metrics is None:
+            return
+        metrics.delivery_attempts.inc(result)
+        metrics.delivery_attempt_seconds.observe(time.perf_counter() - started, result)
+        if result == "delivered":
+            received_at = _received_at(item.payload)
+            if received_at is not None:
+                latency = (datetime.now(timezone.utc) - received_at).total_seconds()
+                metrics.delivery_latency_seconds.observe(max(latency, 0.0))
+
+    def _purge_if_due(self) -> None:
+        now = time.monotonic()
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        purged = self.queue.purge_delivered()
+        if purged:
+            logger.info("Purged {} delivered submissions past retention", purged)
+
+
+def _received_at(payload: SalonSubmission) -> datetime | None:
+    value = payload.metadata.get("received_at")
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
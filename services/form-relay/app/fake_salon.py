@@ -0,0 +1,225 @@
+"""Local stand-in for the Salon submissions API, for development, tests and benchmarks.
+
+Usage:
+    python -m app.fake_salon serve --port 9090 --latency-ms 20 --fail-rate 0.05
+    python -m app.fake_salon bench --submissions 5000 --concurrency 64 --latency-ms 20 [--batch]
+
+``serve`` runs the fake API; point ``FORM_RELAY_SALON_ENDPOINT_URL`` at
+``http://localhost:9090/submissions``. ``bench`` drives :class:`SalonClient`
+against an in-process fake and reports submissions per second.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Sequence
+
+import httpx
+from fastapi import FastAPI, Header, Response, status
+from pydantic import BaseModel
+
+from .clients.salon import SalonClient, SalonDeliveryError, SalonSubmission
+from .config import Settings
+
+
+class BulkSubmissions(BaseModel):
+    """Bulk request body."""
+
+    submissions: List[Dict[str, Any]]
+
+
+@dataclass(slots=True)
+class FakeSalonStats:
+    """What the fake has seen since it started."""
+
+    requests: int = 0
+    batches: int = 0
+    accepted: int = 0
+    duplicates: int = 0
+    failures: int = 0
+    submission_ids: set[str] = field(default_factory=set)
+    idempotency_keys: List[str | None] = field(default_factory=list)
+    batch_sizes: List[int] = field(default_factory=list)
+
+
+def create_fake_salon(
+    *,
+    latency_ms: float = 0.0,
+    fail_rate: float = 0.0,
+    seed: int | None = None,
+    statuses: Mapping[str, int] | None = None,
+) -> FastAPI:
+    """Build the fake app; ``fail_rate`` of submissions get a 503.
+
+    ``statuses`` answers particular submission ids with a fixed status, so
+    tests can script retryable and permanent failures.
+    """
+    app = FastAPI(title="Fake Salon")
+    stats = FakeSalonStats()
+    rng = random.Random(seed)
+    fixed = dict(statuses or {})
+    app.state.stats = stats
+
+    async def accept(submission_id: str) -> int:
+        if submission_id in fixed:
+            if fixed[submission_id] >= 400:
+                stats.failures += 1
+            return fixed[submission_id]
+        if rng.random() < fail_rate:
+            stats.failures += 1
+            return status.HTTP_503_SERVICE_UNAVAILABLE
+        if submission_id in stats.submission_ids:
+            stats.duplicates += 1
+        else:
+            stats.submission_ids.add(submission_id)
+            stats.accepted += 1
+        return status.HTTP_202_ACCEPTED
+
+    @app.post("/submissions")
+    async def submit(
+        payload: Dict[str, Any], response: Response, idempotency_key: str | None = Header(default=None)
+    ) -> Dict[str, Any]:
+        stats.requests += 1
+        stats.idempotency_keys.append(idempotency_key)
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        submission_id = idempotency_key or str(payload.get("submission_id"))
+        response.status_code = await accept(submission_id)
+        return {"submission_id": submission_id, "status": response.status_code}
+
+    @app.post("/submissions/batch")
+    async def submit_batch(payload: BulkSubmissions) -> Dict[str, Any]:
+        stats.requests += 1
+        stats.batches += 1
+        stats.batch_sizes.append(len(payload.submissions))
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        results = []
+        for submission in payload.submissions:
+            submission_id = str(submission.get("submission_id"))
+            results.append({"submission_id": submission_id, "status": await accept(submission_id)})
+        return {"results": results}
+
+    @app.get("/stats")
+    async def get_stats() -> Dict[str, int]:
+        return {
+            "requests": stats.requests,
+            "batches": stats.batches,
+            "accepted": stats.accepted,
+            "duplicates": stats.duplicates,
+            "failures": stats.failures,
+        }
+
+    return app
+
+
+def _submission() -> SalonSubmission:
+    return SalonSubmission(
+        submission_id=str(uuid.uuid4()),
+        origin="https://bench.example.com",
+        hostname="bench.example.com",
+        form_name="contact-us",
+        client_ip="203.0.113.7",
+        user_agent="bench",
+        referer=None,
+        fields={"name": "Ada Lovelace", "email": "ada@example.com", "message": "Hello"},
+        metadata={"site_id": "bench"},
+    )
+
+
+async def run_bench(
+    *, submissions: int, concurrency: int, latency_ms: float, batch: bool, window_ms: float, batch_size: int
+) -> Dict[str, float]:
+    """Forward ``submissions`` through :class:`SalonClient` with ``concurrency`` callers."""
+    fake = create_fake_salon(latency_ms=latency_ms)
+    settings = Settings(
+        salon_forwarding_enabled=True,
+        salon_endpoint_url="http://fake-salon/submissions",
+        salon_batch_enabled=batch,
+        salon_batch_window_ms=window_ms,
+        salon_batch_max_size=batch_size,
+        salon_max_connections=concurrency,
+    )
+    client = SalonClient(settings, transport=httpx.ASGITransport(app=fake))
+    payloads = [_submission() for _ in range(submissions)]
+    failed = 0
+
+    async def worker() -> None:
+        nonlocal failed
+        while payloads:
+            try:
+                await client.forward(payloads.pop())
+            except SalonDeliveryError:
+                failed += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await client.aclose()
+    stats: FakeSalonStats = fake.state.stats
+    return {
+        "submissions": submissions,
+        "seconds": round(elapsed, 3),
+        "submissions_per_second": round(submissions / elapsed, 1),
+        "http_requests": stats.requests,
+        "failed": failed,
+    }
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Fake Salon API and delivery benchmark.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Run the fake Salon API.")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=9090)
+    serve.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every request.")
+    serve.add_argument("--fail-rate", type=float, default=0.0, help="Share of submissions answered with 503.")
+
+    bench = commands.add_parser("bench", help="Measure SalonClient throughput against an in-process fake.")
+    bench.add_argument("--submissions", type=int, default=2000)
+    bench.add_argument("--concurrency", type=int, default=32, help="Concurrent callers (delivery workers).")
+    bench.add_argument("--latency-ms", type=float, default=10.0)
+    bench.add_argument("--batch", action="store_true", help="Enable micro-batching.")
+    bench.add_argument("--window-ms", type=float, default=20.0)
+    bench.add_argument("--batch-size", type=int, default=50)
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Command-line entrypoint."""
+    args = parse_args(argv)
+    if args.command == "serve":
+        import uvicorn
+
+        uvicorn.run(
+            create_fake_salon(latency_ms=args.latency_ms, fail_rate=args.fail_rate),
+            host=args.host,
+            port=args.port,
+        )
+        return
+    result = asyncio.run(
+        run_bench(
+            submissions=args.submissions,
+            concurrency=args.concurrency,
+            latency_ms=args.latency_ms,
+            batch=args.batch,
+            window_ms=args.window_ms,
+            batch_size=args.batch_size,
+        )
+    )
+    for key, value in result.items():
+        print(f"{key:>24}: {value}")
+
+
+if __name__ == "__main__":
+    main()
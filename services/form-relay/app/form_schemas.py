@@ -0,0 +1,313 @@
+"""Per-site form schemas compiled into validators for submission fields."""
+from __future__ import annotations
+
+import json
+import math
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple
+
+from loguru import logger
+
+SCHEMA_FILENAME = "form-schemas.json"
+ANY_FORM = "*"
+DEFAULT_MAX_LENGTH = 5000
+
+EMAIL_PATTERN = re.compile(r"[^@\s]+@[^@\s.]+(?:\.[^@\s.]+)+")
+PHONE_PATTERN = re.compile(r"\+?[\d\s().\-/]+(?:\s*(?:x|ext\.?)\s*\d{1,6})?", re.I)
+URL_PATTERN = re.compile(r"https?://[^\s/$.?#][^\s]*", re.I)
+BOOLEAN_STRINGS = frozenset({"true", "false", "on", "off", "yes", "no", "1", "0"})
+
+
+class FormSchemaError(ValueError):
+    """A schema file or form definition is malformed."""
+
+
+class FieldIssue(NamedTuple):
+    """One problem with a submitted field."""
+
+    field: str
+    type: str
+    message: str
+
+
+# A compiled check returns a (type, message) pair when the value is unacceptable.
+Check = Callable[[Any], "tuple[str, str] | None"]
+
+
+def _is_blank(value: Any) -> bool:
+    return value is None or value == [] or (isinstance(value, str) and not value.strip())
+
+
+def _serialized_length(value: Any) -> int:
+    return len(json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str))
+
+
+def _length_check(max_length: int, min_length: int) -> Check:
+    def check(value: Any) -> tuple[str, str] | None:
+        size = len(value)
+        if size > max_length:
+            return "string_too_long", f"must be at most {max_length} characters"
+        if size < min_length:
+            return "string_too_short", f"must be at least {min_length} characters"
+        return None
+
+    return check
+
+
+def _string_check(value: Any) -> tuple[str, str] | None:
+    if not isinstance(value, str):
+        return "string_type", "must be a string"
+    return None
+
+
+def _pattern_check(pattern: re.Pattern[str], error_type: str, message: str) -> Check:
+    fullmatch = pattern.fullmatch
+
+    def check(value: Any) -> tuple[str, str] | None:
+        if fullmatch(value.strip()) is None:
+            return error_type, message
+        return None
+
+    return check
+
+
+def _phone_digits_check(value: Any) -> tuple[str, str] | None:
+    digits = sum(character.isdigit() for character in value)
+    if not 7 <= digits <= 20:
+        return "phone_format", "must be a valid phone number"
+    return None
+
+
+def _number_check(integer: bool, minimum: float | None, maximum: float | None) -> Check:
+    error = ("int_type", "must be an integer") if integer else ("number_type", "must be a number")
+
+    def check(value: Any) -> tuple[str, str] | None:
+        # HTML forms post numbers as strings, so numeric strings are accepted.
+        if isinstance(value, str):
+            try:
+                value = int(value.strip()) if integer else float(value)
+            except ValueError:
+                return error
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            return error
+        if isinstance(value, float) and (not math.isfinite(value) or (integer and not value.is_integer())):
+            return error
+        if minimum is not None and value < minimum:
+            return "less_than_minimum", f"must be at least {minimum:g}"
+        if maximum is not None and value > maximum:
+            return "greater_than_maximum", f"must be at most {maximum:g}"
+        return None
+
+    return check
+
+
+def _boolean_check(value: Any) -> tuple[str, str] | None:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str) and value.strip().lower() in BOOLEAN_STRINGS:
+        return None
+    return "bool_type", "must be a boolean"
+
+
+def _choices_check(choices: frozenset[str]) -> Check:
+    def check(value: Any) -> tuple[str, str] | None:
+        values = value if isinstance(value, list) else [value]
+        if any(not isinstance(item, str) or item not in choices for item in values):
+            return "enum", f"must be one of: {', '.join(sorted(choices))}"
+        return None
+
+    return check
+
+
+def _compile_field(form: str, name: str, spec: Dict[str, Any]) -> tuple[bool, List[Check]]:
+    """Turn one field definition into its required flag and ordered checks."""
+    if not isinstance(spec, dict):
+        raise FormSchemaError(f"Form {form!r} field {name!r} must be an object")
+    kind = spec.get("type", "string")
+    checks: List[Check] = []
+    if kind in {"string", "email", "phone", "url"}:
+        checks.append(_string_check)
+        default_max = 254 if kind == "email" else 64 if kind == "phone" else DEFAULT_MAX_LENGTH
+        checks.append(_length_check(int(spec.get("max_length", default_max)), int(spec.get("min_length", 0))))
+        if kind == "email":
+            checks.append(_pattern_check(EMAIL_PATTERN, "email_format", "must be a valid email address"))
+        elif kind == "phone":
+            checks.append(_pattern_check(PHONE_PATTERN, "phone_format", "must be a valid phone number"))
+            checks.append(_phone_digits_check)
+        elif kind == "url":
+            checks.append(_pattern_check(URL_PATTERN, "url_format", "must be an http(s) URL"))
+        if "pattern" in spec:
+            try:
+                pattern = re.compile(spec["pattern"])
+            except re.error as exc:
+                raise FormSchemaError(f"Form {form!r} field {name!r} has an invalid pattern: {exc}") from exc
+            checks.append(_pattern_check(pattern, "string_pattern_mismatch", "has an invalid format"))
+    elif kind in {"number", "integer"}:
+        checks.append(_number_check(kind == "integer", spec.get("minimum"), spec.get("maximum")))
+    elif kind == "boolean":
+        checks.append(_boolean_check)
+    elif kind != "choice":
+        raise FormSchemaError(f"Form {form!r} field {name!r} has unknown type {kind!r}")
+    if "choices" in spec or kind == "choice":
+        choices = spec.get("choices")
+        if not isinstance(choices, list) or not choices:
+            raise FormSchemaError(f"Form {form!r} field {name!r} needs a non-empty list of choices")
+        checks.append(_choices_check(frozenset(str(choice) for choice in choices)))
+    return bool(spec.get("required", False)), checks
+
+
+class CompiledForm:
+    """Validator for one form, built once from its schema.
+
+    Calling it runs only precompiled closures and regexes: required fields
+    first, then each declared field's checks in order (type before length
+    before format, so the cheap ones reject first), stopping at the first
+    problem per field.
+    """
+
+    __slots__ = ("name", "required", "checks", "additional_fields", "max_additional_length")
+
+    def __init__(self, name: str, spec: Dict[str, Any]) -> None:
+        fields = spec.get("fields")
+        if not isinstance(fields, dict) or not fields:
+            raise FormSchemaError(f"Form {name!r} must declare a non-empty 'fields' object")
+        self.name = name
+        self.additional_fields = bool(spec.get("additional_fields", True))
+        self.max_additional_length = int(spec.get("max_additional_length", DEFAULT_MAX_LENGTH))
+        required: List[str] = []
+        checks: Dict[str, List[Check]] = {}
+        for field_name, field_spec in fields.items():
+            is_required, field_checks = _compile_field(name, field_name, field_spec)
+            if is_required:
+                required.append(field_name)
+            checks[field_name] = field_checks
+        self.required = tuple(required)
+        self.checks = checks
+
+    def __call__(self, fields: Dict[str, Any]) -> List[FieldIssue]:
+        issues: List[FieldIssue] = []
+        for name in self.required:
+            if _is_blank(fields.get(name)):
+                issues.append(FieldIssue(name, "missing", "is required"))
+        checks = self.checks
+        for name, value in fields.items():
+            if _is_blank(value):
+                continue
+            field_checks = checks.get(name)
+            if field_checks is None:
+                if not self.additional_fields:
+                    issues.append(FieldIssue(name, "extra_forbidden", "is not a field of this form"))
+                elif isinstance(value, str):
+                    if len(value) > self.max_additional_length:
+                        issues.append(
+                            FieldIssue(
+                                name, "string_too_long", f"must be at most {self.max_additional_length} characters"
+                            )
+                        )
+                elif _serialized_length(value) > self.max_additional_length:
+                    # Lists and objects are bounded too, by the JSON they would add to the queued payload.
+                    issues.append(
+                        FieldIssue(
+                            name, "too_long", f"must be at most {self.max_additional_length} characters as JSON"
+                        )
+                    )
+                continue
+            for check in field_checks:
+                problem = check(value)
+                if problem is not None:
+                    issues.append(FieldIssue(name, *problem))
+                    break
+        return issues
+
+
+def validation_errors(issues: Iterable[FieldIssue]) -> List[Dict[str, Any]]:
+    """Shape issues like FastAPI's 422 ``detail`` entries; values are not echoed back."""
+    return [
+        {
+            "type": issue.type,
+            "loc": ("body", "form_name") if issue.type == "unknown_form" else ("body", "fields", issue.field),
+            "msg": f"{issue.field} {issue.message}",
+        }
+        for issue in issues
+    ]
+
+
+class FormSchemaRegistry:
+    """Compiled validators keyed by (hostname, form name).
+
+    Sites opt in by placing ``form-schemas.json`` in their workspace next to
+    ``site-config.json``::
+
+        {
+          "hostnames": ["example.com", "www.example.com"],
+          "allow_unknown_forms": false,
+          "forms": {"contact": {"fields": {"email": {"type": "email", "required": true}}}}
+        }
+
+    A form named ``"*"`` applies to any form without its own schema. Sites
+    without a file, and unknown forms on sites that allow them, are not
+    validated beyond the request model.
+    """
+
+    def __init__(self) -> None:
+        self._forms: Dict[tuple[str, str], CompiledForm] = {}
+        self._strict_hosts: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._forms)
+
+    def add_site(self, spec: Dict[str, Any], *, source: str = "<schema>") -> None:
+        """Compile every form of one site's schema document."""
+        hostnames = spec.get("hostnames")
+        forms = spec.get("forms")
+        if not isinstance(hostnames, list) or not hostnames:
+            raise FormSchemaError(f"{source}: 'hostnames' must be a non-empty list")
+        if not isinstance(forms, dict):
+            raise FormSchemaError(f"{source}: 'forms' must be an object")
+        compiled = {name: CompiledForm(name, form_spec) for name, form_spec in forms.items()}
+        strict = not spec.get("allow_unknown_forms", True)
+        for hostname in hostnames:
+            host = str(hostname).strip().lower()
+            for name, form in compiled.items():
+                self._forms[(host, name)] = form
+            if strict:
+                self._strict_hosts.add(host)
+
+    def knows_form(self, hostname: str, form_name: str | None) -> bool:
+        """Whether the site declares a schema for this exact form name (``"*"`` does not count)."""
+        return (hostname, form_name or "") in self._forms
+
+    def validator(self, hostname: str, form_name: str | None) -> CompiledForm | None:
+        """The validator for a form, falling back to the site's ``"*"`` form."""
+        forms = self._forms
+        return forms.get((hostname, form_name or "")) or forms.get((hostname, ANY_FORM))
+
+    def validate(self, hostname: str, form_name: str | None, fields: Dict[str, Any]) -> List[FieldIssue]:
+        """Return every problem with ``fields`` for this site and form; empty when acceptable."""
+        form = self.validator(hostname, form_name)
+        if form is not None:
+            return form(fields)
+        if hostname in self._strict_hosts:
+            return [FieldIssue("form_name", "unknown_form", f"form {form_name!r} is not accepted by this site")]
+        return []
+
+    @classmethod
+    def from_directory(cls, root: str | Path) -> "FormSchemaRegistry":
+        """Load ``*/form-schemas.json`` from a directory of site workspaces."""
+        return cls.from_files(sorted(Path(root).expanduser().glob(f"*/{SCHEMA_FILENAME}")))
+
+    @classmethod
+    def from_files(cls, paths: Iterable[Path]) -> "FormSchemaRegistry":
+        """Load and compile the given schema files."""
+        registry = cls()
+        for path in paths:
+            try:
+                spec = json.loads(path.read_text())
+            except (OSError, ValueError) as exc:
+                raise FormSchemaError(f"Unable to read form schemas at {path}: {exc}") from exc
+            if not isinstance(spec, dict):
+                raise FormSchemaError(f"{path} must contain a JSON object")
+            registry.add_site(spec, source=str(path))
+        logger.info("Loaded {} form schemas", len(registry))
+        return registry
@@ -0,0 +1,300 @@
+"""In-process counters and histograms exposed in the Prometheus text format."""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Sequence
+
+from loguru import logger
+
+# ``{name: {"type", "help", "labels", ["buckets"], "samples": [[label values, value]]}}``, JSON-safe
+# so worker snapshots can be written to disk and merged by whichever worker is scraped.
+Families = Dict[str, Dict[str, Any]]
+Collector = Callable[[], Families]
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OVERFLOW_LABEL = "other"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DELIVERY_LATENCY_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0, 21600.0)
+
+
+class Counter:
+    """Monotonic totals per label set.
+
+    Updates are plain dict operations on the event loop thread, so no lock is
+    taken. Once ``max_series`` label sets exist, new ones are folded into a
+    single ``other`` series: hostnames and form names come from callers, and
+    must not be able to grow memory or scrape size without bound.
+    """
+
+    __slots__ = ("name", "help", "labels", "max_series", "_values", "_overflow")
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], *, max_series: int) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.max_series = max_series
+        self._values: dict[tuple[str, ...], float] = {}
+        self._overflow = (OVERFLOW_LABEL,) * len(self.labels)
+
+    def inc(self, *values: str, amount: float = 1.0) -> None:
+        """Add ``amount`` to the series for ``values``."""
+        current = self._values.get(values)
+        if current is None:
+            if len(self._values) >= self.max_series:
+                values = self._overflow
+            current = self._values.get(values, 0.0)
+        self._values[values] = current + amount
+
+    def value(self, *values: str) -> float:
+        """Current total for one label set."""
+        return self._values.get(values, 0.0)
+
+    def family(self) -> Dict[str, Any]:
+        """This counter in snapshot form."""
+        return {
+            "type": "counter",
+            "help": self.help,
+            "labels": list(self.labels),
+            "samples": [[list(values), total] for values, total in self._values.items()],
+        }
+
+
+class Histogram:
+    """Bucketed observations per label set, with the same series cap as :class:`Counter`.
+
+    Each series is one flat list: a count per bucket (the last one is
+    ``+Inf``) followed by the running sum, so an observation is a bisect and
+    two list updates.
+    """
+
+    __slots__ = ("name", "help", "labels", "buckets", "max_series", "_series", "_overflow")
+
+    def __init__(
+        self, name: str, help: str, labels: Sequence[str], *, buckets: Sequence[float], max_series: int
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self.max_series = max_series
+        self._series: dict[tuple[str, ...], list[float]] = {}
+        self._overflow = (OVERFLOW_LABEL,) * len(self.labels)
+
+    def observe(self, amount: float, *values: str) -> None:
+        """Record one observation of ``amount`` for ``values``."""
+        series = self._series.get(values)
+        if series is None:
+            if len(self._series) >= self.max_series:
+                values = self._overflow
+            series = self._series.get(values)
+            if series is None:
+                series = self._series[values] = [0.0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, amount)] += 1
+        series[-1] += amount
+
+    def family(self) -> Dict[str, Any]:
+        """This histogram in snapshot form."""
+        return {
+            "type": "histogram",
+            "help": self.help,
+            "labels": list(self.labels),
+            "buckets": list(self.buckets),
+            "samples": [[list(values), list(series)] for values, series in self._series.items()],
+        }
+
+
+class MetricsRegistry:
+    """Owns a process's metrics and renders them.
+
+    Counters and histograms, plus collectors registered with ``aggregate=True``,
+    make up the snapshot that is summed across workers. Collectors registered
+    with ``aggregate=False`` report state every worker shares (such as the
+    queue, which is one SQLite file) and are evaluated only when rendering.
+    """
+
+    def __init__(self, *, max_series: int = 1000) -> None:
+        self.max_series = max_series
+        self._metrics: list[Counter | Histogram] = []
+        self._collectors: list[Collector] = []
+        self._live_collectors: list[Collector] = []
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        """Create and register a counter."""
+        metric = Counter(name, help, labels, max_series=self.max_series)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self, name: str, help: str, labels: Sequence[str] = (), *, buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Create and register a histogram."""
+        metric = Histogram(name, help, labels, buckets=buckets, max_series=self.max_series)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Collector, *, aggregate: bool) -> None:
+        """Register a callable that reports families computed at collection time."""
+        (self._collectors if aggregate else self._live_collectors).append(collector)
+
+    def snapshot(self) -> Families:
+        """Everything this process contributes to a multi-worker total."""
+        families: Families = {metric.name: metric.family() for metric in self._metrics}
+        for collector in self._collectors:
+            families.update(collector())
+        return families
+
+    def live(self) -> Families:
+        """Shared state, read once by the worker being scraped."""
+        families: Families = {}
+        for collector in self._live_collectors:
+            families.update(collector())
+        return families
+
+
+class SnapshotDirectory:
+    """Lets any worker serve totals for all of them (``FORM_RELAY_METRICS_MULTIPROCESS_DIR``).
+
+    Each worker rewrites ``<pid>.json`` every ``interval`` seconds and on
+    shutdown; a scrape merges the other workers' files with its own live
+    snapshot. Files of workers that exited keep contributing their final
+    totals, so clear the directory when the service is redeployed.
+    """
+
+    def __init__(self, path: str | Path, registry: MetricsRegistry, *, interval: float) -> None:
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.registry = registry
+        self.interval = interval
+        self.file = self.path / f"{os.getpid()}.json"
+
+    def write(self) -> None:
+        """Publish this worker's current snapshot atomically."""
+        temporary = self.file.with_suffix(".tmp")
+        try:
+            temporary.write_text(json.dumps(self.registry.snapshot(), separators=(",", ":")))
+            os.replace(temporary, self.file)
+        except OSError as exc:
+            logger.warning("Unable to write metrics snapshot {}: {}", self.file, exc)
+
+    def collect(self) -> Families:
+        """Sum this worker's snapshot with every other worker's last published one."""
+        snapshots = [self.registry.snapshot()]
+        for path in self.path.glob("*.json"):
+            if path == self.file:
+                continue
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue  # Being replaced or from a crashed write; the next scrape picks it up.
+        return merge(snapshots)
+
+    async def run(self) -> None:
+        """Write the snapshot every ``interval`` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(self.interval)
+            self.write()
+
+
+def merge(snapshots: Iterable[Families]) -> Families:
+    """Sum counters and histogram buckets with the same name and labels across snapshots."""
+    merged: Families = {}
+    totals: dict[str, dict[tuple[str, ...], Any]] = {}
+    for snapshot in snapshots:
+        for name, family in snapshot.items():
+            if name not in merged:
+                merged[name] = {key: value for key, value in family.items() if key != "samples"}
+                totals[name] = {}
+            series = totals[name]
+            histogram = family["type"] == "histogram"
+            for values, sample in family["samples"]:
+                key = tuple(values)
+                current = series.get(key)
+                if current is None:
+                    series[key] = list(sample) if histogram else sample
+                elif histogram:
+                    series[key] = [left + right for left, right in zip(current, sample)]
+                else:
+                    series[key] = current + sample
+    for name, family in merged.items():
+        family["samples"] = [[list(key), sample] for key, sample in totals[name].items()]
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render(families: Families) -> str:
+    """Format families in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for name in sorted(families):
+        family = families[name]
+        kind = family["type"]
+        names = family["labels"]
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {kind}")
+        for values, sample in sorted(family["samples"]):
+            if kind != "histogram":
+                lines.append(f"{name}{_labels(names, values)} {_number(sample)}")
+                continue
+            cumulative = 0.0
+            bounds = [*(_number(bound) for bound in family["buckets"]), "+Inf"]
+            for bound, count in zip(bounds, sample[:-1]):
+                cumulative += count
+                bucket_labels = _labels(names, values, f'le="{bound}"')
+                lines.append(f"{name}_bucket{bucket_labels} {_number(cumulative)}")
+            lines.append(f"{name}_sum{_labels(names, values)} {_number(sample[-1])}")
+            lines.append(f"{name}_count{_labels(names, values)} {_number(cumulative)}")
+    return "\n".join(lines) + "\n"
+
+
+class RelayMetrics:
+    """The form relay's own metrics, created once per app."""
+
+    def __init__(self, registry: MetricsRegistry) -> None:
+        self.registry = registry
+        self.submissions = registry.counter(
+            "form_relay_submissions_total",
+            "Submissions by site, form and outcome (accepted, duplicate, spam, invalid, rate_limited).",
+            ("hostname", "form", "outcome"),
+        )
+        self.rejections = registry.counter(
+            "form_relay_rejections_total",
+            "Requests refused before a site and form could be trusted "
+            "(invalid, origin, upload_too_large, upload_type, upload_malformed).",
+            ("reason",),
+        )
+        self.attachment_bytes = registry.counter(
+            "form_relay_attachment_bytes_total",
+            "Bytes of attachments stored for accepted submissions.",
+        )
+        self.delivery_attempts = registry.counter(
+            "form_relay_delivery_attempts_total",
+            "Salon delivery attempts by result (delivered, retried, dead_lettered).",
+            ("result",),
+        )
+        self.delivery_attempt_seconds = registry.histogram(
+            "form_relay_delivery_attempt_seconds",
+            "Duration of one Salon delivery attempt.",
+            ("result",),
+        )
+        self.delivery_latency_seconds = registry.histogram(
+            "form_relay_delivery_latency_seconds",
+            "Time from receiving a submission to delivering it to Salon, retries included.",
+            buckets=DELIVERY_LATENCY_BUCKETS,
+        )
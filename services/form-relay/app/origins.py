@@ -0,0 +1,189 @@
+"""Compiled origin allow-list with wildcard subdomains and file hot-reloading."""
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+from typing import Callable, Iterable
+from urllib.parse import urlsplit
+
+from loguru import logger
+from starlette.middleware.cors import CORSMiddleware
+from starlette.types import ASGIApp
+
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# A wildcard's scheme and port; the port is None when the entry has none (or the scheme's default).
+SchemePort = tuple[str, "int | None"]
+
+
+class _SuffixNode:
+    """One label of a reversed wildcard domain (``*.example.com`` is ``com`` -> ``example``)."""
+
+    __slots__ = ("children", "schemes")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _SuffixNode] = {}
+        # None: no wildcard ends here; empty: any scheme and port; otherwise the allowed (scheme, port) pairs.
+        self.schemes: frozenset[SchemePort] | None = None
+
+
+def _port(scheme: str, port: int | None) -> int | None:
+    return None if port == DEFAULT_PORTS.get(scheme) else port
+
+
+class OriginMatcher:
+    """Allow-list compiled once into hash sets plus a suffix trie.
+
+    Entries are origins (``https://example.com``), bare hosts (``example.com``,
+    any scheme) or wildcards (``https://*.example.com`` / ``*.example.com``). A
+    wildcard matches any subdomain at any depth but not the bare domain itself;
+    one with a scheme also pins the port, like an exact origin does
+    (``https://*.example.com:8443`` allows only port 8443, and without a port
+    only the scheme's default).
+    Exact lookups are single set probes; wildcard lookups walk at most one trie
+    node per label of the candidate host.
+    """
+
+    __slots__ = ("entries", "origins", "hosts", "any_scheme_hosts", "allow_all", "_wildcards")
+
+    def __init__(self, entries: Iterable[str] = ()) -> None:
+        origins: set[str] = set()
+        hosts: set[str] = set()
+        any_scheme_hosts: set[str] = set()
+        self.allow_all = False
+        self._wildcards = _SuffixNode()
+        self.entries = tuple(entry.strip() for entry in entries if entry and entry.strip())
+        for entry in self.entries:
+            if entry == "*":
+                self.allow_all = True
+                continue
+            scheme, _, rest = entry.rpartition("://")
+            host_port = rest.split("/", 1)[0].lower()
+            host, port = host_port, None
+            if host_port.count(":") == 1:
+                host, _, port_text = host_port.partition(":")
+                port = int(port_text) if port_text.isdigit() else None
+            if host.startswith("*.") and host_port != host and port is None:
+                logger.warning("Ignoring allowed origin {!r}: invalid port", entry)
+                continue
+            if host.startswith("*."):
+                self._add_wildcard(host[2:], scheme.lower(), port)
+            elif scheme:
+                origins.add(f"{scheme.lower()}://{host_port}")
+                hosts.add(host)
+            else:
+                any_scheme_hosts.add(host)
+                hosts.add(host)
+        self.origins = frozenset(origins)
+        self.hosts = frozenset(hosts)
+        self.any_scheme_hosts = frozenset(any_scheme_hosts)
+
+    def __bool__(self) -> bool:
+        return bool(self.entries)
+
+    def allows_host(self, host: str) -> bool:
+        """Return whether ``host`` (lower-cased) is allowed under any scheme."""
+        return self.allow_all or host in self.hosts or self._match_wildcard(host, None)
+
+    def allows_origin(self, origin: str) -> bool:
+        """Return whether a browser ``Origin`` header value is allowed."""
+        if self.allow_all or origin in self.origins:
+            return True
+        parts = urlsplit(origin)
+        host = parts.hostname
+        if not parts.scheme or not host:
+            return False
+        if host in self.any_scheme_hosts:
+            return True
+        scheme = parts.scheme.lower()
+        try:
+            port = parts.port
+        except ValueError:
+            return False
+        return self._match_wildcard(host, (scheme, _port(scheme, port)))
+
+    def _add_wildcard(self, domain: str, scheme: str, port: int | None) -> None:
+        node = self._wildcards
+        for label in reversed(domain.split(".")):
+            node = node.children.setdefault(label, _SuffixNode())
+        if not scheme or node.schemes == frozenset():
+            node.schemes = frozenset()
+        else:
+            node.schemes = (node.schemes or frozenset()) | {(scheme, _port(scheme, port))}
+
+    def _match_wildcard(self, host: str, scheme: SchemePort | None) -> bool:
+        node = self._wildcards
+        if not node.children or not host:
+            return False
+        labels = host.split(".")
+        # The last label can never match: a wildcard needs at least one label in front of it.
+        for index in range(len(labels) - 1, 0, -1):
+            node = node.children.get(labels[index])
+            if node is None:
+                return False
+            schemes = node.schemes
+            if schemes is not None and (not schemes or scheme is None or scheme in schemes):
+                return True
+        return False
+
+
+def load_allow_list(path: Path) -> list[str]:
+    """Read a JSON array of origins from ``path``."""
+    data = json.loads(path.read_text())
+    if not isinstance(data, list):
+        raise ValueError(f"{path} must contain a JSON array of origins")
+    return [str(item) for item in data if item]
+
+
+class AllowListCORSMiddleware(CORSMiddleware):
+    """CORS middleware that consults the current :class:`OriginMatcher` for every origin check."""
+
+    def __init__(self, app: ASGIApp, *, matcher: Callable[[], OriginMatcher], **options) -> None:
+        super().__init__(app, allow_origins=(), **options)
+        self._matcher = matcher
+
+    def is_allowed_origin(self, origin: str) -> bool:
+        return self._matcher().allows_origin(origin)
+
+
+class AllowListWatcher:
+    """Polls the allow-list file and swaps in a freshly compiled matcher when it changes.
+
+    A file that fails to parse (for example while it is being rewritten) leaves
+    the previous matcher in place until the next successful read.
+    """
+
+    def __init__(self, path: Path, on_change: Callable[[OriginMatcher], None], *, interval: float) -> None:
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self._mtime = self._stat()
+
+    def _stat(self) -> int | None:
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def check(self) -> bool:
+        """Reload if the file changed since the last check; return whether a new matcher was installed."""
+        mtime = self._stat()
+        if mtime is None or mtime == self._mtime:
+            return False
+        try:
+            entries = load_allow_list(self.path)
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable allow-list {}: {}", self.path, exc)
+            return False
+        self._mtime = mtime
+        self.on_change(OriginMatcher(entries))
+        logger.info("Reloaded {} allowed origins from {}", len(entries), self.path)
+        return True
+
+    async def run(self) -> None:
+        """Check the file every ``interval`` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(self.interval)
+            self.check()
@@ -0,0 +1,303 @@
+"""Token-bucket rate limiting for form submissions, applied before the request is parsed."""
+from __future__ import annotations
+
+import json
+import math
+import time
+from ipaddress import IPv4Network, IPv6Network, ip_address, ip_network
+from typing import Callable, Collection, Iterable, Protocol
+from urllib.parse import urlsplit
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import Settings
+
+RateLimitKey = tuple[str, str]
+TrustedProxies = tuple[IPv4Network | IPv6Network, ...]
+
+# Scope state key under which the parsed JSON body is left for the endpoint to reuse.
+PARSED_BODY_STATE_KEY = "submission_body"
+
+_REJECTION_BODY = json.dumps({"status": "error", "message": "Too many submissions", "detail": None}).encode()
+_TOO_LARGE_BODY = json.dumps({"status": "error", "message": "Submission is too large", "detail": None}).encode()
+
+
+class RateLimitBackend(Protocol):
+    """Storage for token buckets; returns seconds until the next token, or 0 when allowed."""
+
+    async def hit(self, key: RateLimitKey) -> float: ...
+
+    async def close(self) -> None: ...
+
+
+class InMemoryRateLimiter:
+    """Per-process token buckets keyed by (hostname, client IP).
+
+    Each bucket is a two-slot list of ``[tokens, updated_at]``. Buckets that have
+    refilled completely carry no state worth keeping and are swept out every
+    ``sweep_interval`` seconds, so memory tracks only recently active callers.
+    """
+
+    def __init__(self, *, rate_per_second: float, burst: int, sweep_interval: float = 60.0) -> None:
+        self.rate = rate_per_second
+        self.burst = float(burst)
+        self.sweep_interval = sweep_interval
+        self._buckets: dict[RateLimitKey, list[float]] = {}
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def hit(self, key: RateLimitKey) -> float:
+        return self.take(key, time.monotonic())
+
+    def take(self, key: RateLimitKey, now: float) -> float:
+        """Consume one token for ``key`` at ``now``; return the wait in seconds if none is left."""
+        if now >= self._next_sweep:
+            self.sweep(now)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._buckets[key] = [self.burst - 1, now]
+            return 0.0
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            return (1 - tokens) / self.rate
+        bucket[0] = tokens - 1
+        return 0.0
+
+    def sweep(self, now: float) -> None:
+        """Drop buckets that would be full by now."""
+        refill = self.burst / self.rate
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items() if now - bucket[1] < refill
+        }
+        self._next_sweep = now + self.sweep_interval
+
+    async def close(self) -> None:
+        self._buckets.clear()
+
+
+_REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens < 1 then
+    wait = (1 - tokens) / rate
+else
+    tokens = tokens - 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisRateLimiter:
+    """Token buckets shared by every instance through Redis (``pip install 'form-relay[redis]'``).
+
+    The refill-and-take step runs as one Lua script, so concurrent instances
+    never double-spend a token; keys expire once their bucket would be full.
+    """
+
+    def __init__(self, url: str, *, rate_per_second: float, burst: int, prefix: str = "form-relay:rl") -> None:
+        try:
+            from redis.asyncio import Redis
+        except ImportError as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError(
+                "FORM_RELAY_RATE_LIMIT_REDIS_URL is set but the 'redis' package is not installed"
+            ) from exc
+        self.rate = rate_per_second
+        self.burst = burst
+        self.prefix = prefix
+        self._redis = Redis.from_url(url)
+        self._script = self._redis.register_script(_REDIS_TOKEN_BUCKET)
+
+    async def hit(self, key: RateLimitKey) -> float:
+        wait = await self._script(
+            keys=[f"{self.prefix}:{'|'.join(key)}"], args=[self.rate, self.burst, time.time()]
+        )
+        return float(wait)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def create_rate_limiter(settings: Settings) -> RateLimitBackend:
+    """Build the configured backend: Redis when a URL is set, in-process otherwise."""
+    rate = settings.rate_limit_per_minute / 60
+    if settings.rate_limit_redis_url:
+        return RedisRateLimiter(settings.rate_limit_redis_url, rate_per_second=rate, burst=settings.rate_limit_burst)
+    return InMemoryRateLimiter(rate_per_second=rate, burst=settings.rate_limit_burst)
+
+
+def trusted_proxy_networks(addresses: Iterable[str]) -> TrustedProxies:
+    """Parse the proxy addresses and CIDR ranges from ``FORM_RELAY_TRUSTED_PROXIES``."""
+    return tuple(ip_network(address, strict=False) for address in addresses)
+
+
+def client_address(peer: str | None, forwarded_for: str | None, trusted: TrustedProxies) -> str:
+    """Return the caller address, believing X-Forwarded-For only as far as trusted proxies vouch for it.
+
+    Any caller can send the header, so it is ignored unless the peer is a trusted
+    proxy. It is then read right to left, skipping hops added by trusted proxies:
+    the first address they did not add is the client.
+    """
+    if not peer:
+        return "unknown"
+    if not forwarded_for or not _is_trusted(peer, trusted):
+        return peer
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted(hop, trusted):
+            return hop
+    return hops[0] if hops else peer
+
+
+def _is_trusted(address: str, trusted: TrustedProxies) -> bool:
+    try:
+        parsed = ip_address(address)
+    except ValueError:
+        return False
+    return any(parsed in network for network in trusted)
+
+
+class RateLimitMiddleware:
+    """Reject over-limit submissions with 429 before FastAPI parses or logs anything.
+
+    The key is read straight from the ASGI scope: the Origin/Referer host and
+    the client address (see :func:`client_address`). The body's ``form_name``
+    is chosen by the caller, so it is never part of the key; it is only
+    passed to ``on_limited``. The buffered body, capped at ``max_body_bytes``,
+    is replayed to the app. Multipart uploads are never buffered; their body
+    streams through untouched.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        limiter: RateLimitBackend,
+        paths: Collection[str],
+        max_body_bytes: int,
+        on_limited: Callable[[RateLimitKey, str], None] | None = None,
+        trusted_proxies: TrustedProxies = (),
+    ) -> None:
+        self.app = app
+        self.limiter = limiter
+        self.paths = frozenset(paths)
+        self.max_body_bytes = max_body_bytes
+        self.on_limited = on_limited
+        self.trusted_proxies = trusted_proxies
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        streamed = (_header(scope, b"content-type") or "").lower().startswith("multipart/")
+        body = b""
+        if not streamed:
+            body = await _read_body(scope, receive, self.max_body_bytes)
+            if body is None:
+                await _reject(send, 413, _TOO_LARGE_BODY)
+                return
+        payload = None if streamed else _parse_object(body)
+        if payload is not None:
+            scope.setdefault("state", {})[PARSED_BODY_STATE_KEY] = payload
+        key = (_origin_host(scope), _client_ip(scope, self.trusted_proxies))
+        wait = await self.limiter.hit(key)
+        if wait > 0:
+            if self.on_limited is not None:
+                self.on_limited(key, _form_name(payload))
+            retry_after = str(max(1, math.ceil(wait))).encode()
+            await _reject(send, 429, _REJECTION_BODY, (b"retry-after", retry_after))
+            return
+        if streamed:
+            await self.app(scope, receive, send)
+            return
+
+        replayed = False
+
+        async def replay() -> Message:
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        await self.app(scope, replay, send)
+
+
+async def _reject(send: Send, status: int, body: bytes, *headers: tuple[bytes, bytes]) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                *headers,
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _read_body(scope: Scope, receive: Receive, limit: int) -> bytes | None:
+    """Buffer the request body, or return ``None`` once it is known to exceed ``limit``."""
+    declared = _header(scope, b"content-length")
+    if declared is not None and declared.strip().isdigit() and int(declared) > limit:
+        return None
+    chunks: list[bytes] = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            # Client went away; the app sees an empty body and fails validation.
+            return b"".join(chunks)
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+def _header(scope: Scope, name: bytes) -> str | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _origin_host(scope: Scope) -> str:
+    candidate = _header(scope, b"origin") or _header(scope, b"referer") or _header(scope, b"host") or ""
+    if "//" not in candidate:
+        candidate = f"//{candidate}"
+    return (urlsplit(candidate).hostname or "").lower()
+
+
+def _client_ip(scope: Scope, trusted: TrustedProxies) -> str:
+    client = scope.get("client")
+    return client_address(client[0] if client else None, _header(scope, b"x-forwarded-for"), trusted)
+
+
+def _parse_object(body: bytes) -> dict | None:
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def _form_name(payload: dict | None) -> str:
+    form_name = payload.get("form_name") if payload is not None else None
+    return form_name if isinstance(form_name, str) else ""
@@ -2,8 +2,8 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import Any, Dict, Literal, Optional
-from uuid import UUID, uuid4
+from typing import Any, Dict, Literal
+from uuid import UUID
 
 from pydantic import BaseModel, Field, field_validator
 
@@ -33,18 +33,6 @@ class SubmissionRequest(BaseModel):
         return value
 
 
-class SubmissionContext(BaseModel):
-    """Request context derived from headers and connection data."""
-
-    submission_id: UUID = Field(default_factory=uuid4)
-    origin: str
-    hostname: str
-    client_ip: str
-    user_agent: Optional[str] = None
-    referer: Optional[str] = None
-    received_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-
-
 class SubmissionResponse(BaseModel):
     """Success response returned to callers."""
 
@@ -0,0 +1,244 @@
+"""Cheap-first spam filter pipeline run before submissions are queued."""
+from __future__ import annotations
+
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, NamedTuple
+
+from loguru import logger
+
+from .clients.salon import scrub_sensitive_fields
+from .config import Settings
+
+URL_PATTERN = re.compile(r"https?://|www\.|\[url=|<a\s", re.I)
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:['-][a-z0-9]+)*")
+
+# Log-odds weights for the local token classifier; positive tokens lean spam.
+# FORM_RELAY_SPAM_CLASSIFIER_PATH can point at a JSON object to replace them.
+DEFAULT_TOKEN_WEIGHTS: Dict[str, float] = {
+    "viagra": 4.0,
+    "cialis": 4.0,
+    "casino": 3.0,
+    "porn": 4.0,
+    "xxx": 3.0,
+    "bitcoin": 2.0,
+    "crypto": 2.0,
+    "forex": 2.5,
+    "backlinks": 3.5,
+    "seo": 2.0,
+    "ranking": 1.0,
+    "traffic": 1.0,
+    "loan": 1.5,
+    "loans": 1.5,
+    "investment": 1.0,
+    "guaranteed": 1.5,
+    "unsubscribe": 1.5,
+    "whatsapp": 1.5,
+    "telegram": 1.5,
+    "appointment": -1.5,
+    "insurance": -0.5,
+    "therapy": -1.5,
+    "session": -1.0,
+    "schedule": -1.0,
+    "questions": -0.5,
+}
+CLASSIFIER_BIAS = -3.0
+
+
+class SpamVerdict(NamedTuple):
+    """Why a submission was rejected."""
+
+    stage: str
+    reason: str
+
+
+@dataclass(slots=True)
+class StageStats:
+    """Running totals for one filter stage."""
+
+    checked: int = 0
+    rejected: int = 0
+    seconds: float = 0.0
+
+
+class SubmissionCandidate(NamedTuple):
+    """The parts of a submission the filters look at."""
+
+    hostname: str
+    form_name: str | None
+    fields: Dict[str, Any]
+    metadata: Dict[str, Any]
+    received_at: datetime
+
+
+Stage = Callable[[SubmissionCandidate], "str | None"]
+
+
+def _string_values(fields: Dict[str, Any]) -> Iterator[str]:
+    for value in fields.values():
+        if isinstance(value, str):
+            yield value
+        elif isinstance(value, (list, tuple)):
+            yield from (item for item in value if isinstance(item, str))
+
+
+def _parse_timestamp(value: Any) -> datetime | None:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        # Epoch seconds, or milliseconds as Date.now() reports them.
+        seconds = value / 1000 if value > 1e11 else value
+        try:
+            return datetime.fromtimestamp(seconds, tz=timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            return None
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    return None
+
+
+class SpamFilter:
+    """Runs the configured stages in order and stops at the first rejection.
+
+    Stages are ordered cheapest first: a honeypot field, the time taken to fill
+    the form (``metadata.form_started_at``), field lengths, link count, then a
+    small token classifier. Per-stage counts and time are kept in ``stats``, and
+    a sample of rejections is appended to a JSON-lines file for tuning.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.honeypot_fields = frozenset(name.casefold() for name in settings.spam_honeypot_fields)
+        self.min_fill_seconds = settings.spam_min_fill_seconds
+        self.max_field_length = settings.spam_max_field_length
+        self.max_links = settings.spam_max_links
+        self.threshold = settings.spam_classifier_threshold
+        self.weights = (
+            load_token_weights(Path(settings.spam_classifier_path))
+            if settings.spam_classifier_path
+            else DEFAULT_TOKEN_WEIGHTS
+        )
+        self.sample_rate = settings.spam_sample_rate
+        self.sample_path = Path(settings.spam_sample_path) if settings.spam_sample_path else None
+        self._sample_lock = threading.Lock()
+        available: Dict[str, Stage] = {
+            "honeypot": self._honeypot,
+            "fill_time": self._fill_time,
+            "lengths": self._lengths,
+            "links": self._links,
+            "classifier": self._classifier,
+        }
+        unknown = [name for name in settings.spam_filter_stages if name not in available]
+        if unknown:
+            raise ValueError(f"Unknown spam filter stages: {', '.join(unknown)}")
+        self.stages = [(name, available[name]) for name in settings.spam_filter_stages]
+        self.stats: Dict[str, StageStats] = {name: StageStats() for name, _ in self.stages}
+
+    def check(self, candidate: SubmissionCandidate) -> SpamVerdict | None:
+        """Return a verdict for the first stage that rejects ``candidate``, or ``None``."""
+        for name, stage in self.stages:
+            started = time.perf_counter()
+            reason = stage(candidate)
+            stats = self.stats[name]
+            stats.seconds += time.perf_counter() - started
+            stats.checked += 1
+            if reason is not None:
+                stats.rejected += 1
+                verdict = SpamVerdict(name, reason)
+                self._maybe_sample(candidate, verdict)
+                return verdict
+        return None
+
+    def metric_families(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage stats as counter families for :mod:`app.metrics`."""
+        families = {}
+        for name, help_text, attribute in (
+            ("form_relay_spam_checks_total", "Submissions examined by each spam filter stage.", "checked"),
+            ("form_relay_spam_rejections_total", "Submissions rejected by each spam filter stage.", "rejected"),
+            ("form_relay_spam_stage_seconds_total", "Time spent in each spam filter stage.", "seconds"),
+        ):
+            families[name] = {
+                "type": "counter",
+                "help": help_text,
+                "labels": ["stage"],
+                "samples": [[[stage], getattr(stats, attribute)] for stage, stats in self.stats.items()],
+            }
+        return families
+
+    def score(self, text: str) -> float:
+        """Spam probability from the token classifier."""
+        weights = self.weights
+        tokens = set(TOKEN_PATTERN.findall(text.lower()))
+        total = CLASSIFIER_BIAS + sum(weights.get(token, 0.0) for token in tokens)
+        return 1 / (1 + math.exp(-total))
+
+    def _honeypot(self, candidate: SubmissionCandidate) -> str | None:
+        for key, value in candidate.fields.items():
+            if value not in (None, "", []) and key.casefold() in self.honeypot_fields:
+                return f"honeypot field {key!r} filled"
+        return None
+
+    def _fill_time(self, candidate: SubmissionCandidate) -> str | None:
+        started_at = _parse_timestamp(candidate.metadata.get("form_started_at"))
+        if started_at is None:
+            return None
+        elapsed = (candidate.received_at - started_at).total_seconds()
+        if elapsed < self.min_fill_seconds:
+            return f"form filled in {elapsed:.1f}s"
+        return None
+
+    def _lengths(self, candidate: SubmissionCandidate) -> str | None:
+        for key, value in candidate.fields.items():
+            if isinstance(value, str) and len(value) > self.max_field_length:
+                return f"field {key!r} is {len(value)} characters"
+        return None
+
+    def _links(self, candidate: SubmissionCandidate) -> str | None:
+        links = sum(len(URL_PATTERN.findall(value)) for value in _string_values(candidate.fields))
+        if links > self.max_links:
+            return f"{links} links"
+        return None
+
+    def _classifier(self, candidate: SubmissionCandidate) -> str | None:
+        probability = self.score(" ".join(_string_values(candidate.fields)))
+        if probability >= self.threshold:
+            return f"classifier score {probability:.2f}"
+        return None
+
+    def _maybe_sample(self, candidate: SubmissionCandidate, verdict: SpamVerdict) -> None:
+        if self.sample_path is None or random.random() >= self.sample_rate:
+            return
+        record = {
+            "at": candidate.received_at.isoformat(),
+            "stage": verdict.stage,
+            "reason": verdict.reason,
+            "hostname": candidate.hostname,
+            "form_name": candidate.form_name,
+            "fields": {
+                key: value[:500] if isinstance(value, str) else value
+                for key, value in scrub_sensitive_fields(candidate.fields).items()
+            },
+        }
+        try:
+            with self._sample_lock:
+                self.sample_path.parent.mkdir(parents=True, exist_ok=True)
+                with self.sample_path.open("a", encoding="utf-8") as handle:
+                    handle.write(json.dumps(record, default=str) + "\n")
+        except OSError as exc:
+            logger.warning("Unable to write spam sample to {}: {}", self.sample_path, exc)
+
+
+def load_token_weights(path: Path) -> Dict[str, float]:
+    """Read ``{"token": weight, ...}`` classifier weights from ``path``."""
+    data = json.loads(path.read_text())
+    if not isinstance(data, dict):
+        raise ValueError(f"{path} must contain a JSON object of token weights")
+    return {str(token).lower(): float(weight) for token, weight in data.items()}
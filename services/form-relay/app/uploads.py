@@ -0,0 +1,403 @@
+"""Streaming multipart/form-data uploads written to local attachment storage."""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import shutil
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, Dict, List, Tuple
+from urllib.parse import unquote
+
+from loguru import logger
+
+from .config import Settings
+
+_PARAM_PATTERN = re.compile(r';\s*([\w*.-]+)\s*=\s*("(?:[^"\\]|\\.)*"|[^;]*)')
+_BOUNDARY_PATTERN = re.compile(r"[0-9A-Za-z'()+_,\-./:=? ]{1,70}")
+MAX_HEADER_BYTES = 16 * 1024
+# Room for boundaries and part headers on top of the content caps when judging Content-Length.
+FRAMING_ALLOWANCE_BYTES = 64 * 1024
+
+# Text parts with these names configure the submission rather than becoming form fields.
+FORM_NAME_PART = "form_name"
+METADATA_PART = "metadata"
+
+Event = Tuple[Any, ...]
+
+
+class UploadRejected(Exception):
+    """The upload cannot be accepted; carries the HTTP status and a metrics reason."""
+
+    def __init__(self, status_code: int, reason: str, message: str) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.reason = reason
+        self.message = message
+
+
+def _malformed(message: str) -> UploadRejected:
+    return UploadRejected(400, "upload_malformed", message)
+
+
+def _too_large(message: str) -> UploadRejected:
+    return UploadRejected(413, "upload_too_large", message)
+
+
+def parse_header_params(value: str) -> tuple[str, Dict[str, str]]:
+    """Split ``form-data; name="a"; filename="b"`` into its value and parameters."""
+    head, _, rest = value.partition(";")
+    params: Dict[str, str] = {}
+    for key, raw in _PARAM_PATTERN.findall(";" + rest):
+        raw = raw.strip()
+        if raw.startswith('"') and raw.endswith('"') and len(raw) >= 2:
+            raw = re.sub(r"\\(.)", r"\1", raw[1:-1])
+        key = key.lower()
+        if key.endswith("*"):
+            params[key[:-1]] = _decode_extended_value(raw)
+        else:
+            params.setdefault(key, raw)
+    return head.strip().lower(), params
+
+
+def _decode_extended_value(raw: str) -> str:
+    """Decode an RFC 5987 ``charset'language'percent-encoded`` parameter value."""
+    pieces = raw.split("'", 2)
+    if len(pieces) != 3:
+        return unquote(raw, errors="replace")
+    charset, _, encoded = pieces
+    try:
+        return unquote(encoded, encoding=charset or "utf-8", errors="replace")
+    except LookupError:
+        return unquote(encoded, errors="replace")
+
+
+def multipart_boundary(content_type: str | None) -> bytes:
+    """Return the boundary of a ``multipart/form-data`` content type."""
+    kind, params = parse_header_params(content_type or "")
+    if kind != "multipart/form-data":
+        raise UploadRejected(415, "upload_type", "Expected multipart/form-data")
+    boundary = params.get("boundary", "")
+    if not _BOUNDARY_PATTERN.fullmatch(boundary):
+        raise _malformed("Missing or invalid multipart boundary")
+    return boundary.encode("latin-1")
+
+
+class MultipartParser:
+    """Incremental multipart parser: feed it chunks, get back events.
+
+    Events are ``("part", headers)``, ``("data", bytes)`` and ``("end",)``. At
+    most one delimiter's worth of bytes is held back between chunks, so a
+    part's body is never buffered whole however large it is.
+    """
+
+    def __init__(self, boundary: bytes) -> None:
+        self._delimiter = b"--" + boundary
+        self._separator = b"\r\n--" + boundary
+        self._buffer = bytearray()
+        self._state = "preamble"
+
+    @property
+    def done(self) -> bool:
+        return self._state == "done"
+
+    def feed(self, data: bytes) -> List[Event]:
+        """Consume ``data`` and return the events it completes."""
+        buffer = self._buffer
+        buffer += data
+        events: List[Event] = []
+        while True:
+            state = self._state
+            if state == "body":
+                index = buffer.find(self._separator)
+                if index < 0:
+                    keep = len(self._separator) - 1
+                    if len(buffer) > keep:
+                        events.append(("data", bytes(buffer[:-keep])))
+                        del buffer[:-keep]
+                    return events
+                if index:
+                    events.append(("data", bytes(buffer[:index])))
+                del buffer[: index + len(self._separator)]
+                events.append(("end",))
+                self._state = "delimiter"
+            elif state == "delimiter":
+                if len(buffer) < 2:
+                    return events
+                if buffer[:2] == b"--":
+                    self._state = "done"
+                    continue
+                line_end = buffer.find(b"\r\n")
+                if line_end < 0:
+                    if len(buffer) > 256:
+                        raise _malformed("Malformed multipart delimiter")
+                    return events
+                if buffer[:line_end].strip(b" \t"):
+                    raise _malformed("Malformed multipart delimiter")
+                del buffer[: line_end + 2]
+                self._state = "headers"
+            elif state == "headers":
+                index = buffer.find(b"\r\n\r\n")
+                if index < 0:
+                    if len(buffer) > MAX_HEADER_BYTES:
+                        raise _malformed("Multipart part headers are too large")
+                    return events
+                events.append(("part", _parse_headers(bytes(buffer[:index]))))
+                del buffer[: index + 4]
+                self._state = "body"
+            elif state == "preamble":
+                index = buffer.find(self._delimiter)
+                if index < 0:
+                    del buffer[: max(0, len(buffer) - len(self._delimiter) + 1)]
+                    return events
+                del buffer[: index + len(self._delimiter)]
+                self._state = "delimiter"
+            else:  # done: the epilogue is ignored
+                buffer.clear()
+                return events
+
+    def close(self) -> None:
+        """Raise if the body ended before the closing delimiter."""
+        if self._state != "done":
+            raise _malformed("Multipart body ended unexpectedly")
+
+
+def _parse_headers(raw: bytes) -> Dict[str, str]:
+    headers: Dict[str, str] = {}
+    for line in raw.decode("utf-8", errors="replace").split("\r\n"):
+        name, separator, value = line.partition(":")
+        if not separator:
+            raise _malformed("Malformed multipart part header")
+        headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+def _safe_filename(filename: str) -> str:
+    name = filename.replace("\\", "/").rsplit("/", 1)[-1]
+    name = "".join(character for character in name if character.isprintable()).strip()
+    return name[:255] or "upload"
+
+
+def _type_allowed(content_type: str, allowed: Tuple[str, ...]) -> bool:
+    if not allowed:
+        return True
+    major = content_type.split("/", 1)[0]
+    return content_type in allowed or f"{major}/*" in allowed
+
+
+@dataclass(slots=True)
+class _Part:
+    """The part being parsed: text is collected in ``chunks``, files go to ``handle``."""
+
+    name: str
+    is_file: bool = False
+    chunks: List[bytes] = field(default_factory=list)
+    filename: str = ""
+    content_type: str = ""
+    path: Path | None = None
+    handle: BinaryIO | None = None
+    size: int = 0
+    digest: Any = field(default_factory=hashlib.sha256)
+
+
+@dataclass(slots=True)
+class ReceivedUpload:
+    """Text fields and stored attachment references parsed from one upload."""
+
+    form_name: str | None = None
+    fields: Dict[str, Any] = field(default_factory=dict)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    attachments: List[Dict[str, Any]] = field(default_factory=list)
+
+    def submission_body(self) -> Dict[str, Any]:
+        """The parts of the upload that make up a ``SubmissionRequest``."""
+        return {"form_name": self.form_name, "fields": self.fields, "metadata": self.metadata}
+
+
+class AttachmentStore:
+    """Writes uploaded files under ``<upload_dir>/<submission_id>/<n>`` as they stream in.
+
+    Each file is hashed with SHA-256 and counted chunk by chunk, and the
+    per-file, total and file-count caps are enforced as bytes arrive, so an
+    oversized upload is cut off as soon as it crosses a limit. Stored names
+    never contain client-supplied text; the original filename only appears
+    in the reference forwarded to Salon.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.root = Path(settings.upload_dir)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_file_bytes = settings.upload_max_file_bytes
+        self.max_total_bytes = settings.upload_max_total_bytes
+        self.max_files = settings.upload_max_files
+        self.max_field_bytes = settings.upload_max_field_bytes
+        self.allowed_types = tuple(item.lower() for item in settings.upload_allowed_content_types)
+        self.public_base_url = settings.upload_public_base_url
+        self.retention_seconds = settings.upload_retention_seconds
+
+    @property
+    def max_body_bytes(self) -> int:
+        """The largest request body that could fit within every cap."""
+        return self.max_total_bytes + self.max_field_bytes + FRAMING_ALLOWANCE_BYTES
+
+    def check_declared_length(self, content_length: str | None) -> None:
+        """Refuse a body whose Content-Length already exceeds the caps, before reading any of it."""
+        if content_length is None:
+            return
+        try:
+            declared = int(content_length)
+        except ValueError as exc:
+            raise _malformed("Invalid Content-Length") from exc
+        if declared > self.max_body_bytes:
+            raise _too_large(f"Uploads must total at most {self.max_total_bytes} bytes")
+
+    async def receive(
+        self, stream: AsyncIterator[bytes], content_type: str | None, submission_id: str
+    ) -> ReceivedUpload:
+        """Parse ``stream`` and store its files; on any failure nothing is left on disk."""
+        parser = MultipartParser(multipart_boundary(content_type))
+        directory = self.root / submission_id
+        upload = ReceivedUpload()
+        try:
+            await self._consume(stream, parser, directory, submission_id, upload)
+        except BaseException:
+            self.discard(submission_id)
+            raise
+        return upload
+
+    async def _consume(
+        self,
+        stream: AsyncIterator[bytes],
+        parser: MultipartParser,
+        directory: Path,
+        submission_id: str,
+        upload: ReceivedUpload,
+    ) -> None:
+        total = 0
+        text_bytes = 0
+        part: _Part | None = None
+        try:
+            async for chunk in stream:
+                for event in parser.feed(chunk):
+                    kind = event[0]
+                    if kind == "data" and part is not None:
+                        data = event[1]
+                        if not part.is_file:
+                            text_bytes += len(data)
+                            if text_bytes > self.max_field_bytes:
+                                raise _too_large(f"Text fields must total at most {self.max_field_bytes} bytes")
+                            part.chunks.append(data)
+                            continue
+                        if part.handle is None:
+                            self._start_file(part, directory, upload)
+                        part.size += len(data)
+                        total += len(data)
+                        if part.size > self.max_file_bytes:
+                            raise _too_large(f"Each file must be at most {self.max_file_bytes} bytes")
+                        if total > self.max_total_bytes:
+                            raise _too_large(f"Uploads must total at most {self.max_total_bytes} bytes")
+                        part.digest.update(data)
+                        part.handle.write(data)
+                    elif kind == "part":
+                        part = self._open_part(event[1], directory, upload)
+                    elif kind == "end" and part is not None:
+                        self._close_part(part, submission_id, upload)
+                        part = None
+                if parser.done:
+                    break
+            parser.close()
+        finally:
+            if part is not None and part.handle is not None:
+                part.handle.close()
+
+    def _open_part(self, headers: Dict[str, str], directory: Path, upload: ReceivedUpload) -> _Part:
+        disposition, params = parse_header_params(headers.get("content-disposition", ""))
+        name = params.get("name")
+        if disposition != "form-data" or not name:
+            raise _malformed("Each part needs a form-data Content-Disposition with a name")
+        if "filename" not in params:
+            return _Part(name)
+        content_type = parse_header_params(headers.get("content-type", "application/octet-stream"))[0]
+        part = _Part(name, is_file=True, filename=params["filename"], content_type=content_type)
+        if part.filename:
+            self._start_file(part, directory, upload)
+        # An unnamed file part is usually a file input left empty; it only counts once bytes arrive.
+        return part
+
+    def _start_file(self, part: _Part, directory: Path, upload: ReceivedUpload) -> None:
+        """Check the part against the type and count limits and open its file."""
+        if not _type_allowed(part.content_type, self.allowed_types):
+            raise UploadRejected(415, "upload_type", f"Files of type {part.content_type} are not accepted")
+        if len(upload.attachments) >= self.max_files:
+            raise _too_large(f"At most {self.max_files} files may be attached")
+        directory.mkdir(parents=True, exist_ok=True)
+        part.path = directory / str(len(upload.attachments))
+        # Plain blocking writes, like the SQLite queue: chunks are small and land in the page cache.
+        part.handle = part.path.open("wb")
+
+    def _close_part(self, part: _Part, submission_id: str, upload: ReceivedUpload) -> None:
+        if not part.is_file:
+            self._add_text(part.name, b"".join(part.chunks), upload)
+            return
+        if part.handle is None:
+            return  # An empty, unnamed file input.
+        part.handle.close()
+        storage_key = f"{submission_id}/{part.path.name}"
+        reference = {
+            "field": part.name,
+            "filename": _safe_filename(part.filename),
+            "content_type": part.content_type,
+            "size": part.size,
+            "sha256": part.digest.hexdigest(),
+            "storage_key": storage_key,
+        }
+        if self.public_base_url:
+            reference["url"] = f"{self.public_base_url.rstrip('/')}/{storage_key}"
+        upload.attachments.append(reference)
+
+    def _add_text(self, name: str, raw: bytes, upload: ReceivedUpload) -> None:
+        value = raw.decode("utf-8", errors="replace")
+        if name == FORM_NAME_PART:
+            upload.form_name = value or None
+            return
+        if name == METADATA_PART:
+            try:
+                metadata = json.loads(value) if value else {}
+            except ValueError as exc:
+                raise _malformed("metadata must be a JSON object") from exc
+            if not isinstance(metadata, dict):
+                raise _malformed("metadata must be a JSON object")
+            upload.metadata = metadata
+            return
+        existing = upload.fields.get(name)
+        if existing is None:
+            upload.fields[name] = value
+        elif isinstance(existing, list):
+            existing.append(value)
+        else:
+            # Repeated names (checkbox groups, multi-selects) become lists, as in JSON submissions.
+            upload.fields[name] = [existing, value]
+
+    def discard(self, submission_id: str) -> None:
+        """Remove everything stored for ``submission_id``."""
+        shutil.rmtree(self.root / submission_id, ignore_errors=True)
+
+    def purge_expired(self) -> int:
+        """Delete submissions' attachments older than the retention window."""
+        if not self.retention_seconds:
+            return 0
+        cutoff = time.time() - self.retention_seconds
+        purged = 0
+        for directory in self.root.iterdir():
+            try:
+                expired = directory.is_dir() and directory.stat().st_mtime < cutoff
+            except OSError:
+                continue
+            if expired:
+                shutil.rmtree(directory, ignore_errors=True)
+                purged += 1
+        if purged:
+            logger.info("Purged attachments of {} submissions past retention", purged)
+        return purged
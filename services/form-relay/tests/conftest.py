@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from typing import Any
+
+import pytest
+from fastapi import FastAPI
+
+from app import application
+from app.clients.salon import SalonSubmission
+from app.config import Settings
+from app.delivery import SubmissionQueue
+
+
+@pytest.fixture
+def make_settings(tmp_path) -> Callable[..., Settings]:
+    """Settings isolated from ``.env`` with every file under ``tmp_path``."""
+
+    def factory(**overrides: Any) -> Settings:
+        values: dict[str, Any] = {
+            "allowed_origins": ["https://site.example.com"],
+            "delivery_queue_path": str(tmp_path / "submissions.sqlite3"),
+            "spam_sample_path": None,
+            "upload_dir": str(tmp_path / "uploads"),
+            **overrides,
+        }
+        return Settings(_env_file=None, **values)
+
+    return factory
+
+
+@pytest.fixture
+def make_app(make_settings, monkeypatch) -> Callable[..., FastAPI]:
+    """``create_app()`` built from :func:`make_settings` with ``overrides``."""
+
+    def factory(**overrides: Any) -> FastAPI:
+        settings = make_settings(**overrides)
+        monkeypatch.setattr(application, "get_settings", lambda: settings)
+        return application.create_app()
+
+    return factory
+
+
+@pytest.fixture
+def queue(tmp_path) -> Iterator[SubmissionQueue]:
+    submission_queue = SubmissionQueue(tmp_path / "queue.sqlite3", retention_seconds=3600)
+    yield submission_queue
+    submission_queue.close()
+
+
+@pytest.fixture
+def make_submission() -> Callable[..., SalonSubmission]:
+    def factory(submission_id: str = "sub-1", **overrides: Any) -> SalonSubmission:
+        values: dict[str, Any] = {
+            "submission_id": submission_id,
+            "origin": "https://site.example.com",
+            "hostname": "site.example.com",
+            "form_name": "contact",
+            "client_ip": "203.0.113.7",
+            "user_agent": "pytest",
+            "referer": None,
+            "fields": {"email": "ada@example.com"},
+            "metadata": {"received_at": "2026-01-01T00:00:00+00:00"},
+            **overrides,
+        }
+        return SalonSubmission(**values)
+
+    return factory
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timezone
+from uuid import UUID
+
+from fastapi.testclient import TestClient
+
+from app import application
+from app.application import SUBMISSIONS_PATH
+from app.clients.salon import SalonSubmission
+
+
+def test_submission_is_accepted_queued_and_delivered(make_app, monkeypatch) -> None:
+    delivered: list[SalonSubmission] = []
+
+    async def deliver(payload: SalonSubmission) -> None:
+        delivered.append(payload)
+
+    monkeypatch.setattr(application, "forward_to_salon", deliver)
+    app = make_app(delivery_poll_interval_seconds=0.01)
+    before = datetime.now(timezone.utc)
+
+    with TestClient(app) as client:
+        response = client.post(
+            SUBMISSIONS_PATH,
+            json={
+                "form_name": "contact",
+                "fields": {"email": "ada@example.com", "message": "Hello"},
+                "metadata": {"page": "/contact"},
+            },
+            headers={
+                "origin": "https://site.example.com",
+                "user-agent": "pytest-browser",
+                "referer": "https://site.example.com/contact",
+            },
+        )
+        deadline = time.monotonic() + 5
+        while not delivered and time.monotonic() < deadline:
+            time.sleep(0.01)
+        counts = app.state.submission_queue.counts()
+
+    assert response.status_code == 202
+    body = response.json()
+    assert body["status"] == "accepted"
+    assert counts == {"pending": 0, "delivered": 1, "dead": 0}
+
+    [payload] = delivered
+    assert payload.submission_id == str(UUID(body["submission_id"]))
+    assert (payload.origin, payload.hostname, payload.form_name) == (
+        "https://site.example.com",
+        "site.example.com",
+        "contact",
+    )
+    assert payload.fields == {"email": "ada@example.com", "message": "Hello"}
+    assert (payload.user_agent, payload.referer) == ("pytest-browser", "https://site.example.com/contact")
+    assert payload.attachments == []
+    assert payload.metadata["page"] == "/contact"
+    received_at = datetime.fromisoformat(payload.metadata["received_at"])
+    assert received_at.tzinfo is not None
+    assert before <= received_at <= datetime.now(timezone.utc)
+
+
+def test_malformed_submission_gets_a_422_and_is_not_queued(make_app) -> None:
+    app = make_app()
+
+    with TestClient(app) as client:
+        responses = [
+            client.post(SUBMISSIONS_PATH, content=content, headers={"origin": "https://site.example.com"})
+            for content in (b"{not json", b"[]", b'{"fields": "text"}')
+        ]
+        counts = app.state.submission_queue.counts()
+
+    assert [response.status_code for response in responses] == [422, 422, 422]
+    assert counts == {"pending": 0, "delivered": 0, "dead": 0}
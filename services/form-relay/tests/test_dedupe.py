@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import dedupe
+from app.application import DUPLICATE_MESSAGE, SUBMISSIONS_PATH
+from app.dedupe import SubmissionDeduplicator, submission_fingerprint
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(dedupe, "time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def test_entries_expire_after_the_window(clock) -> None:
+    deduplicator = SubmissionDeduplicator(window_seconds=60, max_entries=10)
+    deduplicator.remember(b"first", "id-1")
+    clock.value += 30
+    deduplicator.remember(b"second", "id-2")
+
+    clock.value += 29.9
+    assert deduplicator.seen(b"first") == "id-1"
+
+    clock.value += 0.1
+    assert deduplicator.seen(b"first") is None
+    assert deduplicator.seen(b"second") == "id-2"
+    assert len(deduplicator) == 1
+
+    clock.value += 30
+    assert deduplicator.seen(b"second") is None
+    assert len(deduplicator) == 0
+
+
+def test_remembering_again_restarts_the_window(clock) -> None:
+    deduplicator = SubmissionDeduplicator(window_seconds=60, max_entries=10)
+    deduplicator.remember(b"a", "id-1")
+    deduplicator.remember(b"b", "id-2")
+    clock.value += 50
+    deduplicator.remember(b"a", "id-3")
+
+    clock.value += 20
+    # "b" expired at the front of the queue; "a" moved behind it and is still live.
+    assert deduplicator.seen(b"a") == "id-3"
+    assert deduplicator.seen(b"b") is None
+
+
+def test_max_entries_evicts_the_oldest(clock) -> None:
+    deduplicator = SubmissionDeduplicator(window_seconds=60, max_entries=2)
+    for index in range(3):
+        deduplicator.remember(f"fp-{index}".encode(), f"id-{index}")
+
+    assert len(deduplicator) == 2
+    assert [deduplicator.seen(f"fp-{index}".encode()) for index in range(3)] == [None, "id-1", "id-2"]
+
+
+def test_fingerprint_ignores_case_and_whitespace() -> None:
+    fingerprint = submission_fingerprint(
+        "site.example.com", "contact", {"Email": "Ada@Example.com", "message": "Hello   there\n", "tags": ["A"]}
+    )
+
+    assert fingerprint == submission_fingerprint(
+        "site.example.com", "contact", {" email": "ada@example.com", "Message": " hello there", "TAGS": ["a"]}
+    )
+    assert fingerprint == submission_fingerprint(
+        "site.example.com", "contact", {"email": "ada@example.com", "message": "hello there", "tags": ["a"]}, ()
+    )
+
+
+@pytest.mark.parametrize(
+    ("hostname", "form_name", "fields"),
+    [
+        ("other.example.com", "contact", {"email": "ada@example.com"}),
+        ("site.example.com", "newsletter", {"email": "ada@example.com"}),
+        ("site.example.com", None, {"email": "ada@example.com"}),
+        ("site.example.com", "contact", {"email": "grace@example.com"}),
+        ("site.example.com", "contact", {"email": "ada@example.com", "phone": "1"}),
+    ],
+)
+def test_fingerprint_distinguishes_site_form_and_values(hostname, form_name, fields) -> None:
+    assert submission_fingerprint(hostname, form_name, fields) != submission_fingerprint(
+        "site.example.com", "contact", {"email": "ada@example.com"}
+    )
+
+
+def test_fingerprint_includes_attachment_digests_in_any_order() -> None:
+    fields = {"email": "ada@example.com"}
+
+    with_files = submission_fingerprint("site.example.com", "contact", fields, ["bb", "aa"])
+
+    assert with_files == submission_fingerprint("site.example.com", "contact", fields, ["aa", "bb"])
+    assert with_files != submission_fingerprint("site.example.com", "contact", fields, ["aa", "cc"])
+    assert with_files != submission_fingerprint("site.example.com", "contact", fields)
+
+
+def test_duplicate_submission_returns_the_original_id(make_app) -> None:
+    app = make_app()
+    headers = {"origin": "https://site.example.com"}
+
+    with TestClient(app) as client:
+        first = client.post(
+            SUBMISSIONS_PATH, json={"form_name": "contact", "fields": {"email": "ada@example.com"}}, headers=headers
+        )
+        second = client.post(
+            SUBMISSIONS_PATH, json={"form_name": "contact", "fields": {"Email": " ADA@example.com"}}, headers=headers
+        )
+        counts = app.state.submission_queue.counts()
+
+    assert (first.status_code, second.status_code) == (202, 202)
+    assert second.json() == {
+        "status": "accepted",
+        "submission_id": first.json()["submission_id"],
+        "message": DUPLICATE_MESSAGE,
+    }
+    assert counts["pending"] + counts["delivered"] == 1
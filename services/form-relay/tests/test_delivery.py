@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from app.clients.salon import PermanentDeliveryError, SalonDeliveryError, SalonSubmission
+from app.delivery import DeliveryWorkers, SubmissionQueue
+from app.metrics import MetricsRegistry, RelayMetrics
+
+
+def _row(queue: SubmissionQueue, submission_id: str) -> tuple:
+    with sqlite3.connect(queue.path) as conn:
+        return conn.execute(
+            "SELECT status, attempts, next_attempt_at, last_error FROM submissions WHERE submission_id = ?",
+            (submission_id,),
+        ).fetchone()
+
+
+def test_enqueue_ignores_a_repeated_submission_id(queue: SubmissionQueue, make_submission) -> None:
+    assert queue.enqueue(make_submission("a"))
+    assert not queue.enqueue(make_submission("a", fields={"email": "other@example.com"}))
+
+    claimed = queue.claim(lease_seconds=60)
+    assert claimed is not None
+    assert claimed.payload.fields == {"email": "ada@example.com"}
+    assert queue.counts() == {"pending": 1, "delivered": 0, "dead": 0}
+
+
+def test_claim_leases_the_oldest_due_submission(queue: SubmissionQueue, make_submission) -> None:
+    queue.enqueue(make_submission("first"))
+    queue.enqueue(make_submission("second"))
+
+    first = queue.claim(lease_seconds=60)
+    second = queue.claim(lease_seconds=60)
+
+    assert (first.submission_id, first.attempts) == ("first", 1)
+    assert second.submission_id == "second"
+    assert isinstance(first.payload, SalonSubmission)
+    # Both are leased, so nothing else is due.
+    assert queue.claim(lease_seconds=60) is None
+
+
+def test_expired_lease_makes_a_submission_due_again(queue: SubmissionQueue, make_submission) -> None:
+    queue.enqueue(make_submission())
+    assert queue.claim(lease_seconds=0.05).attempts == 1
+    assert queue.claim(lease_seconds=0.05) is None
+
+    time.sleep(0.1)
+
+    reclaimed = queue.claim(lease_seconds=60)
+    assert reclaimed is not None
+    assert reclaimed.attempts == 2
+
+
+def test_retry_later_schedules_the_next_attempt(queue: SubmissionQueue, make_submission) -> None:
+    queue.enqueue(make_submission())
+    queue.claim(lease_seconds=0)
+    before = time.time()
+
+    queue.retry_later("sub-1", 30, "Salon returned 503")
+
+    status, attempts, next_attempt_at, last_error = _row(queue, "sub-1")
+    assert (status, attempts, last_error) == ("pending", 1, "Salon returned 503")
+    assert before + 30 <= next_attempt_at <= time.time() + 30
+    assert queue.claim(lease_seconds=60) is None
+
+
+def test_requeue_dead_resets_attempts(queue: SubmissionQueue, make_submission) -> None:
+    queue.enqueue(make_submission("a"))
+    queue.enqueue(make_submission("b"))
+    queue.claim(lease_seconds=0)
+    queue.dead_letter("a", "rejected")
+
+    assert queue.counts() == {"pending": 1, "delivered": 0, "dead": 1}
+    assert queue.requeue_dead() == 1
+    assert queue.requeue_dead() == 0
+
+    claimed = {item.submission_id: item.attempts for item in (queue.claim(60), queue.claim(60))}
+    assert claimed == {"a": 1, "b": 1}
+
+
+def test_purge_delivered_keeps_rows_within_retention(tmp_path, make_submission) -> None:
+    queue = SubmissionQueue(tmp_path / "queue.sqlite3", retention_seconds=0)
+    queue.enqueue(make_submission("old"))
+    queue.enqueue(make_submission("pending"))
+    queue.mark_delivered("old")
+    time.sleep(0.01)
+
+    assert queue.purge_delivered() == 1
+    assert queue.counts() == {"pending": 1, "delivered": 0, "dead": 0}
+    # A purged id is accepted again; one still pending is not.
+    assert queue.enqueue(make_submission("old"))
+    assert not queue.enqueue(make_submission("pending"))
+    queue.close()
+
+
+def test_backoff_doubles_with_jitter_and_is_capped(queue: SubmissionQueue, make_settings) -> None:
+    workers = DeliveryWorkers(
+        queue,
+        _never_called,
+        make_settings(delivery_backoff_base_seconds=2, delivery_backoff_max_seconds=10),
+    )
+
+    for attempts, full in ((1, 2), (2, 4), (3, 8), (4, 10), (12, 10)):
+        delay = workers.backoff(attempts)
+        assert full * 0.5 <= delay <= full
+
+
+async def _never_called(payload: SalonSubmission) -> None:
+    raise AssertionError("deliver should not be called")
+
+
+async def _drain(queue: SubmissionQueue, deliver, settings, metrics=None, *, until) -> None:
+    workers = DeliveryWorkers(queue, deliver, settings, metrics=metrics)
+    workers.start()
+    try:
+        async with asyncio.timeout(5):
+            while not until():
+                await asyncio.sleep(0.01)
+    finally:
+        await workers.stop()
+
+
+def _fast_retries(make_settings, **overrides):
+    return make_settings(
+        delivery_workers=2,
+        delivery_backoff_base_seconds=0.01,
+        delivery_backoff_max_seconds=0.01,
+        delivery_poll_interval_seconds=0.01,
+        **overrides,
+    )
+
+
+def test_workers_deliver_and_record_metrics(queue: SubmissionQueue, make_submission, make_settings) -> None:
+    delivered: list[str] = []
+    metrics = RelayMetrics(MetricsRegistry())
+
+    async def deliver(payload: SalonSubmission) -> None:
+        delivered.append(payload.submission_id)
+
+    for index in range(3):
+        queue.enqueue(make_submission(f"sub-{index}"))
+
+    asyncio.run(
+        _drain(queue, deliver, _fast_retries(make_settings), metrics, until=lambda: len(delivered) == 3)
+    )
+
+    assert sorted(delivered) == ["sub-0", "sub-1", "sub-2"]
+    assert queue.counts()["delivered"] == 3
+    assert metrics.delivery_attempts.value("delivered") == 3
+    [(_, latency_series)] = metrics.delivery_latency_seconds.family()["samples"]
+    assert sum(latency_series[:-1]) == 3  # bucket counts; the last slot is the sum
+
+
+def test_permanent_errors_are_dead_lettered_without_retry(
+    queue: SubmissionQueue, make_submission, make_settings
+) -> None:
+    attempts: list[str] = []
+
+    async def deliver(payload: SalonSubmission) -> None:
+        attempts.append(payload.submission_id)
+        raise PermanentDeliveryError("Salon returned 422 for submission sub-1")
+
+    queue.enqueue(make_submission())
+    asyncio.run(
+        _drain(queue, deliver, _fast_retries(make_settings), until=lambda: queue.counts()["dead"] == 1)
+    )
+
+    assert attempts == ["sub-1"]
+    assert _row(queue, "sub-1")[3] == "Salon returned 422 for submission sub-1"
+
+
+def test_retryable_errors_are_dead_lettered_after_max_attempts(
+    queue: SubmissionQueue, make_submission, make_settings
+) -> None:
+    attempts: list[int] = []
+    metrics = RelayMetrics(MetricsRegistry())
+
+    async def deliver(payload: SalonSubmission) -> None:
+        attempts.append(len(attempts) + 1)
+        raise SalonDeliveryError("Salon returned 503")
+
+    queue.enqueue(make_submission())
+    asyncio.run(
+        _drain(
+            queue,
+            deliver,
+            _fast_retries(make_settings, delivery_max_attempts=3),
+            metrics,
+            until=lambda: queue.counts()["dead"] == 1,
+        )
+    )
+
+    assert attempts == [1, 2, 3]
+    assert _row(queue, "sub-1")[:2] == ("dead", 3)
+    assert metrics.delivery_attempts.value("retried") == 2
+    assert metrics.delivery_attempts.value("dead_lettered") == 1
+
+
+def test_transient_failure_is_retried_then_delivered(
+    queue: SubmissionQueue, make_submission, make_settings
+) -> None:
+    outcomes = [SalonDeliveryError("timeout"), None]
+
+    async def deliver(payload: SalonSubmission) -> None:
+        outcome = outcomes.pop(0)
+        if outcome is not None:
+            raise outcome
+
+    queue.enqueue(make_submission())
+    asyncio.run(
+        _drain(queue, deliver, _fast_retries(make_settings), until=lambda: queue.counts()["delivered"] == 1)
+    )
+
+    status, attempts, _, last_error = _row(queue, "sub-1")
+    assert (status, attempts, last_error) == ("delivered", 2, None)
+
+
+def test_notify_wakes_idle_workers_before_the_poll_interval(
+    queue: SubmissionQueue, make_submission, make_settings
+) -> None:
+    delivered = asyncio.Event()
+
+    async def deliver(payload: SalonSubmission) -> None:
+        delivered.set()
+
+    async def run() -> float:
+        workers = DeliveryWorkers(
+            queue, deliver, make_settings(delivery_workers=2, delivery_poll_interval_seconds=60)
+        )
+        workers.start()
+        try:
+            # Let both workers find the queue empty and go idle.
+            await asyncio.sleep(0.05)
+            started = time.perf_counter()
+            queue.enqueue(make_submission())
+            workers.notify()
+            await asyncio.wait_for(delivered.wait(), timeout=5)
+            return time.perf_counter() - started
+        finally:
+            await workers.stop()
+
+    assert asyncio.run(run()) < 1
+
+
+@pytest.mark.parametrize("stop_while", ["idle", "delivering"])
+def test_stop_returns_promptly(queue: SubmissionQueue, make_submission, make_settings, stop_while) -> None:
+    async def deliver(payload: SalonSubmission) -> None:
+        await asyncio.sleep(60)
+
+    if stop_while == "delivering":
+        queue.enqueue(make_submission())
+
+    async def run() -> None:
+        workers = DeliveryWorkers(queue, deliver, make_settings(delivery_poll_interval_seconds=60))
+        workers.start()
+        await asyncio.sleep(0.05)
+        await asyncio.wait_for(workers.stop(), timeout=5)
+
+    asyncio.run(run())
+    # A submission interrupted mid-delivery stays pending for its lease to expire.
+    assert queue.counts()["dead"] == 0
+
+
+def test_stop_right_after_notify_ends_every_worker(queue: SubmissionQueue, make_settings) -> None:
+    # On Python 3.11, a cancel landing as the wakeup fires can be swallowed by wait_for; the stop flag still
+    # ends those workers.
+    async def run() -> None:
+        workers = DeliveryWorkers(
+            queue, _never_called, make_settings(delivery_workers=4, delivery_poll_interval_seconds=60)
+        )
+        for _ in range(20):
+            workers.start()
+            tasks = list(workers._tasks)
+            await asyncio.sleep(0.01)
+            assert not any(task.done() for task in tasks)
+            workers.notify()
+            await asyncio.wait_for(workers.stop(), timeout=5)
+            assert all(task.done() for task in tasks)
+
+    asyncio.run(run())
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.application import SUBMISSIONS_PATH
+from app.form_schemas import FieldIssue, FormSchemaError, FormSchemaRegistry, validation_errors
+
+
+def _registry(forms: dict, **site) -> FormSchemaRegistry:
+    registry = FormSchemaRegistry()
+    registry.add_site({"hostnames": ["Site.Example.com"], "forms": forms, **site})
+    return registry
+
+
+def _issues(field_spec: dict, value) -> list[tuple[str, str]]:
+    registry = _registry({"contact": {"fields": {"value": field_spec}}})
+    return [(issue.field, issue.type) for issue in registry.validate("site.example.com", "contact", {"value": value})]
+
+
+@pytest.mark.parametrize(
+    ("spec", "value", "expected"),
+    [
+        ({"type": "string"}, "hello", None),
+        ({"type": "string"}, 42, "string_type"),
+        ({"type": "string", "max_length": 3}, "four", "string_too_long"),
+        ({"type": "string", "min_length": 3}, "ab", "string_too_short"),
+        ({"type": "string", "pattern": r"[A-Z]{2}\d{4}"}, "AB1234", None),
+        ({"type": "string", "pattern": r"[A-Z]{2}\d{4}"}, "ab1234", "string_pattern_mismatch"),
+        ({"type": "email"}, " ada@example.com ", None),
+        ({"type": "email"}, "ada@example", "email_format"),
+        ({"type": "email"}, "a" * 250 + "@example.com", "string_too_long"),
+        ({"type": "phone"}, "+1 (555) 010-2030 ext. 12", None),
+        ({"type": "phone"}, "call me", "phone_format"),
+        ({"type": "phone"}, "123", "phone_format"),
+        ({"type": "url"}, "https://example.com/a?b=c", None),
+        ({"type": "url"}, "ftp://example.com", "url_format"),
+        ({"type": "number", "minimum": 1, "maximum": 10}, "2.5", None),
+        ({"type": "number", "minimum": 1, "maximum": 10}, 0.5, "less_than_minimum"),
+        ({"type": "number", "minimum": 1, "maximum": 10}, 11, "greater_than_maximum"),
+        ({"type": "number"}, "NaN", "number_type"),
+        ({"type": "number"}, True, "number_type"),
+        ({"type": "integer"}, "7", None),
+        ({"type": "integer"}, 7.0, None),
+        ({"type": "integer"}, 7.5, "int_type"),
+        ({"type": "integer"}, "7.5", "int_type"),
+        ({"type": "boolean"}, "on", None),
+        ({"type": "boolean"}, False, None),
+        ({"type": "boolean"}, "maybe", "bool_type"),
+        ({"type": "choice", "choices": ["a", "b"]}, ["a", "b"], None),
+        ({"type": "choice", "choices": ["a", "b"]}, "c", "enum"),
+        ({"type": "choice", "choices": ["1", "2"]}, 1, "enum"),
+        ({"type": "string", "choices": ["x"]}, "y", "enum"),
+    ],
+)
+def test_field_checks(spec, value, expected) -> None:
+    assert _issues(spec, value) == ([] if expected is None else [("value", expected)])
+
+
+def test_required_fields_and_blank_values() -> None:
+    registry = _registry(
+        {"contact": {"fields": {"email": {"type": "email", "required": True}, "phone": {"type": "phone"}}}}
+    )
+
+    assert registry.validate("site.example.com", "contact", {"email": "  ", "phone": ""}) == [
+        FieldIssue("email", "missing", "is required")
+    ]
+    assert registry.validate("site.example.com", "contact", {"email": "ada@example.com", "phone": []}) == []
+
+
+def test_unknown_forms_pass_through_unless_the_site_is_strict() -> None:
+    forms = {"contact": {"fields": {"email": {"type": "email"}}}}
+    lenient = _registry(forms)
+    strict = _registry(forms, allow_unknown_forms=False)
+
+    assert lenient.validate("site.example.com", "newsletter", {"email": "nope"}) == []
+    assert lenient.validate("other.example.com", "contact", {"email": "nope"}) == []
+    assert [issue.type for issue in strict.validate("site.example.com", "newsletter", {})] == ["unknown_form"]
+    assert strict.knows_form("site.example.com", "contact")
+    assert not strict.knows_form("site.example.com", "newsletter")
+
+
+def test_any_form_schema_covers_forms_without_their_own() -> None:
+    registry = _registry({"*": {"fields": {"email": {"type": "email", "required": True}}}})
+
+    assert [issue.type for issue in registry.validate("site.example.com", "anything", {})] == ["missing"]
+    assert [issue.type for issue in registry.validate("site.example.com", None, {})] == ["missing"]
+    assert not registry.knows_form("site.example.com", "anything")
+
+
+def test_additional_fields_are_length_capped() -> None:
+    registry = _registry({"contact": {"fields": {"email": {"type": "email"}}, "max_additional_length": 20}})
+
+    def issues(value) -> list[str]:
+        return [issue.type for issue in registry.validate("site.example.com", "contact", {"extra": value})]
+
+    assert issues("x" * 20) == []
+    assert issues("x" * 21) == ["string_too_long"]
+    assert issues(["short", "list"]) == []
+    assert issues(12345) == []
+    # Non-strings are bounded by their JSON size, so oversized lists and objects cannot slip through.
+    assert issues(["x" * 10, "y" * 10]) == ["too_long"]
+    assert issues({"nested": {"deep": "z" * 20}}) == ["too_long"]
+    assert issues(list(range(20))) == ["too_long"]
+
+
+def test_additional_fields_can_be_forbidden() -> None:
+    registry = _registry({"contact": {"additional_fields": False, "fields": {"email": {"type": "email"}}}})
+
+    issues = registry.validate("site.example.com", "contact", {"email": "ada@example.com", "extra": "x", "blank": ""})
+
+    assert issues == [FieldIssue("extra", "extra_forbidden", "is not a field of this form")]
+
+
+def test_validation_errors_do_not_echo_values() -> None:
+    errors = validation_errors(
+        [
+            FieldIssue("email", "email_format", "must be a valid email address"),
+            FieldIssue("form_name", "unknown_form", "x"),
+        ]
+    )
+
+    assert errors == [
+        {"type": "email_format", "loc": ("body", "fields", "email"), "msg": "email must be a valid email address"},
+        {"type": "unknown_form", "loc": ("body", "form_name"), "msg": "form_name x"},
+    ]
+
+
+@pytest.mark.parametrize(
+    ("forms", "message"),
+    [
+        ({"contact": {"fields": {}}}, "non-empty 'fields'"),
+        ({"contact": {"fields": {"a": {"type": "colour"}}}}, "unknown type 'colour'"),
+        ({"contact": {"fields": {"a": {"pattern": "("}}}}, "invalid pattern"),
+        ({"contact": {"fields": {"a": {"type": "choice", "choices": []}}}}, "non-empty list of choices"),
+        ({"contact": {"fields": {"a": "string"}}}, "must be an object"),
+    ],
+)
+def test_malformed_schemas_are_rejected(forms, message) -> None:
+    with pytest.raises(FormSchemaError, match=message):
+        _registry(forms)
+
+
+def test_from_directory_loads_every_site(tmp_path) -> None:
+    for slug, host in (("one", "one.example.com"), ("two", "two.example.com")):
+        (tmp_path / slug).mkdir()
+        (tmp_path / slug / "form-schemas.json").write_text(
+            json.dumps({"hostnames": [host], "forms": {"contact": {"fields": {"email": {"type": "email"}}}}})
+        )
+    (tmp_path / "three").mkdir()  # a site without schemas
+
+    registry = FormSchemaRegistry.from_directory(tmp_path)
+
+    assert len(registry) == 2
+    assert registry.knows_form("one.example.com", "contact")
+    assert registry.knows_form("two.example.com", "contact")
+
+
+@pytest.mark.parametrize(
+    ("content", "message"), [("{broken", "Unable to read"), ("[]", "must contain a JSON object")]
+)
+def test_from_directory_reports_unreadable_files(tmp_path, content, message) -> None:
+    (tmp_path / "site").mkdir()
+    (tmp_path / "site" / "form-schemas.json").write_text(content)
+
+    with pytest.raises(FormSchemaError, match=message):
+        FormSchemaRegistry.from_directory(tmp_path)
+
+
+def test_endpoint_refuses_invalid_submissions_without_queueing(make_app, tmp_path) -> None:
+    (tmp_path / "schemas" / "site").mkdir(parents=True)
+    (tmp_path / "schemas" / "site" / "form-schemas.json").write_text(
+        json.dumps(
+            {
+                "hostnames": ["site.example.com"],
+                "forms": {"contact": {"fields": {"email": {"type": "email", "required": True}}}},
+            }
+        )
+    )
+    app = make_app(form_schemas_dir=str(tmp_path / "schemas"), spam_filter_enabled=False)
+
+    with TestClient(app) as client:
+        response = client.post(
+            SUBMISSIONS_PATH,
+            json={"form_name": "contact", "fields": {"email": "secret-not-an-email", "extra": ["x" * 6000]}},
+            headers={"origin": "https://site.example.com"},
+        )
+        counts = app.state.submission_queue.counts()
+
+    assert response.status_code == 422
+    assert "secret-not-an-email" not in response.text
+    assert {error["loc"][-1]: error["type"] for error in response.json()["detail"]} == {
+        "email": "email_format",
+        "extra": "too_long",
+    }
+    assert counts == {"pending": 0, "delivered": 0, "dead": 0}
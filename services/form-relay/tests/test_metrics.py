@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.metrics import OVERFLOW_LABEL, MetricsRegistry, SnapshotDirectory, merge, render
+
+
+def test_render_counters_and_histograms() -> None:
+    registry = MetricsRegistry()
+    counter = registry.counter("relay_events_total", "Events seen.", ("site",))
+    histogram = registry.histogram("relay_seconds", "Durations.", ("result",), buckets=(0.1, 1.0))
+    counter.inc('a "quoted"\nsite')
+    counter.inc("b.example.com", amount=2.5)
+    for amount in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(amount, "ok")
+
+    assert render(registry.snapshot()).splitlines() == [
+        "# HELP relay_events_total Events seen.",
+        "# TYPE relay_events_total counter",
+        'relay_events_total{site="a \\"quoted\\"\\nsite"} 1',
+        'relay_events_total{site="b.example.com"} 2.5',
+        "# HELP relay_seconds Durations.",
+        "# TYPE relay_seconds histogram",
+        'relay_seconds_bucket{result="ok",le="0.1"} 1',
+        'relay_seconds_bucket{result="ok",le="1"} 3',
+        'relay_seconds_bucket{result="ok",le="+Inf"} 4',
+        'relay_seconds_sum{result="ok"} 4.05',
+        'relay_seconds_count{result="ok"} 4',
+    ]
+
+
+def test_unlabelled_counter_renders_without_braces() -> None:
+    registry = MetricsRegistry()
+    registry.counter("relay_bytes_total", "Bytes.").inc(amount=10)
+
+    assert render(registry.snapshot()).splitlines()[-1] == "relay_bytes_total 10"
+
+
+def test_series_past_the_cap_fold_into_other() -> None:
+    registry = MetricsRegistry(max_series=2)
+    counter = registry.counter("relay_total", "Totals.", ("site", "form"))
+    histogram = registry.histogram("relay_seconds", "Durations.", ("site",), buckets=(1.0,))
+
+    for index in range(5):
+        counter.inc(f"site-{index}", "contact")
+        histogram.observe(0.5, f"site-{index}")
+    # Series that existed before the cap keep counting on their own.
+    counter.inc("site-0", "contact")
+
+    assert counter.value("site-0", "contact") == 2
+    assert counter.value(OVERFLOW_LABEL, OVERFLOW_LABEL) == 3
+    assert len(counter.family()["samples"]) == 3
+    assert dict((tuple(labels), series) for labels, series in histogram.family()["samples"]) == {
+        ("site-0",): [1, 0, 0.5],
+        ("site-1",): [1, 0, 0.5],
+        (OVERFLOW_LABEL,): [3, 0, 1.5],
+    }
+
+
+def _family(samples, kind="counter"):
+    family = {"type": kind, "help": "h", "labels": ["site"], "samples": samples}
+    if kind == "histogram":
+        family["buckets"] = [1.0]
+    return family
+
+
+def test_merge_sums_matching_series() -> None:
+    merged = merge(
+        [
+            {"c": _family([[["a"], 1], [["b"], 2]]), "h": _family([[["a"], [1, 0, 0.5]]], "histogram")},
+            {"c": _family([[["a"], 3]]), "h": _family([[["a"], [0, 2, 4.0]], [["b"], [1, 0, 0.1]]], "histogram")},
+            {"only_here": _family([[["z"], 7]])},
+        ]
+    )
+
+    assert merged["c"]["samples"] == [[["a"], 4], [["b"], 2]]
+    assert merged["h"]["samples"] == [[["a"], [1, 2, 4.5]], [["b"], [1, 0, 0.1]]]
+    assert merged["h"]["buckets"] == [1.0]
+    assert merged["only_here"]["samples"] == [[["z"], 7]]
+
+
+def test_snapshot_directory_merges_other_workers(tmp_path) -> None:
+    registry = MetricsRegistry()
+    counter = registry.counter("relay_total", "Totals.", ("site",))
+    counter.inc("a")
+    snapshots = SnapshotDirectory(tmp_path, registry, interval=60)
+    (tmp_path / "1.json").write_text(json.dumps({"relay_total": _family([[["a"], 2], [["b"], 5]])}))
+    (tmp_path / "2.json").write_text("{not json")  # a torn write is skipped
+
+    assert merge([snapshots.collect()])["relay_total"]["samples"] == [[["a"], 3], [["b"], 5]]
+
+    # Its own file is written atomically and not counted twice.
+    counter.inc("a")
+    snapshots.write()
+    assert json.loads(snapshots.file.read_text())["relay_total"]["samples"] == [[["a"], 2]]
+    assert not snapshots.file.with_suffix(".tmp").exists()
+    assert snapshots.collect()["relay_total"]["samples"] == [[["a"], 4], [["b"], 5]]
+
+
+def test_metrics_endpoint_is_off_by_default(make_app) -> None:
+    with TestClient(make_app()) as client:
+        assert client.get("/metrics").status_code == 404
+
+
+@pytest.mark.parametrize(("authorization", "expected"), [(None, 401), ("Bearer wrong", 401), ("Bearer s3cret", 200)])
+def test_metrics_endpoint_requires_the_token(make_app, authorization, expected) -> None:
+    headers = {"authorization": authorization} if authorization else {}
+
+    with TestClient(make_app(metrics_enabled=True, metrics_auth_token="s3cret")) as client:
+        response = client.get("/metrics", headers=headers)
+
+    assert response.status_code == expected
+    if expected == 200:
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE form_relay_submissions_total counter" in response.text
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.application import SUBMISSIONS_PATH
+from app.origins import AllowListWatcher, OriginMatcher
+
+MATCHER = OriginMatcher(
+    [
+        "https://exact.example.com",
+        "http://localhost:5173",
+        "bare.example.org",
+        "https://*.example.com",
+        "*.any.example.net",
+        "https://*.ported.example.com:8443",
+        " ",
+    ]
+)
+
+
+@pytest.mark.parametrize(
+    ("origin", "allowed"),
+    [
+        ("https://exact.example.com", True),
+        ("http://exact.example.com", False),
+        ("https://exact.example.com:444", False),
+        ("http://localhost:5173", True),
+        ("http://localhost:3000", False),
+        ("https://bare.example.org", True),
+        ("http://bare.example.org:8080", True),
+        ("https://www.bare.example.org", False),
+        # Wildcards cover subdomains at any depth, never the domain itself.
+        ("https://a.example.com", True),
+        ("https://a.b.c.example.com", True),
+        ("https://example.com", False),
+        ("https://evilexample.com", False),
+        ("https://a.example.com.evil.test", False),
+        ("http://a.example.com", False),
+        ("https://a.example.com:8443", False),
+        ("ws://x.any.example.net:9000", True),
+        ("https://any.example.net", False),
+        # A ported wildcard keeps its port.
+        ("https://a.ported.example.com:8443", True),
+        ("https://a.ported.example.com", True),  # still covered by https://*.example.com
+        ("https://a.ported.example.com:9000", False),
+        ("https://a.ported.example.com:notaport", False),
+        ("null", False),
+        ("", False),
+    ],
+)
+def test_allows_origin(origin, allowed) -> None:
+    assert MATCHER.allows_origin(origin) is allowed
+
+
+@pytest.mark.parametrize(
+    ("host", "allowed"),
+    [
+        ("exact.example.com", True),
+        ("localhost", True),
+        ("bare.example.org", True),
+        ("deep.sub.example.com", True),
+        ("x.ported.example.com", True),
+        ("example.com", False),
+        ("other.test", False),
+        ("", False),
+    ],
+)
+def test_allows_host_ignores_scheme_and_port(host, allowed) -> None:
+    assert MATCHER.allows_host(host) is allowed
+
+
+def test_ported_wildcard_only_allows_its_port() -> None:
+    matcher = OriginMatcher(["https://*.example.com:8443", "http://*.dev.test:80"])
+
+    assert matcher.allows_origin("https://a.example.com:8443")
+    assert not matcher.allows_origin("https://a.example.com")
+    assert not matcher.allows_origin("https://a.example.com:9443")
+    # An explicit default port is the same origin as none.
+    assert matcher.allows_origin("http://a.dev.test")
+
+    # A wildcard whose port cannot be read is dropped rather than widened to the default port.
+    assert not OriginMatcher(["https://*.example.com:http"]).allows_origin("https://a.example.com")
+
+
+def test_exact_entries_and_wildcards_combine() -> None:
+    matcher = OriginMatcher(["http://legacy.example.com", "https://*.example.com", "http://*.example.com"])
+
+    assert matcher.allows_origin("http://legacy.example.com")
+    assert matcher.allows_origin("http://other.example.com")
+    assert matcher.allows_origin("https://legacy.example.com")
+    assert not matcher.allows_origin("ftp://other.example.com")
+
+    # A scheme-less wildcard widens a scheme-specific one on the same domain, whichever comes first.
+    for entries in (["https://*.example.com", "*.example.com"], ["*.example.com", "https://*.example.com"]):
+        assert OriginMatcher(entries).allows_origin("ftp://a.example.com")
+
+
+def test_star_allows_everything_and_empty_is_falsy() -> None:
+    assert OriginMatcher(["*"]).allows_origin("https://anything.test")
+    assert OriginMatcher(["*"]).allows_host("anything.test")
+    assert not OriginMatcher([])
+    assert not OriginMatcher(["", "  "])
+    assert not OriginMatcher([]).allows_origin("https://anything.test")
+
+
+def _bump(path, entries, *, step: int) -> None:
+    path.write_text(entries if isinstance(entries, str) else json.dumps(entries))
+    stat = path.stat()
+    # Filesystem timestamps can be coarse; move mtime explicitly so every write is seen.
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + step * 1_000_000_000))
+
+
+def test_watcher_reloads_changes_and_keeps_the_last_good_list(tmp_path) -> None:
+    path = tmp_path / "allowed-origins.json"
+    _bump(path, ["https://one.example.com"], step=0)
+    installed: list[OriginMatcher] = []
+    watcher = AllowListWatcher(path, installed.append, interval=60)
+
+    assert not watcher.check()  # unchanged since the watcher started
+
+    _bump(path, ["https://*.two.example.com"], step=1)
+    assert watcher.check()
+    assert installed[-1].allows_origin("https://a.two.example.com")
+    assert not watcher.check()
+
+    _bump(path, "[\"https://half-written", step=2)
+    assert not watcher.check()
+    _bump(path, {"not": "a list"}, step=3)
+    assert not watcher.check()
+    assert len(installed) == 1
+
+    _bump(path, ["https://three.example.com"], step=4)
+    assert watcher.check()
+    assert installed[-1].entries == ("https://three.example.com",)
+
+    path.unlink()
+    assert not watcher.check()
+    assert len(installed) == 2
+
+
+def test_app_swaps_in_a_reloaded_allow_list(make_app, tmp_path) -> None:
+    path = tmp_path / "allowed-origins.json"
+    _bump(path, ["https://one.example.com"], step=0)
+    app = make_app(allowed_origins=[], allowed_origins_file=str(path), allowed_origins_reload_seconds=60)
+    body = {"form_name": "contact", "fields": {"email": "ada@example.com"}}
+
+    with TestClient(app) as client:
+        before = client.post(SUBMISSIONS_PATH, json=body, headers={"origin": "https://two.example.com"})
+        _bump(path, ["https://two.example.com"], step=1)
+        assert app.state.allow_list_watcher.check()
+        after = client.post(SUBMISSIONS_PATH, json=body, headers={"origin": "https://two.example.com"})
+        preflight = client.options(
+            SUBMISSIONS_PATH,
+            headers={"origin": "https://two.example.com", "access-control-request-method": "POST"},
+        )
+
+    assert (before.status_code, after.status_code) == (403, 202)
+    assert preflight.headers["access-control-allow-origin"] == "https://two.example.com"
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from starlette.types import Receive, Scope, Send
+
+from app.application import SUBMISSIONS_PATH, UNDECLARED_FORM_LABEL, UNLISTED_HOST_LABEL
+from app.ratelimit import InMemoryRateLimiter, RateLimitMiddleware, client_address, trusted_proxy_networks
+
+PROXIES = trusted_proxy_networks(["10.0.0.0/8", "2001:db8::1"])
+
+
+@pytest.mark.parametrize(
+    ("peer", "forwarded_for", "expected"),
+    [
+        ("198.51.100.7", None, "198.51.100.7"),
+        # Untrusted peers cannot pick their own address.
+        ("198.51.100.7", "203.0.113.1", "198.51.100.7"),
+        ("10.0.0.2", "203.0.113.1", "203.0.113.1"),
+        # Hops the caller prepended sit left of the one the proxy appended.
+        ("10.0.0.2", "1.1.1.1, 203.0.113.1", "203.0.113.1"),
+        ("10.0.0.2", "203.0.113.1, 10.0.0.3", "203.0.113.1"),
+        ("2001:db8::1", "2001:db8::42", "2001:db8::42"),
+        ("10.0.0.2", "10.0.0.4, 10.0.0.3", "10.0.0.4"),
+        ("10.0.0.2", "not-an-ip", "not-an-ip"),
+        ("10.0.0.2", None, "10.0.0.2"),
+        (None, "203.0.113.1", "unknown"),
+    ],
+)
+def test_client_address(peer, forwarded_for, expected) -> None:
+    assert client_address(peer, forwarded_for, PROXIES) == expected
+
+
+def test_client_address_ignores_the_header_without_trusted_proxies() -> None:
+    assert client_address("10.0.0.2", "203.0.113.1", ()) == "10.0.0.2"
+
+
+def _post_all(peer: str, posts: list[dict], trusted=(), received: list[bytes] | None = None) -> list[int]:
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        if received is not None:
+            received.append((await receive())["body"])
+        await send({"type": "http.response.start", "status": 202, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = RateLimitMiddleware(
+        app,
+        limiter=InMemoryRateLimiter(rate_per_second=0.01, burst=2),
+        paths=("/submit",),
+        max_body_bytes=1024,
+        trusted_proxies=trusted,
+    )
+
+    async def run() -> list[int]:
+        transport = httpx.ASGITransport(app=middleware, client=(peer, 40000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://relay") as client:
+            statuses = []
+            for post in posts:
+                headers = {"origin": "https://site.example.com", **post.pop("headers", {})}
+                response = await client.post("/submit", headers=headers, **post)
+                statuses.append(response.status_code)
+            return statuses
+
+    return asyncio.run(run())
+
+
+def _statuses(peer: str, forwarded_for: list[str], trusted=()) -> list[int]:
+    posts = [{"json": {"form_name": "contact"}, "headers": {"x-forwarded-for": value}} for value in forwarded_for]
+    return _post_all(peer, posts, trusted)
+
+
+def test_spoofed_forwarded_for_does_not_reset_the_bucket() -> None:
+    spoofed = [f"203.0.113.{index}" for index in range(5)]
+
+    assert _statuses("198.51.100.7", spoofed) == [202, 202, 429, 429, 429]
+
+
+def test_prepended_hops_behind_a_trusted_proxy_do_not_reset_the_bucket() -> None:
+    spoofed = [f"203.0.113.{index}, 198.51.100.7" for index in range(5)]
+
+    assert _statuses("10.0.0.2", spoofed, PROXIES) == [202, 202, 429, 429, 429]
+
+
+def test_trusted_proxy_clients_get_their_own_buckets() -> None:
+    clients = [f"198.51.100.{index}" for index in range(5)]
+
+    assert _statuses("10.0.0.2", clients, PROXIES) == [202] * 5
+
+
+def test_rotating_form_names_share_one_bucket() -> None:
+    posts = [{"json": {"form_name": f"form-{index}"}} for index in range(5)]
+
+    assert _post_all("198.51.100.7", posts) == [202, 202, 429, 429, 429]
+
+
+def test_buffered_body_is_replayed_to_the_app() -> None:
+    received: list[bytes] = []
+
+    assert _post_all("198.51.100.7", [{"content": b'{"form_name": "contact"}'}], received=received) == [202]
+    assert received == [b'{"form_name": "contact"}']
+
+
+@pytest.mark.parametrize("declared", [True, False])
+def test_oversized_bodies_are_refused_before_buffering(declared) -> None:
+    body = b'{"fields": {"message": "' + b"x" * 2000 + b'"}}'
+
+    async def chunks():
+        for start in range(0, len(body), 100):
+            yield body[start : start + 100]
+
+    # Without Content-Length the body streams in chunks and is cut off once it passes the cap.
+    post = {"content": body} if declared else {"content": chunks()}
+    assert _post_all("198.51.100.7", [post]) == [413]
+
+
+def test_endpoint_caps_the_body_without_the_rate_limiter(make_app) -> None:
+    app = make_app(rate_limit_enabled=False, submission_max_body_bytes=100)
+
+    with TestClient(app) as client:
+        response = client.post(
+            SUBMISSIONS_PATH,
+            json={"form_name": "contact", "fields": {"message": "x" * 200}},
+            headers={"origin": "https://site.example.com"},
+        )
+
+    assert response.status_code == 413
+    assert app.state.metrics.rejections.value("too_large") == 1
+
+
+def _limited_labels(app) -> dict[tuple[str, str], float]:
+    return {
+        tuple(labels[:2]): total
+        for labels, total in app.state.metrics.submissions.family()["samples"]
+        if labels[2] == "rate_limited"
+    }
+
+
+def test_rate_limited_metrics_label_only_allowed_hosts_and_declared_forms(make_app, tmp_path) -> None:
+    site = tmp_path / "schemas" / "site"
+    site.mkdir(parents=True)
+    (site / "form-schemas.json").write_text(
+        json.dumps(
+            {"hostnames": ["site.example.com"], "forms": {"contact": {"fields": {"email": {"type": "email"}}}}}
+        )
+    )
+    app = make_app(rate_limit_burst=1, spam_filter_enabled=False, form_schemas_dir=str(tmp_path / "schemas"))
+    posts = [
+        ("https://site.example.com", "contact"),
+        ("https://site.example.com", "contact"),
+        ("https://site.example.com", "form-8c1f"),
+        ("https://a.attacker.test", "contact"),
+        ("https://a.attacker.test", "contact"),
+        ("https://b.attacker.test", "form-77aa"),
+        ("https://b.attacker.test", "form-77ab"),
+    ]
+
+    with TestClient(app) as client:
+        for origin, form_name in posts:
+            client.post(
+                SUBMISSIONS_PATH,
+                json={"form_name": form_name, "fields": {"email": "ada@example.com"}},
+                headers={"origin": origin},
+            )
+
+    assert _limited_labels(app) == {
+        ("site.example.com", "contact"): 1,
+        ("site.example.com", UNDECLARED_FORM_LABEL): 1,
+        (UNLISTED_HOST_LABEL, UNDECLARED_FORM_LABEL): 2,
+    }
+    assert app.state.metrics.submissions.value("site.example.com", "contact", "accepted") == 1
+
+
+def test_rate_limited_metrics_keep_hosts_when_every_origin_is_allowed(make_app, tmp_path) -> None:
+    app = make_app(
+        allowed_origins=[], allowed_origins_file=str(tmp_path / "missing.json"), rate_limit_burst=1
+    )
+
+    with TestClient(app) as client:
+        for _ in range(2):
+            client.post(
+                SUBMISSIONS_PATH, json={"form_name": "contact"}, headers={"origin": "https://any.example.org"}
+            )
+
+    assert _limited_labels(app) == {("any.example.org", UNDECLARED_FORM_LABEL): 1}
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.clients.salon import PermanentDeliveryError, SalonClient, SalonDeliveryError
+from app.fake_salon import FakeSalonStats, create_fake_salon
+
+
+def _client(make_settings, fake, **overrides) -> SalonClient:
+    settings = make_settings(
+        salon_forwarding_enabled=True,
+        salon_endpoint_url="http://fake-salon/submissions",
+        **overrides,
+    )
+    return SalonClient(settings, transport=httpx.ASGITransport(app=fake))
+
+
+def _stats(fake) -> FakeSalonStats:
+    return fake.state.stats
+
+
+@pytest.mark.parametrize(
+    ("status_code", "expected"),
+    [
+        (202, None),
+        (409, SalonDeliveryError),
+        (429, SalonDeliveryError),
+        (500, SalonDeliveryError),
+        (503, SalonDeliveryError),
+        (400, PermanentDeliveryError),
+        (422, PermanentDeliveryError),
+    ],
+)
+def test_forward_maps_salon_statuses(make_settings, make_submission, status_code, expected) -> None:
+    fake = create_fake_salon(statuses={"sub-1": status_code})
+
+    async def run() -> None:
+        client = _client(make_settings, fake)
+        try:
+            await client.forward(make_submission("sub-1"))
+        finally:
+            await client.aclose()
+
+    if expected is None:
+        asyncio.run(run())
+    else:
+        with pytest.raises(expected, match=f"Salon returned {status_code} for submission sub-1"):
+            asyncio.run(run())
+    assert _stats(fake).requests == 1
+
+
+def test_forward_sends_the_submission_id_as_idempotency_key(make_settings, make_submission) -> None:
+    fake = create_fake_salon()
+
+    async def run() -> None:
+        client = _client(make_settings, fake)
+        try:
+            # A retried delivery reuses the key, so Salon can recognise it.
+            await client.forward(make_submission("sub-1"))
+            await client.forward(make_submission("sub-1"))
+            await client.forward(make_submission("sub-2"))
+        finally:
+            await client.aclose()
+
+    asyncio.run(run())
+
+    stats = _stats(fake)
+    assert stats.idempotency_keys == ["sub-1", "sub-1", "sub-2"]
+    assert (stats.accepted, stats.duplicates) == (2, 1)
+
+
+def test_connection_errors_are_retryable(make_settings, make_submission) -> None:
+    def refuse(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused", request=request)
+
+    settings = make_settings(salon_forwarding_enabled=True, salon_endpoint_url="http://fake-salon/submissions")
+
+    async def run() -> None:
+        client = SalonClient(settings, transport=httpx.MockTransport(refuse))
+        try:
+            await client.forward(make_submission())
+        finally:
+            await client.aclose()
+
+    with pytest.raises(SalonDeliveryError, match="Salon request failed"):
+        asyncio.run(run())
+
+
+def test_batch_flushes_after_the_window(make_settings, make_submission) -> None:
+    fake = create_fake_salon()
+
+    async def run() -> float:
+        client = _client(
+            make_settings, fake, salon_batch_enabled=True, salon_batch_window_ms=50, salon_batch_max_size=50
+        )
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(client.forward(make_submission(f"sub-{index}")) for index in range(3)))
+            return time.perf_counter() - started
+        finally:
+            await client.aclose()
+
+    elapsed = asyncio.run(run())
+
+    stats = _stats(fake)
+    assert stats.batch_sizes == [3]
+    assert stats.accepted == 3
+    assert elapsed >= 0.05
+
+
+def test_batch_flushes_as_soon_as_it_is_full(make_settings, make_submission) -> None:
+    fake = create_fake_salon()
+
+    async def run() -> None:
+        client = _client(
+            make_settings, fake, salon_batch_enabled=True, salon_batch_window_ms=60_000, salon_batch_max_size=2
+        )
+        try:
+            forwards = (client.forward(make_submission(f"sub-{index}")) for index in range(4))
+            # Far shorter than the window: only reaching max_size can have sent them.
+            await asyncio.wait_for(asyncio.gather(*forwards), timeout=5)
+        finally:
+            await client.aclose()
+
+    asyncio.run(run())
+
+    assert _stats(fake).batch_sizes == [2, 2]
+
+
+def test_batch_reports_failures_per_submission(make_settings, make_submission) -> None:
+    fake = create_fake_salon(statuses={"busy": 503, "throttled": 429, "rejected": 422})
+
+    async def run() -> list[BaseException | None]:
+        client = _client(
+            make_settings, fake, salon_batch_enabled=True, salon_batch_window_ms=10, salon_batch_max_size=10
+        )
+        try:
+            return await asyncio.gather(
+                *(
+                    client.forward(make_submission(submission_id))
+                    for submission_id in ("ok", "busy", "throttled", "rejected")
+                ),
+                return_exceptions=True,
+            )
+        finally:
+            await client.aclose()
+
+    ok, busy, throttled, rejected = asyncio.run(run())
+
+    assert _stats(fake).batch_sizes == [4]
+    assert ok is None
+    assert isinstance(busy, SalonDeliveryError)
+    assert isinstance(throttled, SalonDeliveryError)
+    assert isinstance(rejected, PermanentDeliveryError)
+    assert str(rejected) == "Salon returned 422 for submission rejected"
+
+
+def test_batch_treats_unreadable_item_statuses_as_retryable(make_settings, make_submission) -> None:
+    statuses = {"ok": 202, "garbled": "accepted?", "missing": None, "nested": {"code": 500}}
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            json={"results": [{"submission_id": key, "status": value} for key, value in statuses.items()]},
+        )
+
+    settings = make_settings(
+        salon_forwarding_enabled=True,
+        salon_endpoint_url="http://fake-salon/submissions",
+        salon_batch_enabled=True,
+        salon_batch_window_ms=10,
+        salon_batch_max_size=10,
+    )
+
+    async def run() -> list[BaseException | None]:
+        client = SalonClient(settings, transport=httpx.MockTransport(respond))
+        try:
+            return await asyncio.gather(
+                *(client.forward(make_submission(submission_id)) for submission_id in statuses),
+                return_exceptions=True,
+            )
+        finally:
+            await client.aclose()
+
+    ok, *unreadable = asyncio.run(run())
+
+    assert ok is None
+    for error in unreadable:
+        assert type(error) is SalonDeliveryError
+        assert "unreadable status" in str(error)
+
+
+def test_close_drains_the_open_batch(make_settings, make_submission) -> None:
+    fake = create_fake_salon()
+
+    async def run() -> list[asyncio.Task[None]]:
+        client = _client(
+            make_settings, fake, salon_batch_enabled=True, salon_batch_window_ms=60_000, salon_batch_max_size=50
+        )
+        forwards = [asyncio.create_task(client.forward(make_submission(f"sub-{index}"))) for index in range(2)]
+        await asyncio.sleep(0)  # let both join the batch
+        await asyncio.wait_for(client.aclose(), timeout=5)
+        await asyncio.gather(*forwards)
+        return forwards
+
+    forwards = asyncio.run(run())
+
+    assert all(task.done() and task.exception() is None for task in forwards)
+    assert _stats(fake).batch_sizes == [2]
+    assert _stats(fake).accepted == 2
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.application import SUBMISSIONS_PATH
+from app.spam import SpamFilter, SpamVerdict, SubmissionCandidate
+
+RECEIVED_AT = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _candidate(fields: dict | None = None, **metadata) -> SubmissionCandidate:
+    return SubmissionCandidate(
+        hostname="site.example.com",
+        form_name="contact",
+        fields={"email": "ada@example.com", "message": "Hello"} if fields is None else fields,
+        metadata=metadata,
+        received_at=RECEIVED_AT,
+    )
+
+
+@pytest.fixture
+def make_filter(make_settings):
+    def factory(*stages: str, **overrides) -> SpamFilter:
+        return SpamFilter(make_settings(spam_filter_stages=list(stages), **overrides))
+
+    return factory
+
+
+def test_clean_submission_passes_every_stage(make_filter) -> None:
+    spam_filter = make_filter("honeypot", "fill_time", "lengths", "links", "classifier")
+
+    assert spam_filter.check(_candidate(form_started_at=(RECEIVED_AT - timedelta(seconds=30)).isoformat())) is None
+    assert {stats.checked for stats in spam_filter.stats.values()} == {1}
+
+
+@pytest.mark.parametrize("value", ["I am a bot", ["checked"]])
+def test_honeypot_rejects_filled_fields(make_filter, value) -> None:
+    spam_filter = make_filter("honeypot")
+
+    assert spam_filter.check(_candidate({"email": "a@example.com", "Bot_Field": value})) == SpamVerdict(
+        "honeypot", "honeypot field 'Bot_Field' filled"
+    )
+    assert spam_filter.check(_candidate({"email": "a@example.com", "_gotcha": ""})) is None
+
+
+@pytest.mark.parametrize(
+    ("started_at", "rejected"),
+    [
+        ((RECEIVED_AT - timedelta(seconds=1)).isoformat(), True),
+        ((RECEIVED_AT - timedelta(seconds=1)).isoformat().replace("+00:00", "Z"), True),
+        ((RECEIVED_AT - timedelta(seconds=1)).timestamp(), True),
+        ((RECEIVED_AT - timedelta(seconds=1)).timestamp() * 1000, True),
+        ((RECEIVED_AT - timedelta(seconds=10)).timestamp(), False),
+    ],
+)
+def test_fill_time_rejects_forms_filled_too_fast(make_filter, started_at, rejected) -> None:
+    verdict = make_filter("fill_time", spam_min_fill_seconds=3).check(_candidate(form_started_at=started_at))
+
+    assert (verdict is not None) is rejected
+    if rejected:
+        assert verdict == SpamVerdict("fill_time", "form filled in 1.0s")
+
+
+@pytest.mark.parametrize(
+    "started_at",
+    [1e20, -1e20, float("inf"), float("nan"), "yesterday", "", True, None, {"at": 1}],
+)
+def test_fill_time_ignores_out_of_range_or_garbage_timestamps(make_filter, started_at) -> None:
+    assert make_filter("fill_time").check(_candidate(form_started_at=started_at)) is None
+
+
+def test_lengths_rejects_long_fields(make_filter) -> None:
+    spam_filter = make_filter("lengths", spam_max_field_length=10)
+
+    assert spam_filter.check(_candidate({"message": "x" * 10})) is None
+    assert spam_filter.check(_candidate({"message": "x" * 11})) == SpamVerdict(
+        "lengths", "field 'message' is 11 characters"
+    )
+
+
+def test_links_counts_urls_across_fields_and_lists(make_filter) -> None:
+    spam_filter = make_filter("links", spam_max_links=2)
+
+    assert spam_filter.check(_candidate({"a": "see https://one.test", "b": ["www.two.test"]})) is None
+    assert spam_filter.check(
+        _candidate({"a": "see https://one.test and http://two.test", "b": ['<a href="x">']})
+    ) == SpamVerdict("links", "3 links")
+
+
+def test_classifier_scores_tokens(make_filter) -> None:
+    spam_filter = make_filter("classifier")
+
+    assert spam_filter.check(_candidate({"message": "Can I schedule an appointment?"})) is None
+    verdict = spam_filter.check(_candidate({"message": "Cheap viagra and casino backlinks"}))
+    assert verdict is not None and verdict.stage == "classifier"
+
+
+def test_classifier_weights_load_from_file(make_filter, tmp_path) -> None:
+    weights = tmp_path / "weights.json"
+    weights.write_text(json.dumps({"Pineapple": 10}))
+    spam_filter = make_filter("classifier", spam_classifier_path=str(weights))
+
+    assert spam_filter.check(_candidate({"message": "viagra casino"})) is None
+    assert spam_filter.check(_candidate({"message": "pineapple"})).stage == "classifier"
+
+
+def test_stages_stop_at_the_first_rejection(make_filter) -> None:
+    spam_filter = make_filter("honeypot", "links")
+
+    spam_filter.check(_candidate({"_honeypot": "x", "message": "https://a https://b https://c https://d"}))
+
+    assert (spam_filter.stats["honeypot"].rejected, spam_filter.stats["links"].checked) == (1, 0)
+    checks = spam_filter.metric_families()["form_relay_spam_checks_total"]["samples"]
+    assert checks == [[["honeypot"], 1], [["links"], 0]]
+
+
+def test_unknown_stage_is_a_configuration_error(make_filter) -> None:
+    with pytest.raises(ValueError, match="Unknown spam filter stages: captcha"):
+        make_filter("honeypot", "captcha")
+
+
+@pytest.mark.parametrize(("rate", "expected_lines"), [(1.0, 1), (0.0, 0)])
+def test_rejections_are_sampled_with_sensitive_fields_masked(make_filter, tmp_path, rate, expected_lines) -> None:
+    sample_path = tmp_path / "samples" / "spam.jsonl"
+    spam_filter = make_filter("honeypot", spam_sample_rate=rate, spam_sample_path=str(sample_path))
+
+    spam_filter.check(_candidate({"_gotcha": "x", "password": "hunter2", "message": "y" * 600}))
+
+    lines = sample_path.read_text().splitlines() if sample_path.exists() else []
+    assert len(lines) == expected_lines
+    if lines:
+        record = json.loads(lines[0])
+        assert record["stage"] == "honeypot"
+        assert record["fields"]["password"] == "***redacted***"
+        assert len(record["fields"]["message"]) == 500
+
+
+@pytest.mark.parametrize("started_at", [1e20, "not a date"])
+def test_endpoint_accepts_unparseable_start_times(make_app, started_at) -> None:
+    with TestClient(make_app(spam_filter_stages=["fill_time"])) as client:
+        response = client.post(
+            SUBMISSIONS_PATH,
+            json={
+                "form_name": "contact",
+                "fields": {"email": "ada@example.com"},
+                "metadata": {"form_started_at": started_at},
+            },
+            headers={"origin": "https://site.example.com"},
+        )
+
+    assert response.status_code == 202
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from collections.abc import AsyncIterator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.application import UPLOADS_PATH
+from app.uploads import AttachmentStore, MultipartParser, ReceivedUpload, UploadRejected
+
+BOUNDARY = "relay-boundary"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+# Ends with most of a delimiter, so the parser has to hold it back and then let it go.
+TRICKY_BYTES = b"line one\r\n--relay-boundar\r\n-" + bytes(range(256))
+
+
+def _text(name: str, value: str) -> bytes:
+    return f'Content-Disposition: form-data; name="{name}"\r\n\r\n'.encode() + value.encode()
+
+
+def _file(name: str, data: bytes, filename: str = "notes.txt", *, disposition: str | None = None) -> bytes:
+    disposition = disposition or f'form-data; name="{name}"; filename="{filename}"'
+    return f"Content-Disposition: {disposition}\r\nContent-Type: text/plain\r\n\r\n".encode() + data
+
+
+def _body(*parts: bytes) -> bytes:
+    delimiter = f"--{BOUNDARY}".encode()
+    return b"".join(delimiter + b"\r\n" + part + b"\r\n" for part in parts) + delimiter + b"--\r\n"
+
+
+async def _chunks(body: bytes, size: int) -> AsyncIterator[bytes]:
+    for start in range(0, len(body), size):
+        yield body[start : start + size]
+
+
+def _receive(store: AttachmentStore, body: bytes, chunk_size: int = 4096) -> ReceivedUpload:
+    return asyncio.run(store.receive(_chunks(body, chunk_size), CONTENT_TYPE, "sub-1"))
+
+
+@pytest.fixture
+def make_store(make_settings):
+    def factory(**overrides) -> AttachmentStore:
+        return AttachmentStore(make_settings(**overrides))
+
+    return factory
+
+
+def test_parser_handles_a_boundary_split_across_chunks() -> None:
+    body = _body(_text("email", "ada@example.com"), _file("cv", TRICKY_BYTES))
+
+    def parse(chunk_size: int) -> list[tuple]:
+        parser = MultipartParser(BOUNDARY.encode())
+        events: list[tuple] = []
+        for start in range(0, len(body), chunk_size):
+            events.extend(parser.feed(body[start : start + chunk_size]))
+        parser.close()
+        # Data may arrive in any number of pieces; join consecutive ones before comparing.
+        merged: list[tuple] = []
+        for event in events:
+            if event[0] == "data" and merged and merged[-1][0] == "data":
+                merged[-1] = ("data", merged[-1][1] + event[1])
+            else:
+                merged.append(event)
+        return merged
+
+    whole = parse(len(body))
+    assert [event[0] for event in whole] == ["part", "data", "end", "part", "data", "end"]
+    assert whole[4] == ("data", TRICKY_BYTES)
+    for chunk_size in (1, 2, 3, 17):
+        assert parse(chunk_size) == whole
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_receive_stores_files_with_matching_digests(make_store, chunk_size) -> None:
+    store = make_store()
+    body = _body(
+        _text("form_name", "apply"),
+        _text("email", "ada@example.com"),
+        _text("metadata", '{"page": "/jobs"}'),
+        _file("cv", TRICKY_BYTES, "cv.txt"),
+        _file("cover", b"Dear team,", "letters/cover.txt"),
+    )
+
+    upload = _receive(store, body, chunk_size)
+
+    assert upload.submission_body() == {
+        "form_name": "apply",
+        "fields": {"email": "ada@example.com"},
+        "metadata": {"page": "/jobs"},
+    }
+    assert [(item["field"], item["filename"], item["size"]) for item in upload.attachments] == [
+        ("cv", "cv.txt", len(TRICKY_BYTES)),
+        ("cover", "cover.txt", 10),
+    ]
+    for item in upload.attachments:
+        stored = (store.root / item["storage_key"]).read_bytes()
+        assert item["sha256"] == hashlib.sha256(stored).hexdigest()
+    assert (store.root / "sub-1" / "0").read_bytes() == TRICKY_BYTES
+
+
+def test_empty_file_input_is_ignored(make_store) -> None:
+    store = make_store()
+    body = _body(_text("email", "ada@example.com"), _file("cv", b"", filename=""))
+
+    upload = _receive(store, body)
+
+    assert upload.fields == {"email": "ada@example.com"}
+    assert upload.attachments == []
+    assert not (store.root / "sub-1").exists()
+
+
+def test_rfc5987_filename_takes_precedence(make_store) -> None:
+    store = make_store()
+    disposition = "form-data; name=\"cv\"; filename=\"naive.pdf\"; filename*=UTF-8''na%C3%AFve%20r%C3%A9sum%C3%A9.pdf"
+    body = _body(_file("cv", b"%PDF-1.7", disposition=disposition))
+
+    [attachment] = _receive(store, body).attachments
+
+    assert attachment["filename"] == "naïve résumé.pdf"
+
+
+@pytest.mark.parametrize(
+    ("limits", "parts", "message"),
+    [
+        ({"upload_max_file_bytes": 64}, [_file("a", b"x" * 40), _file("b", b"y" * 100)], "Each file"),
+        (
+            {"upload_max_file_bytes": 64, "upload_max_total_bytes": 100},
+            [_file("a", b"x" * 60), _file("b", b"y" * 60)],
+            "Uploads must total",
+        ),
+        ({"upload_max_files": 2}, [_file(name, b"data") for name in "abc"], "At most 2 files"),
+    ],
+)
+def test_caps_trip_mid_stream_and_remove_partial_files(make_store, limits, parts, message) -> None:
+    store = make_store(**limits)
+    seen: list[bool] = []
+
+    async def stream() -> AsyncIterator[bytes]:
+        async for chunk in _chunks(_body(*parts), 8):
+            seen.append((store.root / "sub-1" / "0").exists())
+            yield chunk
+
+    with pytest.raises(UploadRejected, match=message) as excinfo:
+        asyncio.run(store.receive(stream(), CONTENT_TYPE, "sub-1"))
+
+    assert (excinfo.value.status_code, excinfo.value.reason) == (413, "upload_too_large")
+    # The first file was on disk before the limit tripped, and is gone afterwards.
+    assert any(seen)
+    assert not (store.root / "sub-1").exists()
+
+
+def test_truncated_body_is_rejected_and_removed(make_store) -> None:
+    store = make_store()
+    body = _body(_file("cv", b"z" * 500))
+
+    with pytest.raises(UploadRejected, match="ended unexpectedly") as excinfo:
+        _receive(store, body[:300], chunk_size=64)
+
+    assert (excinfo.value.status_code, excinfo.value.reason) == (400, "upload_malformed")
+    assert not (store.root / "sub-1").exists()
+
+
+def test_attachment_bytes_count_only_accepted_uploads(make_app) -> None:
+    app = make_app(spam_filter_enabled=False, rate_limit_enabled=False)
+    body = _body(_text("form_name", "apply"), _text("email", "ada@example.com"), _file("cv", b"x" * 100))
+    headers = {"origin": "https://site.example.com", "content-type": CONTENT_TYPE}
+
+    with TestClient(app) as client:
+        first = client.post(UPLOADS_PATH, content=body, headers=headers)
+        duplicate = client.post(UPLOADS_PATH, content=body, headers=headers)
+
+    assert (first.status_code, duplicate.status_code) == (202, 202)
+    assert duplicate.json()["submission_id"] == first.json()["submission_id"]
+    assert app.state.metrics.attachment_bytes.value() == 100
+    assert [path.name for path in app.state.attachment_store.root.iterdir()] == [first.json()["submission_id"]]
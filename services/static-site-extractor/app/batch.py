@@ -0,0 +1,407 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Iterable
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import urlparse
+
+import httpx
+from loguru import logger
+
+from . import models
+from .config import (
+    BATCH_CONCURRENCY,
+    BATCH_PER_HOST_CONCURRENCY,
+    BATCH_RETENTION_SECONDS,
+    BATCH_STORE_DIR,
+)
+from .extractor import ExtractionError, extract_page
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    options TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    finished INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS items (
+    job_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (job_id, position)
+);
+CREATE TABLE IF NOT EXISTS results (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    status_code INTEGER,
+    detail TEXT,
+    page TEXT
+);
+CREATE INDEX IF NOT EXISTS results_job ON results (job_id, seq);
+"""
+
+
+class BatchJob(NamedTuple):
+    id: str
+    total: int
+    probe_images: bool
+    finished: bool
+
+
+class BatchItem(NamedTuple):
+    position: int
+    url: str
+
+
+class StoredResult(NamedTuple):
+    seq: int
+    position: int
+    url: str
+    status_code: int | None
+    detail: str | None
+    page_json: str | None
+
+
+class JobStore:
+    """SQLite-backed record of batch jobs, their URLs and every finished result.
+
+    Results are appended to a log ordered by ``seq``, so a client that drops its
+    stream can reconnect and continue from the last ``seq`` it saw, and a job
+    interrupted by a restart can pick up exactly the URLs that never finished.
+    """
+
+    def __init__(self, directory: str | Path, *, retention_seconds: float) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.directory / "jobs.sqlite3", check_same_thread=False, isolation_level=None
+        )
+        self._conn.executescript(_SCHEMA)
+
+    def create(self, urls: list[str], *, probe_images: bool) -> BatchJob:
+        job = BatchJob(id=uuid.uuid4().hex, total=len(urls), probe_images=probe_images, finished=False)
+        with self._lock:
+            self._purge_expired()
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "INSERT INTO jobs (id, created_at, options, total) VALUES (?, ?, ?, ?)",
+                (job.id, time.time(), json.dumps({"probe_images": probe_images}), job.total),
+            )
+            self._conn.executemany(
+                "INSERT INTO items (job_id, position, url) VALUES (?, ?, ?)",
+                [(job.id, position, url) for position, url in enumerate(urls)],
+            )
+            self._conn.execute("COMMIT")
+        return job
+
+    def get(self, job_id: str) -> BatchJob | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT total, options, finished FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        total, options, finished = row
+        return BatchJob(
+            id=job_id,
+            total=total,
+            probe_images=bool(json.loads(options).get("probe_images")),
+            finished=bool(finished),
+        )
+
+    def pending(self, job_id: str) -> list[BatchItem]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT position, url FROM items WHERE job_id = ? AND done = 0 ORDER BY position",
+                (job_id,),
+            ).fetchall()
+        return [BatchItem(position=position, url=url) for position, url in rows]
+
+    def record(
+        self,
+        job_id: str,
+        item: BatchItem,
+        *,
+        page: models.ExtractionResponse | None = None,
+        status_code: int | None = None,
+        detail: str | None = None,
+    ) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "INSERT INTO results (job_id, position, url, status_code, detail, page) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    item.position,
+                    item.url,
+                    status_code,
+                    detail,
+                    page.model_dump_json() if page is not None else None,
+                ),
+            )
+            self._conn.execute(
+                "UPDATE items SET done = 1 WHERE job_id = ? AND position = ?",
+                (job_id, item.position),
+            )
+            self._conn.execute("COMMIT")
+
+    def finish(self, job_id: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET finished = 1 WHERE id = ?", (job_id,))
+
+    def results(self, job_id: str, *, after: int = 0) -> list[StoredResult]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, position, url, status_code, detail, page FROM results "
+                "WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, after),
+            ).fetchall()
+        return [StoredResult(*row) for row in rows]
+
+    def counts(self, job_id: str, *, through: int | None = None) -> tuple[int, int]:
+        """Return ``(succeeded, failed)`` for results up to and including ``through``."""
+
+        with self._lock:
+            succeeded, failed = self._conn.execute(
+                "SELECT COALESCE(SUM(page IS NOT NULL), 0), COALESCE(SUM(page IS NULL), 0) "
+                "FROM results WHERE job_id = ? AND seq <= ?",
+                (job_id, through if through is not None else 2**62),
+            ).fetchone()
+        return int(succeeded), int(failed)
+
+    def close(self) -> None:
+        # Waits for a call still running in a worker thread, e.g. one whose awaiting task was cancelled.
+        with self._lock:
+            self._conn.close()
+
+    def _purge_expired(self) -> None:
+        # Caller holds the lock.
+        cutoff = time.time() - self.retention_seconds
+        expired = [
+            job_id
+            for (job_id,) in self._conn.execute(
+                "SELECT id FROM jobs WHERE created_at < ?", (cutoff,)
+            ).fetchall()
+        ]
+        for job_id in expired:
+            self._conn.execute("DELETE FROM results WHERE job_id = ?", (job_id,))
+            self._conn.execute("DELETE FROM items WHERE job_id = ?", (job_id,))
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+
+class _FairQueue:
+    """Hands out batch items round-robin across hosts with a per-host in-flight cap.
+
+    One slow or very large site in a batch therefore cannot starve the others.
+    """
+
+    def __init__(self, items: Iterable[BatchItem], *, per_host: int) -> None:
+        self.per_host = max(1, per_host)
+        self._hosts: OrderedDict[str, deque[BatchItem]] = OrderedDict()
+        self._active: dict[str, int] = {}
+        self._changed = asyncio.Condition()
+        for item in items:
+            host = urlparse(item.url).netloc.lower()
+            self._hosts.setdefault(host, deque()).append(item)
+
+    async def get(self) -> tuple[str, BatchItem] | None:
+        async with self._changed:
+            while self._hosts:
+                for host, items in self._hosts.items():
+                    if self._active.get(host, 0) < self.per_host:
+                        item = items.popleft()
+                        if items:
+                            self._hosts.move_to_end(host)
+                        else:
+                            del self._hosts[host]
+                        self._active[host] = self._active.get(host, 0) + 1
+                        return host, item
+                await self._changed.wait()
+            return None
+
+    async def done(self, host: str) -> None:
+        async with self._changed:
+            self._active[host] -= 1
+            self._changed.notify_all()
+
+
+class BatchRunner:
+    """Runs batch jobs in the background, independent of the request that started them."""
+
+    def __init__(self, store: JobStore) -> None:
+        self.store = store
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+        self._signals: dict[str, asyncio.Event] = {}
+
+    async def submit(
+        self, urls: list[str], *, probe_images: bool, client: httpx.AsyncClient
+    ) -> BatchJob:
+        job = await asyncio.to_thread(self.store.create, urls, probe_images=probe_images)
+        self.resume(job, client=client)
+        return job
+
+    def resume(self, job: BatchJob, *, client: httpx.AsyncClient) -> None:
+        """Start ``job`` unless it already finished or is running in this process."""
+
+        if job.finished or job.id in self._tasks:
+            return
+        task = asyncio.create_task(self._run(job, client))
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _task: self._tasks.pop(job.id, None))
+
+    def is_running(self, job_id: str) -> bool:
+        return job_id in self._tasks
+
+    async def events(self, job_id: str, *, after: int = 0) -> AsyncIterator[models.BatchEvent]:
+        """Stream a job's results after ``seq == after`` as they are recorded, then a summary."""
+
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None:
+            return
+        succeeded, failed = await asyncio.to_thread(self.store.counts, job_id, through=after)
+        completed = succeeded + failed
+        yield models.BatchJobEvent(job_id=job_id, total=job.total, completed=completed)
+
+        cursor = after
+        while True:
+            # Take the signal before reading so a result recorded in between still wakes us.
+            changed = self._signals.setdefault(job_id, asyncio.Event())
+            results = await asyncio.to_thread(self.store.results, job_id, after=cursor)
+            for result in results:
+                completed += 1
+                cursor = result.seq
+                yield _result_event(result, completed=completed, total=job.total)
+            if results:
+                continue
+            job = await asyncio.to_thread(self.store.get, job_id) or job
+            if job.finished or not self.is_running(job_id):
+                break
+            await changed.wait()
+
+        succeeded, failed = await asyncio.to_thread(self.store.counts, job_id)
+        yield models.BatchSummaryEvent(
+            job_id=job_id,
+            total=job.total,
+            succeeded=succeeded,
+            failed=failed,
+            finished=job.finished,
+        )
+
+    async def shutdown(self) -> None:
+        """Cancel running jobs; their unfinished URLs are picked up again on resume."""
+
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.store.close()
+
+    async def _run(self, job: BatchJob, client: httpx.AsyncClient) -> None:
+        pending = await asyncio.to_thread(self.store.pending, job.id)
+        queue = _FairQueue(pending, per_host=BATCH_PER_HOST_CONCURRENCY)
+        logger.info("Batch {}: extracting {} of {} URLs", job.id, len(pending), job.total)
+
+        async def _worker() -> None:
+            while (claimed := await queue.get()) is not None:
+                host, item = claimed
+                try:
+                    await self._extract(job, item, client)
+                except Exception:
+                    # Storing the result failed; the URL stays pending and the job carries on.
+                    logger.exception("Batch {} could not record {}", job.id, item.url)
+                finally:
+                    await queue.done(host)
+                self._notify(job.id)
+
+        workers = [
+            asyncio.create_task(_worker())
+            for _ in range(max(1, min(BATCH_CONCURRENCY, len(pending))))
+        ]
+        try:
+            await asyncio.gather(*workers)
+            await asyncio.to_thread(self.store.finish, job.id)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            # Wake followers even if the job was cancelled or failed, so no stream waits forever.
+            self._notify(job.id)
+
+    async def _extract(self, job: BatchJob, item: BatchItem, client: httpx.AsyncClient) -> None:
+        try:
+            page = await extract_page(item.url, client=client, probe_images=job.probe_images)
+        except ExtractionError as exc:
+            await asyncio.to_thread(
+                self.store.record, job.id, item, status_code=exc.status_code, detail=exc.message
+            )
+        except Exception:
+            logger.exception("Batch {} failed while extracting {}", job.id, item.url)
+            await asyncio.to_thread(
+                self.store.record,
+                job.id,
+                item,
+                status_code=500,
+                detail="Unexpected error while extracting the page",
+            )
+        else:
+            await asyncio.to_thread(self.store.record, job.id, item, page=page)
+
+    def _notify(self, job_id: str) -> None:
+        signal = self._signals.pop(job_id, None)
+        if signal is not None:
+            signal.set()
+
+
+def _result_event(
+    result: StoredResult, *, completed: int, total: int
+) -> models.BatchResultEvent | models.BatchErrorEvent:
+    if result.page_json is not None:
+        return models.BatchResultEvent(
+            seq=result.seq,
+            position=result.position,
+            url=result.url,
+            completed=completed,
+            total=total,
+            page=models.ExtractionResponse.model_validate_json(result.page_json),
+        )
+    return models.BatchErrorEvent(
+        seq=result.seq,
+        position=result.position,
+        url=result.url,
+        completed=completed,
+        total=total,
+        status_code=result.status_code or 500,
+        detail=result.detail or "",
+    )
+
+
+_runner: BatchRunner | None = None
+
+
+def get_batch_runner() -> BatchRunner:
+    global _runner
+    if _runner is None:
+        _runner = BatchRunner(JobStore(BATCH_STORE_DIR, retention_seconds=BATCH_RETENTION_SECONDS))
+    return _runner
+
+
+def set_batch_runner(runner: BatchRunner | None) -> None:
+    global _runner
+    _runner = runner
+
+
+__all__ = ["BatchJob", "BatchRunner", "JobStore", "get_batch_runner", "set_batch_runner"]
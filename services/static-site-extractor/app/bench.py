@@ -0,0 +1,110 @@
+"""Replay saved HTML (and CSS) fixtures through each extraction stage and report timings.
+
+Usage:
+    python -m app.bench fixtures/*.html fixtures/*.css --repeat 20
+    python -m app.bench page.html --base-url https://example.com/ --json
+
+Network stages (fetch, stylesheet downloads, image probes) are not replayed;
+saved ``.css`` files are run through the stylesheet parser instead.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+from collections.abc import Sequence
+from pathlib import Path
+
+from .css_fonts import parse_stylesheet
+from .extractor import analyse_document
+from .instrumentation import StageTimer
+
+
+def run_benchmark(
+    paths: Sequence[Path], *, repeat: int, base_url: str
+) -> dict[str, dict[str, list[float]]]:
+    """Return seconds per run, keyed by fixture name and then stage."""
+
+    results: dict[str, dict[str, list[float]]] = {}
+    for path in paths:
+        content = path.read_bytes()
+        runs: dict[str, list[float]] = {}
+        for _ in range(repeat):
+            timer = StageTimer()
+            if path.suffix.lower() == ".css":
+                with timer.stage("stylesheet_parse"):
+                    parse_stylesheet(content.decode("utf-8", errors="replace"), base_url)
+            else:
+                with timer.stage("total"):
+                    analyse_document(content, None, base_url, timer)
+            for stage, seconds in timer.durations.items():
+                runs.setdefault(stage, []).append(seconds)
+        results[path.name] = runs
+    return results
+
+
+def summarize(runs: Sequence[float]) -> dict[str, float]:
+    ordered = sorted(runs)
+    p95_index = min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))
+    return {
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[p95_index] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def format_table(results: dict[str, dict[str, list[float]]]) -> str:
+    header = f"{'fixture':<32} {'stage':<18} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}"
+    lines = [header, "-" * len(header)]
+    for fixture, stages in results.items():
+        for stage, runs in stages.items():
+            summary = summarize(runs)
+            lines.append(
+                f"{fixture[:32]:<32} {stage:<18} {summary['mean_ms']:>10.3f} {summary['p50_ms']:>10.3f}"
+                f" {summary['p95_ms']:>10.3f} {summary['max_ms']:>10.3f}"
+            )
+    return "\n".join(lines)
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Replay saved HTML/CSS fixtures through the extractor's stages.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("fixtures", nargs="+", type=Path, help="Saved .html or .css files.")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per fixture (default 10).")
+    parser.add_argument(
+        "--base-url",
+        default="https://fixture.invalid/",
+        help="URL relative links and stylesheets resolve against.",
+    )
+    parser.add_argument("--json", action="store_true", help="Print per-stage summaries as JSON.")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    missing = [str(path) for path in args.fixtures if not path.is_file()]
+    if missing:
+        parser.error(f"Fixture not found: {', '.join(missing)}")
+    return args
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = parse_args(argv)
+    results = run_benchmark(args.fixtures, repeat=args.repeat, base_url=args.base_url)
+    if args.json:
+        summaries = {
+            fixture: {stage: summarize(runs) for stage, runs in stages.items()}
+            for fixture, stages in results.items()
+        }
+        json.dump(summaries, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        print(format_table(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,47 @@
 from __future__ import annotations
 
 import os
+import tempfile
 from typing import Final
 
 REQUEST_TIMEOUT_SECONDS: Final[float] = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "10"))
 MAX_CONTENT_LENGTH_BYTES: Final[int] = int(os.getenv("MAX_CONTENT_LENGTH_BYTES", str(5_000_000)))
 MAX_STYLESHEET_BYTES: Final[int] = int(os.getenv("MAX_STYLESHEET_BYTES", str(1_000_000)))
 MAX_STYLESHEETS: Final[int] = int(os.getenv("MAX_STYLESHEETS", "8"))
+STYLESHEET_CONCURRENCY: Final[int] = int(os.getenv("STYLESHEET_CONCURRENCY", "4"))
+STYLESHEET_PER_HOST_CONCURRENCY: Final[int] = int(os.getenv("STYLESHEET_PER_HOST_CONCURRENCY", "2"))
+HTTP_MAX_CONNECTIONS: Final[int] = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS: Final[int] = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "50"))
+HTTP_KEEPALIVE_EXPIRY_SECONDS: Final[float] = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+HTTP2_ENABLED: Final[bool] = os.getenv("HTTP2_ENABLED", "true").strip().lower() in {"1", "true", "yes"}
+EXTRACTION_DEADLINE_SECONDS: Final[float] = float(os.getenv("EXTRACTION_DEADLINE_SECONDS", "20"))
+IMAGE_PROBE_CONCURRENCY: Final[int] = int(os.getenv("IMAGE_PROBE_CONCURRENCY", "8"))
+IMAGE_PROBE_DEADLINE_SECONDS: Final[float] = float(os.getenv("IMAGE_PROBE_DEADLINE_SECONDS", "5"))
+IMAGE_PROBE_BYTES: Final[int] = int(os.getenv("IMAGE_PROBE_BYTES", str(32_768)))
+MAX_IMAGE_PROBES: Final[int] = int(os.getenv("MAX_IMAGE_PROBES", "100"))
+CRAWL_CONCURRENCY: Final[int] = int(os.getenv("CRAWL_CONCURRENCY", "4"))
+CRAWL_PER_HOST_CONCURRENCY: Final[int] = int(os.getenv("CRAWL_PER_HOST_CONCURRENCY", "2"))
+CRAWL_HOST_DELAY_SECONDS: Final[float] = float(os.getenv("CRAWL_HOST_DELAY_SECONDS", "0.25"))
+CRAWL_MAX_PAGES: Final[int] = int(os.getenv("CRAWL_MAX_PAGES", "50"))
+CRAWL_MAX_DEPTH: Final[int] = int(os.getenv("CRAWL_MAX_DEPTH", "3"))
+CRAWL_DEADLINE_SECONDS: Final[float] = float(os.getenv("CRAWL_DEADLINE_SECONDS", "300"))
+# An empty HTTP_CACHE_DIR disables the on-disk HTTP cache.
+HTTP_CACHE_DIR: Final[str] = os.getenv(
+    "HTTP_CACHE_DIR", os.path.join(tempfile.gettempdir(), "static-site-extractor", "http-cache")
+)
+HTTP_CACHE_MAX_BYTES: Final[int] = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(256_000_000)))
+BATCH_STORE_DIR: Final[str] = os.getenv(
+    "BATCH_STORE_DIR", os.path.join(tempfile.gettempdir(), "static-site-extractor", "batches")
+)
+BATCH_CONCURRENCY: Final[int] = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_PER_HOST_CONCURRENCY: Final[int] = int(os.getenv("BATCH_PER_HOST_CONCURRENCY", "2"))
+BATCH_RETENTION_SECONDS: Final[float] = float(os.getenv("BATCH_RETENTION_SECONDS", str(7 * 24 * 3600)))
+RESULT_CACHE_TTL_SECONDS: Final[float] = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600"))
+RESULT_CACHE_MAX_BYTES: Final[int] = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64_000_000)))
+# Worker processes for parsing and page analysis; 0 runs it inline on the event loop.
+PARSE_WORKERS: Final[int] = int(os.getenv("PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+HTML_PARSER: Final[str] = os.getenv("HTML_PARSER", "auto")
+# google-fonts.json from the Horizon template's apply_theme.py; maps @font-face
+# families to next/font/google loaders. Empty disables the manifest lookup.
+GOOGLE_FONTS_MANIFEST: Final[str] = os.getenv("GOOGLE_FONTS_MANIFEST", "")
 USER_AGENT: Final[str] = os.getenv("USER_AGENT", "Prempage-Content-Extractor/0.1")
@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4.element import PreformattedString
+
+from . import models
+from .parsing import NAV_KEYWORD_PATTERN, NAV_ROLE_PATTERN, SKIP_TEXT_PARENTS, has_footer_marker, marker_attributes
+
+HEADING_TAGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+BLOCK_TAGS = {*HEADING_TAGS, "p", "li", "blockquote", "dt", "dd", "figcaption", "pre", "address"}
+# Text inside these belongs to the nearest enclosing non-inline element.
+INLINE_TAGS = {
+    "a", "abbr", "b", "bdi", "bdo", "br", "cite", "code", "em", "font", "i", "kbd", "mark",
+    "q", "s", "small", "span", "strong", "sub", "sup", "time", "u", "var", "wbr",
+}
+BOILERPLATE_TAGS = {"nav", "footer", "aside", "form", "button", "select", "option", "label", "dialog"}
+BOILERPLATE_KEYWORDS = (
+    "cookie",
+    "consent",
+    "gdpr",
+    "modal",
+    "popup",
+    "newsletter",
+    "subscribe",
+    "social",
+    "share",
+    "breadcrumb",
+    "sidebar",
+    "widget",
+    "skip-link",
+    "sr-only",
+    "screen-reader",
+    "visually-hidden",
+    "copyright",
+)
+HIDDEN_STYLE_PATTERN = re.compile(r"display\s*:\s*none|visibility\s*:\s*hidden", re.I)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Paragraph-like blocks shorter than this, or mostly link text, are treated as chrome.
+MIN_PARAGRAPH_CHARS = 25
+MAX_LINK_DENSITY = 0.5
+# A paragraph this long with few links anchors the main-content region.
+DENSE_PARAGRAPH_CHARS = 80
+
+# Horizon section keys (templates/horizon/sections/catalog.py) and the heading words
+# that usually introduce them on a legacy site.
+SECTION_KEYWORDS = (
+    ("horizon_home_testimonials", ("testimonial", "review", "client say", "clients say", "kind words")),
+    ("horizon_home_final_cta", ("contact", "get started", "schedule", "book", "appointment", "reach out", "consultation")),
+    ("horizon_home_services", ("service", "specialt", "offer", "treat", "therap", "help with", "areas of focus")),
+    ("horizon_home_why_choose_us", ("why", "approach", "about", "philosophy", "meet", "who we are", "experience")),
+)
+HERO_SECTION = "horizon_home_hero"
+# Slot names per section for a heading, the paragraphs under it, lists and quotes.
+SECTION_SLOTS: dict[str, dict[str, str]] = {
+    HERO_SECTION: {"heading": "headline_primary", "paragraph": "supporting_copy", "list": "value_props"},
+    "horizon_home_services": {"heading": "section_heading", "paragraph": "section_body", "list": "service_groups"},
+    "horizon_home_why_choose_us": {"heading": "section_heading", "paragraph": "section_body", "list": "reasons"},
+    "horizon_home_testimonials": {"heading": "section_heading", "paragraph": "section_body", "quote": "testimonials"},
+    "horizon_home_final_cta": {"heading": "headline", "paragraph": "supporting_copy", "list": "expectations"},
+}
+
+
+@dataclass(slots=True)
+class _Block:
+    tag: str
+    boilerplate: bool
+    in_main: bool
+    list_id: int | None
+    parts: list[str] = field(default_factory=list)
+    link_chars: int = 0
+
+    @property
+    def text(self) -> str:
+        return WHITESPACE_PATTERN.sub(" ", "".join(self.parts)).strip()
+
+
+@dataclass(slots=True)
+class _State:
+    block: _Block | None
+    anchor: int
+    boilerplate: bool
+    in_main: bool
+    in_link: bool
+    skip: bool
+
+
+def extract_main_content(soup: BeautifulSoup) -> list[models.ContentBlock]:
+    """Return the page's main content as headings, paragraphs, lists and quotes.
+
+    One walk over the tree assigns every text node to its innermost block while
+    inheriting boilerplate, main-landmark and link context from its ancestors.
+    Blocks are then kept or dropped by text length, link density and position,
+    repeated text is kept once, and each block gets a suggested Horizon slot.
+    """
+
+    root = soup.body or soup
+    blocks: list[_Block] = []
+    anonymous: dict[int, _Block] = {}
+    states: dict[int, _State] = {
+        id(root): _State(
+            block=None, anchor=id(root), boilerplate=False, in_main=False, in_link=False, skip=False
+        )
+    }
+
+    for node in root.descendants:
+        if isinstance(node, Tag):
+            parent = states.get(id(node.parent))
+            if parent is None:
+                continue
+            name = node.name
+            skip = parent.skip or name in SKIP_TEXT_PARENTS
+            in_main = parent.in_main or name in {"main", "article"} or node.get("role") == "main"
+            boilerplate = parent.boilerplate or _is_boilerplate(node, in_main=in_main)
+            block = parent.block
+            if name in BLOCK_TAGS and not skip:
+                block = _Block(
+                    tag=name,
+                    boilerplate=boilerplate,
+                    in_main=in_main,
+                    list_id=id(node.parent) if name == "li" else None,
+                )
+                blocks.append(block)
+            elif name == "br" and block is not None:
+                block.parts.append(" ")
+            states[id(node)] = _State(
+                block=block,
+                anchor=parent.anchor if name in INLINE_TAGS else id(node),
+                boilerplate=boilerplate,
+                in_main=in_main,
+                in_link=parent.in_link or name == "a",
+                skip=skip,
+            )
+            continue
+
+        if not isinstance(node, NavigableString) or isinstance(node, PreformattedString):
+            continue
+        state = states.get(id(node.parent))
+        if state is None or state.skip:
+            continue
+        text = str(node)
+        # Loose text in a div or table cell: one paragraph per enclosing element.
+        block = state.block or anonymous.get(state.anchor)
+        if not text.strip():
+            # Keep the gap between inline elements ("<b>a</b> <i>b</i>").
+            if block is not None and block.parts:
+                block.parts.append(" ")
+            continue
+        if block is None:
+            block = anonymous[state.anchor] = _Block(
+                tag="p", boilerplate=state.boilerplate, in_main=state.in_main, list_id=None
+            )
+            blocks.append(block)
+        block.parts.append(text)
+        if state.in_link:
+            block.link_chars += len(text.strip())
+
+    return _assign_slots(_group_lists(_select_main(blocks)))
+
+
+def _is_boilerplate(tag: Tag, *, in_main: bool) -> bool:
+    name = tag.name
+    if name in BOILERPLATE_TAGS:
+        return True
+    # A page-level header is site chrome; one inside <main>/<article> is content.
+    if name == "header" and not in_main:
+        return True
+    attrs = tag.attrs
+    if "hidden" in attrs or attrs.get("aria-hidden") == "true":
+        return True
+    style = attrs.get("style")
+    if isinstance(style, str) and HIDDEN_STYLE_PATTERN.search(style):
+        return True
+    if not attrs.keys() & {"id", "class", "role"}:
+        return False
+    markers = marker_attributes(tag)
+    if NAV_KEYWORD_PATTERN.search(markers) or NAV_ROLE_PATTERN.search(markers):
+        return True
+    if has_footer_marker(tag):
+        return True
+    return any(keyword in markers for keyword in BOILERPLATE_KEYWORDS)
+
+
+class _Scored:
+    __slots__ = ("block", "text", "density")
+
+    def __init__(self, block: _Block, text: str) -> None:
+        self.block = block
+        self.text = text
+        self.density = block.link_chars / len(text) if text else 1.0
+
+
+def _select_main(blocks: list[_Block]) -> list[_Scored]:
+    candidates = [
+        _Scored(block, text)
+        for block in blocks
+        if not block.boilerplate and (text := block.text)
+    ]
+    # Prefer the page's own <main>/<article> landmark when it holds real content;
+    # everything inside it is then in position.
+    if any(item.block.in_main and _is_dense(item) for item in candidates):
+        candidates = [item for item in candidates if item.block.in_main]
+        start, end = 0, len(candidates) - 1
+    else:
+        # Position: the main region runs from the first h1 or dense paragraph to the
+        # last dense paragraph; short blocks outside it are usually header/footer chrome.
+        anchors = [
+            index
+            for index, item in enumerate(candidates)
+            if _is_dense(item) or item.block.tag == "h1"
+        ]
+        start, end = (anchors[0], anchors[-1]) if anchors else (0, len(candidates) - 1)
+        # Pull in the headings that introduce the first block and the list or
+        # heading group that follows the last one.
+        while start > 0 and candidates[start - 1].block.tag in HEADING_TAGS:
+            start -= 1
+        while end + 1 < len(candidates) and candidates[end + 1].block.tag in {"li", *HEADING_TAGS}:
+            end += 1
+
+    selected: list[_Scored] = []
+    seen: set[str] = set()
+    for index, item in enumerate(candidates):
+        key = item.text.lower()
+        if key in seen:
+            continue
+        tag = item.block.tag
+        if tag in HEADING_TAGS:
+            keep = item.density <= MAX_LINK_DENSITY and start <= index <= end
+        elif tag == "li":
+            keep = item.density <= MAX_LINK_DENSITY and start <= index <= end
+        else:
+            keep = item.density <= MAX_LINK_DENSITY and (
+                _is_dense(item) or (start <= index <= end and len(item.text) >= MIN_PARAGRAPH_CHARS)
+            )
+        if keep:
+            seen.add(key)
+            selected.append(item)
+    return selected
+
+
+def _is_dense(item: _Scored) -> bool:
+    return (
+        item.block.tag not in HEADING_TAGS
+        and item.block.tag != "li"
+        and len(item.text) >= DENSE_PARAGRAPH_CHARS
+        and item.density < 0.3
+    )
+
+
+def _group_lists(items: list[_Scored]) -> list[models.ContentBlock]:
+    content: list[models.ContentBlock] = []
+    current_list: int | None = None
+    for item in items:
+        block = item.block
+        if block.tag == "li":
+            if current_list == block.list_id and content and content[-1].kind == "list":
+                content[-1].items.append(item.text)
+            else:
+                content.append(models.ContentBlock(kind="list", items=[item.text]))
+                current_list = block.list_id
+            continue
+        current_list = None
+        if block.tag in HEADING_TAGS:
+            content.append(
+                models.ContentBlock(kind="heading", level=HEADING_TAGS[block.tag], text=item.text)
+            )
+        elif block.tag == "blockquote":
+            content.append(models.ContentBlock(kind="quote", text=item.text))
+        else:
+            content.append(models.ContentBlock(kind="paragraph", text=item.text))
+    return content
+
+
+def _assign_slots(content: list[models.ContentBlock]) -> list[models.ContentBlock]:
+    section: str | None = None
+    for block in content:
+        if block.kind == "heading":
+            if block.level == 1:
+                section = HERO_SECTION
+            elif block.level == 2:
+                section = _section_for(block.text or "")
+            else:
+                # Sub-headings stay in the current section but have no slot of their own.
+                continue
+        if section is None:
+            continue
+        slot = SECTION_SLOTS[section].get(block.kind)
+        if slot is not None:
+            block.slot = f"{section}.{slot}"
+    return content
+
+
+def _section_for(heading: str) -> str | None:
+    lowered = heading.lower()
+    for section, keywords in SECTION_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return section
+    return None
+
+
+def compose_main_text(content: list[models.ContentBlock]) -> list[str]:
+    """Flatten content blocks into text entries, one per heading, paragraph, quote or list item."""
+
+    texts: list[str] = []
+    for block in content:
+        if block.kind == "list":
+            texts.extend(block.items or [])
+        elif block.text:
+            texts.append(block.text)
+    return texts
+
+
+__all__ = ["compose_main_text", "extract_main_content"]
@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import NamedTuple
+from urllib.parse import urldefrag, urlparse, urlunparse
+from urllib.robotparser import RobotFileParser
+
+import httpx
+from loguru import logger
+
+from . import models
+from .config import (
+    CRAWL_CONCURRENCY,
+    CRAWL_DEADLINE_SECONDS,
+    CRAWL_HOST_DELAY_SECONDS,
+    CRAWL_MAX_DEPTH,
+    CRAWL_MAX_PAGES,
+    CRAWL_PER_HOST_CONCURRENCY,
+    USER_AGENT,
+)
+from .extractor import (
+    ExtractionError,
+    StylesheetCache,
+    _is_internal_link,
+    apply_mode,
+    create_client,
+    extract_document,
+    timed_enrich_images,
+)
+from .instrumentation import StageTimer
+
+# Links to these are assets rather than pages; following them only earns a 415.
+NON_PAGE_EXTENSIONS = (
+    ".css",
+    ".js",
+    ".json",
+    ".xml",
+    ".pdf",
+    ".zip",
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".svg",
+    ".webp",
+    ".ico",
+    ".mp3",
+    ".mp4",
+    ".mov",
+    ".doc",
+    ".docx",
+)
+
+
+class _FrontierEntry(NamedTuple):
+    url: str
+    depth: int
+
+
+class _HostThrottle:
+    """Caps concurrent page fetches against one host and spaces out their start times."""
+
+    def __init__(self, concurrency: int, interval: float) -> None:
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.interval = max(0.0, interval)
+        self._next_start = 0.0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        async with self._semaphore:
+            now = asyncio.get_running_loop().time()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+
+class _HostPolicy(NamedTuple):
+    robots: RobotFileParser | None
+    throttle: _HostThrottle
+
+
+async def crawl_site(
+    url: str,
+    *,
+    max_pages: int | None = None,
+    max_depth: int | None = None,
+    respect_robots: bool = True,
+    probe_images: bool = False,
+    mode: models.ExtractionMode = "full",
+    client: httpx.AsyncClient | None = None,
+) -> AsyncIterator[models.CrawlEvent]:
+    options = {
+        "max_pages": max_pages,
+        "max_depth": max_depth,
+        "respect_robots": respect_robots,
+        "probe_images": probe_images,
+        "mode": mode,
+    }
+    if client is not None:
+        async for event in _crawl(client, url, **options):
+            yield event
+        return
+    async with create_client() as own_client:
+        async for event in _crawl(own_client, url, **options):
+            yield event
+
+
+async def _crawl(
+    client: httpx.AsyncClient,
+    url: str,
+    *,
+    max_pages: int | None,
+    max_depth: int | None,
+    respect_robots: bool,
+    probe_images: bool = False,
+    mode: models.ExtractionMode = "full",
+) -> AsyncIterator[models.CrawlEvent]:
+    """Follow internal links breadth-first from ``url``, yielding an event per page.
+
+    Pages are emitted in completion order. Images and fonts already sent with an
+    earlier page are dropped from later ones, and the last event is always a
+    :class:`models.CrawlSummaryEvent`.
+    """
+
+    page_limit = max_pages or CRAWL_MAX_PAGES
+    depth_limit = CRAWL_MAX_DEPTH if max_depth is None else max_depth
+    started = time.perf_counter()
+
+    frontier: asyncio.Queue[_FrontierEntry] = asyncio.Queue()
+    events: asyncio.Queue[models.CrawlEvent | None] = asyncio.Queue()
+    seen: set[str] = set()
+    allowed_hosts: set[str] = set()
+    policies: dict[str, asyncio.Task[_HostPolicy]] = {}
+    stylesheet_cache: StylesheetCache = {}
+    seen_images: set[str] = set()
+    seen_fonts: set[str] = set()
+    counts = {"scheduled": 0, "pages": 0, "errors": 0, "skipped": 0}
+    truncated = False
+
+    def _schedule(link: str, depth: int) -> None:
+        nonlocal truncated
+        normalized = _normalize_page_url(link)
+        if normalized is None or normalized in seen:
+            return
+        if not any(_is_internal_link(normalized, host) for host in allowed_hosts):
+            return
+        if counts["scheduled"] >= page_limit:
+            truncated = True
+            return
+        seen.add(normalized)
+        counts["scheduled"] += 1
+        frontier.put_nowait(_FrontierEntry(url=normalized, depth=depth))
+
+    async def _host_policy(page_url: str) -> _HostPolicy:
+        parsed = urlparse(page_url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        task = policies.get(origin)
+        if task is None:
+            task = policies[origin] = asyncio.create_task(
+                _load_host_policy(client, origin, respect_robots=respect_robots)
+            )
+        return await task
+
+    async def _visit(entry: _FrontierEntry) -> None:
+        policy = await _host_policy(entry.url)
+        if policy.robots is not None and not policy.robots.can_fetch(USER_AGENT, entry.url):
+            counts["skipped"] += 1
+            events.put_nowait(
+                models.CrawlSkippedEvent(url=entry.url, depth=entry.depth, reason="robots")
+            )
+            return
+
+        try:
+            async with policy.throttle.slot():
+                extraction = await extract_document(
+                    client, entry.url, stylesheet_cache=stylesheet_cache
+                )
+        except ExtractionError as exc:
+            counts["errors"] += 1
+            events.put_nowait(
+                models.CrawlErrorEvent(
+                    url=entry.url,
+                    depth=entry.depth,
+                    status_code=exc.status_code,
+                    detail=exc.message,
+                )
+            )
+            return
+
+        page = apply_mode(extraction.page, mode)
+        final_url = str(page.url)
+        if entry.depth == 0:
+            # Follow the start page's redirect (e.g. apex to www) when judging links.
+            allowed_hosts.add(urlparse(final_url).netloc)
+        if (normalized := _normalize_page_url(final_url)) is not None:
+            seen.add(normalized)
+
+        images = [image for image in page.images if str(image.src) not in seen_images]
+        seen_images.update(str(image.src) for image in images)
+        if probe_images and images:
+            images = await timed_enrich_images(client, images, StageTimer())
+        fonts = [font for font in page.fonts if str(font.url) not in seen_fonts]
+        seen_fonts.update(str(font.url) for font in fonts)
+
+        counts["pages"] += 1
+        events.put_nowait(
+            models.CrawlPageEvent(
+                depth=entry.depth,
+                page=page.model_copy(update={"images": images, "fonts": fonts}),
+            )
+        )
+
+        if entry.depth < depth_limit:
+            for link in extraction.links:
+                _schedule(link, entry.depth + 1)
+
+    async def _worker() -> None:
+        while True:
+            entry = await frontier.get()
+            try:
+                await _visit(entry)
+            except Exception:  # pragma: no cover - keep the pool alive on unexpected errors
+                logger.exception("Crawl failed while extracting {}", entry.url)
+                counts["errors"] += 1
+                events.put_nowait(
+                    models.CrawlErrorEvent(
+                        url=entry.url,
+                        depth=entry.depth,
+                        status_code=500,
+                        detail="Unexpected error while extracting the page",
+                    )
+                )
+            finally:
+                frontier.task_done()
+
+    async def _close_when_drained() -> None:
+        await frontier.join()
+        events.put_nowait(None)
+
+    start = _normalize_page_url(url)
+    if start is not None:
+        allowed_hosts.add(urlparse(start).netloc)
+        _schedule(start, 0)
+    else:
+        counts["errors"] += 1
+        events.put_nowait(
+            models.CrawlErrorEvent(
+                url=url, depth=0, status_code=400, detail="Start URL is not a crawlable page"
+            )
+        )
+
+    tasks = [
+        asyncio.create_task(_worker()) for _ in range(max(1, min(CRAWL_CONCURRENCY, page_limit)))
+    ]
+    tasks.append(asyncio.create_task(_close_when_drained()))
+    deadline = asyncio.get_running_loop().time() + CRAWL_DEADLINE_SECONDS
+    try:
+        while True:
+            # Bound only the wait, never the consumer's handling of a yielded event.
+            try:
+                async with asyncio.timeout_at(deadline):
+                    event = await events.get()
+            except TimeoutError:
+                logger.warning(
+                    "Crawl of {} hit the deadline after {} pages", url, counts["pages"]
+                )
+                truncated = True
+                break
+            if event is None:
+                break
+            yield event
+    finally:
+        for task in (*tasks, *policies.values()):
+            task.cancel()
+        await asyncio.gather(*tasks, *policies.values(), return_exceptions=True)
+
+    yield models.CrawlSummaryEvent(
+        url=url,
+        pages=counts["pages"],
+        errors=counts["errors"],
+        skipped=counts["skipped"],
+        images=len(seen_images),
+        fonts=len(seen_fonts),
+        truncated=truncated,
+        elapsed_ms=round((time.perf_counter() - started) * 1000),
+    )
+
+
+async def _load_host_policy(
+    client: httpx.AsyncClient, origin: str, *, respect_robots: bool
+) -> _HostPolicy:
+    robots = await _load_robots(client, origin) if respect_robots else None
+    interval = CRAWL_HOST_DELAY_SECONDS
+    if robots is not None:
+        crawl_delay = robots.crawl_delay(USER_AGENT)
+        if crawl_delay:
+            interval = max(interval, float(crawl_delay))
+    return _HostPolicy(
+        robots=robots, throttle=_HostThrottle(CRAWL_PER_HOST_CONCURRENCY, interval)
+    )
+
+
+async def _load_robots(client: httpx.AsyncClient, origin: str) -> RobotFileParser | None:
+    """Fetch ``origin``'s robots.txt; ``None`` means no rules could be loaded."""
+
+    robots_url = f"{origin}/robots.txt"
+    try:
+        response = await client.get(robots_url)
+    except httpx.HTTPError as exc:
+        logger.debug("Failed to fetch {}: {}", robots_url, exc)
+        return None
+
+    parser = RobotFileParser(robots_url)
+    # Same status handling as RobotFileParser.read().
+    if response.status_code in {401, 403}:
+        parser.disallow_all = True
+    elif response.status_code >= 400:
+        parser.allow_all = True
+    else:
+        parser.parse(response.text.splitlines())
+    return parser
+
+
+def _normalize_page_url(url: str) -> str | None:
+    url, _fragment = urldefrag(url)
+    parsed = urlparse(url)
+    if parsed.scheme not in {"http", "https"} or not parsed.netloc:
+        return None
+    if parsed.path.lower().endswith(NON_PAGE_EXTENSIONS):
+        return None
+    return urlunparse(
+        parsed._replace(
+            scheme=parsed.scheme.lower(),
+            netloc=parsed.netloc.lower(),
+            path=parsed.path or "/",
+        )
+    )
+
+
+__all__ = ["crawl_site"]
@@ -0,0 +1,438 @@
+from __future__ import annotations
+
+import json
+import re
+from collections.abc import Iterable, Iterator
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, NamedTuple
+from urllib.parse import urljoin, urlparse
+
+from loguru import logger
+
+from .config import GOOGLE_FONTS_MANIFEST
+
+FONT_EXTENSIONS = (".woff", ".woff2", ".ttf", ".otf", ".eot")
+GOOGLE_FONT_HOSTS = frozenset({"fonts.gstatic.com"})
+WEIGHT_KEYWORDS = {"normal": "400", "bold": "700"}
+STANDARD_WEIGHTS = ("100", "200", "300", "400", "500", "600", "700", "800", "900")
+
+_WHITESPACE = re.compile(r"\s+")
+_ESCAPE_SOURCE = r"\\(?:[0-9a-fA-F]{1,6}\s?|.)"
+_IDENT = re.compile(
+    rf"-?(?:[A-Za-z_]|[^\x00-\x7f]|{_ESCAPE_SOURCE})(?:[\w-]|[^\x00-\x7f]|{_ESCAPE_SOURCE})*"
+    rf"|--(?:[\w-]|[^\x00-\x7f]|{_ESCAPE_SOURCE})*",
+    re.DOTALL,
+)
+_NUMBER = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?(?:%|[A-Za-z]+)?")
+_UNQUOTED_URL = re.compile(r"\s*((?:[^)\s\\\"'(]|\\.)*)\s*\)", re.DOTALL)
+_ESCAPE = re.compile(r"\\([0-9a-fA-F]{1,6}\s?|.)", re.DOTALL)
+
+
+class Token(NamedTuple):
+    """A CSS token. ``kind`` is ``ident``, ``function`` (name without the parenthesis),
+    ``at`` (name without the ``@``), ``string``, ``url``, ``number`` or the
+    punctuation character itself (``{ } ( ) [ ] ; : ,``); anything else is ``delim``.
+    """
+
+    kind: str
+    value: str
+
+
+class FontFace(NamedTuple):
+    family: str
+    weight: str
+    style: str
+    sources: list[str]
+
+
+class StylesheetFonts(NamedTuple):
+    """What one stylesheet contributes: ``@font-face`` rules, every font file it
+    references (inside ``@font-face`` or not) and the stylesheets it ``@import``s.
+    """
+
+    faces: list[FontFace]
+    font_urls: set[str]
+    imports: set[str]
+
+
+def tokenize(css: str) -> Iterator[Token]:
+    """Yield the tokens of ``css`` in one left-to-right pass; comments and whitespace are dropped.
+
+    Follows the CSS Syntax tokenizer closely enough for rule and declaration
+    structure; malformed input degrades into ``delim`` tokens instead of failing.
+    """
+
+    pos = 0
+    length = len(css)
+    while pos < length:
+        char = css[pos]
+        if char.isspace():
+            pos = _WHITESPACE.match(css, pos).end()
+        elif css.startswith("/*", pos):
+            end = css.find("*/", pos + 2)
+            pos = length if end == -1 else end + 2
+        elif char in "\"'":
+            value, pos = _consume_string(css, pos + 1, char)
+            yield Token("string", value)
+        elif char == "@" and (match := _IDENT.match(css, pos + 1)):
+            yield Token("at", _unescape(match.group()).lower())
+            pos = match.end()
+        elif char in "{}()[];:,":
+            yield Token(char, char)
+            pos += 1
+        elif char.isdigit() or (char in "+-." and _NUMBER.match(css, pos)):
+            match = _NUMBER.match(css, pos)
+            yield Token("number", match.group())
+            pos = match.end()
+        elif match := _IDENT.match(css, pos):
+            name = _unescape(match.group())
+            pos = match.end()
+            if pos < length and css[pos] == "(":
+                pos += 1
+                if name.lower() == "url" and (url := _UNQUOTED_URL.match(css, pos)):
+                    # url( foo ) with no quotes is a single token; url("foo") is a
+                    # function whose argument is a string.
+                    yield Token("url", _unescape(url.group(1)))
+                    pos = url.end()
+                    continue
+                yield Token("function", name.lower())
+            else:
+                yield Token("ident", name)
+        else:
+            yield Token("delim", char)
+            pos += 1
+
+
+def _consume_string(css: str, pos: int, quote: str) -> tuple[str, int]:
+    parts: list[str] = []
+    start = pos
+    length = len(css)
+    while pos < length:
+        char = css[pos]
+        if char == quote:
+            parts.append(css[start:pos])
+            return _unescape("".join(parts)), pos + 1
+        if char == "\\":
+            pos += 2
+            continue
+        if char == "\n":
+            # Unterminated string: CSS ends it at the newline.
+            break
+        pos += 1
+    parts.append(css[start:pos])
+    return _unescape("".join(parts)), pos
+
+
+def _unescape(value: str) -> str:
+    if "\\" not in value:
+        return value
+
+    def _replace(match: re.Match[str]) -> str:
+        escaped = match.group(1)
+        if escaped == "\n":
+            return ""
+        stripped = escaped.strip()
+        if stripped and all(ch in "0123456789abcdefABCDEF" for ch in stripped):
+            code = int(stripped, 16)
+            return chr(code) if 0 < code <= 0x10FFFF else "\ufffd"
+        return escaped
+
+    return _ESCAPE.sub(_replace, value)
+
+
+def parse_stylesheet(css: str, base: str) -> StylesheetFonts:
+    """Collect ``@font-face`` rules, font URLs and ``@import`` targets from ``css``.
+
+    Consumes the token stream once, so the work is linear in the stylesheet size.
+    """
+
+    faces: list[FontFace] = []
+    font_urls: set[str] = set()
+    imports: set[str] = set()
+    tokens = tokenize(css)
+
+    for token in tokens:
+        if token.kind == "at" and token.value == "import":
+            target = _import_target(tokens)
+            if target:
+                imports.add(urljoin(base, target))
+        elif token.kind == "at" and token.value == "font-face":
+            face = _consume_font_face(tokens, base, font_urls)
+            if face is not None:
+                faces.append(face)
+        elif url := _url_value(token, tokens):
+            absolute = _absolute_font_url(url, base)
+            if absolute:
+                font_urls.add(absolute)
+
+    return StylesheetFonts(faces=faces, font_urls=font_urls, imports=imports)
+
+
+def _url_value(token: Token, tokens: Iterator[Token]) -> str | None:
+    """Return the URL for a ``url`` token or a ``url("...")`` function, consuming its argument."""
+
+    if token.kind == "url":
+        return token.value
+    if token.kind == "function" and token.value == "url":
+        value = None
+        for inner in tokens:
+            if inner.kind == ")":
+                break
+            if inner.kind == "string" and value is None:
+                value = inner.value
+        return value
+    return None
+
+
+def _import_target(tokens: Iterator[Token]) -> str | None:
+    target = None
+    for token in tokens:
+        if token.kind == ";":
+            break
+        if token.kind == "{":
+            # Not a valid @import; skip the block it opened.
+            _skip_block(tokens)
+            break
+        if target is not None:
+            continue
+        if token.kind == "string":
+            target = token.value
+        else:
+            target = _url_value(token, tokens)
+    if target and not target.startswith("data:"):
+        return target.strip()
+    return None
+
+
+def _skip_block(tokens: Iterator[Token]) -> None:
+    depth = 1
+    for token in tokens:
+        if token.kind == "{":
+            depth += 1
+        elif token.kind == "}":
+            depth -= 1
+            if depth == 0:
+                return
+
+
+def _consume_font_face(tokens: Iterator[Token], base: str, font_urls: set[str]) -> FontFace | None:
+    for token in tokens:
+        if token.kind == "{":
+            break
+        if token.kind == ";":
+            return None
+    else:
+        return None
+
+    declarations: dict[str, list[Token]] = {}
+    name: str | None = None
+    value: list[Token] = []
+    seen_colon = False
+    depth = 0
+    for token in tokens:
+        if depth == 0 and token.kind in (";", "}"):
+            if name is not None and seen_colon:
+                declarations[name] = value
+            name, value, seen_colon = None, [], False
+            if token.kind == "}":
+                break
+            continue
+        if token.kind == "{":
+            depth += 1
+        elif token.kind == "}":
+            depth -= 1
+        if name is None and token.kind == "ident":
+            name = token.value.lower()
+        elif name is not None and not seen_colon and token.kind == ":":
+            seen_colon = True
+        elif seen_colon:
+            value.append(token)
+
+    sources: list[str] = []
+    src_tokens = iter(declarations.get("src", []))
+    for token in src_tokens:
+        if url := _url_value(token, src_tokens):
+            absolute = _absolute_font_url(url, base)
+            if absolute and absolute not in sources:
+                sources.append(absolute)
+    font_urls.update(sources)
+
+    family = _font_family(declarations.get("font-family", []))
+    if not family or not sources:
+        return None
+    return FontFace(
+        family=family,
+        weight=_font_weight(declarations.get("font-weight", [])),
+        style=_font_style(declarations.get("font-style", [])),
+        sources=sources,
+    )
+
+
+def _font_family(tokens: list[Token]) -> str | None:
+    if tokens and tokens[0].kind == "string":
+        return tokens[0].value.strip() or None
+    words = [token.value for token in tokens if token.kind == "ident"]
+    return " ".join(words) or None
+
+
+def _font_weight(tokens: list[Token]) -> str:
+    values: list[str] = []
+    for token in tokens:
+        if token.kind == "number":
+            try:
+                values.append(str(round(float(token.value))))
+            except ValueError:
+                continue
+        elif token.kind == "ident" and token.value.lower() in WEIGHT_KEYWORDS:
+            values.append(WEIGHT_KEYWORDS[token.value.lower()])
+    if len(values) >= 2 and values[0] != values[1]:
+        # Variable font: "100 900" covers the whole range.
+        low, high = sorted(values[:2], key=int)
+        return f"{low} {high}"
+    return values[0] if values else "400"
+
+
+def _font_style(tokens: list[Token]) -> str:
+    for token in tokens:
+        if token.kind == "ident" and token.value.lower() in ("normal", "italic", "oblique"):
+            return "italic" if token.value.lower() == "oblique" else token.value.lower()
+    return "normal"
+
+
+def _absolute_font_url(url: str, base: str) -> str | None:
+    cleaned = url.strip()
+    if not cleaned or cleaned.startswith("data:"):
+        return None
+    absolute = urljoin(base, cleaned)
+    return absolute if looks_like_font(absolute) else None
+
+
+def looks_like_font(url: str) -> bool:
+    lower = url.lower()
+    return lower.startswith(("http://", "https://")) and lower.endswith(FONT_EXTENSIONS)
+
+
+class FontFamilyGroup(NamedTuple):
+    family: str
+    weights: list[str]
+    styles: list[str]
+    files: list[str]
+    loader: str | None
+
+
+def group_font_faces(
+    faces: Iterable[FontFace], manifest: dict[str, Any] | None = None
+) -> list[FontFamilyGroup]:
+    """Group faces by family, in first-seen order, and resolve each to a ``next/font/google`` loader.
+
+    A family maps to a loader when it is listed in the Google Fonts manifest, or
+    when its files are served from Google's font CDN.
+    """
+
+    manifest = load_google_fonts_manifest() if manifest is None else manifest
+    lookup = {name.lower(): name for name in manifest}
+    families: dict[str, FontFace] = {}
+    weights: dict[str, set[str]] = {}
+    styles: dict[str, set[str]] = {}
+    files: dict[str, list[str]] = {}
+    from_google: set[str] = set()
+    for face in faces:
+        key = face.family.lower()
+        families.setdefault(key, face)
+        weights.setdefault(key, set()).add(face.weight)
+        styles.setdefault(key, set()).add(face.style)
+        family_files = files.setdefault(key, [])
+        family_files.extend(url for url in face.sources if url not in family_files)
+        if any(urlparse(url).hostname in GOOGLE_FONT_HOSTS for url in face.sources):
+            from_google.add(key)
+
+    groups: list[FontFamilyGroup] = []
+    for key, first in families.items():
+        loader_name = first.family.strip().replace(" ", "_")
+        loader = lookup.get(loader_name.lower()) or (loader_name if key in from_google else None)
+        meta = manifest.get(loader, {}) if loader else {}
+        groups.append(
+            FontFamilyGroup(
+                family=first.family,
+                weights=_expand_weights(weights[key], meta.get("weights")),
+                styles=sorted(styles[key], key=lambda style: style != "normal"),
+                files=files[key],
+                loader=loader,
+            )
+        )
+    return groups
+
+
+def _expand_weights(weights: Iterable[str], allowed: list[str] | None) -> list[str]:
+    candidates = [str(weight) for weight in allowed] if allowed else list(STANDARD_WEIGHTS)
+    expanded: set[str] = set()
+    for weight in weights:
+        if " " in weight:
+            low, high = (int(part) for part in weight.split())
+            expanded.update(
+                value for value in candidates if value.isdigit() and low <= int(value) <= high
+            )
+        else:
+            expanded.add(weight)
+    if allowed:
+        # Next.js rejects weights the family does not ship.
+        expanded &= set(candidates)
+    return sorted(expanded, key=lambda value: int(value) if value.isdigit() else 0)
+
+
+def fonts_config(groups: Iterable[FontFamilyGroup]) -> list[dict[str, Any]]:
+    """Return the ``fonts`` list for ``site-config.json`` (the shape ``apply_theme.py --fonts`` takes).
+
+    Only families with a Google loader are included; self-hosted families need
+    ``next/font/local`` and are left for the caller.
+    """
+
+    config: list[dict[str, Any]] = []
+    used_ids: set[str] = set()
+    for group in groups:
+        if group.loader is None:
+            continue
+        font_id = re.sub(r"[^a-z0-9]+", "-", group.family.lower()).strip("-") or "font"
+        if font_id in used_ids:
+            continue
+        used_ids.add(font_id)
+        options: dict[str, Any] = {"subsets": ["latin"], "display": "swap"}
+        if group.weights:
+            options["weight"] = group.weights
+        if group.styles and group.styles != ["normal"]:
+            options["style"] = group.styles
+        config.append({"id": font_id, "loader": group.loader, "options": options})
+    return config
+
+
+@lru_cache(maxsize=1)
+def load_google_fonts_manifest() -> dict[str, Any]:
+    """Load the ``google-fonts.json`` manifest used by ``apply_theme.py``, if configured."""
+
+    if not GOOGLE_FONTS_MANIFEST:
+        return {}
+    path = Path(GOOGLE_FONTS_MANIFEST)
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        logger.warning("Could not load Google Fonts manifest {}: {}", path, exc)
+        return {}
+    if not isinstance(data, dict):
+        logger.warning("Google Fonts manifest {} is not a JSON object", path)
+        return {}
+    return data
+
+
+__all__ = [
+    "FontFace",
+    "FontFamilyGroup",
+    "StylesheetFonts",
+    "Token",
+    "fonts_config",
+    "group_font_faces",
+    "load_google_fonts_manifest",
+    "looks_like_font",
+    "parse_stylesheet",
+    "tokenize",
+]
@@ -1,53 +1,52 @@
 from __future__ import annotations
 
 import asyncio
+import importlib.util
 import re
+import time
 from collections.abc import Iterable
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from http.cookiejar import CookieJar, DefaultCookiePolicy
 from typing import NamedTuple
 from urllib.parse import urljoin, urlparse
 
 import httpx
-from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4 import BeautifulSoup, Tag
 from loguru import logger
 
 from . import models
 from .config import (
+    EXTRACTION_DEADLINE_SECONDS,
+    HTTP2_ENABLED,
+    HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
     MAX_CONTENT_LENGTH_BYTES,
     MAX_STYLESHEET_BYTES,
     MAX_STYLESHEETS,
     REQUEST_TIMEOUT_SECONDS,
+    STYLESHEET_CONCURRENCY,
+    STYLESHEET_PER_HOST_CONCURRENCY,
     USER_AGENT,
 )
-
-FONT_EXTENSIONS = (".woff", ".woff2", ".ttf", ".otf", ".eot")
-NAV_KEYWORDS = (
-    "nav",
-    "menu",
-    "menubar",
-    "navbar",
-    "main-nav",
-    "primary-nav",
-    "primary-menu",
-    "topnav",
-    "site-nav",
-    "header-nav",
+from .content import compose_main_text, extract_main_content
+from .css_fonts import (
+    FontFace,
+    StylesheetFonts,
+    fonts_config,
+    group_font_faces,
+    looks_like_font,
+    parse_stylesheet,
 )
-FOOTER_KEYWORDS = ("footer", "foot", "bottom")
-CSS_URL_PATTERN = re.compile(r"url\(([^)]+)\)", re.IGNORECASE)
-IMPORT_PATTERN = re.compile(r"@import\s+url\(([^)]+)\)", re.IGNORECASE)
-SKIP_TEXT_PARENTS = {
-    "script",
-    "style",
-    "noscript",
-    "template",
-    "meta",
-    "link",
-    "head",
-    "title",
-    "[document]",
-}
+from .http_cache import CONDITIONAL_HEADERS, CachingTransport, get_http_cache
+from .image_probe import enrich_images
+from .instrumentation import StageTimer, get_stage_histograms
+from .parse_pool import get_parse_pool
+from .result_cache import get_result_cache
+from .parsing import DocumentScan, ScannedText, looks_like_footer, parse_html, scan_document
+
 
 
 class ExtractionError(Exception):
@@ -67,74 +66,334 @@ class FontCandidate:
     url: str
     source: str
     stylesheet_url: str | None
+    family: str | None = None
+    weight: str | None = None
+    style: str | None = None
+
+
+class PageExtraction(NamedTuple):
+    page: models.ExtractionResponse
+    links: list[str]
+    # Seconds spent per stage; see instrumentation.StageTimer.
+    timings: dict[str, float]
+
+
+StylesheetCache = dict[str, StylesheetFonts | None]
 
 
-async def extract_page(url: str) -> models.ExtractionResponse:
-    async with httpx.AsyncClient(
+def create_client() -> httpx.AsyncClient:
+    """Build the pooled outbound client; the service keeps one for its lifetime."""
+
+    transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(
+        http2=_http2_available(),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+    )
+    if (cache := get_http_cache()) is not None:
+        transport = CachingTransport(transport, cache)
+    return httpx.AsyncClient(
+        transport=transport,
         timeout=httpx.Timeout(REQUEST_TIMEOUT_SECONDS),
         follow_redirects=True,
         headers={"User-Agent": USER_AGENT},
-    ) as client:
-        response = await _fetch_html(client, url)
-        html = response.text
+        # The client is shared across extractions of unrelated sites, so never
+        # keep cookies one site sets around for the next request.
+        cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+    )
 
-        soup = BeautifulSoup(html, "html.parser")
 
-        text_nodes = list(_extract_text_nodes(soup))
-        images = list(_extract_images(soup, base_url=response.url))
-        font_candidates = await _collect_font_candidates(client, soup, base_url=response.url)
+def _http2_available() -> bool:
+    if not HTTP2_ENABLED:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP2_ENABLED is set but the h2 package is missing; using HTTP/1.1")
+        return False
+    return True
+
+
+async def extract_page(
+    url: str,
+    *,
+    client: httpx.AsyncClient | None = None,
+    probe_images: bool = False,
+    include_timings: bool = False,
+    mode: models.ExtractionMode = "full",
+) -> models.ExtractionResponse:
+    if client is None:
+        async with create_client() as own_client:
+            return await extract_page(
+                url,
+                client=own_client,
+                probe_images=probe_images,
+                include_timings=include_timings,
+                mode=mode,
+            )
 
+    extraction = await extract_document(client, url)
+    page = apply_mode(extraction.page, mode)
+    timer = StageTimer()
+    timer.merge(extraction.timings)
+    if probe_images and page.images:
+        page = page.model_copy(update={"images": await timed_enrich_images(client, page.images, timer)})
+    if include_timings:
+        page = page.model_copy(update={"timings": timer.milliseconds()})
+    return page
+
+
+def apply_mode(page: models.ExtractionResponse, mode: models.ExtractionMode) -> models.ExtractionResponse:
+    """Restrict ``text``/``text_blob`` to the main content blocks when ``mode`` is ``"main"``.
+
+    Cached results always hold the full text, so one entry serves both modes.
+    """
+
+    if mode == "full":
+        return page
+    texts = compose_main_text(page.content)
+    return page.model_copy(
+        update={
+            "text": [models.TextNode(content=text) for text in texts],
+            "text_blob": "\n\n".join(texts),
+        }
+    )
+
+
+async def timed_enrich_images(
+    client: httpx.AsyncClient, images: list[models.ImageResource], timer: StageTimer
+) -> list[models.ImageResource]:
+    """:func:`enrich_images`, recorded as the ``image_probe`` stage (and counted in ``total``)."""
+
+    started = time.perf_counter()
+    enriched = await enrich_images(client, images)
+    elapsed = time.perf_counter() - started
+    timer.add("image_probe", elapsed)
+    timer.add("total", elapsed)
+    get_stage_histograms().observe({"image_probe": elapsed})
+    return enriched
+
+
+async def extract_document(
+    client: httpx.AsyncClient,
+    url: str,
+    *,
+    stylesheet_cache: StylesheetCache | None = None,
+) -> PageExtraction:
+    """Extract one page with ``client`` and return it with the absolute URLs it links to.
+
+    ``stylesheet_cache`` lets callers extracting several pages of the same site
+    reuse stylesheets (and their ``@import``s) that were already fetched.
+    """
+
+    timer = StageTimer()
+    started = time.perf_counter()
+    # One deadline covers the HTML fetch and the stylesheet crawl combined.
+    deadline = asyncio.get_running_loop().time() + EXTRACTION_DEADLINE_SECONDS
+    try:
+        async with asyncio.timeout_at(deadline):
+            with timer.stage("fetch"):
+                response = await _fetch_html(client, url)
+    except TimeoutError as exc:
+        raise ExtractionError("Timed out fetching the requested URL", status_code=504) from exc
+
+    result_cache = get_result_cache()
+    with timer.stage("result_cache"):
+        cache_key = result_cache.key_for(str(response.url), response.content)
+        cached = result_cache.get(cache_key)
+    if cached is not None:
+        page = models.ExtractionResponse.model_validate_json(cached.page_json)
+        # Unchanged HTML is a hit, unless the HTTP cache had to ask the origin
+        # about a stale copy (a 304, or a conditional request answered in full).
+        status = (
+            "revalidated"
+            if response.cache_status == "REVALIDATED" or response.conditional
+            else "hit"
+        )
+        page = page.model_copy(update={"fetched_at": datetime.now(timezone.utc), "cache": status})
+        return PageExtraction(page=page, links=list(cached.links), timings=_finish(timer, started))
+
+    submitted = time.perf_counter()
+    try:
+        analysis, worker_timings = await get_parse_pool().run(
+            analyse_document_timed, response.content, response.encoding, str(response.url)
+        )
+    except BrokenProcessPool as exc:
+        raise ExtractionError("Parser worker crashed while analysing the page", status_code=500) from exc
+    timer.merge(worker_timings)
+    # Waiting for a free worker plus pickling the page and the analysis.
+    timer.add(
+        "parse_queue",
+        max(0.0, time.perf_counter() - submitted - sum(worker_timings.values())),
+    )
+
+    font_candidates = list(analysis.inline_fonts)
+    if analysis.stylesheets:
+        with timer.stage("stylesheets"):
+            font_candidates.extend(
+                await _stylesheet_font_candidates(
+                    client, analysis.stylesheets, deadline=deadline, cache=stylesheet_cache
+                )
+            )
     fonts = _dedupe_fonts(font_candidates)
-    text_models = [models.TextNode(content=node.content) for node in text_nodes]
-    text_blob = _compose_text_blob(text_nodes)
-    navigation = _extract_navigation(soup, base_url=response.url)
-    image_nodes = _dedupe_image_nodes(images)
+    families = group_font_faces(_faces_from_candidates(fonts))
 
-    return models.ExtractionResponse(
+    page = models.ExtractionResponse(
         url=str(response.url),
-        title=_extract_title(soup),
+        title=analysis.title,
         fetched_at=datetime.now(timezone.utc),
-        text=text_models,
-        text_blob=text_blob,
-        images=[models.ImageResource(**_image_dict(image)) for image in image_nodes],
+        text=[models.TextNode(content=node.content) for node in analysis.text],
+        text_blob=_compose_text_blob(analysis.text),
+        images=[models.ImageResource(**_image_dict(image)) for image in analysis.images],
         fonts=[
-            models.FontResource(url=font.url, source=font.source, stylesheet_url=font.stylesheet_url)
+            models.FontResource(
+                url=font.url,
+                source=font.source,
+                stylesheet_url=font.stylesheet_url,
+                family=font.family,
+                weight=font.weight,
+                style=font.style,
+            )
             for font in fonts
         ],
+        font_families=[models.FontFamily(**family._asdict()) for family in families],
+        fonts_config=[models.FontLoaderConfig(**entry) for entry in fonts_config(families)],
+        navigation=analysis.navigation,
+        content=analysis.content,
+        cache="miss",
+    )
+    result_cache.put(cache_key, page, analysis.links)
+    return PageExtraction(page=page, links=analysis.links, timings=_finish(timer, started))
+
+
+def _finish(timer: StageTimer, started: float) -> dict[str, float]:
+    timer.add("total", time.perf_counter() - started)
+    get_stage_histograms().observe(timer.durations)
+    return timer.durations
+
+
+class DocumentAnalysis(NamedTuple):
+    """Everything derived from a page's HTML; crosses the parse-worker process boundary."""
+
+    title: str | None
+    text: list[_TextNode]
+    images: list[_ImageNode]
+    navigation: list[models.NavigationItem]
+    links: list[str]
+    inline_fonts: list[FontCandidate]
+    stylesheets: list[StylesheetRef]
+    content: list[models.ContentBlock]
+
+
+def analyse_document(
+    content: bytes, encoding: str | None, base_url: str, timer: StageTimer | None = None
+) -> DocumentAnalysis:
+    """Parse and analyse a fetched page. CPU-bound; runs in a parse worker."""
+
+    timer = timer if timer is not None else StageTimer()
+    url = httpx.URL(base_url)
+    with timer.stage("parse"):
+        soup = parse_html(content, encoding=encoding)
+    with timer.stage("scan"):
+        scan = scan_document(soup)
+    with timer.stage("text"):
+        title = _extract_title(scan)
+        text = list(_extract_text_nodes(scan))
+    with timer.stage("navigation"):
+        navigation = _extract_navigation(scan, base_url=url)
+    with timer.stage("images"):
+        images = _dedupe_image_nodes(_extract_images(scan, base_url=url))
+    with timer.stage("links"):
+        links = _extract_links(scan, navigation, base_url=url)
+    with timer.stage("inline_fonts"):
+        inline_fonts, stylesheets = _inline_font_candidates(scan, base_url=url)
+    with timer.stage("content"):
+        content = extract_main_content(soup)
+    return DocumentAnalysis(
+        title=title,
+        text=text,
+        images=images,
         navigation=navigation,
+        links=links,
+        inline_fonts=inline_fonts,
+        stylesheets=stylesheets,
+        content=content,
     )
 
 
-async def _fetch_html(client: httpx.AsyncClient, url: str) -> httpx.Response:
+def analyse_document_timed(
+    content: bytes, encoding: str | None, base_url: str
+) -> tuple[DocumentAnalysis, dict[str, float]]:
+    """:func:`analyse_document` plus the seconds spent in each of its stages."""
+
+    timer = StageTimer()
+    return analyse_document(content, encoding, base_url, timer), timer.durations
+
+
+class FetchedPage(NamedTuple):
+    url: httpx.URL
+    content: bytes
+    encoding: str | None
+    # "HIT"/"REVALIDATED"/"MISS" when the body went through the HTTP cache.
+    cache_status: str | None = None
+    # The HTTP cache sent If-None-Match/If-Modified-Since for a stale copy.
+    conditional: bool = False
+
+
+async def _fetch_html(client: httpx.AsyncClient, url: str) -> FetchedPage:
     try:
-        response = await client.get(url)
+        async with client.stream("GET", url) as response:
+            content_type = response.headers.get("Content-Type", "").lower()
+            if "text/html" not in content_type:
+                raise ExtractionError("URL does not appear to be HTML content", status_code=415)
+
+            body = await _read_capped(response, MAX_CONTENT_LENGTH_BYTES)
+            if body is None:
+                raise ExtractionError("Fetched content exceeds maximum allowed size", status_code=413)
     except httpx.HTTPError as exc:
-        logger.warning("Failed to fetch %s: %s", url, exc)
+        logger.warning("Failed to fetch {}: {}", url, exc)
         raise ExtractionError("Failed to fetch the requested URL", status_code=502) from exc
 
+    return FetchedPage(
+        url=response.url,
+        content=body,
+        encoding=response.charset_encoding,
+        cache_status=response.extensions.get("cache_status"),
+        conditional=any(name in response.request.headers for name in CONDITIONAL_HEADERS),
+    )
+
+
+async def _read_capped(response: httpx.Response, limit: int) -> bytes | None:
+    """Read a streamed body, returning ``None`` as soon as it exceeds ``limit`` bytes."""
+
     content_length = response.headers.get("Content-Length")
-    if content_length and int(content_length) > MAX_CONTENT_LENGTH_BYTES:
-        raise ExtractionError("Fetched content exceeds maximum allowed size", status_code=413)
+    if content_length and content_length.isdigit() and int(content_length) > limit:
+        return None
 
-    if len(response.content) > MAX_CONTENT_LENGTH_BYTES:
-        raise ExtractionError("Fetched content exceeds maximum allowed size", status_code=413)
+    chunks: list[bytes] = []
+    received = 0
+    async for chunk in response.aiter_bytes():
+        received += len(chunk)
+        if received > limit:
+            return None
+        chunks.append(chunk)
+    return b"".join(chunks)
 
-    content_type = response.headers.get("Content-Type", "").lower()
-    if "text/html" not in content_type:
-        raise ExtractionError("URL does not appear to be HTML content", status_code=415)
 
-    return response
+def _as_scan(source: BeautifulSoup | DocumentScan) -> DocumentScan:
+    if isinstance(source, DocumentScan):
+        return source
+    return scan_document(source)
 
 
-def _extract_title(soup: BeautifulSoup) -> str | None:
-    if soup.title and soup.title.string:
-        return soup.title.string.strip() or None
+def _extract_title(source: BeautifulSoup | DocumentScan) -> str | None:
+    title = _as_scan(source).title
+    if title is not None and title.string:
+        return title.string.strip() or None
     return None
 
 
-class _TextNode(NamedTuple):
-    path: str
-    content: str
+_TextNode = ScannedText
 
 
 class _NavLink(NamedTuple):
@@ -142,30 +401,18 @@ class _NavLink(NamedTuple):
     href: str | None
 
 
-def _extract_text_nodes(soup: BeautifulSoup) -> Iterable[_TextNode]:
-    for text in soup.find_all(string=True):
-        if not isinstance(text, NavigableString):
-            continue
-        stripped = text.strip()
-        if not stripped:
-            continue
-        parent = text.parent
-        if not isinstance(parent, Tag):
-            continue
-        if parent.name in SKIP_TEXT_PARENTS:
-            continue
-        path = _build_dom_path(parent)
-        if path == "[document]":
-            continue
-        yield _TextNode(path=path, content=stripped)
+def _extract_text_nodes(source: BeautifulSoup | DocumentScan) -> Iterable[_TextNode]:
+    return iter(_as_scan(source).text_nodes)
 
 
 def _compose_text_blob(nodes: Iterable[_TextNode]) -> str:
     return "\n\n".join(node.content for node in nodes)
 
 
-def _extract_navigation(soup: BeautifulSoup, *, base_url: httpx.URL) -> list[models.NavigationItem]:
-    candidates = _navigation_candidates(soup)
+def _extract_navigation(
+    source: BeautifulSoup | DocumentScan, *, base_url: httpx.URL
+) -> list[models.NavigationItem]:
+    candidates = _as_scan(source).nav_candidates
     if not candidates:
         return []
 
@@ -182,7 +429,7 @@ def _extract_navigation(soup: BeautifulSoup, *, base_url: httpx.URL) -> list[mod
             continue
 
         score = internal_links * 2 + len(links)
-        if _looks_like_footer(candidate):
+        if looks_like_footer(candidate):
             score -= 3
 
         if score <= 0:
@@ -200,32 +447,28 @@ def _extract_navigation(soup: BeautifulSoup, *, base_url: httpx.URL) -> list[mod
     return items
 
 
-def _navigation_candidates(soup: BeautifulSoup) -> list[Tag]:
-    candidates: list[Tag] = []
-    seen: set[int] = set()
+def _extract_links(
+    source: BeautifulSoup | DocumentScan,
+    navigation: Iterable[models.NavigationItem],
+    *,
+    base_url: httpx.URL,
+) -> list[str]:
+    """Return absolute http(s) link targets, navigation entries first, without duplicates."""
 
-    def _register(tag: Tag) -> None:
-        identity = id(tag)
-        if identity in seen:
-            return
-        seen.add(identity)
-        candidates.append(tag)
-
-    for element in soup.find_all("nav"):
-        _register(element)
+    links: dict[str, None] = {}
 
-    for element in soup.find_all(attrs={"role": re.compile("navigation|menubar", re.I)}):
-        _register(element)
+    def _visit(items: Iterable[models.NavigationItem]) -> None:
+        for item in items:
+            if item.href:
+                links.setdefault(item.href)
+            _visit(item.children)
 
-    keyword_pattern = re.compile("|".join(re.escape(k) for k in NAV_KEYWORDS), re.I)
-    for element in soup.find_all(
-        attrs={"class": keyword_pattern}
-    ):
-        _register(element)
-    for element in soup.find_all(id=keyword_pattern):
-        _register(element)
-
-    return candidates
+    _visit(navigation)
+    for anchor in _as_scan(source).anchors:
+        href = _normalize_href(anchor.get("href"), base_url)
+        if href:
+            links.setdefault(href)
+    return [link for link in links if link.startswith(("http://", "https://"))]
 
 
 def _candidate_links(container: Tag) -> list[_NavLink]:
@@ -306,30 +549,15 @@ def _flat_navigation(container: Tag, base_url: httpx.URL) -> list[models.Navigat
     return items
 
 
-def _build_dom_path(element: Tag) -> str:
-    parts: list[str] = []
-    current: Tag | None = element
-
-    while current and isinstance(current, Tag):
-        parent = current.parent if isinstance(current.parent, Tag) else None
-        if parent:
-            siblings = [sib for sib in parent.find_all(current.name, recursive=False)]
-            index = siblings.index(current) + 1 if siblings else 1
-            parts.append(f"{current.name}[{index}]")
-        else:
-            parts.append(current.name)
-        current = parent
-
-    return ".".join(reversed(parts))
-
-
 class _ImageNode(NamedTuple):
     src: str
     alt: str | None
 
 
-def _extract_images(soup: BeautifulSoup, *, base_url: httpx.URL) -> Iterable[_ImageNode]:
-    for img in soup.find_all("img"):
+def _extract_images(
+    source: BeautifulSoup | DocumentScan, *, base_url: httpx.URL
+) -> Iterable[_ImageNode]:
+    for img in _as_scan(source).images:
         src = img.get("src") or ""
         if not src:
             continue
@@ -409,92 +637,180 @@ def _is_internal_link(href: str | None, base_host: str) -> bool:
     return parsed.netloc == base_host
 
 
-def _looks_like_footer(tag: Tag) -> bool:
-    if tag.find_parent("footer") is not None:
-        return True
-    values: list[str] = []
-    for key, value in tag.attrs.items():
-        if key not in {"id", "class", "role"}:
-            continue
-        if isinstance(value, (list, tuple)):
-            values.extend(str(item) for item in value)
-        else:
-            values.append(str(value))
-    attrs = " ".join(values).lower()
-    return any(keyword in attrs for keyword in FOOTER_KEYWORDS)
-
+def _inline_font_candidates(
+    source: BeautifulSoup | DocumentScan, *, base_url: httpx.URL
+) -> tuple[list[FontCandidate], list[StylesheetRef]]:
+    """Return fonts referenced by the document itself plus the stylesheets still to fetch."""
 
-async def _collect_font_candidates(
-    client: httpx.AsyncClient, soup: BeautifulSoup, *, base_url: httpx.URL
-) -> list[FontCandidate]:
+    scan = _as_scan(source)
     candidates: list[FontCandidate] = []
 
     # Fonts exposed directly via <link rel="preload" as="font"> entries
-    for link in soup.find_all("link"):
+    for link in scan.links:
         rel = {value.lower() for value in (link.get("rel") or [])}
         if "preload" in rel and link.get("as") == "font":
             href = link.get("href")
             if not href:
                 continue
             absolute = urljoin(str(base_url), href)
-            if _looks_like_font(absolute):
+            if looks_like_font(absolute):
                 candidates.append(FontCandidate(url=absolute, source="inline", stylesheet_url=None))
 
     inline_imports: set[str] = set()
-    inline_styles = [str(tag.string) for tag in soup.find_all("style") if tag.string]
-    for css in inline_styles:
-        font_urls, imports = _parse_css_for_fonts(css, base=str(base_url))
-        for font_url in font_urls:
-            candidates.append(FontCandidate(url=font_url, source="inline", stylesheet_url=None))
-        inline_imports.update(imports)
-
-    stylesheet_refs = _stylesheet_urls(soup, str(base_url))
+    for css in scan.styles:
+        parsed = parse_stylesheet(css, str(base_url))
+        candidates.extend(_font_candidates(parsed, source="inline", stylesheet_url=None))
+        inline_imports.update(parsed.imports)
+
+    stylesheet_refs = _stylesheet_urls(scan, str(base_url))
     stylesheet_refs.extend(
-        StylesheetRef(url=css_url, referer=str(base_url)) for css_url in inline_imports
+        StylesheetRef(url=css_url, referer=str(base_url)) for css_url in sorted(inline_imports)
     )
-    if not stylesheet_refs:
-        return candidates
+    return candidates, stylesheet_refs
 
-    queue: asyncio.Queue[StylesheetRef] = asyncio.Queue()
-    enqueued: set[str] = set()
-    for ref in stylesheet_refs[:MAX_STYLESHEETS]:
-        queue.put_nowait(ref)
-        enqueued.add(ref.url)
 
-    processed = 0
-    seen_stylesheets: set[str] = set()
+async def _stylesheet_font_candidates(
+    client: httpx.AsyncClient,
+    refs: Iterable[StylesheetRef],
+    *,
+    deadline: float | None = None,
+    cache: StylesheetCache | None = None,
+) -> list[FontCandidate]:
+    candidates: list[FontCandidate] = []
+    for stylesheet_url, parsed in await _crawl_stylesheets(
+        client, refs, deadline=deadline, cache=cache
+    ):
+        candidates.extend(
+            _font_candidates(parsed, source="stylesheet", stylesheet_url=stylesheet_url)
+        )
+    return candidates
 
-    while not queue.empty() and processed < MAX_STYLESHEETS:
-        ref = await queue.get()
-        processed += 1
-        if ref.url in seen_stylesheets:
-            continue
-        seen_stylesheets.add(ref.url)
 
-        css = await _fetch_stylesheet(client, ref.url)
-        if css is None:
-            continue
+def _font_candidates(
+    parsed: StylesheetFonts, *, source: str, stylesheet_url: str | None
+) -> list[FontCandidate]:
+    """Fonts declared by ``@font-face`` rules first, then any other font files referenced."""
 
-        font_urls, imports = _parse_css_for_fonts(css, base=ref.url)
-        for font_url in font_urls:
+    candidates: list[FontCandidate] = []
+    described: set[str] = set()
+    for face in parsed.faces:
+        for font_url in face.sources:
+            described.add(font_url)
             candidates.append(
-                FontCandidate(url=font_url, source="stylesheet", stylesheet_url=ref.url)
+                FontCandidate(
+                    url=font_url,
+                    source=source,
+                    stylesheet_url=stylesheet_url,
+                    family=face.family,
+                    weight=face.weight,
+                    style=face.style,
+                )
             )
+    for font_url in sorted(parsed.font_urls - described):
+        candidates.append(FontCandidate(url=font_url, source=source, stylesheet_url=stylesheet_url))
+    return candidates
 
-        for import_url in imports:
-            if import_url in seen_stylesheets or import_url in enqueued:
-                continue
-            if len(enqueued) >= MAX_STYLESHEETS:
-                continue
-            queue.put_nowait(StylesheetRef(url=import_url, referer=ref.url))
-            enqueued.add(import_url)
 
-    return candidates
+def _faces_from_candidates(fonts: Iterable[FontCandidate]) -> list[FontFace]:
+    faces: dict[tuple[str, str, str], list[str]] = {}
+    for font in fonts:
+        if font.family is None:
+            continue
+        key = (font.family, font.weight or "400", font.style or "normal")
+        faces.setdefault(key, []).append(font.url)
+    return [FontFace(family, weight, style, urls) for (family, weight, style), urls in faces.items()]
+
+
+async def _crawl_stylesheets(
+    client: httpx.AsyncClient,
+    refs: Iterable[StylesheetRef],
+    *,
+    deadline: float | None,
+    cache: StylesheetCache | None = None,
+) -> list[tuple[str, StylesheetFonts]]:
+    """Fetch stylesheets and their ``@import``s with a bounded worker pool.
+
+    Returns ``(stylesheet_url, parsed)`` pairs in discovery order. Stylesheets
+    still in flight when ``deadline`` (event-loop time) passes are dropped.
+    Parsed stylesheets found in ``cache`` are reused instead of refetched.
+    """
+
+    queue: asyncio.Queue[tuple[int, StylesheetRef]] = asyncio.Queue()
+    enqueued: set[str] = set()
+    seen_stylesheets: set[str] = set()
+    host_limits: dict[str, asyncio.Semaphore] = {}
+    results: dict[int, tuple[str, StylesheetFonts]] = {}
 
+    def _enqueue(ref: StylesheetRef) -> None:
+        if ref.url in enqueued or len(enqueued) >= MAX_STYLESHEETS:
+            return
+        queue.put_nowait((len(enqueued), ref))
+        enqueued.add(ref.url)
 
-def _stylesheet_urls(soup: BeautifulSoup, base_url: str) -> list[StylesheetRef]:
+    for ref in refs:
+        _enqueue(ref)
+
+    async def _worker() -> None:
+        while True:
+            order, ref = await queue.get()
+            try:
+                if ref.url in seen_stylesheets:
+                    continue
+                seen_stylesheets.add(ref.url)
+
+                if cache is not None and ref.url in cache:
+                    parsed = cache[ref.url]
+                else:
+                    host = urlparse(ref.url).netloc
+                    host_limit = host_limits.get(host)
+                    if host_limit is None:
+                        host_limit = host_limits[host] = asyncio.Semaphore(
+                            STYLESHEET_PER_HOST_CONCURRENCY
+                        )
+                    async with host_limit:
+                        css = await _fetch_stylesheet(client, ref.url)
+                    parsed = (
+                        None
+                        if css is None
+                        else await get_parse_pool().run(parse_stylesheet, css, ref.url)
+                    )
+                    if cache is not None:
+                        cache[ref.url] = parsed
+                if parsed is None:
+                    continue
+
+                results[order] = (ref.url, parsed)
+                for import_url in sorted(parsed.imports):
+                    _enqueue(StylesheetRef(url=import_url, referer=ref.url))
+            finally:
+                queue.task_done()
+
+    workers = [
+        asyncio.create_task(_worker())
+        for _ in range(max(1, min(STYLESHEET_CONCURRENCY, MAX_STYLESHEETS)))
+    ]
+    try:
+        async with asyncio.timeout_at(deadline):
+            await queue.join()
+    except TimeoutError:
+        logger.debug(
+            "Stylesheet crawl hit the extraction deadline after {} of {} stylesheets",
+            len(results),
+            len(enqueued),
+        )
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    return [results[order] for order in sorted(results)]
+
+
+def _stylesheet_urls(
+    source: BeautifulSoup | DocumentScan, base_url: str
+) -> list[StylesheetRef]:
     refs: list[StylesheetRef] = []
-    for link in soup.find_all("link"):
+    for link in _as_scan(source).links:
         rel = {value.lower() for value in (link.get("rel") or [])}
         if "stylesheet" not in rel:
             continue
@@ -508,46 +824,25 @@ def _stylesheet_urls(soup: BeautifulSoup, base_url: str) -> list[StylesheetRef]:
 
 async def _fetch_stylesheet(client: httpx.AsyncClient, url: str) -> str | None:
     try:
-        response = await client.get(url)
-    except httpx.HTTPError as exc:
-        logger.debug("Failed to fetch stylesheet %s: %s", url, exc)
-        return None
+        async with client.stream("GET", url) as response:
+            content_type = response.headers.get("Content-Type", "").lower()
+            if "text/css" not in content_type and "text/plain" not in content_type:
+                return None
 
-    content_type = response.headers.get("Content-Type", "").lower()
-    if "text/css" not in content_type and "text/plain" not in content_type:
+            body = await _read_capped(response, MAX_STYLESHEET_BYTES)
+            encoding = response.charset_encoding or "utf-8"
+    except httpx.HTTPError as exc:
+        logger.debug("Failed to fetch stylesheet {}: {}", url, exc)
         return None
 
-    if len(response.content) > MAX_STYLESHEET_BYTES:
-        logger.debug("Skipping stylesheet %s because it exceeds size limit", url)
+    if body is None:
+        logger.debug("Skipping stylesheet {} because it exceeds size limit", url)
         return None
 
-    return response.text
-
-
-def _parse_css_for_fonts(css: str, base: str) -> tuple[set[str], set[str]]:
-    font_urls: set[str] = set()
-    import_urls: set[str] = set()
-
-    for raw_url in CSS_URL_PATTERN.findall(css):
-        cleaned = raw_url.strip().strip("'\"")
-        if not cleaned or cleaned.startswith("data:"):
-            continue
-        absolute = urljoin(base, cleaned)
-        if _looks_like_font(absolute):
-            font_urls.add(absolute)
-
-    for import_url in IMPORT_PATTERN.findall(css):
-        cleaned = import_url.strip().strip("'\"")
-        if not cleaned or cleaned.startswith("data:"):
-            continue
-        import_urls.add(urljoin(base, cleaned))
-
-    return font_urls, import_urls
-
-
-def _looks_like_font(url: str) -> bool:
-    lower = url.lower()
-    return lower.startswith(("http://", "https://")) and lower.endswith(FONT_EXTENSIONS)
+    try:
+        return body.decode(encoding, errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
 
 
 def _dedupe_fonts(fonts: Iterable[FontCandidate]) -> list[FontCandidate]:
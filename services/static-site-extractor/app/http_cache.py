@@ -0,0 +1,432 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from pathlib import Path
+
+import httpx
+from loguru import logger
+
+from .config import HTTP_CACHE_DIR, HTTP_CACHE_MAX_BYTES
+
+CACHEABLE_STATUS_CODES = frozenset({200, 203})
+# Headers a 304 carries that should replace the stored copies.
+REVALIDATION_HEADERS = ("cache-control", "date", "etag", "expires", "last-modified")
+# Validators sent when revalidating a stale entry.
+CONDITIONAL_HEADERS = ("if-none-match", "if-modified-since")
+HOP_BY_HOP_HEADERS = frozenset(
+    {"connection", "keep-alive", "proxy-connection", "transfer-encoding", "upgrade"}
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    status_code INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    vary TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest);
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+"""
+
+
+@dataclass(slots=True)
+class CachedResponse:
+    url: str
+    digest: str
+    status_code: int
+    headers: list[tuple[str, str]]
+    vary: dict[str, str]
+    expires_at: float
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expires_at
+
+    def matches(self, request: httpx.Request) -> bool:
+        return all(request.headers.get(name, "") == value for name, value in self.vary.items())
+
+    def header(self, name: str) -> str | None:
+        return httpx.Headers(self.headers).get(name)
+
+
+class HTTPCache:
+    """Content-addressed response store with an LRU size cap.
+
+    Bodies live in ``blobs/<digest[:2]>/<digest>`` keyed by their SHA-256, so
+    the same stylesheet served from several URLs is kept once. A SQLite index
+    maps URLs to digests along with the headers needed for freshness checks
+    and conditional requests.
+    """
+
+    def __init__(self, directory: str | Path, *, max_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._blobs = self.directory / "blobs"
+        self._blobs.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.directory / "index.sqlite3", check_same_thread=False, isolation_level=None
+        )
+        self._conn.executescript(_SCHEMA)
+
+    def lookup(self, url: str) -> CachedResponse | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest, status_code, headers, vary, expires_at FROM entries WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE url = ?", (time.time(), url)
+            )
+        digest, status_code, headers, vary, expires_at = row
+        return CachedResponse(
+            url=url,
+            digest=digest,
+            status_code=status_code,
+            headers=[tuple(pair) for pair in json.loads(headers)],
+            vary=json.loads(vary),
+            expires_at=expires_at,
+        )
+
+    def read_body(self, entry: CachedResponse) -> bytes | None:
+        try:
+            return self._blob_path(entry.digest).read_bytes()
+        except FileNotFoundError:
+            logger.debug("HTTP cache blob for {} is missing; dropping entry", entry.url)
+            self.discard(entry.url)
+            return None
+
+    def store(
+        self,
+        url: str,
+        *,
+        status_code: int,
+        headers: httpx.Headers,
+        vary: dict[str, str],
+        body: bytes,
+        expires_at: float,
+    ) -> None:
+        if len(body) > self.max_bytes:
+            return
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            temporary.write_bytes(body)
+            os.replace(temporary, path)
+
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT digest FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR IGNORE INTO blobs (digest, size) VALUES (?, ?)", (digest, len(body))
+            )
+            self._conn.execute(
+                """
+                INSERT INTO entries (url, digest, status_code, headers, vary, expires_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    digest = excluded.digest,
+                    status_code = excluded.status_code,
+                    headers = excluded.headers,
+                    vary = excluded.vary,
+                    expires_at = excluded.expires_at,
+                    last_access = excluded.last_access
+                """,
+                (
+                    url,
+                    digest,
+                    status_code,
+                    json.dumps(
+                        [
+                            (name, value)
+                            for name, value in headers.multi_items()
+                            if name not in HOP_BY_HOP_HEADERS
+                        ]
+                    ),
+                    json.dumps(vary),
+                    expires_at,
+                    time.time(),
+                ),
+            )
+            if previous is not None and previous[0] != digest:
+                self._drop_blob_if_orphaned(previous[0])
+            self._evict()
+
+    def refresh(
+        self, entry: CachedResponse, headers: httpx.Headers, *, expires_at: float
+    ) -> CachedResponse:
+        """Merge a 304's validators and freshness headers into ``entry``."""
+
+        updates = {name: headers[name] for name in REVALIDATION_HEADERS if name in headers}
+        merged = [(name, value) for name, value in entry.headers if name.lower() not in updates]
+        merged.extend(updates.items())
+        entry.headers = merged
+        entry.expires_at = expires_at
+        with self._lock:
+            self._conn.execute(
+                "UPDATE entries SET headers = ?, expires_at = ?, last_access = ? WHERE url = ?",
+                (json.dumps(merged), expires_at, time.time(), entry.url),
+            )
+        return entry
+
+    def discard(self, url: str) -> None:
+        with self._lock:
+            row = self._conn.execute("SELECT digest FROM entries WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return
+            self._conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+            self._drop_blob_if_orphaned(row[0])
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._total_bytes()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _total_bytes(self) -> int:
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        return int(total)
+
+    def _evict(self) -> None:
+        # Caller holds the lock. Least recently used URLs go first; a blob is
+        # removed once no remaining URL points at it. The total is summed once
+        # and reduced by each freed blob rather than re-summed per eviction.
+        total = self._total_bytes()
+        while total > self.max_bytes:
+            row = self._conn.execute(
+                "SELECT url, digest FROM entries ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            url, digest = row
+            self._conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+            total -= self._drop_blob_if_orphaned(digest)
+
+    def _drop_blob_if_orphaned(self, digest: str) -> int:
+        """Delete ``digest`` if no entry references it; return the bytes freed."""
+
+        referenced = self._conn.execute(
+            "SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)
+        ).fetchone()
+        if referenced is not None:
+            return 0
+        row = self._conn.execute("SELECT size FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        self._conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+        self._blob_path(digest).unlink(missing_ok=True)
+        return int(row[0]) if row is not None else 0
+
+    def _blob_path(self, digest: str) -> Path:
+        return self._blobs / digest[:2] / digest
+
+
+class CachingTransport(httpx.AsyncBaseTransport):
+    """Serve GETs from an :class:`HTTPCache`, revalidating stale entries.
+
+    Fresh entries are replayed without touching the network. Stale entries are
+    revalidated with ``If-None-Match``/``If-Modified-Since`` and a 304 replays
+    the stored body. New cacheable responses are recorded as the caller
+    streams them, so a body abandoned part way (e.g. over a size cap) is never
+    stored. Replayed responses carry ``extensions["cache_status"]``. Index
+    queries and blob reads and writes run in a worker thread, off the event loop.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, cache: HTTPCache) -> None:
+        self._transport = transport
+        self._cache = cache
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request_directives = _cache_directives(request.headers.get("Cache-Control"))
+        if request.method != "GET" or "no-store" in request_directives:
+            return await self._transport.handle_async_request(request)
+
+        url = str(request.url)
+        entry = await asyncio.to_thread(self._cache.lookup, url)
+        body: bytes | None = None
+        if entry is not None and entry.matches(request):
+            body = await asyncio.to_thread(self._cache.read_body, entry)
+        if body is None:
+            entry = None
+
+        if entry is not None and body is not None:
+            if entry.is_fresh(time.time()) and "no-cache" not in request_directives:
+                return _replay(entry, body, "HIT")
+            if etag := entry.header("ETag"):
+                request.headers["If-None-Match"] = etag
+            if last_modified := entry.header("Last-Modified"):
+                request.headers["If-Modified-Since"] = last_modified
+
+        response = await self._transport.handle_async_request(request)
+
+        if response.status_code == 304 and entry is not None and body is not None:
+            await response.aclose()
+            merged = httpx.Headers(entry.headers)
+            merged.update(response.headers)
+            entry = await asyncio.to_thread(
+                self._cache.refresh,
+                entry,
+                response.headers,
+                expires_at=_expires_at(merged, time.time()),
+            )
+            return _replay(entry, body, "REVALIDATED")
+
+        if not _is_storable(response):
+            return response
+
+        vary = {
+            name: request.headers.get(name, "")
+            for name in _header_tokens(response.headers.get("Vary"))
+        }
+        expires_at = _expires_at(response.headers, time.time())
+        headers = response.headers
+
+        def _record(content: bytes) -> None:
+            self._cache.store(
+                url,
+                status_code=response.status_code,
+                headers=headers,
+                vary=vary,
+                body=content,
+                expires_at=expires_at,
+            )
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_RecordingStream(response.stream, on_complete=_record),
+            extensions={**response.extensions, "cache_status": "MISS"},
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class _RecordingStream(httpx.AsyncByteStream):
+    def __init__(
+        self, stream: httpx.AsyncByteStream, *, on_complete: Callable[[bytes], None]
+    ) -> None:
+        self._stream = stream
+        self._on_complete = on_complete
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        chunks: list[bytes] = []
+        async for chunk in self._stream:
+            chunks.append(chunk)
+            yield chunk
+        try:
+            await asyncio.to_thread(self._on_complete, b"".join(chunks))
+        except (OSError, sqlite3.Error) as exc:
+            logger.warning("Failed to store response in HTTP cache: {}", exc)
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+
+
+def _replay(entry: CachedResponse, body: bytes, cache_status: str) -> httpx.Response:
+    return httpx.Response(
+        status_code=entry.status_code,
+        headers=entry.headers,
+        stream=httpx.ByteStream(body),
+        extensions={"cache_status": cache_status},
+    )
+
+
+def _is_storable(response: httpx.Response) -> bool:
+    if response.status_code not in CACHEABLE_STATUS_CODES:
+        return False
+    if "no-store" in _cache_directives(response.headers.get("Cache-Control")):
+        return False
+    if "*" in _header_tokens(response.headers.get("Vary")):
+        return False
+    # Without freshness or a validator a stored copy could never be reused.
+    return (
+        _expires_at(response.headers, time.time()) > time.time()
+        or "ETag" in response.headers
+        or "Last-Modified" in response.headers
+    )
+
+
+def _expires_at(headers: httpx.Headers, now: float) -> float:
+    """Absolute expiry per RFC 9111 freshness rules; ``now`` means revalidate first."""
+
+    directives = _cache_directives(headers.get("Cache-Control"))
+    if "no-cache" in directives:
+        return now
+
+    age = _parse_int(headers.get("Age")) or 0
+    max_age = _parse_int(directives.get("max-age"))
+    if max_age is not None:
+        return now + max_age - age
+
+    expires = _parse_http_date(headers.get("Expires"))
+    if expires is None:
+        return now
+    date = _parse_http_date(headers.get("Date")) or now
+    return now + (expires - date) - age
+
+
+def _cache_directives(value: str | None) -> dict[str, str | None]:
+    directives: dict[str, str | None] = {}
+    for token in _header_tokens(value):
+        name, _, argument = token.partition("=")
+        directives[name.strip().lower()] = argument.strip().strip('"') or None
+    return directives
+
+
+def _header_tokens(value: str | None) -> list[str]:
+    if not value:
+        return []
+    return [token.strip().lower() for token in value.split(",") if token.strip()]
+
+
+def _parse_int(value: str | None) -> int | None:
+    if value is None:
+        return None
+    try:
+        return max(0, int(value))
+    except ValueError:
+        return None
+
+
+def _parse_http_date(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=1)
+def get_http_cache() -> HTTPCache | None:
+    if not HTTP_CACHE_DIR:
+        return None
+    try:
+        return HTTPCache(HTTP_CACHE_DIR, max_bytes=HTTP_CACHE_MAX_BYTES)
+    except (OSError, sqlite3.Error) as exc:
+        logger.warning("HTTP cache disabled; could not open {}: {}", HTTP_CACHE_DIR, exc)
+        return None
+
+
+__all__ = ["CONDITIONAL_HEADERS", "CachedResponse", "CachingTransport", "HTTPCache", "get_http_cache"]
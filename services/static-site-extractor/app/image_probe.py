@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import struct
+from collections.abc import Iterable
+from typing import NamedTuple
+
+import httpx
+from loguru import logger
+
+from . import models
+from .config import (
+    IMAGE_PROBE_BYTES,
+    IMAGE_PROBE_CONCURRENCY,
+    IMAGE_PROBE_DEADLINE_SECONDS,
+    MAX_IMAGE_PROBES,
+)
+
+CONTENT_RANGE_PATTERN = re.compile(r"bytes\s+\d+-\d+/(\d+)", re.IGNORECASE)
+SVG_LENGTH_PATTERN = re.compile(r"^\s*([0-9]*\.?[0-9]+)\s*(px)?\s*$", re.IGNORECASE)
+SVG_TAG_PATTERN = re.compile(rb"<svg\b[^>]*>", re.IGNORECASE | re.DOTALL)
+SVG_ATTR_PATTERN = re.compile(
+    rb"""\b(width|height|viewBox)\s*=\s*["']([^"']*)["']""", re.IGNORECASE
+)
+# JPEG start-of-frame markers carry the dimensions; C4, C8 and CC are not frames.
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+class ImageInfo(NamedTuple):
+    format: str
+    width: int | None
+    height: int | None
+
+
+class ImageProbe(NamedTuple):
+    format: str | None
+    width: int | None
+    height: int | None
+    size_bytes: int | None
+
+
+async def enrich_images(
+    client: httpx.AsyncClient, images: list[models.ImageResource]
+) -> list[models.ImageResource]:
+    """Return ``images`` with format, dimensions and byte size filled in where probing succeeded."""
+
+    probes = await probe_images(client, [str(image.src) for image in images])
+    enriched: list[models.ImageResource] = []
+    for image in images:
+        probe = probes.get(str(image.src))
+        if probe is None:
+            enriched.append(image)
+            continue
+        enriched.append(
+            image.model_copy(
+                update={
+                    "format": probe.format,
+                    "width": probe.width,
+                    "height": probe.height,
+                    "size_bytes": probe.size_bytes,
+                }
+            )
+        )
+    return enriched
+
+
+async def probe_images(client: httpx.AsyncClient, urls: Iterable[str]) -> dict[str, ImageProbe]:
+    """Probe up to ``MAX_IMAGE_PROBES`` image URLs concurrently within one shared deadline.
+
+    Images still in flight when the deadline passes are simply left out.
+    """
+
+    targets = list(dict.fromkeys(urls))[:MAX_IMAGE_PROBES]
+    results: dict[str, ImageProbe] = {}
+    if not targets:
+        return results
+
+    semaphore = asyncio.Semaphore(max(1, IMAGE_PROBE_CONCURRENCY))
+
+    async def _probe(url: str) -> None:
+        async with semaphore:
+            probe = await _probe_image(client, url)
+        if probe is not None:
+            results[url] = probe
+
+    tasks = [asyncio.create_task(_probe(url)) for url in targets]
+    try:
+        async with asyncio.timeout(IMAGE_PROBE_DEADLINE_SECONDS):
+            await asyncio.gather(*tasks, return_exceptions=True)
+    except TimeoutError:
+        logger.debug(
+            "Image probing hit the deadline after {} of {} images", len(results), len(targets)
+        )
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return results
+
+
+async def _probe_image(client: httpx.AsyncClient, url: str) -> ImageProbe | None:
+    try:
+        head, size = await _read_prefix(client, url)
+        if size is None:
+            # No Content-Range total or Content-Length on the GET; ask for headers only.
+            response = await client.head(url)
+            size = _parse_size(response.headers.get("Content-Length"))
+    except httpx.HTTPError as exc:
+        logger.debug("Failed to probe image {}: {}", url, exc)
+        return None
+
+    info = sniff_image(head)
+    if info is None and size is None:
+        return None
+    return ImageProbe(
+        format=info.format if info else None,
+        width=info.width if info else None,
+        height=info.height if info else None,
+        size_bytes=size,
+    )
+
+
+async def _read_prefix(client: httpx.AsyncClient, url: str) -> tuple[bytes, int | None]:
+    """Fetch the first ``IMAGE_PROBE_BYTES`` bytes; also return the full size when known."""
+
+    headers = {"Range": f"bytes=0-{IMAGE_PROBE_BYTES - 1}"}
+    async with client.stream("GET", url, headers=headers) as response:
+        response.raise_for_status()
+        if response.status_code == 206:
+            match = CONTENT_RANGE_PATTERN.match(response.headers.get("Content-Range", ""))
+            size = int(match.group(1)) if match else None
+        else:
+            # The server ignored the range; stop reading once we have enough.
+            size = _parse_size(response.headers.get("Content-Length"))
+
+        chunks: list[bytes] = []
+        received = 0
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            received += len(chunk)
+            if received >= IMAGE_PROBE_BYTES:
+                break
+    return b"".join(chunks)[:IMAGE_PROBE_BYTES], size
+
+
+def _parse_size(value: str | None) -> int | None:
+    if value and value.isdigit():
+        return int(value)
+    return None
+
+
+def sniff_image(data: bytes) -> ImageInfo | None:
+    """Identify an image from its leading bytes and read its dimensions when present."""
+
+    if data.startswith(b"\x89PNG\r\n\x1a\n") and len(data) >= 24:
+        width, height = struct.unpack(">II", data[16:24])
+        return ImageInfo("png", width, height)
+    if data[:6] in (b"GIF87a", b"GIF89a") and len(data) >= 10:
+        width, height = struct.unpack("<HH", data[6:10])
+        return ImageInfo("gif", width, height)
+    if data.startswith(b"\xff\xd8"):
+        return _sniff_jpeg(data)
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return _sniff_webp(data)
+    if data[4:8] == b"ftyp":
+        return _sniff_isobmff(data)
+    if data.startswith(b"BM") and len(data) >= 26:
+        width, height = struct.unpack("<ii", data[18:26])
+        return ImageInfo("bmp", width, abs(height))
+    if data.startswith(b"\x00\x00\x01\x00") and len(data) >= 8:
+        # First directory entry; 0 encodes 256 px.
+        return ImageInfo("ico", data[6] or 256, data[7] or 256)
+    if SVG_TAG_PATTERN.search(data[:4096]):
+        return _sniff_svg(data)
+    return None
+
+
+def _sniff_jpeg(data: bytes) -> ImageInfo:
+    offset = 2
+    while offset + 9 <= len(data):
+        if data[offset] != 0xFF:
+            offset += 1
+            continue
+        marker = data[offset + 1]
+        if marker == 0xFF:
+            offset += 1
+            continue
+        if marker in (0x01, *range(0xD0, 0xDA)):
+            offset += 2
+            continue
+        (length,) = struct.unpack(">H", data[offset + 2 : offset + 4])
+        if marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[offset + 5 : offset + 9])
+            return ImageInfo("jpeg", width, height)
+        if marker == 0xDA:
+            break
+        offset += 2 + length
+    return ImageInfo("jpeg", None, None)
+
+
+def _sniff_webp(data: bytes) -> ImageInfo:
+    chunk = data[12:16]
+    if chunk == b"VP8X" and len(data) >= 30:
+        width = int.from_bytes(data[24:27], "little") + 1
+        height = int.from_bytes(data[27:30], "little") + 1
+        return ImageInfo("webp", width, height)
+    if chunk == b"VP8 " and len(data) >= 30:
+        width, height = struct.unpack("<HH", data[26:30])
+        return ImageInfo("webp", width & 0x3FFF, height & 0x3FFF)
+    if chunk == b"VP8L" and len(data) >= 25:
+        bits = int.from_bytes(data[21:25], "little")
+        return ImageInfo("webp", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+    return ImageInfo("webp", None, None)
+
+
+def _sniff_isobmff(data: bytes) -> ImageInfo | None:
+    brand = data[8:12]
+    if brand in (b"avif", b"avis"):
+        image_format = "avif"
+    elif brand in (b"heic", b"heix", b"mif1"):
+        image_format = "heic"
+    else:
+        return None
+    # The "ispe" property box holds the spatial extent: version/flags, then width and height.
+    index = data.find(b"ispe")
+    if index != -1 and index + 16 <= len(data):
+        width, height = struct.unpack(">II", data[index + 8 : index + 16])
+        return ImageInfo(image_format, width, height)
+    return ImageInfo(image_format, None, None)
+
+
+def _sniff_svg(data: bytes) -> ImageInfo:
+    tag = SVG_TAG_PATTERN.search(data)
+    attrs = {
+        name.decode().lower(): value.decode(errors="replace")
+        for name, value in SVG_ATTR_PATTERN.findall(tag.group(0))
+    }
+    width = _svg_length(attrs.get("width"))
+    height = _svg_length(attrs.get("height"))
+    if (width is None or height is None) and "viewbox" in attrs:
+        parts = attrs["viewbox"].replace(",", " ").split()
+        if len(parts) == 4:
+            try:
+                width = width if width is not None else round(float(parts[2]))
+                height = height if height is not None else round(float(parts[3]))
+            except ValueError:
+                pass
+    return ImageInfo("svg", width, height)
+
+
+def _svg_length(value: str | None) -> int | None:
+    if value is None:
+        return None
+    match = SVG_LENGTH_PATTERN.match(value)
+    return round(float(match.group(1))) if match else None
+
+
+__all__ = ["ImageInfo", "ImageProbe", "enrich_images", "probe_images", "sniff_image"]
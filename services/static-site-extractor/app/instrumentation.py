@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+
+from . import models
+
+# Upper bounds in seconds, in the spirit of the Prometheus client defaults.
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STAGE_METRIC = "extractor_stage_duration_seconds"
+
+
+class StageTimer:
+    """Accumulates wall-clock seconds per named extraction stage."""
+
+    def __init__(self) -> None:
+        self.durations: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def merge(self, durations: Mapping[str, float]) -> None:
+        for name, seconds in durations.items():
+            self.add(name, seconds)
+
+    def milliseconds(self) -> dict[str, float]:
+        return {name: round(seconds * 1000, 3) for name, seconds in self.durations.items()}
+
+
+class StageHistograms:
+    """Cumulative per-stage duration histograms, exported Prometheus-style on ``/metrics``."""
+
+    def __init__(self, buckets: tuple[float, ...] = STAGE_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counts: dict[str, list[int]] = {}
+        self._sums: dict[str, float] = {}
+
+    def observe(self, durations: Mapping[str, float]) -> None:
+        with self._lock:
+            for stage, seconds in durations.items():
+                counts = self._counts.get(stage)
+                if counts is None:
+                    # One slot per bucket plus +Inf.
+                    counts = self._counts[stage] = [0] * (len(self.buckets) + 1)
+                    self._sums[stage] = 0.0
+                counts[bisect_left(self.buckets, seconds)] += 1
+                self._sums[stage] += seconds
+
+    def snapshot(self) -> list[models.StageHistogram]:
+        with self._lock:
+            stages = {stage: list(counts) for stage, counts in self._counts.items()}
+            sums = dict(self._sums)
+        histograms: list[models.StageHistogram] = []
+        for stage in sorted(stages):
+            cumulative: list[int] = []
+            running = 0
+            for count in stages[stage]:
+                running += count
+                cumulative.append(running)
+            histograms.append(
+                models.StageHistogram(
+                    stage=stage,
+                    count=running,
+                    sum_seconds=round(sums[stage], 6),
+                    buckets={
+                        **{_format_bound(bound): cumulative[i] for i, bound in enumerate(self.buckets)},
+                        "+Inf": running,
+                    },
+                )
+            )
+        return histograms
+
+
+def render_prometheus(metrics: models.ServiceMetrics) -> str:
+    """Render ``metrics`` in the Prometheus text exposition format."""
+
+    lines = [
+        f"# HELP {STAGE_METRIC} Time spent in each extraction stage.",
+        f"# TYPE {STAGE_METRIC} histogram",
+    ]
+    for histogram in metrics.stages:
+        label = f'stage="{histogram.stage}"'
+        for bound, count in histogram.buckets.items():
+            lines.append(f'{STAGE_METRIC}_bucket{{{label},le="{bound}"}} {count}')
+        lines.append(f"{STAGE_METRIC}_sum{{{label}}} {histogram.sum_seconds}")
+        lines.append(f"{STAGE_METRIC}_count{{{label}}} {histogram.count}")
+
+    pool = metrics.parse_pool
+    cache = metrics.result_cache
+    for name, kind, help_text, value in (
+        ("extractor_parse_pool_in_flight", "gauge", "Parse jobs submitted and not yet finished.", pool.in_flight),
+        ("extractor_parse_pool_queued", "gauge", "Parse jobs waiting for a free worker.", pool.queued),
+        ("extractor_parse_pool_completed_total", "counter", "Parse jobs completed.", pool.completed),
+        ("extractor_parse_pool_failed_total", "counter", "Parse jobs that failed.", pool.failed),
+        ("extractor_result_cache_entries", "gauge", "Extraction results held in memory.", cache.entries),
+        ("extractor_result_cache_bytes", "gauge", "Bytes held by the result cache.", cache.bytes),
+        ("extractor_result_cache_hits_total", "counter", "Result cache hits.", cache.hits),
+        ("extractor_result_cache_misses_total", "counter", "Result cache misses.", cache.misses),
+    ):
+        lines.extend((f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"))
+    return "\n".join(lines) + "\n"
+
+
+def _format_bound(bound: float) -> str:
+    return f"{bound:g}"
+
+
+_histograms: StageHistograms | None = None
+
+
+def get_stage_histograms() -> StageHistograms:
+    global _histograms
+    if _histograms is None:
+        _histograms = StageHistograms()
+    return _histograms
+
+
+def set_stage_histograms(histograms: StageHistograms | None) -> None:
+    global _histograms
+    _histograms = histograms
+
+
+__all__ = [
+    "StageHistograms",
+    "StageTimer",
+    "get_stage_histograms",
+    "render_prometheus",
+    "set_stage_histograms",
+]
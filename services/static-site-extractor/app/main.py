@@ -1,12 +1,61 @@
 from __future__ import annotations
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Annotated, Literal
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from loguru import logger
+from pydantic import BaseModel
+
+from .batch import BatchRunner, JobStore, get_batch_runner, set_batch_runner
+from .crawler import crawl_site
+from .config import BATCH_RETENTION_SECONDS, BATCH_STORE_DIR, PARSE_WORKERS
+from .extractor import ExtractionError, create_client, extract_page
+from .instrumentation import get_stage_histograms, render_prometheus
+from .models import (
+    BatchRequest,
+    CrawlRequest,
+    ExtractionRequest,
+    ExtractionResponse,
+    ServiceMetrics,
+)
+from .parse_pool import ParsePool, get_parse_pool, set_parse_pool
+from .result_cache import get_result_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # One pooled client per process so connections, TLS sessions and DNS
+    # lookups are reused across extractions.
+    parse_pool = ParsePool(PARSE_WORKERS)
+    set_parse_pool(parse_pool)
+    batch_runner = BatchRunner(JobStore(BATCH_STORE_DIR, retention_seconds=BATCH_RETENTION_SECONDS))
+    set_batch_runner(batch_runner)
+    try:
+        async with create_client() as client:
+            app.state.http_client = client
+            try:
+                yield
+            finally:
+                # Stop batch jobs while their client is still open; they resume on request.
+                await batch_runner.shutdown()
+    finally:
+        set_batch_runner(None)
+        set_parse_pool(None)
+        parse_pool.shutdown()
+
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    return request.app.state.http_client
 
-from .extractor import ExtractionError, extract_page
-from .models import ExtractionRequest, ExtractionResponse
 
-app = FastAPI(title="Static Site Extractor", version="0.1.0")
+HTTPClient = Annotated[httpx.AsyncClient, Depends(get_http_client)]
+
+app = FastAPI(title="Static Site Extractor", version="0.1.0", lifespan=lifespan)
 
 
 @app.get("/health")
@@ -14,13 +63,127 @@ async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get(
+    "/metrics",
+    response_model=ServiceMetrics,
+    responses={200: {"content": {"text/plain": {}}}},
+)
+async def metrics(
+    request: Request, format: Literal["json", "prometheus"] | None = None
+) -> ServiceMetrics | PlainTextResponse:
+    """JSON by default; Prometheus text for ``?format=prometheus`` or a scraper's ``Accept`` header."""
+
+    snapshot = ServiceMetrics(
+        parse_pool=get_parse_pool().metrics(),
+        result_cache=get_result_cache().metrics(),
+        stages=get_stage_histograms().snapshot(),
+    )
+    accept = request.headers.get("accept", "")
+    if format == "prometheus" or (
+        format is None and ("text/plain" in accept or "openmetrics" in accept)
+    ):
+        return PlainTextResponse(
+            render_prometheus(snapshot), media_type="text/plain; version=0.0.4"
+        )
+    return snapshot
+
+
 @app.post("/extract", response_model=ExtractionResponse)
-async def extract(payload: ExtractionRequest) -> ExtractionResponse:
+async def extract(
+    payload: ExtractionRequest,
+    client: HTTPClient,
+    debug: Literal["timings"] | None = None,
+) -> ExtractionResponse:
     try:
-        return await extract_page(str(payload.url))
+        return await extract_page(
+            str(payload.url),
+            client=client,
+            probe_images=payload.probe_images,
+            include_timings=debug == "timings",
+            mode=payload.mode,
+        )
     except ExtractionError as exc:  # pragma: no cover - simple mapping
         logger.warning("Extraction failed for %s: %s", payload.url, exc.message)
         raise HTTPException(status_code=exc.status_code, detail=exc.message) from exc
 
 
+def _ndjson(events: AsyncIterator[BaseModel]) -> StreamingResponse:
+    return StreamingResponse(
+        (event.model_dump_json() + "\n" async for event in events),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.post(
+    "/extract/batch",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def extract_batch(payload: BatchRequest, client: HTTPClient) -> StreamingResponse:
+    """Start a batch job and stream its progress; the job keeps running if the client disconnects."""
+
+    runner = get_batch_runner()
+    job = await runner.submit(
+        [str(url) for url in payload.urls], probe_images=payload.probe_images, client=client
+    )
+    return _ndjson(runner.events(job.id))
+
+
+@app.get(
+    "/extract/batch/{job_id}",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}, 404: {}},
+)
+async def batch_events(
+    job_id: str, after: Annotated[int, Query(ge=0)] = 0
+) -> StreamingResponse:
+    """Replay a job's results after ``seq == after`` and follow it while it runs; starts nothing."""
+
+    runner = get_batch_runner()
+    if await asyncio.to_thread(runner.store.get, job_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown batch job")
+    return _ndjson(runner.events(job_id, after=after))
+
+
+@app.post(
+    "/extract/batch/{job_id}/resume",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}, 404: {}},
+)
+async def resume_batch(
+    job_id: str, client: HTTPClient, after: Annotated[int, Query(ge=0)] = 0
+) -> StreamingResponse:
+    """Continue a job interrupted by a restart with the URLs that never finished, and stream it.
+
+    Finished or already running jobs are only streamed.
+    """
+
+    runner = get_batch_runner()
+    job = await asyncio.to_thread(runner.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown batch job")
+    runner.resume(job, client=client)
+    return _ndjson(runner.events(job_id, after=after))
+
+
+@app.post(
+    "/crawl",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def crawl(payload: CrawlRequest, client: HTTPClient) -> StreamingResponse:
+    """Crawl internal links from ``url`` and stream one JSON event per line."""
+
+    events = crawl_site(
+        str(payload.url),
+        max_pages=payload.max_pages,
+        max_depth=payload.max_depth,
+        respect_robots=payload.respect_robots,
+        probe_images=payload.probe_images,
+        mode=payload.mode,
+        client=client,
+    )
+    return _ndjson(events)
+
+
 __all__ = ["app"]
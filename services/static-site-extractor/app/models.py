@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Literal
+from typing import Any, Literal
 
 from pydantic import BaseModel, ConfigDict, Field, HttpUrl, model_serializer
 
@@ -10,8 +10,19 @@ class _BaseModel(BaseModel):
     model_config = ConfigDict(ser_json_exclude_none=True)
 
 
+ExtractionMode = Literal["full", "main"]
+MODE_DESCRIPTION = (
+    "'main' limits text and text_blob to the page's main content, dropping navigation, "
+    "headers, footers, cookie banners and other boilerplate"
+)
+
+
 class ExtractionRequest(_BaseModel):
     url: HttpUrl = Field(..., description="URL of the webpage to extract content from")
+    probe_images: bool = Field(
+        False, description="Probe each image for its format, dimensions and byte size"
+    )
+    mode: ExtractionMode = Field("full", description=MODE_DESCRIPTION)
 
 
 class TextNode(_BaseModel):
@@ -21,12 +32,17 @@ class TextNode(_BaseModel):
 class ImageResource(_BaseModel):
     src: HttpUrl = Field(..., description="Absolute URL for the image")
     alt: str | None = Field(None, description="Alt text associated with the image")
+    format: str | None = Field(None, description="Image format sniffed from the file's magic bytes")
+    width: int | None = Field(None, description="Intrinsic width in pixels, when probed")
+    height: int | None = Field(None, description="Intrinsic height in pixels, when probed")
+    size_bytes: int | None = Field(None, description="Full file size in bytes, when probed")
 
     @model_serializer(mode="wrap")
     def serialize(self, handler):  # type: ignore[override]
         data = handler(self)
-        if data.get("alt") is None:
-            data.pop("alt", None)
+        for key in ("alt", "format", "width", "height", "size_bytes"):
+            if data.get(key) is None:
+                data.pop(key, None)
         return data
 
 
@@ -38,6 +54,53 @@ class FontResource(_BaseModel):
     stylesheet_url: HttpUrl | None = Field(
         None, description="Stylesheet URL when the font was discovered in a linked CSS file"
     )
+    family: str | None = Field(None, description="font-family of the @font-face rule using the file")
+    weight: str | None = Field(
+        None, description="font-weight of that rule; two numbers for a variable font's range"
+    )
+    style: str | None = Field(None, description="font-style of that rule ('normal' or 'italic')")
+
+    @model_serializer(mode="wrap")
+    def serialize(self, handler):  # type: ignore[override]
+        data = handler(self)
+        for key in ("family", "weight", "style"):
+            if data.get(key) is None:
+                data.pop(key, None)
+        return data
+
+
+class FontFamily(_BaseModel):
+    family: str = Field(..., description="Family name as declared in @font-face")
+    weights: list[str] = Field(..., description="Weights the page loads, variable ranges expanded")
+    styles: list[str] = Field(..., description="Styles the page loads")
+    files: list[HttpUrl] = Field(..., description="Font files declared for the family")
+    loader: str | None = Field(
+        None, description="next/font/google loader for the family, when it is a Google font"
+    )
+
+
+class FontLoaderConfig(_BaseModel):
+    id: str = Field(..., description="Font id used for the CSS variable name")
+    loader: str = Field(..., description="next/font/google loader name")
+    options: dict[str, Any] = Field(..., description="Loader options (weight, style, subsets, display)")
+
+
+class ContentBlock(_BaseModel):
+    kind: Literal["heading", "paragraph", "list", "quote"]
+    text: str | None = Field(None, description="Block text; absent for lists")
+    level: int | None = Field(None, ge=1, le=6, description="Heading level")
+    items: list[str] | None = Field(None, description="List item texts, in order")
+    slot: str | None = Field(
+        None, description="Suggested Horizon content slot as '<section_key>.<field>'"
+    )
+
+    @model_serializer(mode="wrap")
+    def serialize(self, handler):  # type: ignore[override]
+        data = handler(self)
+        for key in ("text", "level", "items", "slot"):
+            if data.get(key) is None:
+                data.pop(key, None)
+        return data
 
 
 class NavigationItem(_BaseModel):
@@ -56,10 +119,178 @@ class ExtractionResponse(_BaseModel):
     text_blob: str = Field(..., description="All visible text concatenated into a single blob")
     images: list[ImageResource]
     fonts: list[FontResource]
+    font_families: list[FontFamily] = Field(
+        default_factory=list, description="@font-face rules grouped by family"
+    )
+    fonts_config: list[FontLoaderConfig] = Field(
+        default_factory=list,
+        description="Ready-to-apply 'fonts' entries for site-config.json (apply_theme.py --fonts)",
+    )
     navigation: list[NavigationItem] = Field(
         default_factory=list,
         description="Hierarchical navigation menu extracted from the page",
     )
+    content: list[ContentBlock] = Field(
+        default_factory=list,
+        description="Main content as headings, paragraphs, lists and quotes, with boilerplate removed",
+    )
+    timings: dict[str, float] | None = Field(
+        None,
+        description="Milliseconds spent per extraction stage; only with ?debug=timings",
+    )
+    cache: Literal["hit", "miss", "revalidated"] = Field(
+        "miss",
+        description=(
+            "Result cache outcome: 'hit' reused a stored result for unchanged HTML, "
+            "'revalidated' reused it after the HTTP cache revalidated a stale copy with the origin, "
+            "'miss' analysed the page"
+        ),
+    )
+
+    @model_serializer(mode="wrap")
+    def serialize(self, handler):  # type: ignore[override]
+        data = handler(self)
+        if data.get("timings") is None:
+            data.pop("timings", None)
+        return data
+
+
+class CrawlRequest(_BaseModel):
+    url: HttpUrl = Field(..., description="Page the crawl starts from")
+    max_pages: int | None = Field(
+        None, ge=1, le=500, description="Maximum pages to fetch (defaults to CRAWL_MAX_PAGES)"
+    )
+    max_depth: int | None = Field(
+        None, ge=0, le=10, description="Maximum link depth from the start page (defaults to CRAWL_MAX_DEPTH)"
+    )
+    respect_robots: bool = Field(True, description="Skip pages disallowed by robots.txt")
+    probe_images: bool = Field(
+        False, description="Probe each newly seen image for its format, dimensions and byte size"
+    )
+    mode: ExtractionMode = Field("full", description=MODE_DESCRIPTION)
+
+
+class CrawlPageEvent(_BaseModel):
+    event: Literal["page"] = "page"
+    depth: int
+    page: ExtractionResponse = Field(
+        ..., description="Extraction result; images and fonts already sent for earlier pages are omitted"
+    )
+
+
+class CrawlErrorEvent(_BaseModel):
+    event: Literal["error"] = "error"
+    url: str
+    depth: int
+    status_code: int
+    detail: str
+
+
+class CrawlSkippedEvent(_BaseModel):
+    event: Literal["skipped"] = "skipped"
+    url: str
+    depth: int
+    reason: Literal["robots"]
+
+
+class CrawlSummaryEvent(_BaseModel):
+    event: Literal["summary"] = "summary"
+    url: HttpUrl
+    pages: int
+    errors: int
+    skipped: int
+    images: int = Field(..., description="Unique images across all crawled pages")
+    fonts: int = Field(..., description="Unique fonts across all crawled pages")
+    truncated: bool = Field(
+        ..., description="True when the page limit or crawl deadline stopped the crawl early"
+    )
+    elapsed_ms: int
+
+
+CrawlEvent = CrawlPageEvent | CrawlErrorEvent | CrawlSkippedEvent | CrawlSummaryEvent
+
+
+class BatchRequest(_BaseModel):
+    urls: list[HttpUrl] = Field(
+        ..., min_length=1, max_length=1000, description="Pages to extract, in the order results are numbered"
+    )
+    probe_images: bool = Field(
+        False, description="Probe each image for its format, dimensions and byte size"
+    )
+
+
+class BatchJobEvent(_BaseModel):
+    event: Literal["job"] = "job"
+    job_id: str = Field(..., description="Id to resume the stream with GET /extract/batch/{job_id}")
+    total: int
+    completed: int = Field(..., description="URLs already finished when the stream (re)started")
+
+
+class BatchResultEvent(_BaseModel):
+    event: Literal["result"] = "result"
+    seq: int = Field(..., description="Position in the job's result log; resume with ?after=seq")
+    position: int = Field(..., description="Index of the URL in the submitted list")
+    url: str
+    completed: int
+    total: int
+    page: ExtractionResponse
+
+
+class BatchErrorEvent(_BaseModel):
+    event: Literal["error"] = "error"
+    seq: int
+    position: int
+    url: str
+    completed: int
+    total: int
+    status_code: int
+    detail: str
+
+
+class BatchSummaryEvent(_BaseModel):
+    event: Literal["summary"] = "summary"
+    job_id: str
+    total: int
+    succeeded: int
+    failed: int
+    finished: bool = Field(
+        ..., description="False when the stream ended before every URL was processed (e.g. shutdown)"
+    )
+
+
+BatchEvent = BatchJobEvent | BatchResultEvent | BatchErrorEvent | BatchSummaryEvent
+
+
+class ParsePoolMetrics(_BaseModel):
+    mode: Literal["process", "inline"]
+    workers: int
+    in_flight: int = Field(..., description="Parse jobs submitted and not yet finished")
+    queued: int = Field(..., description="Parse jobs waiting for a free worker")
+    peak_queued: int
+    completed: int
+    failed: int
+
+
+class ResultCacheMetrics(_BaseModel):
+    entries: int
+    bytes: int
+    hits: int
+    misses: int
+
+
+class StageHistogram(_BaseModel):
+    stage: str
+    count: int
+    sum_seconds: float
+    buckets: dict[str, int] = Field(
+        ..., description="Cumulative observation counts keyed by upper bound in seconds"
+    )
+
+
+class ServiceMetrics(_BaseModel):
+    parse_pool: ParsePoolMetrics
+    result_cache: ResultCacheMetrics
+    stages: list[StageHistogram] = Field(default_factory=list)
 
 
 NavigationItem.model_rebuild()
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, TypeVar
+
+from loguru import logger
+
+from . import models
+from .config import PARSE_WORKERS
+
+T = TypeVar("T")
+
+
+class ParsePool:
+    """Runs CPU-bound parse and analysis calls off the event loop.
+
+    With ``workers`` > 0 calls go to a ``ProcessPoolExecutor`` (spawned, so
+    workers never inherit the loop or open sockets); arguments and results
+    must be picklable. ``workers == 0`` runs calls inline on the loop, which
+    is what tests and one-off scripts use.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.workers = max(0, workers)
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._peak_queued = 0
+        self._completed = 0
+        self._failed = 0
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self.workers == 0:
+            try:
+                result = fn(*args)
+            except Exception:
+                self._record(failed=True)
+                raise
+            self._record(failed=False)
+            return result
+
+        executor = self._ensure_executor()
+        with self._lock:
+            self._in_flight += 1
+            self._peak_queued = max(self._peak_queued, self._queued())
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._finish(failed=True)
+            self._reset(executor)
+            raise
+        future.add_done_callback(self._on_done)
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            logger.error("Parse worker died; restarting the pool")
+            self._reset(executor)
+            raise
+
+    def metrics(self) -> models.ParsePoolMetrics:
+        with self._lock:
+            return models.ParsePoolMetrics(
+                mode="process" if self.workers else "inline",
+                workers=self.workers,
+                in_flight=self._in_flight,
+                queued=self._queued(),
+                peak_queued=self._peak_queued,
+                completed=self._completed,
+                failed=self._failed,
+            )
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _reset(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _on_done(self, future: Future[Any]) -> None:
+        # Runs on the executor's management thread, hence the lock.
+        self._finish(failed=future.cancelled() or future.exception() is not None)
+
+    def _finish(self, *, failed: bool) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._record(failed=failed)
+
+    def _record(self, *, failed: bool) -> None:
+        with self._lock:
+            if failed:
+                self._failed += 1
+            else:
+                self._completed += 1
+
+    def _queued(self) -> int:
+        return max(0, self._in_flight - self.workers)
+
+
+_pool: ParsePool | None = None
+
+
+def get_parse_pool() -> ParsePool:
+    global _pool
+    if _pool is None:
+        _pool = ParsePool(PARSE_WORKERS)
+    return _pool
+
+
+def set_parse_pool(pool: ParsePool | None) -> None:
+    global _pool
+    _pool = pool
+
+
+__all__ = ["ParsePool", "get_parse_pool", "set_parse_pool"]
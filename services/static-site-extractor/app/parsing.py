@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import NamedTuple
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4.element import PreformattedString
+from bs4.builder import builder_registry
+from loguru import logger
+
+from .config import HTML_PARSER
+
+PARSER_BACKENDS = ("lxml", "html.parser")
+NAV_KEYWORDS = (
+    "nav",
+    "menu",
+    "menubar",
+    "navbar",
+    "main-nav",
+    "primary-nav",
+    "primary-menu",
+    "topnav",
+    "site-nav",
+    "header-nav",
+)
+FOOTER_KEYWORDS = ("footer", "foot", "bottom")
+NAV_KEYWORD_PATTERN = re.compile("|".join(re.escape(k) for k in NAV_KEYWORDS), re.I)
+NAV_ROLE_PATTERN = re.compile("navigation|menubar", re.I)
+SKIP_TEXT_PARENTS = {
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "meta",
+    "link",
+    "head",
+    "title",
+    "[document]",
+}
+
+
+class ScannedText(NamedTuple):
+    path: str
+    content: str
+
+
+@dataclass(slots=True)
+class DocumentScan:
+    """Everything the extractor needs from a document, gathered in one traversal."""
+
+    soup: BeautifulSoup
+    title: Tag | None = None
+    text_nodes: list[ScannedText] = field(default_factory=list)
+    images: list[Tag] = field(default_factory=list)
+    links: list[Tag] = field(default_factory=list)
+    anchors: list[Tag] = field(default_factory=list)
+    styles: list[str] = field(default_factory=list)
+    nav_candidates: list[Tag] = field(default_factory=list)
+
+
+@lru_cache(maxsize=None)
+def _backend_available(name: str) -> bool:
+    return builder_registry.lookup(name) is not None
+
+
+def resolve_parser(preference: str | None = None) -> str:
+    """Return the BeautifulSoup tree builder to use for ``preference``.
+
+    ``auto`` picks lxml when it is installed and falls back to the bundled
+    ``html.parser`` otherwise; an explicit ``lxml`` request also falls back.
+    """
+
+    choice = (preference or HTML_PARSER).strip().lower()
+    if choice == "auto":
+        return "lxml" if _backend_available("lxml") else "html.parser"
+    if choice not in PARSER_BACKENDS:
+        raise ValueError(f"Unsupported HTML parser backend '{choice}'")
+    if not _backend_available(choice):
+        logger.warning("HTML parser backend {} is not installed; using html.parser", choice)
+        return "html.parser"
+    return choice
+
+
+def parse_html(
+    content: bytes | str,
+    *,
+    encoding: str | None = None,
+    parser: str | None = None,
+) -> BeautifulSoup:
+    backend = resolve_parser(parser)
+    if isinstance(content, bytes):
+        return BeautifulSoup(content, backend, from_encoding=encoding)
+    return BeautifulSoup(content, backend)
+
+
+def scan_document(soup: BeautifulSoup) -> DocumentScan:
+    """Collect text nodes, images, links, anchors, styles and nav candidates in one pass.
+
+    Text nodes carry dotted nth-of-type DOM paths. ``descendants`` yields
+    parents before children, so each path extends its parent's memoised path.
+    """
+
+    scan = DocumentScan(soup=soup)
+    paths: dict[int, str] = {id(soup): soup.name}
+    type_counts: dict[int, dict[str, int]] = {}
+    # Candidates keep the order of the old per-selector sweeps (nav, role, class,
+    # id) because navigation scoring breaks ties by candidate position.
+    by_tag: list[Tag] = []
+    by_role: list[Tag] = []
+    by_class: list[Tag] = []
+    by_id: list[Tag] = []
+
+    for node in soup.descendants:
+        if isinstance(node, Tag):
+            parent_id = id(node.parent)
+            counts = type_counts.get(parent_id)
+            if counts is None:
+                counts = type_counts[parent_id] = {}
+            name = node.name
+            index = counts.get(name, 0) + 1
+            counts[name] = index
+            paths[id(node)] = f"{paths[parent_id]}.{name}[{index}]"
+
+            if name == "img":
+                scan.images.append(node)
+            elif name == "link":
+                scan.links.append(node)
+            elif name == "a":
+                if "href" in node.attrs:
+                    scan.anchors.append(node)
+            elif name == "style":
+                if node.string:
+                    scan.styles.append(str(node.string))
+            elif name == "title":
+                if scan.title is None:
+                    scan.title = node
+            elif name == "nav":
+                by_tag.append(node)
+
+            attrs = node.attrs
+            if not attrs:
+                continue
+            role = attrs.get("role")
+            if isinstance(role, str) and NAV_ROLE_PATTERN.search(role):
+                by_role.append(node)
+            classes = attrs.get("class")
+            if classes and _matches_keyword(classes):
+                by_class.append(node)
+            element_id = attrs.get("id")
+            if isinstance(element_id, str) and NAV_KEYWORD_PATTERN.search(element_id):
+                by_id.append(node)
+            continue
+
+        # Comments, CDATA, doctypes and processing instructions are not visible text.
+        if not isinstance(node, NavigableString) or isinstance(node, PreformattedString):
+            continue
+        stripped = node.strip()
+        if not stripped:
+            continue
+        parent = node.parent
+        if not isinstance(parent, Tag) or parent.name in SKIP_TEXT_PARENTS:
+            continue
+        path = paths.get(id(parent))
+        if path is None or path == "[document]":
+            continue
+        scan.text_nodes.append(ScannedText(path=path, content=stripped))
+
+    seen: set[int] = set()
+    for candidate in (*by_tag, *by_role, *by_class, *by_id):
+        identity = id(candidate)
+        if identity in seen:
+            continue
+        seen.add(identity)
+        scan.nav_candidates.append(candidate)
+
+    return scan
+
+
+def marker_attributes(tag: Tag) -> str:
+    """Return ``tag``'s id, class and role values as one lower-cased string."""
+
+    values: list[str] = []
+    for key, value in tag.attrs.items():
+        if key not in {"id", "class", "role"}:
+            continue
+        if isinstance(value, (list, tuple)):
+            values.extend(str(item) for item in value)
+        else:
+            values.append(str(value))
+    return " ".join(values).lower()
+
+
+def has_footer_marker(tag: Tag) -> bool:
+    attrs = marker_attributes(tag)
+    return any(keyword in attrs for keyword in FOOTER_KEYWORDS)
+
+
+def looks_like_footer(tag: Tag) -> bool:
+    return tag.find_parent("footer") is not None or has_footer_marker(tag)
+
+
+def _matches_keyword(value: str | list[str]) -> bool:
+    if isinstance(value, str):
+        return NAV_KEYWORD_PATTERN.search(value) is not None
+    return any(NAV_KEYWORD_PATTERN.search(item) for item in value)
+
+
+__all__ = [
+    "DocumentScan",
+    "FOOTER_KEYWORDS",
+    "NAV_KEYWORDS",
+    "PARSER_BACKENDS",
+    "ScannedText",
+    "SKIP_TEXT_PARENTS",
+    "has_footer_marker",
+    "looks_like_footer",
+    "marker_attributes",
+    "parse_html",
+    "resolve_parser",
+    "scan_document",
+]
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from typing import NamedTuple
+from urllib.parse import urldefrag, urlsplit, urlunsplit
+
+from . import models
+from .config import RESULT_CACHE_MAX_BYTES, RESULT_CACHE_TTL_SECONDS
+
+
+class CachedExtraction(NamedTuple):
+    page_json: bytes
+    links: tuple[str, ...]
+    expires_at: float
+
+    @property
+    def size(self) -> int:
+        return len(self.page_json) + sum(len(link) for link in self.links)
+
+
+class ResultCache:
+    """In-memory LRU of serialised extraction results keyed by URL and HTML body hash.
+
+    A hit means the fetched HTML is byte-for-byte what was analysed before, so
+    parsing, analysis and the stylesheet crawl can all be skipped. Entries expire
+    after ``ttl_seconds`` so stylesheet changes are eventually picked up, and the
+    least recently used entries are evicted once ``max_bytes`` is exceeded.
+    ``max_bytes == 0`` disables the cache.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_bytes = max(0, max_bytes)
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[str, CachedExtraction] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(url: str, content: bytes) -> str:
+        url, _fragment = urldefrag(url)
+        parts = urlsplit(url)
+        normalized = urlunsplit(
+            parts._replace(
+                scheme=parts.scheme.lower(), netloc=parts.netloc.lower(), path=parts.path or "/"
+            )
+        )
+        return f"{normalized}#{hashlib.sha256(content).hexdigest()}"
+
+    def get(self, key: str) -> CachedExtraction | None:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= self._clock():
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, page: models.ExtractionResponse, links: Iterable[str]) -> None:
+        if self.max_bytes == 0:
+            return
+        entry = CachedExtraction(
+            page_json=page.model_dump_json().encode(),
+            links=tuple(links),
+            expires_at=self._clock() + self.ttl_seconds,
+        )
+        if entry.size > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def metrics(self) -> models.ResultCacheMetrics:
+        return models.ResultCacheMetrics(
+            entries=len(self._entries), bytes=self._bytes, hits=self.hits, misses=self.misses
+        )
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+
+_cache: ResultCache | None = None
+
+
+def get_result_cache() -> ResultCache:
+    global _cache
+    if _cache is None:
+        _cache = ResultCache(max_bytes=RESULT_CACHE_MAX_BYTES, ttl_seconds=RESULT_CACHE_TTL_SECONDS)
+    return _cache
+
+
+def set_result_cache(cache: ResultCache | None) -> None:
+    global _cache
+    _cache = cache
+
+
+__all__ = ["CachedExtraction", "ResultCache", "get_result_cache", "set_result_cache"]
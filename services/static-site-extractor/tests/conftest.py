@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+
+import pytest
+
+from app.instrumentation import StageHistograms, set_stage_histograms
+from app.parse_pool import ParsePool, set_parse_pool
+from app.result_cache import ResultCache, set_result_cache
+
+
+@pytest.fixture(autouse=True)
+def inline_parse_pool() -> Iterator[ParsePool]:
+    """Run parsing inline; tests that need worker processes build their own pool."""
+
+    pool = ParsePool(0)
+    set_parse_pool(pool)
+    yield pool
+    set_parse_pool(None)
+
+
+@pytest.fixture(autouse=True)
+def result_cache() -> Iterator[ResultCache]:
+    """Give every test an empty result cache so repeated fixture pages never leak across tests."""
+
+    cache = ResultCache(max_bytes=10_000_000, ttl_seconds=3600)
+    set_result_cache(cache)
+    yield cache
+    set_result_cache(None)
+
+
+@pytest.fixture(autouse=True)
+def stage_histograms() -> Iterator[StageHistograms]:
+    histograms = StageHistograms()
+    set_stage_histograms(histograms)
+    yield histograms
+    set_stage_histograms(None)
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterator
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app import batch, main, models
+from app.batch import BatchRunner, JobStore
+
+
+class _Sites:
+    def __init__(self, delay: float = 0.01) -> None:
+        self.delay = delay
+        self.requested: list[str] = []
+        self.in_flight: dict[str, int] = {}
+        self.peak: dict[str, int] = {}
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        self.requested.append(str(request.url))
+        self.in_flight[host] = self.in_flight.get(host, 0) + 1
+        self.peak[host] = max(self.peak.get(host, 0), self.in_flight[host])
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight[host] -= 1
+        if request.url.path == "/missing":
+            return httpx.Response(404, text="nope", headers={"Content-Type": "text/plain"})
+        html = f"<html><head><title>{host}{request.url.path}</title></head><body><p>Hi</p></body></html>"
+        return httpx.Response(200, text=html, headers={"Content-Type": "text/html"})
+
+
+@pytest.fixture
+def store(tmp_path) -> Iterator[JobStore]:
+    job_store = JobStore(tmp_path / "batches", retention_seconds=3600)
+    yield job_store
+    job_store.close()
+
+
+async def _collect(events) -> list[models.BatchEvent]:
+    return [event async for event in events]
+
+
+def test_batch_streams_every_result_then_a_summary(store: JobStore) -> None:
+    sites = _Sites()
+    urls = [f"https://a.test/{i}" for i in range(4)] + ["https://b.test/missing", "https://c.test/"]
+
+    async def run() -> list[models.BatchEvent]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(sites)) as client:
+            runner = BatchRunner(store)
+            job = await runner.submit(urls, probe_images=False, client=client)
+            return await _collect(runner.events(job.id))
+
+    events = asyncio.run(run())
+
+    assert events[0] == models.BatchJobEvent(job_id=events[0].job_id, total=6, completed=0)
+    results = events[1:-1]
+    assert [event.seq for event in results] == sorted(event.seq for event in results)
+    assert [event.completed for event in results] == [1, 2, 3, 4, 5, 6]
+    assert sorted(event.position for event in results) == list(range(6))
+    errors = [event for event in results if isinstance(event, models.BatchErrorEvent)]
+    assert [(error.url, error.status_code) for error in errors] == [("https://b.test/missing", 415)]
+    assert events[-1] == models.BatchSummaryEvent(
+        job_id=events[0].job_id, total=6, succeeded=5, failed=1, finished=True
+    )
+
+
+def test_batch_spreads_work_across_hosts(store: JobStore, monkeypatch) -> None:
+    monkeypatch.setattr(batch, "BATCH_CONCURRENCY", 4)
+    monkeypatch.setattr(batch, "BATCH_PER_HOST_CONCURRENCY", 2)
+    sites = _Sites(delay=0.02)
+    urls = [f"https://big.test/{i}" for i in range(12)] + ["https://small.test/", "https://tiny.test/"]
+
+    async def run() -> list[models.BatchEvent]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(sites)) as client:
+            runner = BatchRunner(store)
+            job = await runner.submit(urls, probe_images=False, client=client)
+            return await _collect(runner.events(job.id))
+
+    events = asyncio.run(run())
+
+    assert sites.peak["big.test"] == 2
+    # The small sites are not queued behind the big one.
+    first_four = {event.url for event in events[1:5]}
+    assert {"https://small.test/", "https://tiny.test/"} <= first_four
+
+
+def test_stream_resumes_after_disconnect(store: JobStore) -> None:
+    sites = _Sites()
+    urls = [f"https://a.test/{i}" for i in range(5)]
+
+    async def run() -> tuple[list[models.BatchEvent], list[models.BatchEvent]]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(sites)) as client:
+            runner = BatchRunner(store)
+            job = await runner.submit(urls, probe_images=False, client=client)
+            first: list[models.BatchEvent] = []
+            stream = runner.events(job.id)
+            async for event in stream:
+                first.append(event)
+                if len(first) == 3:
+                    break
+            await stream.aclose()
+            # The job carries on without a listener.
+            while runner.is_running(job.id):
+                await asyncio.sleep(0.01)
+            resumed = await _collect(runner.events(job.id, after=first[-1].seq))
+            return first, resumed
+
+    first, resumed = asyncio.run(run())
+
+    assert resumed[0].completed == 2
+    assert [event.completed for event in resumed[1:-1]] == [3, 4, 5]
+    seen = [event.position for event in first[1:] + resumed[1:-1]]
+    assert sorted(seen) == list(range(5))
+    assert resumed[-1].succeeded == 5
+    assert len(sites.requested) == 5
+
+
+def test_interrupted_job_resumes_pending_urls(tmp_path) -> None:
+    sites = _Sites(delay=0.05)
+    urls = [f"https://a.test/{i}" for i in range(6)]
+
+    async def interrupted() -> str:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(sites)) as client:
+            runner = BatchRunner(JobStore(tmp_path, retention_seconds=3600))
+            job = await runner.submit(urls, probe_images=False, client=client)
+            async for event in runner.events(job.id):
+                if isinstance(event, models.BatchResultEvent):
+                    break
+            await runner.shutdown()
+            return job.id
+
+    async def restarted(job_id: str) -> list[models.BatchEvent]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(sites)) as client:
+            runner = BatchRunner(JobStore(tmp_path, retention_seconds=3600))
+            job = runner.store.get(job_id)
+            assert job is not None and not job.finished
+            runner.resume(job, client=client)
+            events = await _collect(runner.events(job_id))
+            await runner.shutdown()
+            return events
+
+    job_id = asyncio.run(interrupted())
+    fetched_before = len(sites.requested)
+    events = asyncio.run(restarted(job_id))
+
+    assert events[-1].finished and events[-1].succeeded == 6
+    assert sorted(event.position for event in events[1:-1]) == list(range(6))
+    # Only the URLs with no stored result were extracted again.
+    assert len(sites.requested) - fetched_before < 6
+
+
+def test_read_only_stream_does_not_restart_interrupted_jobs(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(main, "BATCH_STORE_DIR", str(tmp_path))
+    job_store = JobStore(tmp_path, retention_seconds=3600)
+    job = job_store.create(["https://a.test/", "https://b.test/"], probe_images=False)
+    job_store.close()
+    sites = _Sites(delay=0)
+    mock_client = httpx.AsyncClient(transport=httpx.MockTransport(sites))
+    main.app.dependency_overrides[main.get_http_client] = lambda: mock_client
+    try:
+        with TestClient(main.app) as client:
+            followed = client.get(f"/extract/batch/{job.id}").text.splitlines()
+            fetched_by_get = len(sites.requested)
+            resumed = client.post(f"/extract/batch/{job.id}/resume").text.splitlines()
+    finally:
+        main.app.dependency_overrides.clear()
+
+    assert fetched_by_get == 0
+    assert models.BatchSummaryEvent.model_validate_json(followed[-1]).finished is False
+    assert len(resumed) == 4
+    assert models.BatchSummaryEvent.model_validate_json(resumed[-1]).succeeded == 2
+
+
+def test_job_finishes_when_storing_a_result_fails(store: JobStore, monkeypatch) -> None:
+    record = store.record
+    calls = []
+
+    def flaky_record(job_id, item, **kwargs):
+        calls.append(item.url)
+        if len(calls) == 1:
+            raise OSError("disk full")
+        record(job_id, item, **kwargs)
+
+    monkeypatch.setattr(store, "record", flaky_record)
+
+    async def run() -> list[models.BatchEvent]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(_Sites(delay=0))) as client:
+            runner = BatchRunner(store)
+            job = await runner.submit(
+                [f"https://a.test/{i}" for i in range(3)], probe_images=False, client=client
+            )
+            return await asyncio.wait_for(_collect(runner.events(job.id)), timeout=5)
+
+    events = asyncio.run(run())
+
+    assert events[-1].finished
+    assert events[-1].succeeded == 2
+
+
+def test_batch_endpoints(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(main, "BATCH_STORE_DIR", str(tmp_path))
+    sites = _Sites(delay=0)
+    mock_client = httpx.AsyncClient(transport=httpx.MockTransport(sites))
+    main.app.dependency_overrides[main.get_http_client] = lambda: mock_client
+    try:
+        with TestClient(main.app) as client:
+            response = client.post(
+                "/extract/batch", json={"urls": ["https://a.test/", "https://b.test/missing"]}
+            )
+            lines = response.text.splitlines()
+            job_id = models.BatchJobEvent.model_validate_json(lines[0]).job_id
+            replay = client.get(f"/extract/batch/{job_id}", params={"after": 1})
+            resumed = client.post(f"/extract/batch/{job_id}/resume")
+            missing = client.get("/extract/batch/unknown")
+            missing_resume = client.post("/extract/batch/unknown/resume")
+            invalid = client.post("/extract/batch", json={"urls": []})
+    finally:
+        main.app.dependency_overrides.clear()
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert len(lines) == 4
+    assert models.BatchSummaryEvent.model_validate_json(lines[-1]).failed == 1
+    replay_lines = replay.text.splitlines()
+    assert len(replay_lines) == 3
+    assert replay_lines[1] == lines[2]
+    # Resuming a finished job only replays it.
+    assert resumed.text.splitlines() == lines
+    assert len(sites.requested) == 2
+    assert missing.status_code == missing_resume.status_code == 404
+    assert invalid.status_code == 422
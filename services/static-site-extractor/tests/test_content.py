@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app import main
+from app.content import extract_main_content
+from app.parsing import parse_html
+
+LANDING = """<html><body>
+<div class="cookie-banner"><p>We use cookies to improve your experience on this website. Accept all?</p></div>
+<header class="site-header"><a href="/">Bright Path Counseling</a>
+  <nav class="main-nav"><ul><li><a href="/">Home</a></li><li><a href="/about">About</a></li></ul></nav></header>
+<div class="wrapper">
+  <h1>Compassionate therapy in Portland</h1>
+  <p>We help adults and couples work through anxiety, grief and life transitions with evidence-based care.</p>
+  <h2>Our Services</h2>
+  <ul><li>Individual therapy</li><li>Couples counseling</li><li>Grief support</li></ul>
+  <h2>What clients say</h2>
+  <blockquote>Working with Dana changed how I handle stress at work and at home.</blockquote>
+  <div>Related: <a href="/a">Anxiety guide for new parents</a> <a href="/b">Grief resources</a></div>
+  <h2>Schedule a consultation</h2>
+  <p>Call <a href="tel:5035550100">503-555-0100</a> or book online for a free 15 minute consultation with our team.</p>
+</div>
+<footer><p>© 2024 Bright Path Counseling. All rights reserved. Privacy policy and terms apply.</p></footer>
+</body></html>"""
+
+
+def _blocks(html: str) -> list[dict]:
+    return [block.model_dump(mode="json") for block in extract_main_content(parse_html(html.encode()))]
+
+
+def test_main_content_drops_boilerplate_and_maps_horizon_slots() -> None:
+    assert _blocks(LANDING) == [
+        {
+            "kind": "heading",
+            "level": 1,
+            "text": "Compassionate therapy in Portland",
+            "slot": "horizon_home_hero.headline_primary",
+        },
+        {
+            "kind": "paragraph",
+            "text": "We help adults and couples work through anxiety, grief and life transitions with evidence-based care.",
+            "slot": "horizon_home_hero.supporting_copy",
+        },
+        {"kind": "heading", "level": 2, "text": "Our Services", "slot": "horizon_home_services.section_heading"},
+        {
+            "kind": "list",
+            "items": ["Individual therapy", "Couples counseling", "Grief support"],
+            "slot": "horizon_home_services.service_groups",
+        },
+        {"kind": "heading", "level": 2, "text": "What clients say", "slot": "horizon_home_testimonials.section_heading"},
+        {
+            "kind": "quote",
+            "text": "Working with Dana changed how I handle stress at work and at home.",
+            "slot": "horizon_home_testimonials.testimonials",
+        },
+        {"kind": "heading", "level": 2, "text": "Schedule a consultation", "slot": "horizon_home_final_cta.headline"},
+        {
+            "kind": "paragraph",
+            "text": "Call 503-555-0100 or book online for a free 15 minute consultation with our team.",
+            "slot": "horizon_home_final_cta.supporting_copy",
+        },
+    ]
+
+
+def test_main_landmark_wins_and_repeated_text_is_kept_once() -> None:
+    html = """<html><body>
+    <div class="promo"><p>Free consultations for new clients all month long, call today to book yours.</p></div>
+    <main>
+      <h3>Office hours</h3>
+      <p>Our office is open weekdays from nine to five, with evening sessions available on request.</p>
+      <p>Our office is open weekdays from nine to five, with evening sessions available on request.</p>
+      <div>Parking is available behind the building <span>at no cost</span>.</div>
+      <p hidden>Legacy notice that should never be shown to anyone visiting the page.</p>
+    </main>
+    </body></html>"""
+
+    assert _blocks(html) == [
+        {"kind": "heading", "level": 3, "text": "Office hours"},
+        {
+            "kind": "paragraph",
+            "text": "Our office is open weekdays from nine to five, with evening sessions available on request.",
+        },
+        {"kind": "paragraph", "text": "Parking is available behind the building at no cost."},
+    ]
+
+
+def test_extract_main_mode_limits_text_to_main_content() -> None:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text=LANDING, headers={"Content-Type": "text/html"})
+
+    mock_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    main.app.dependency_overrides[main.get_http_client] = lambda: mock_client
+    try:
+        with TestClient(main.app) as client:
+            full = client.post("/extract", json={"url": "https://example.com/"}).json()
+            trimmed = client.post("/extract", json={"url": "https://example.com/", "mode": "main"}).json()
+    finally:
+        main.app.dependency_overrides.clear()
+
+    assert "Bright Path Counseling" in full["text_blob"]
+    assert "cookies" not in trimmed["text_blob"]
+    assert "Home" not in [node["content"] for node in trimmed["text"]]
+    assert trimmed["text"][:2] == [
+        {"content": "Compassionate therapy in Portland"},
+        {"content": "We help adults and couples work through anxiety, grief and life transitions with evidence-based care."},
+    ]
+    assert "Couples counseling" in trimmed["text_blob"].split("\n\n")
+    assert trimmed["content"] == full["content"]
+    # The second request reused the cached analysis.
+    assert trimmed["cache"] != "miss"
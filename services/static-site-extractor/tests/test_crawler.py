@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app import crawler, main, models
+
+PAGE_TEMPLATE = """
+<html>
+  <head>
+    <title>{title}</title>
+    <link rel="stylesheet" href="/site.css" />
+  </head>
+  <body>
+    <nav class="main-nav">
+      <ul>
+        <li><a href="/">Home</a></li>
+        <li><a href="/about#team">About</a></li>
+        <li><a href="/services">Services</a></li>
+        <li><a href="/private">Private</a></li>
+      </ul>
+    </nav>
+    <p>{title} body</p>
+    <img src="/logo.png" alt="Logo" />
+    <img src="/{slug}.jpg" />
+    {extra}
+    <a href="https://elsewhere.example.org/">Partner</a>
+    <a href="/brochure.pdf">Brochure</a>
+  </body>
+</html>
+"""
+
+PAGES = {
+    "/": PAGE_TEMPLATE.format(title="Home", slug="home", extra=""),
+    "/about": PAGE_TEMPLATE.format(title="About", slug="about", extra='<a href="/team">Team</a>'),
+    "/services": PAGE_TEMPLATE.format(title="Services", slug="services", extra=""),
+    "/team": PAGE_TEMPLATE.format(title="Team", slug="team", extra=""),
+    "/private": PAGE_TEMPLATE.format(title="Private", slug="private", extra=""),
+}
+
+
+@pytest.fixture(autouse=True)
+def _fast_politeness(monkeypatch) -> None:
+    monkeypatch.setattr(crawler, "CRAWL_HOST_DELAY_SECONDS", 0.0)
+
+
+class _FakeSite:
+    def __init__(self, robots: str = "User-agent: *\nDisallow: /private\n", delay: float = 0.0) -> None:
+        self.robots = robots
+        self.delay = delay
+        self.requested: list[str] = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        self.requested.append(path)
+        if path == "/robots.txt":
+            return httpx.Response(200, text=self.robots)
+        if path == "/site.css":
+            return httpx.Response(
+                200,
+                text="@font-face { src: url('/fonts/brand.woff2'); }",
+                headers={"Content-Type": "text/css"},
+            )
+        if path not in PAGES:
+            return httpx.Response(404, text="missing", headers={"Content-Type": "text/plain"})
+
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        return httpx.Response(200, text=PAGES[path], headers={"Content-Type": "text/html"})
+
+
+def _run_crawl(site: _FakeSite, **options) -> list[models.CrawlEvent]:
+    options = {"max_pages": None, "max_depth": None, "respect_robots": True, **options}
+
+    async def run() -> list[models.CrawlEvent]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(site)) as client:
+            return [event async for event in crawler._crawl(client, "https://example.com/", **options)]
+
+    return asyncio.run(run())
+
+
+def _pages(events: list[models.CrawlEvent]) -> dict[str, models.CrawlPageEvent]:
+    return {
+        httpx.URL(str(event.page.url)).path: event
+        for event in events
+        if isinstance(event, models.CrawlPageEvent)
+    }
+
+
+def test_crawl_follows_internal_links_within_depth_and_robots() -> None:
+    site = _FakeSite()
+
+    events = _run_crawl(site, max_depth=1)
+    pages = _pages(events)
+    summary = events[-1]
+
+    assert set(pages) == {"/", "/about", "/services"}
+    assert pages["/"].depth == 0
+    assert pages["/about"].depth == 1
+    assert [event.url for event in events if isinstance(event, models.CrawlSkippedEvent)] == [
+        "https://example.com/private"
+    ]
+    assert "/team" not in site.requested
+    assert "/brochure.pdf" not in site.requested
+    assert site.requested.count("/robots.txt") == 1
+    assert site.requested.count("/site.css") == 1
+
+    assert isinstance(summary, models.CrawlSummaryEvent)
+    assert (summary.pages, summary.errors, summary.skipped) == (3, 0, 1)
+    assert summary.truncated is False
+
+
+def test_crawl_dedupes_images_and_fonts_across_pages() -> None:
+    events = _run_crawl(_FakeSite(), max_depth=2)
+    pages = _pages(events)
+
+    image_owners: dict[str, list[str]] = {}
+    for path, event in pages.items():
+        for image in event.page.images:
+            image_owners.setdefault(str(image.src), []).append(path)
+
+    assert all(len(owners) == 1 for owners in image_owners.values())
+    assert "https://example.com/logo.png" in image_owners
+    assert sum(len(event.page.fonts) for event in pages.values()) == 1
+    assert events[-1].images == len(image_owners) == 5
+    assert events[-1].fonts == 1
+
+
+def test_crawl_stops_at_page_limit() -> None:
+    site = _FakeSite()
+
+    events = _run_crawl(site, max_pages=2)
+    summary = events[-1]
+
+    assert len(_pages(events)) == 2
+    assert summary.truncated is True
+    assert sum(1 for path in site.requested if path in PAGES) == 2
+
+
+def test_crawl_respects_per_host_concurrency(monkeypatch) -> None:
+    monkeypatch.setattr(crawler, "CRAWL_CONCURRENCY", 4)
+    monkeypatch.setattr(crawler, "CRAWL_PER_HOST_CONCURRENCY", 2)
+    site = _FakeSite(robots="", delay=0.02)
+
+    events = _run_crawl(site)
+
+    assert len(_pages(events)) == 5
+    assert site.peak == 2
+
+
+def test_crawl_reports_failed_pages_and_can_ignore_robots() -> None:
+    home_with_broken_link = PAGES["/services"].replace("/services\"", "/missing\"")
+    site = _FakeSite()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/":
+            return httpx.Response(
+                200, text=home_with_broken_link, headers={"Content-Type": "text/html"}
+            )
+        return await site(request)
+
+    async def run() -> list[models.CrawlEvent]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return [
+                event
+                async for event in crawler._crawl(
+                    client, "https://example.com/", max_pages=None, max_depth=1, respect_robots=False
+                )
+            ]
+
+    events = asyncio.run(run())
+    errors = [event for event in events if isinstance(event, models.CrawlErrorEvent)]
+
+    assert "/robots.txt" not in site.requested
+    assert "/private" in _pages(events)
+    assert [(error.url, error.status_code) for error in errors] == [
+        ("https://example.com/missing", 415)
+    ]
+
+
+def test_normalize_page_url_drops_fragments_and_assets() -> None:
+    assert crawler._normalize_page_url("HTTPS://Example.com#top") == "https://example.com/"
+    assert crawler._normalize_page_url("https://example.com/a?b=1#c") == "https://example.com/a?b=1"
+    assert crawler._normalize_page_url("https://example.com/file.PDF") is None
+    assert crawler._normalize_page_url("mailto:hello@example.com") is None
+
+
+def test_crawl_endpoint_streams_ndjson(monkeypatch) -> None:
+    async def fake_crawl_site(url: str, **options):
+        yield models.CrawlSkippedEvent(url=url + "private", depth=1, reason="robots")
+        yield models.CrawlSummaryEvent(
+            url=url, pages=0, errors=0, skipped=1, images=0, fonts=0, truncated=False, elapsed_ms=1
+        )
+
+    monkeypatch.setattr(main, "crawl_site", fake_crawl_site)
+
+    with TestClient(main.app) as client:
+        response = client.post("/crawl", json={"url": "https://example.com/"})
+    lines = [models.CrawlSummaryEvent.model_validate_json(line) for line in response.text.splitlines()[1:]]
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.text.splitlines()[0].startswith('{"event":"skipped"')
+    assert lines[0].skipped == 1
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+import httpx
+
+from app import css_fonts, extractor
+from app.css_fonts import FontFace, Token, fonts_config, group_font_faces, parse_stylesheet, tokenize
+
+BASE = "https://example.com/css/site.css"
+
+
+def test_tokenize_handles_strings_comments_urls_and_escapes() -> None:
+    css = '/* a { b } */ @Font-Face { src: url( "x}.woff2" ), url( /y.woff ); font-family: F\\6f o; }'
+
+    assert list(tokenize(css)) == [
+        Token("at", "font-face"),
+        Token("{", "{"),
+        Token("ident", "src"),
+        Token(":", ":"),
+        Token("function", "url"),
+        Token("string", "x}.woff2"),
+        Token(")", ")"),
+        Token(",", ","),
+        Token("url", "/y.woff"),
+        Token(";", ";"),
+        Token("ident", "font-family"),
+        Token(":", ":"),
+        Token("ident", "Foo"),
+        Token(";", ";"),
+        Token("}", "}"),
+    ]
+
+
+def test_parse_stylesheet_reads_font_face_rules() -> None:
+    css = """
+        @import "print.css" print;
+        @import url(theme.css);
+        @font-face {
+          font-family: "Brand Sans";
+          font-weight: bold;
+          src: url('../fonts/brand-bold.woff2') format('woff2'), url(../fonts/brand-bold.woff) format('woff'),
+               local("Brand Sans Bold");
+        }
+        @media (min-width: 40em) {
+          @font-face { font-family: Open Sans; font-style: oblique 10deg; font-weight: 300 700;
+                       src: url(https://fonts.gstatic.com/s/opensans/v1/os.woff2) }
+        }
+        .hero { background: url("/img/hero.png"); font-family: "Brand Sans"; }
+        .icon:before { src: url(/fonts/icons.ttf); content: "}"; }
+        @font-face { font-family: "No Files"; src: local(Arial); }
+    """
+
+    parsed = parse_stylesheet(css, BASE)
+
+    assert parsed.faces == [
+        FontFace(
+            family="Brand Sans",
+            weight="700",
+            style="normal",
+            sources=[
+                "https://example.com/fonts/brand-bold.woff2",
+                "https://example.com/fonts/brand-bold.woff",
+            ],
+        ),
+        FontFace(
+            family="Open Sans",
+            weight="300 700",
+            style="italic",
+            sources=["https://fonts.gstatic.com/s/opensans/v1/os.woff2"],
+        ),
+    ]
+    assert parsed.font_urls == {
+        "https://example.com/fonts/brand-bold.woff2",
+        "https://example.com/fonts/brand-bold.woff",
+        "https://fonts.gstatic.com/s/opensans/v1/os.woff2",
+        "https://example.com/fonts/icons.ttf",
+    }
+    assert parsed.imports == {"https://example.com/css/print.css", "https://example.com/css/theme.css"}
+
+
+def test_parse_stylesheet_survives_malformed_css() -> None:
+    css = "@font-face { font-family: 'Broken; src: url(/a.woff2) } .x { url( @import"
+
+    parsed = parse_stylesheet(css, BASE)
+
+    assert parsed.faces == []
+    assert parsed.imports == set()
+
+
+def test_parse_stylesheet_is_linear_in_input_size() -> None:
+    rule = (
+        "@font-face{font-family:'F';font-weight:400;src:url(/f.woff2) format('woff2')}"
+        ".a{color:red;background:url(/bg.png)} /* note */ "
+    )
+
+    def elapsed(repeat: int) -> float:
+        css = rule * repeat
+        start = time.perf_counter()
+        parse_stylesheet(css, BASE)
+        return time.perf_counter() - start
+
+    elapsed(200)
+    small = min(elapsed(1_000) for _ in range(3))
+    large = min(elapsed(10_000) for _ in range(3))
+
+    assert large < small * 25
+    # Pathological input that would make a backtracking scanner quadratic.
+    start = time.perf_counter()
+    parse_stylesheet("url(" * 20_000 + "'" + "a" * 20_000, BASE)
+    assert time.perf_counter() - start < 2
+
+
+def test_group_font_faces_resolves_google_loaders() -> None:
+    faces = [
+        FontFace("Playfair Display", "400 700", "normal", ["https://cdn.example.com/pd.woff2"]),
+        FontFace("Playfair Display", "400", "italic", ["https://cdn.example.com/pd-i.woff2"]),
+        FontFace("Open Sans", "300 700", "normal", ["https://fonts.gstatic.com/s/os.woff2"]),
+        FontFace("Brand Sans", "400", "normal", ["https://example.com/brand.woff2"]),
+    ]
+    manifest = {"Playfair_Display": {"weights": ["400", "600", "700", "900"], "styles": ["normal", "italic"]}}
+
+    groups = group_font_faces(faces, manifest)
+
+    assert [(group.family, group.loader, group.weights, group.styles) for group in groups] == [
+        ("Playfair Display", "Playfair_Display", ["400", "600", "700"], ["normal", "italic"]),
+        ("Open Sans", "Open_Sans", ["300", "400", "500", "600", "700"], ["normal"]),
+        ("Brand Sans", None, ["400"], ["normal"]),
+    ]
+    assert groups[0].files == ["https://cdn.example.com/pd.woff2", "https://cdn.example.com/pd-i.woff2"]
+    assert fonts_config(groups) == [
+        {
+            "id": "playfair-display",
+            "loader": "Playfair_Display",
+            "options": {
+                "subsets": ["latin"],
+                "display": "swap",
+                "weight": ["400", "600", "700"],
+                "style": ["normal", "italic"],
+            },
+        },
+        {
+            "id": "open-sans",
+            "loader": "Open_Sans",
+            "options": {
+                "subsets": ["latin"],
+                "display": "swap",
+                "weight": ["300", "400", "500", "600", "700"],
+            },
+        },
+    ]
+
+
+def test_manifest_is_loaded_from_config(tmp_path, monkeypatch) -> None:
+    manifest = tmp_path / "google-fonts.json"
+    manifest.write_text(json.dumps({"Lora": {"weights": ["400", "700"], "styles": ["normal"]}}))
+    monkeypatch.setattr(css_fonts, "GOOGLE_FONTS_MANIFEST", str(manifest))
+    css_fonts.load_google_fonts_manifest.cache_clear()
+    try:
+        groups = group_font_faces([FontFace("lora", "400", "normal", ["https://example.com/l.woff2"])])
+    finally:
+        css_fonts.load_google_fonts_manifest.cache_clear()
+
+    assert groups[0].loader == "Lora"
+
+
+def test_extract_page_reports_font_families_and_config() -> None:
+    page = (
+        "<html><head><link rel='stylesheet' href='/site.css'>"
+        "<style>@font-face{font-family:Lora;font-style:italic;src:url(https://fonts.gstatic.com/l-i.woff2)}</style>"
+        "</head><body><p>Hi</p></body></html>"
+    )
+    css = (
+        "@font-face{font-family:Lora;src:url(https://fonts.gstatic.com/l.woff2)}"
+        "@font-face{font-family:'Brand';font-weight:700;src:url(/brand.woff2)}"
+        ".x{src:url(/loose.woff)}"
+    )
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/site.css":
+            return httpx.Response(200, text=css, headers={"Content-Type": "text/css"})
+        return httpx.Response(200, text=page, headers={"Content-Type": "text/html"})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await extractor.extract_page("https://example.com/", client=client)
+
+    data = asyncio.run(run()).model_dump(mode="json")
+
+    assert data["fonts"] == [
+        {
+            "url": "https://fonts.gstatic.com/l-i.woff2",
+            "source": "inline",
+            "stylesheet_url": None,
+            "family": "Lora",
+            "weight": "400",
+            "style": "italic",
+        },
+        {
+            "url": "https://fonts.gstatic.com/l.woff2",
+            "source": "stylesheet",
+            "stylesheet_url": "https://example.com/site.css",
+            "family": "Lora",
+            "weight": "400",
+            "style": "normal",
+        },
+        {
+            "url": "https://example.com/brand.woff2",
+            "source": "stylesheet",
+            "stylesheet_url": "https://example.com/site.css",
+            "family": "Brand",
+            "weight": "700",
+            "style": "normal",
+        },
+        {
+            "url": "https://example.com/loose.woff",
+            "source": "stylesheet",
+            "stylesheet_url": "https://example.com/site.css",
+        },
+    ]
+    assert [(family["family"], family["loader"]) for family in data["font_families"]] == [
+        ("Lora", "Lora"),
+        ("Brand", None),
+    ]
+    assert data["fonts_config"] == [
+        {
+            "id": "lora",
+            "loader": "Lora",
+            "options": {
+                "subsets": ["latin"],
+                "display": "swap",
+                "weight": ["400"],
+                "style": ["normal", "italic"],
+            },
+        }
+    ]
@@ -0,0 +1,63 @@
+"""DOM path computation on a large, realistic page matches the previous implementation."""
+from __future__ import annotations
+
+from bs4 import BeautifulSoup, Tag
+
+from app import extractor
+from app.parsing import SKIP_TEXT_PARENTS
+
+
+def _legacy_build_dom_path(element: Tag) -> str:
+    """Previous bottom-up implementation, kept as the reference for expected paths."""
+
+    parts: list[str] = []
+    current: Tag | None = element
+    while current and isinstance(current, Tag):
+        parent = current.parent if isinstance(current.parent, Tag) else None
+        if parent:
+            siblings = parent.find_all(current.name, recursive=False)
+            index = siblings.index(current) + 1 if siblings else 1
+            parts.append(f"{current.name}[{index}]")
+        else:
+            parts.append(current.name)
+        current = parent
+    return ".".join(reversed(parts))
+
+
+def _large_page_html(sections: int = 120, list_items: int = 20) -> str:
+    nav = "".join(f'<li><a href="/page-{i}">Page {i}</a></li>' for i in range(40))
+    body: list[str] = [
+        "<html><head><title>Large practice site</title></head><body>",
+        f'<header><nav class="main-nav"><ul>{nav}</ul></nav></header><main>',
+    ]
+    for section in range(sections):
+        items = "".join(
+            f"<li><span>Service {section}.{item}</span> <em>details</em></li>"
+            for item in range(list_items)
+        )
+        body.append(
+            f'<section class="block"><div class="container"><div class="row">'
+            f"<h2>Section {section}</h2>"
+            f"<p>Intro copy for section {section} with <a href='#'>a link</a>.</p>"
+            f"<p>Second paragraph {section}.</p><ul>{items}</ul>"
+            f"</div></div></section>"
+        )
+    body.append("</main><footer><p>© Practice</p></footer></body></html>")
+    return "".join(body)
+
+
+def test_text_node_paths_match_legacy() -> None:
+    soup = BeautifulSoup(_large_page_html(), "html.parser")
+    text_parents = [
+        text.parent
+        for text in soup.find_all(string=True)
+        if text.strip()
+        and isinstance(text.parent, Tag)
+        and text.parent.name not in SKIP_TEXT_PARENTS
+    ]
+
+    legacy = [_legacy_build_dom_path(parent) for parent in text_parents]
+    indexed = [node.path for node in extractor._extract_text_nodes(soup)]
+
+    assert len(indexed) == len(text_parents)
+    assert indexed == legacy
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import asyncio
+
 from bs4 import BeautifulSoup
 import httpx
+import pytest
 
-from app import extractor
+from app import css_fonts, extractor
 
 
 def test_parse_css_for_fonts_filters_non_fonts() -> None:
@@ -13,10 +16,10 @@ def test_parse_css_for_fonts_filters_non_fonts() -> None:
         @import url('//cdn.example.com/nested.css');
     """
 
-    fonts, imports = extractor._parse_css_for_fonts(css, base="https://example.com/styles/main.css")
+    parsed = css_fonts.parse_stylesheet(css, base="https://example.com/styles/main.css")
 
-    assert fonts == {"https://example.com/fonts/test.woff2"}
-    assert imports == {"https://cdn.example.com/nested.css"}
+    assert parsed.font_urls == {"https://example.com/fonts/test.woff2"}
+    assert parsed.imports == {"https://cdn.example.com/nested.css"}
 
 
 def test_extract_text_nodes_ignores_script_and_empty_nodes() -> None:
@@ -155,3 +158,148 @@ def test_dedupe_fonts_by_url() -> None:
         "https://cdn.com/font.woff",
         "https://cdn.com/font2.woff",
     ]
+
+
+def _stylesheet_client(handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_crawl_stylesheets_fetches_in_parallel_with_per_host_limit(monkeypatch) -> None:
+    monkeypatch.setattr(extractor, "STYLESHEET_CONCURRENCY", 4)
+    monkeypatch.setattr(extractor, "STYLESHEET_PER_HOST_CONCURRENCY", 2)
+
+    in_flight: dict[str, int] = {}
+    peak: dict[str, int] = {}
+    requested: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        requested.append(str(request.url))
+        in_flight[host] = in_flight.get(host, 0) + 1
+        peak[host] = max(peak.get(host, 0), in_flight[host])
+        await asyncio.sleep(0.02)
+        in_flight[host] -= 1
+        name = request.url.path.rsplit("/", 1)[-1]
+        body = f"@font-face {{ src: url('/fonts/{name}.woff2'); }}"
+        if name == "a.css":
+            body += "@import url('/nested.css'); @import url('/b.css');"
+        return httpx.Response(200, text=body, headers={"Content-Type": "text/css"})
+
+    refs = [
+        extractor.StylesheetRef(url=f"https://{host}/{name}.css", referer=None)
+        for host in ("one.example.com", "two.example.com")
+        for name in ("a", "b", "c")
+    ]
+
+    async def run() -> list[tuple[str, css_fonts.StylesheetFonts]]:
+        async with _stylesheet_client(handler) as client:
+            return await extractor._crawl_stylesheets(client, refs, deadline=None)
+
+    results = asyncio.run(run())
+
+    assert peak == {"one.example.com": 2, "two.example.com": 2}
+    assert len(requested) == len(set(requested)) == 8
+    assert [url for url, _ in results][:6] == [ref.url for ref in refs]
+    assert results[0][1].font_urls == {"https://one.example.com/fonts/a.css.woff2"}
+
+
+def test_crawl_stylesheets_respects_deadline() -> None:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/slow.css":
+            await asyncio.sleep(5)
+        return httpx.Response(
+            200,
+            text="@font-face { src: url('/f.woff'); }",
+            headers={"Content-Type": "text/css"},
+        )
+
+    refs = [
+        extractor.StylesheetRef(url="https://example.com/fast.css", referer=None),
+        extractor.StylesheetRef(url="https://example.com/slow.css", referer=None),
+    ]
+
+    async def run() -> list[tuple[str, css_fonts.StylesheetFonts]]:
+        async with _stylesheet_client(handler) as client:
+            deadline = asyncio.get_running_loop().time() + 0.2
+            return await extractor._crawl_stylesheets(client, refs, deadline=deadline)
+
+    results = asyncio.run(run())
+
+    assert [url for url, _ in results] == ["https://example.com/fast.css"]
+
+
+class _TrackingStream(httpx.AsyncByteStream):
+    def __init__(self, chunks: list[bytes]) -> None:
+        self.chunks = chunks
+        self.yielded = 0
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            self.yielded += 1
+            yield chunk
+
+
+def test_fetch_html_aborts_once_size_cap_is_exceeded(monkeypatch) -> None:
+    monkeypatch.setattr(extractor, "MAX_CONTENT_LENGTH_BYTES", 1_000)
+    stream = _TrackingStream([b"<p>" + b"x" * 400 for _ in range(50)])
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"Content-Type": "text/html"}, stream=stream)
+
+    async def run() -> None:
+        async with _stylesheet_client(handler) as client:
+            await extractor._fetch_html(client, "https://example.com")
+
+    with pytest.raises(extractor.ExtractionError) as excinfo:
+        asyncio.run(run())
+
+    assert excinfo.value.status_code == 413
+    assert stream.yielded == 3
+
+
+def test_fetch_html_rejects_non_html_before_reading_body() -> None:
+    stream = _TrackingStream([b"\x89PNG"])
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"Content-Type": "image/png"}, stream=stream)
+
+    async def run() -> None:
+        async with _stylesheet_client(handler) as client:
+            await extractor._fetch_html(client, "https://example.com/logo.png")
+
+    with pytest.raises(extractor.ExtractionError) as excinfo:
+        asyncio.run(run())
+
+    assert excinfo.value.status_code == 415
+    assert stream.yielded == 0
+
+
+def test_fetch_html_returns_body_and_charset() -> None:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            headers={"Content-Type": "text/html; charset=iso-8859-1"},
+            content="<p>café</p>".encode("iso-8859-1"),
+        )
+
+    async def run() -> extractor.FetchedPage:
+        async with _stylesheet_client(handler) as client:
+            return await extractor._fetch_html(client, "https://example.com")
+
+    page = asyncio.run(run())
+
+    assert page.encoding == "iso-8859-1"
+    assert page.content.decode(page.encoding) == "<p>café</p>"
+
+
+def test_fetch_stylesheet_skips_oversized_css(monkeypatch) -> None:
+    monkeypatch.setattr(extractor, "MAX_STYLESHEET_BYTES", 10)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"Content-Type": "text/css"}, text="a" * 100)
+
+    async def run() -> str | None:
+        async with _stylesheet_client(handler) as client:
+            return await extractor._fetch_stylesheet(client, "https://example.com/big.css")
+
+    assert asyncio.run(run()) is None
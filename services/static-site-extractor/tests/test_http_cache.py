@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+
+from app import extractor
+from app.http_cache import CachingTransport, HTTPCache
+
+
+class _Origin:
+    def __init__(self, responses: dict[str, httpx.Response]) -> None:
+        self.responses = responses
+        self.requests: list[httpx.Request] = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        template = self.responses[request.url.path]
+        etag = template.headers.get("ETag")
+        if etag and request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag, "Cache-Control": "max-age=60"})
+        return httpx.Response(template.status_code, headers=template.headers, content=template.content)
+
+
+@pytest.fixture
+def cache(tmp_path) -> HTTPCache:
+    store = HTTPCache(tmp_path / "http-cache", max_bytes=10_000)
+    yield store
+    store.close()
+
+
+def _get_all(cache: HTTPCache, origin: _Origin, urls: list[str]) -> list[httpx.Response]:
+    async def run() -> list[httpx.Response]:
+        transport = CachingTransport(httpx.MockTransport(origin), cache)
+        async with httpx.AsyncClient(transport=transport) as client:
+            responses = []
+            for url in urls:
+                response = await client.get(url)
+                responses.append(response)
+            return responses
+
+    return asyncio.run(run())
+
+
+def _css(body: str, **headers: str) -> httpx.Response:
+    return httpx.Response(
+        200, headers={"Content-Type": "text/css", **headers}, content=body.encode()
+    )
+
+
+def test_fresh_responses_are_served_without_network(cache: HTTPCache) -> None:
+    origin = _Origin({"/site.css": _css("body{}", **{"Cache-Control": "max-age=600"})})
+
+    first, second = _get_all(cache, origin, ["https://a.test/site.css"] * 2)
+
+    assert len(origin.requests) == 1
+    assert first.extensions["cache_status"] == "MISS"
+    assert second.extensions["cache_status"] == "HIT"
+    assert second.text == "body{}"
+    assert second.headers["Content-Type"] == "text/css"
+
+
+def test_stale_responses_are_revalidated_with_etag(cache: HTTPCache) -> None:
+    origin = _Origin({"/site.css": _css("body{}", ETag='"v1"', **{"Cache-Control": "no-cache"})})
+
+    first, second, third = _get_all(cache, origin, ["https://a.test/site.css"] * 3)
+
+    assert [request.headers.get("If-None-Match") for request in origin.requests] == [None, '"v1"']
+    assert second.extensions["cache_status"] == "REVALIDATED"
+    assert second.text == "body{}"
+    # The 304 carried max-age=60, so the third fetch is a plain hit.
+    assert third.extensions["cache_status"] == "HIT"
+
+
+def test_last_modified_is_sent_as_if_modified_since(cache: HTTPCache) -> None:
+    stamp = "Wed, 01 Jan 2025 00:00:00 GMT"
+    origin = _Origin({"/page": _css("<p>hi</p>", **{"Last-Modified": stamp})})
+
+    _get_all(cache, origin, ["https://a.test/page"] * 2)
+
+    assert origin.requests[1].headers["If-Modified-Since"] == stamp
+
+
+def test_no_store_and_unvalidated_responses_are_not_cached(cache: HTTPCache) -> None:
+    origin = _Origin(
+        {
+            "/private.css": _css("a{}", **{"Cache-Control": "no-store, max-age=600"}),
+            "/plain.css": _css("b{}"),
+        }
+    )
+
+    _get_all(cache, origin, ["https://a.test/private.css", "https://a.test/plain.css"] * 2)
+
+    assert len(origin.requests) == 4
+    assert cache.total_bytes() == 0
+
+
+def test_identical_bodies_share_one_blob(cache: HTTPCache) -> None:
+    body = "@font-face{src:url(/f.woff2)}"
+    origin = _Origin({"/theme.css": _css(body, **{"Cache-Control": "max-age=600"})})
+
+    _get_all(cache, origin, ["https://a.test/theme.css", "https://b.test/theme.css"])
+
+    assert cache.lookup("https://a.test/theme.css").digest == cache.lookup("https://b.test/theme.css").digest
+    assert cache.total_bytes() == len(body)
+
+
+def test_lru_eviction_keeps_total_under_cap(tmp_path) -> None:
+    cache = HTTPCache(tmp_path / "small", max_bytes=250)
+    origin = _Origin(
+        {f"/{name}.css": _css(name * 100, **{"Cache-Control": "max-age=600"}) for name in "abc"}
+    )
+
+    _get_all(cache, origin, ["https://a.test/a.css", "https://a.test/b.css"])
+    # Touch a.css so b.css becomes the least recently used entry.
+    assert cache.lookup("https://a.test/a.css") is not None
+    _get_all(cache, origin, ["https://a.test/c.css"])
+
+    assert cache.total_bytes() <= 250
+    assert cache.lookup("https://a.test/b.css") is None
+    assert cache.lookup("https://a.test/a.css") is not None
+    assert cache.lookup("https://a.test/c.css") is not None
+    cache.close()
+
+
+def test_abandoned_streams_are_not_stored(cache: HTTPCache, monkeypatch) -> None:
+    monkeypatch.setattr(extractor, "MAX_CONTENT_LENGTH_BYTES", 100)
+    origin = _Origin(
+        {"/big": httpx.Response(200, headers={"Content-Type": "text/html", "ETag": '"x"'}, content=b"x" * 500)}
+    )
+
+    async def run() -> None:
+        transport = CachingTransport(httpx.MockTransport(origin), cache)
+        async with httpx.AsyncClient(transport=transport) as client:
+            await extractor._fetch_html(client, "https://a.test/big")
+
+    with pytest.raises(extractor.ExtractionError):
+        asyncio.run(run())
+
+    assert cache.lookup("https://a.test/big") is None
+
+
+def test_stylesheet_fetches_reuse_cache_across_extractions(cache: HTTPCache) -> None:
+    origin = _Origin({"/css2": _css("@font-face{src:url(/x.woff2)}", **{"Cache-Control": "max-age=86400"})})
+
+    async def run() -> list[str | None]:
+        results = []
+        for _ in range(3):
+            transport = CachingTransport(httpx.MockTransport(origin), cache)
+            async with httpx.AsyncClient(transport=transport) as client:
+                results.append(await extractor._fetch_stylesheet(client, "https://fonts.test/css2"))
+        return results
+
+    results = asyncio.run(run())
+
+    assert results == ["@font-face{src:url(/x.woff2)}"] * 3
+    assert len(origin.requests) == 1
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import struct
+
+import httpx
+import pytest
+
+from app import extractor, image_probe, models
+from app.image_probe import ImageInfo, sniff_image
+
+
+def _png(width: int, height: int) -> bytes:
+    ihdr = struct.pack(">II", width, height) + b"\x08\x06\x00\x00\x00"
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + ihdr + b"\x00" * 4000
+
+
+def _jpeg(width: int, height: int) -> bytes:
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    exif = b"\xff\xe1" + struct.pack(">H", 1002) + b"\x00" * 1000
+    sof = b"\xff\xc2" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + app0 + exif + sof + b"\xff\xda" + b"\x00" * 100
+
+
+def _webp_vp8x(width: int, height: int) -> bytes:
+    body = b"VP8X" + struct.pack("<I", 10) + b"\x00\x00\x00\x00"
+    body += (width - 1).to_bytes(3, "little") + (height - 1).to_bytes(3, "little")
+    return b"RIFF" + struct.pack("<I", len(body) + 4) + b"WEBP" + body
+
+
+def _avif(width: int, height: int) -> bytes:
+    ftyp = struct.pack(">I", 20) + b"ftypavif" + b"\x00\x00\x00\x00mif1"
+    ispe = struct.pack(">I", 20) + b"ispe" + b"\x00\x00\x00\x00" + struct.pack(">II", width, height)
+    return ftyp + b"\x00" * 64 + ispe
+
+
+@pytest.mark.parametrize(
+    ("data", "expected"),
+    [
+        (_png(1920, 1080), ImageInfo("png", 1920, 1080)),
+        (b"GIF89a" + struct.pack("<HH", 16, 16) + b"\x00" * 10, ImageInfo("gif", 16, 16)),
+        (_jpeg(1200, 800), ImageInfo("jpeg", 1200, 800)),
+        (_webp_vp8x(640, 480), ImageInfo("webp", 640, 480)),
+        (_avif(2048, 1365), ImageInfo("avif", 2048, 1365)),
+        (b"\x00\x00\x01\x00\x01\x00\x20\x20" + b"\x00" * 20, ImageInfo("ico", 32, 32)),
+        (b'<?xml version="1.0"?><svg xmlns="http://www.w3.org/2000/svg" width="24px" height="24">', ImageInfo("svg", 24, 24)),
+        (b'<svg viewBox="0 0 120.4 60" xmlns="http://www.w3.org/2000/svg"><path/></svg>', ImageInfo("svg", 120, 60)),
+        (b"\xff\xd8\xff\xe0\x00\x10", ImageInfo("jpeg", None, None)),
+        (b"not an image at all", None),
+    ],
+)
+def test_sniff_image_reads_format_and_dimensions(data: bytes, expected: ImageInfo | None) -> None:
+    assert sniff_image(data) == expected
+
+
+class _ImageHost:
+    def __init__(self, images: dict[str, bytes], *, ranges: bool = True, lengths: bool = True) -> None:
+        self.images = images
+        self.ranges = ranges
+        self.lengths = lengths
+        self.methods: list[tuple[str, str]] = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        self.methods.append((request.method, path))
+        data = self.images.get(path)
+        if data is None:
+            return httpx.Response(404)
+        if request.method == "HEAD":
+            return httpx.Response(200, headers={"Content-Length": str(len(data))})
+
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+
+        range_header = request.headers.get("Range")
+        if self.ranges and range_header:
+            end = int(range_header.rsplit("-", 1)[1])
+            chunk = data[: end + 1]
+            return httpx.Response(
+                206,
+                headers={"Content-Range": f"bytes 0-{len(chunk) - 1}/{len(data)}"},
+                content=chunk,
+            )
+        if self.lengths:
+            return httpx.Response(200, content=data)
+        return httpx.Response(200, stream=httpx.ByteStream(data))
+
+
+def _probe(host: _ImageHost, paths: list[str]) -> dict[str, image_probe.ImageProbe]:
+    async def run() -> dict[str, image_probe.ImageProbe]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(host)) as client:
+            return await image_probe.probe_images(client, [f"https://cdn.test{path}" for path in paths])
+
+    return asyncio.run(run())
+
+
+def test_probe_uses_ranged_get_and_content_range_size() -> None:
+    hero = _jpeg(1600, 900) + b"\x00" * 100_000
+    host = _ImageHost({"/hero.jpg": hero})
+
+    probes = _probe(host, ["/hero.jpg"])
+
+    assert probes["https://cdn.test/hero.jpg"] == image_probe.ImageProbe("jpeg", 1600, 900, len(hero))
+    assert host.methods == [("GET", "/hero.jpg")]
+
+
+def test_probe_falls_back_to_head_when_size_is_unknown(monkeypatch) -> None:
+    monkeypatch.setattr(image_probe, "IMAGE_PROBE_BYTES", 64)
+    icon = _png(16, 16)
+    host = _ImageHost({"/icon.png": icon}, ranges=False, lengths=False)
+
+    probes = _probe(host, ["/icon.png"])
+
+    assert probes["https://cdn.test/icon.png"] == image_probe.ImageProbe("png", 16, 16, len(icon))
+    assert host.methods == [("GET", "/icon.png"), ("HEAD", "/icon.png")]
+
+
+def test_probe_limits_concurrency_and_skips_failures(monkeypatch) -> None:
+    monkeypatch.setattr(image_probe, "IMAGE_PROBE_CONCURRENCY", 3)
+    host = _ImageHost({f"/{i}.png": _png(i + 1, i + 1) for i in range(10)})
+
+    probes = _probe(host, [f"/{i}.png" for i in range(10)] + ["/missing.png"])
+
+    assert len(probes) == 10
+    assert "https://cdn.test/missing.png" not in probes
+    assert host.peak == 3
+
+
+def test_probe_returns_partial_results_at_deadline(monkeypatch) -> None:
+    monkeypatch.setattr(image_probe, "IMAGE_PROBE_DEADLINE_SECONDS", 0.2)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/slow.png":
+            await asyncio.sleep(5)
+        return httpx.Response(200, content=_png(10, 10))
+
+    async def run() -> dict[str, image_probe.ImageProbe]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await image_probe.probe_images(
+                client, ["https://cdn.test/fast.png", "https://cdn.test/slow.png"]
+            )
+
+    assert list(asyncio.run(run())) == ["https://cdn.test/fast.png"]
+
+
+def test_extract_page_enriches_images_when_requested() -> None:
+    page = '<html><body><img src="/hero.jpg" alt="Hero"><img src="/missing.png"></body></html>'
+    hero = _jpeg(1600, 900)
+    host = _ImageHost({"/hero.jpg": hero})
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/":
+            return httpx.Response(200, text=page, headers={"Content-Type": "text/html"})
+        return await host(request)
+
+    async def run(probe: bool) -> models.ExtractionResponse:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await extractor.extract_page("https://cdn.test/", client=client, probe_images=probe)
+
+    plain = asyncio.run(run(False))
+    enriched = asyncio.run(run(True))
+
+    assert plain.model_dump(mode="json")["images"][0] == {"src": "https://cdn.test/hero.jpg", "alt": "Hero"}
+    assert enriched.model_dump(mode="json")["images"] == [
+        {
+            "src": "https://cdn.test/hero.jpg",
+            "alt": "Hero",
+            "format": "jpeg",
+            "width": 1600,
+            "height": 900,
+            "size_bytes": len(hero),
+        },
+        {"src": "https://cdn.test/missing.png"},
+    ]
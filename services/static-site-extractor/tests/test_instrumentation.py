@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app import bench, main
+from app.instrumentation import StageHistograms, StageTimer
+
+PAGE = """<html><head><title>Timed</title><link rel="stylesheet" href="/site.css"></head>
+<body><nav class="main-nav"><ul><li><a href="/">Home</a></li><li><a href="/about">About</a></li></ul></nav>
+<p>Hello</p><img src="/a.png" alt="A"></body></html>"""
+ANALYSIS_STAGES = {"parse", "scan", "text", "navigation", "images", "links", "inline_fonts", "content"}
+
+
+def test_histograms_bucket_observations_cumulatively() -> None:
+    histograms = StageHistograms(buckets=(0.01, 0.1, 1.0))
+    histograms.observe({"fetch": 0.005, "parse": 0.1})
+    histograms.observe({"fetch": 0.5})
+    histograms.observe({"fetch": 3.0})
+
+    fetch, parse = histograms.snapshot()
+
+    assert fetch.stage == "fetch"
+    assert fetch.count == 3
+    assert fetch.sum_seconds == pytest.approx(3.505)
+    assert fetch.buckets == {"0.01": 1, "0.1": 1, "1": 2, "+Inf": 3}
+    # Bounds are inclusive, as Prometheus "le" buckets are.
+    assert parse.buckets == {"0.01": 0, "0.1": 1, "1": 1, "+Inf": 1}
+
+
+def test_stage_timer_accumulates_repeated_stages() -> None:
+    timer = StageTimer()
+    timer.add("fetch", 0.25)
+    timer.merge({"fetch": 0.25, "parse": 0.001})
+
+    assert timer.milliseconds() == {"fetch": 500.0, "parse": 1.0}
+
+
+@pytest.fixture
+def api_client():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/site.css":
+            return httpx.Response(200, text="@font-face{font-family:A;src:url(/a.woff2)}", headers={"Content-Type": "text/css"})
+        return httpx.Response(200, text=PAGE, headers={"Content-Type": "text/html"})
+
+    mock_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    main.app.dependency_overrides[main.get_http_client] = lambda: mock_client
+    try:
+        with TestClient(main.app) as client:
+            yield client
+    finally:
+        main.app.dependency_overrides.clear()
+
+
+def test_extract_reports_timings_only_when_asked(api_client, stage_histograms) -> None:
+    plain = api_client.post("/extract", json={"url": "https://example.com/"}).json()
+    debug = api_client.post(
+        "/extract", params={"debug": "timings"}, json={"url": "https://example.com/"}
+    ).json()
+
+    assert "timings" not in plain
+    timings = debug["timings"]
+    assert {"fetch", "result_cache", "total"} <= set(timings)
+    assert debug["cache"] == "hit"
+    assert timings["total"] >= timings["fetch"]
+
+    observed = {histogram.stage: histogram.count for histogram in stage_histograms.snapshot()}
+    assert observed["fetch"] == 2
+    assert observed["stylesheets"] == 1
+    assert ANALYSIS_STAGES <= set(observed)
+
+
+def test_metrics_exports_prometheus_histograms(api_client) -> None:
+    api_client.post("/extract", json={"url": "https://example.com/"})
+
+    as_json = api_client.get("/metrics").json()
+    as_text = api_client.get("/metrics", params={"format": "prometheus"})
+    scraped = api_client.get("/metrics", headers={"Accept": "text/plain;version=0.0.4"})
+
+    assert {stage["stage"] for stage in as_json["stages"]} >= {"fetch", "parse", "total"}
+    assert as_text.headers["content-type"].startswith("text/plain")
+    lines = as_text.text.splitlines()
+    assert "# TYPE extractor_stage_duration_seconds histogram" in lines
+    assert 'extractor_stage_duration_seconds_bucket{stage="fetch",le="+Inf"} 1' in lines
+    assert 'extractor_stage_duration_seconds_count{stage="parse_queue"} 1' in lines
+    assert "extractor_result_cache_misses_total 1" in lines
+    assert scraped.text == as_text.text
+
+
+def test_bench_replays_fixtures_through_each_stage(tmp_path, capsys) -> None:
+    page = tmp_path / "page.html"
+    page.write_text(PAGE)
+    css = tmp_path / "site.css"
+    css.write_text("@font-face{font-family:A;src:url(/a.woff2)}")
+
+    bench.main([str(page), str(css), "--repeat", "3", "--json"])
+    summaries = json.loads(capsys.readouterr().out)
+
+    assert set(summaries["page.html"]) == ANALYSIS_STAGES | {"total"}
+    assert set(summaries["site.css"]) == {"stylesheet_parse"}
+    assert set(summaries["page.html"]["parse"]) == {"mean_ms", "p50_ms", "p95_ms", "max_ms"}
+
+    bench.main([str(page), "--repeat", "2"])
+    table = capsys.readouterr().out
+    assert "page.html" in table and "navigation" in table
@@ -0,0 +1,105 @@
+"""Load test: concurrent /extract calls against a local fixture server."""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app import extractor, main
+from app.result_cache import ResultCache, set_result_cache
+
+FIXTURE_PAGE = b"""<html><head><title>Fixture</title>
+<link rel="stylesheet" href="/site.css"></head>
+<body><nav class="main-nav"><ul><li><a href="/">Home</a></li><li><a href="/about">About</a></li></ul></nav>
+<h1>Welcome</h1><p>Therapy for individuals and couples.</p><img src="/hero.jpg" alt="Hero"></body></html>"""
+FIXTURE_CSS = b"@font-face { font-family: Brand; src: url('/fonts/brand.woff2'); }"
+
+REQUESTS = 100
+CONCURRENCY = 25
+
+
+class _FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+    connections = 0
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self) -> None:  # noqa: N802 - stdlib handler API
+        if self.path == "/site.css":
+            body, content_type = FIXTURE_CSS, "text/css"
+        else:
+            body, content_type = FIXTURE_PAGE, "text/html; charset=utf-8"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def fixture_server() -> Iterator[_FixtureServer]:
+    server = _FixtureServer(("127.0.0.1", 0), _FixtureHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+async def _drive(call, count: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            await call()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(count)))
+    return time.perf_counter() - started
+
+
+def test_shared_client_reuses_connections_under_load(fixture_server, monkeypatch) -> None:
+    # Measure connection reuse, not caching: every call fetches and parses the page.
+    monkeypatch.setattr(extractor, "get_http_cache", lambda: None)
+    set_result_cache(ResultCache(max_bytes=0, ttl_seconds=0))
+    page_url = f"http://127.0.0.1:{fixture_server.server_address[1]}/"
+
+    async def per_request_clients() -> float:
+        return await _drive(lambda: extractor.extract_page(page_url), REQUESTS, CONCURRENCY)
+
+    async def shared_client() -> float:
+        async with main.lifespan(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://service") as api:
+
+                async def call() -> None:
+                    response = await api.post("/extract", json={"url": page_url})
+                    assert response.status_code == 200
+                    assert response.json()["fonts"][0]["url"].endswith("/fonts/brand.woff2")
+
+                return await _drive(call, REQUESTS, CONCURRENCY)
+
+    asyncio.run(per_request_clients())
+    baseline_connections = fixture_server.connections
+    fixture_server.connections = 0
+    asyncio.run(shared_client())
+    shared_connections = fixture_server.connections
+
+    # Every per-request client opens at least one fresh connection.
+    assert baseline_connections >= REQUESTS
+    assert shared_connections <= CONCURRENCY * 2
+    assert shared_connections * 2 < baseline_connections
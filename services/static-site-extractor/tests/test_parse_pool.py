@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections.abc import Iterator
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app import extractor
+from app.parse_pool import ParsePool
+
+PAGE = """
+<html><head><title>Practice</title><link rel="stylesheet" href="/site.css">
+<style>@font-face { src: url('/fonts/inline.woff2'); }</style></head>
+<body><nav class="main-nav"><ul><li><a href="/">Home</a></li><li><a href="/about">About</a></li></ul></nav>
+<p>Hello <strong>there</strong></p><img src="/a.png" alt="A"></body></html>
+"""
+
+
+def _large_page(sections: int = 400) -> bytes:
+    blocks = "".join(
+        f"<section><h2>Section {i}</h2><p>Copy {i} with <a href='/p{i}'>link</a>.</p>"
+        f"<ul>{''.join(f'<li>Item {i}.{j}</li>' for j in range(15))}</ul></section>"
+        for i in range(sections)
+    )
+    return f"<html><body>{blocks}</body></html>".encode()
+
+
+def _sleep_and_return(value: int) -> int:
+    time.sleep(0.3)
+    return value
+
+
+def _crash() -> None:
+    os._exit(1)
+
+
+@pytest.fixture
+def process_pool() -> Iterator[ParsePool]:
+    pool = ParsePool(1)
+    yield pool
+    pool.shutdown()
+
+
+def test_process_pool_returns_same_analysis_as_inline(process_pool: ParsePool) -> None:
+    args = (PAGE.encode(), "utf-8", "https://example.com/")
+
+    async def run() -> extractor.DocumentAnalysis:
+        return await process_pool.run(extractor.analyse_document, *args)
+
+    remote = asyncio.run(run())
+
+    assert remote == extractor.analyse_document(*args)
+    assert remote.inline_fonts[0].url == "https://example.com/fonts/inline.woff2"
+    assert remote.stylesheets == [
+        extractor.StylesheetRef(url="https://example.com/site.css", referer=None)
+    ]
+    assert process_pool.metrics().completed == 1
+
+
+def test_event_loop_stays_responsive_while_parsing(process_pool: ParsePool) -> None:
+    content = _large_page()
+
+    async def longest_stall(pool: ParsePool) -> float:
+        stall = 0.0
+        done = False
+
+        async def ticker() -> None:
+            nonlocal stall
+            last = time.perf_counter()
+            while not done:
+                await asyncio.sleep(0.005)
+                now = time.perf_counter()
+                stall = max(stall, now - last)
+                last = now
+
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0.01)
+        await pool.run(extractor.analyse_document, content, None, "https://example.com/")
+        done = True
+        await task
+        return stall
+
+    # Warm the worker up so process start-up is not part of the measurement.
+    asyncio.run(process_pool.run(_sleep_and_return, 0))
+
+    inline_stall = asyncio.run(longest_stall(ParsePool(0)))
+    pooled_stall = asyncio.run(longest_stall(process_pool))
+
+    assert pooled_stall < inline_stall / 2
+
+
+def test_metrics_report_queue_depth(process_pool: ParsePool) -> None:
+    async def run() -> tuple[list[int], dict[str, int]]:
+        jobs = [asyncio.create_task(process_pool.run(_sleep_and_return, i)) for i in range(3)]
+        await asyncio.sleep(0.05)
+        during = process_pool.metrics()
+        results = await asyncio.gather(*jobs)
+        return results, {"in_flight": during.in_flight, "queued": during.queued}
+
+    results, during = asyncio.run(run())
+    after = process_pool.metrics()
+
+    assert results == [0, 1, 2]
+    assert during == {"in_flight": 3, "queued": 2}
+    assert (after.in_flight, after.queued, after.peak_queued, after.completed) == (0, 0, 2, 3)
+    assert after.mode == "process"
+
+
+def test_pool_recovers_after_worker_crash(process_pool: ParsePool) -> None:
+    async def run() -> int:
+        with pytest.raises(BrokenProcessPool):
+            await process_pool.run(_crash)
+        return await process_pool.run(_sleep_and_return, 7)
+
+    assert asyncio.run(run()) == 7
+    assert process_pool.metrics().failed == 1
@@ -0,0 +1,148 @@
+"""Parity tests for parser backends and the single-pass document scan."""
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+import httpx
+import pytest
+from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4.element import PreformattedString
+
+from app import extractor, parsing
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+HTML_FIXTURES = sorted(
+    [
+        *(REPO_ROOT / "public-sites" / "templates" / "clarity" / "page-examples").rglob("*.html"),
+        *(REPO_ROOT / "public-sites" / "sites" / "progressivewaytherapy-clarity").glob("*.html"),
+    ]
+)
+INLINE_FIXTURES = {
+    "nested-menu": """
+    <html><head><title>Nested</title><style>@font-face { src: url(/a.woff2); }</style></head>
+    <body>
+      <header><nav class="main-nav"><ul>
+        <li><a href="/">Home</a></li>
+        <li><a href="/services">Services</a><ul><li><a href="/services/therapy">Therapy</a></li></ul></li>
+      </ul></nav></header>
+      <div role="navigation" id="side-menu"><a href="/a">A</a><a href="/b">B</a></div>
+      <p>Hello <strong>world</strong><!-- hidden --></p>
+      <img src="/hero.jpg" alt="Hero" />
+      <footer><nav class="footer-nav"><a href="/privacy">Privacy</a></nav></footer>
+    </body></html>
+    """,
+    "flat-links": """
+    <div class="navbar"><a href="/home">Home</a><a href="/about">About</a></div>
+    <link rel="stylesheet" href="/main.css" /><p>Body copy</p>
+    """,
+}
+BASE_URL = httpx.URL("https://example.com/")
+
+
+def _fixture_params() -> list:
+    params = [pytest.param(html, id=name) for name, html in INLINE_FIXTURES.items()]
+    params.extend(
+        pytest.param(path.read_bytes(), id=path.relative_to(REPO_ROOT).as_posix())
+        for path in HTML_FIXTURES
+    )
+    return params
+
+
+def _legacy_dom_path(element: Tag) -> str:
+    parts: list[str] = []
+    current: Tag | None = element
+    while current and isinstance(current, Tag):
+        parent = current.parent if isinstance(current.parent, Tag) else None
+        if parent:
+            siblings = parent.find_all(current.name, recursive=False)
+            # Tags compare structurally, so locate by identity: duplicate
+            # paragraphs would otherwise collapse onto the first one's index.
+            index = next(i for i, sibling in enumerate(siblings) if sibling is current)
+            parts.append(f"{current.name}[{index + 1}]")
+        else:
+            parts.append(current.name)
+        current = parent
+    return ".".join(reversed(parts))
+
+
+def _legacy_nav_candidates(soup: BeautifulSoup) -> list[Tag]:
+    candidates: list[Tag] = []
+    seen: set[int] = set()
+    keyword_pattern = re.compile("|".join(re.escape(k) for k in parsing.NAV_KEYWORDS), re.I)
+    for group in (
+        soup.find_all("nav"),
+        soup.find_all(attrs={"role": re.compile("navigation|menubar", re.I)}),
+        soup.find_all(attrs={"class": keyword_pattern}),
+        soup.find_all(id=keyword_pattern),
+    ):
+        for element in group:
+            if id(element) not in seen:
+                seen.add(id(element))
+                candidates.append(element)
+    return candidates
+
+
+def _legacy_text_nodes(soup: BeautifulSoup) -> list[tuple[str, str]]:
+    nodes: list[tuple[str, str]] = []
+    for text in soup.find_all(string=True):
+        if isinstance(text, PreformattedString) or not isinstance(text, NavigableString):
+            continue
+        stripped = text.strip()
+        parent = text.parent
+        if not stripped or not isinstance(parent, Tag) or parent.name in parsing.SKIP_TEXT_PARENTS:
+            continue
+        path = _legacy_dom_path(parent)
+        if path != "[document]":
+            nodes.append((path, stripped))
+    return nodes
+
+
+@pytest.mark.parametrize("html", _fixture_params())
+def test_single_pass_scan_matches_legacy_sweeps(html: str | bytes) -> None:
+    soup = parsing.parse_html(html, parser="html.parser")
+
+    scan = parsing.scan_document(soup)
+
+    assert [(node.path, node.content) for node in scan.text_nodes] == _legacy_text_nodes(soup)
+    assert scan.images == soup.find_all("img")
+    assert scan.links == soup.find_all("link")
+    assert scan.anchors == soup.find_all("a", href=True)
+    assert scan.styles == [str(tag.string) for tag in soup.find_all("style") if tag.string]
+    assert scan.nav_candidates == _legacy_nav_candidates(soup)
+    assert scan.title is soup.title
+
+
+def _extraction_summary(html: str | bytes, parser: str) -> dict[str, object]:
+    scan = parsing.scan_document(parsing.parse_html(html, parser=parser))
+    return {
+        "title": extractor._extract_title(scan),
+        "text": [node.content for node in extractor._extract_text_nodes(scan)],
+        "images": list(extractor._extract_images(scan, base_url=BASE_URL)),
+        "stylesheets": extractor._stylesheet_urls(scan, str(BASE_URL)),
+        "styles": scan.styles,
+        "navigation": [
+            item.model_dump() for item in extractor._extract_navigation(scan, base_url=BASE_URL)
+        ],
+    }
+
+
+@pytest.mark.parametrize("html", _fixture_params())
+def test_lxml_backend_matches_html_parser(html: str | bytes) -> None:
+    pytest.importorskip("lxml")
+
+    assert _extraction_summary(html, "lxml") == _extraction_summary(html, "html.parser")
+
+
+def test_resolve_parser_prefers_lxml_when_available(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(parsing, "_backend_available", lambda name: True)
+    assert parsing.resolve_parser("auto") == "lxml"
+
+    monkeypatch.setattr(parsing, "_backend_available", lambda name: name == "html.parser")
+    assert parsing.resolve_parser("auto") == "html.parser"
+    assert parsing.resolve_parser("lxml") == "html.parser"
+
+
+def test_resolve_parser_rejects_unknown_backend() -> None:
+    with pytest.raises(ValueError):
+        parsing.resolve_parser("html5lib")
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+
+from app import extractor, models
+from app.http_cache import CachingTransport, HTTPCache
+from app.result_cache import ResultCache
+
+PAGE = "<html><head><title>Home</title></head><body><p>Welcome</p><a href='/about'>About</a></body></html>"
+
+
+def _page(url: str = "https://example.com/", title: str = "Home") -> models.ExtractionResponse:
+    return models.ExtractionResponse(
+        url=url,
+        title=title,
+        fetched_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        text=[models.TextNode(content="Welcome")],
+        text_blob="Welcome",
+        images=[],
+        fonts=[],
+    )
+
+
+def test_key_normalises_url_and_tracks_body() -> None:
+    key = ResultCache.key_for("HTTPS://Example.com#intro", b"<p>a</p>")
+
+    assert key == ResultCache.key_for("https://example.com/", b"<p>a</p>")
+    assert key != ResultCache.key_for("https://example.com/", b"<p>b</p>")
+    assert key != ResultCache.key_for("https://example.com/about", b"<p>a</p>")
+
+
+def test_entries_expire_after_ttl() -> None:
+    now = [0.0]
+    cache = ResultCache(max_bytes=100_000, ttl_seconds=60, clock=lambda: now[0])
+    cache.put("k", _page(), ["https://example.com/about"])
+
+    now[0] = 59
+    assert cache.get("k").links == ("https://example.com/about",)
+    now[0] = 61
+    assert cache.get("k") is None
+    assert cache.metrics() == models.ResultCacheMetrics(entries=0, bytes=0, hits=1, misses=1)
+
+
+def test_least_recently_used_entries_are_evicted_by_size() -> None:
+    entry_size = len(_page().model_dump_json())
+    cache = ResultCache(max_bytes=entry_size * 2 + 10, ttl_seconds=60)
+    cache.put("a", _page(), [])
+    cache.put("b", _page(), [])
+    assert cache.get("a") is not None
+
+    cache.put("c", _page(), [])
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.metrics().bytes <= cache.max_bytes
+
+
+def test_disabled_cache_stores_nothing() -> None:
+    cache = ResultCache(max_bytes=0, ttl_seconds=60)
+    cache.put("a", _page(), [])
+
+    assert cache.get("a") is None
+
+
+def test_unchanged_html_skips_analysis(monkeypatch) -> None:
+    bodies = [PAGE, PAGE, PAGE.replace("Welcome", "Hello")]
+    analysed: list[str] = []
+    analyse = extractor.analyse_document
+
+    def counting_analyse(content: bytes, encoding: str | None, base_url: str, timer=None):
+        analysed.append(base_url)
+        return analyse(content, encoding, base_url, timer)
+
+    monkeypatch.setattr(extractor, "analyse_document", counting_analyse)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text=bodies.pop(0), headers={"Content-Type": "text/html"})
+
+    async def run() -> list[extractor.PageExtraction]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return [await extractor.extract_document(client, "https://example.com/") for _ in range(3)]
+
+    first, second, third = asyncio.run(run())
+
+    assert [result.page.cache for result in (first, second, third)] == ["miss", "hit", "miss"]
+    assert len(analysed) == 2
+    assert second.page.text == first.page.text
+    assert second.links == first.links == ["https://example.com/about"]
+    assert second.page.fetched_at >= first.page.fetched_at
+    assert third.page.text_blob.startswith("Hello")
+
+
+def test_locally_fresh_html_reports_hit(tmp_path) -> None:
+    requests: list[httpx.Request] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(
+            200, text=PAGE, headers={"Content-Type": "text/html", "Cache-Control": "max-age=300"}
+        )
+
+    http_cache = HTTPCache(tmp_path / "http", max_bytes=1_000_000)
+
+    async def run() -> list[str]:
+        transport = CachingTransport(httpx.MockTransport(handler), http_cache)
+        async with httpx.AsyncClient(transport=transport) as client:
+            return [
+                (await extractor.extract_document(client, "https://example.com/")).page.cache
+                for _ in range(2)
+            ]
+
+    assert asyncio.run(run()) == ["miss", "hit"]
+    assert len(requests) == 1
+    http_cache.close()
+
+
+@pytest.mark.parametrize("revalidation_status", [304, 200])
+def test_stale_html_confirmed_by_origin_reports_revalidated(tmp_path, revalidation_status) -> None:
+    requests: list[httpx.Request] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        headers = {"Content-Type": "text/html", "Cache-Control": "no-cache", "ETag": '"v1"'}
+        if request.headers.get("If-None-Match") == '"v1"' and revalidation_status == 304:
+            return httpx.Response(304, headers=headers)
+        return httpx.Response(200, text=PAGE, headers=headers)
+
+    http_cache = HTTPCache(tmp_path / "http", max_bytes=1_000_000)
+
+    async def run() -> list[str]:
+        transport = CachingTransport(httpx.MockTransport(handler), http_cache)
+        async with httpx.AsyncClient(transport=transport) as client:
+            return [
+                (await extractor.extract_document(client, "https://example.com/")).page.cache
+                for _ in range(2)
+            ]
+
+    assert asyncio.run(run()) == ["miss", "revalidated"]
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+    http_cache.close()